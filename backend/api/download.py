@@ -1,7 +1,125 @@
-from fastapi import APIRouter, Response
+import json
+import os
+import re
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.api.media import parse_range, etag_matches
+from backend.services.run_manager import get_run_result
+from backend.services.storage import get_run_store
+from backend.services.retention import get_retention
+from backend.config import CHUNK_RESULTS_DIRNAME, DOWNLOAD_READ_BLOCK_BYTES
+from src.zipstream import ZipEntry, ZipPlan
+from src.retention import ARTIFACT_KINDS, artifact_kind
 
 router = APIRouter(prefix="/download", tags=["download"])
 
-@router.get("/{run_id}")
-def download_run(run_id: str):
-    return Response(content="Download feature disabled.", media_type="text/plain", status_code=404)
+COMPARISONS_JSON = "comparisons.json"
+_CHUNK_NUMBER_RE = re.compile(r"(\d+)")
+
+@router.api_route("/{run_id}", methods=["GET", "HEAD"])
+def download_run(run_id: str, request: Request, include: Optional[str] = None, chunks: Optional[str] = None):
+    """
+    ZIP of run_id's artifacts, streamed from disk as it is sent (constant memory, no temp
+    archive). `include` is a comma-separated subset of ARTIFACT_KINDS (default: all);
+    `chunks` limits chunk audio and comparison records to chunk numbers "N" or "N-M".
+    Content-Length and a strong ETag are sent, and Range/If-Range requests resume an
+    interrupted download from any byte.
+    """
+    meta = get_run_result(run_id)
+    if not meta or not meta.get("output_dir") or not os.path.isdir(meta["output_dir"]):
+        raise HTTPException(status_code=404, detail="Result unavailable or not finished.")
+    get_retention().touch(run_id)
+    kinds = _parse_kinds(include)
+    chunk_range = _parse_chunk_range(chunks)
+    entries = _export_entries(run_id, meta["output_dir"], kinds, chunk_range)
+    if not entries:
+        raise HTTPException(status_code=404, detail="No artifacts match the selection.")
+    plan = ZipPlan(entries, block_bytes=DOWNLOAD_READ_BLOCK_BYTES)
+    print(f"[Download] {run_id}: {len(entries)} files, {plan.size} bytes")
+
+    suffix = "" if include is None and chunks is None else "_" + "-".join(sorted(kinds)) + (f"_chunks{chunks}" if chunks else "")
+    headers = {
+        "ETag": plan.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="{run_id}{suffix}.zip"',
+    }
+    if etag_matches(request.headers.get("if-none-match"), plan.etag):
+        return Response(status_code=304, headers=headers)
+    start, end, status_code = 0, plan.size, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == plan.etag):
+        try:
+            byte_range = parse_range(range_header, plan.size)
+        except ValueError:
+            return Response(status_code=416, headers=dict(headers, **{"Content-Range": f"bytes */{plan.size}"}))
+        if byte_range:
+            start, end, status_code = byte_range[0], byte_range[1] + 1, 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{plan.size}"
+    headers["Content-Length"] = str(end - start)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="application/zip")
+    return StreamingResponse(plan.iter_bytes(start, end), status_code=status_code, headers=headers, media_type="application/zip")
+
+def _parse_kinds(include: Optional[str]) -> List[str]:
+    if not include:
+        return list(ARTIFACT_KINDS)
+    kinds = [kind.strip() for kind in include.split(",") if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in ARTIFACT_KINDS]
+    if unknown or not kinds:
+        raise HTTPException(status_code=400, detail=f"include must be a subset of {', '.join(ARTIFACT_KINDS)}")
+    return kinds
+
+def _parse_chunk_range(chunks: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not chunks:
+        return None
+    first, _, last = chunks.partition("-")
+    try:
+        low, high = int(first), int(last or first)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="chunks must be N or N-M (1-based chunk numbers)")
+    if low < 1 or high < low:
+        raise HTTPException(status_code=400, detail="chunks must be N or N-M (1-based chunk numbers)")
+    return low, high
+
+def _chunk_number(name: str) -> Optional[int]:
+    match = _CHUNK_NUMBER_RE.search(os.path.basename(name))
+    return int(match.group(1)) if match else None
+
+def _in_range(name: Optional[str], chunk_range: Optional[Tuple[int, int]]) -> bool:
+    if chunk_range is None or name is None:
+        return True
+    number = _chunk_number(name)
+    return number is not None and chunk_range[0] <= number <= chunk_range[1]
+
+def _chunk_of(relpath: str, kind: str) -> Optional[str]:
+    # Chunk audio, or a chunk_results/<chunk>/ file: the chunk it belongs to (None: whole-run artifact)
+    if kind == "chunks":
+        return relpath
+    parts = relpath.split("/")
+    if len(parts) > 2 and parts[0] == CHUNK_RESULTS_DIRNAME:
+        return parts[1]
+    return None
+
+def _export_entries(run_id: str, output_dir: str, kinds: List[str], chunk_range: Optional[Tuple[int, int]]) -> List[ZipEntry]:
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(output_dir):
+        # Skip hidden directories (locks, staging) and keep the archive order stable
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.startswith(".") or filename.endswith(".part"):
+                continue
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, output_dir).replace(os.sep, "/")
+            kind = artifact_kind(relpath)
+            if kind not in kinds or not _in_range(_chunk_of(relpath, kind), chunk_range):
+                continue
+            entries.append(ZipEntry(f"{run_id}/{relpath}", path=path))
+    if "comparisons" in kinds:
+        records = [r for r in get_run_store().chunk_results(run_id) if _in_range(r["chunk"], chunk_range)]
+        if records:
+            data = json.dumps(records, indent=2, sort_keys=True).encode("utf-8")
+            entries.append(ZipEntry(f"{run_id}/{COMPARISONS_JSON}", data=data, mtime=max(r["created_at"] for r in records)))
+    return entries
@@ -1,10 +1,33 @@
-# History API router is disabled/not in use for this deployment.
-# (This file remains as a stub for future expansion, but is not registered in FastAPI app.)
-# from fastapi import APIRouter
-# from backend.services.run_manager import get_all_runs
-#
-# router = APIRouter(prefix="/history", tags=["history"])
-#
-# @router.get("")
-# def get_history():
-#     return {"runs": get_all_runs()}
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from backend.services.run_manager import get_run_history, get_run_details
+from backend.services.storage import RunStoreError
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+@router.get("")
+def get_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    step: Optional[str] = None,
+    youtube_url: Optional[str] = None,
+    created_after: Optional[float] = None,
+    created_before: Optional[float] = None,
+):
+    """
+    Stored runs, newest first. Pass the returned next_cursor to get the next page.
+    Filters: step, youtube_url (any URL form of the video), created_after/created_before (unix seconds).
+    """
+    try:
+        return get_run_history(limit=limit, cursor=cursor, step=step, youtube_url=youtube_url,
+                               created_after=created_after, created_before=created_before)
+    except RunStoreError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{run_id}")
+def get_history_run(run_id: str):
+    """Stored state of one run with its per-stage timings and per-chunk results."""
+    details = get_run_details(run_id)
+    if not details:
+        raise HTTPException(status_code=404, detail="No such run.")
+    return details
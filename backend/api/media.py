@@ -0,0 +1,155 @@
+import mimetypes
+import os
+from typing import BinaryIO, Iterator, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.services.run_manager import get_run_result
+from backend.services.retention import get_retention
+from backend.config import (
+    MEDIA_IMMUTABLE_EXTENSIONS,
+    MEDIA_IMMUTABLE_CACHE_CONTROL,
+    MEDIA_REVALIDATE_CACHE_CONTROL,
+    MEDIA_TRANSCODE_DIR,
+    MEDIA_TRANSCODE_MAX_BYTES,
+    MEDIA_OPUS_BITRATE,
+    MEDIA_STREAM_BLOCK_BYTES,
+)
+from src.transcode import cached_transcode, start_transcode, OPUS_CONTENT_TYPE
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+_AUDIO_EXTENSIONS = (".wav", ".webm", ".m4a", ".mp3", ".ogg", ".opus")
+
+@router.api_route("/{run_id}/{path:path}", methods=["GET", "HEAD"])
+def get_media(run_id: str, path: str, request: Request, format: Optional[str] = None):
+    """
+    Serve a file from run_id's output directory (e.g. audio.wav, chunks/chunk_001.wav) with
+    single-range Range requests (206/416), a strong ETag (304 on If-None-Match, If-Range
+    honoured) and Cache-Control (immutable for audio/captions). format=opus serves an
+    Opus/WebM transcode of an audio file instead; until the cached transcode exists (it is
+    started in the background on first request), the source is served, not cacheable.
+    """
+    meta = get_run_result(run_id)
+    if not meta or not meta.get("output_dir"):
+        raise HTTPException(status_code=404, detail="Result unavailable or not finished.")
+    root = os.path.realpath(meta["output_dir"])
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep):
+        raise HTTPException(status_code=404, detail="File not found.")
+    retention = get_retention()
+    if not os.path.isfile(full_path):
+        tombstone = retention.tombstone(run_id, os.path.relpath(full_path, root))
+        if tombstone:
+            raise HTTPException(status_code=410, detail=f"Evicted by retention ({tombstone['reason']}).")
+        raise HTTPException(status_code=404, detail="File not found.")
+    retention.touch(run_id)
+    cache_control = MEDIA_IMMUTABLE_CACHE_CONTROL if full_path.endswith(MEDIA_IMMUTABLE_EXTENSIONS) else MEDIA_REVALIDATE_CACHE_CONTROL
+    media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    opened = None
+    if format == "opus":
+        if not full_path.endswith(_AUDIO_EXTENSIONS):
+            raise HTTPException(status_code=400, detail="format=opus is only available for audio files.")
+        transcoded = cached_transcode(full_path, MEDIA_TRANSCODE_DIR, MEDIA_OPUS_BITRATE)
+        # Opened right away: eviction of the transcode by another request cannot pull it from under us
+        opened = _open(transcoded) if transcoded else None
+        if opened is not None:
+            media_type = OPUS_CONTENT_TYPE
+        else:
+            # No ffmpeg run on the request path: play the source until the transcode is ready,
+            # and keep clients from caching it as the transcode
+            start_transcode(full_path, MEDIA_TRANSCODE_DIR, MEDIA_OPUS_BITRATE, max_bytes=MEDIA_TRANSCODE_MAX_BYTES)
+            cache_control = MEDIA_REVALIDATE_CACHE_CONTROL
+    elif format:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if opened is None:
+        opened = _open(full_path)
+        if opened is None:
+            raise HTTPException(status_code=404, detail="File not found.")
+
+    f, st = opened
+    try:
+        return _file_response(request, f, st, cache_control, media_type)
+    except BaseException:
+        f.close()
+        raise
+
+def _open(path: str) -> Optional[Tuple[BinaryIO, os.stat_result]]:
+    # (file, stat) of path, or None if it no longer exists
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    return f, os.fstat(f.fileno())
+
+def _file_response(request: Request, f: BinaryIO, st: os.stat_result, cache_control: str, media_type: str) -> Response:
+    size = st.st_size
+    # Run artifacts are written once (atomically), so size + mtime identify the bytes
+    etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        f.close()
+        return Response(status_code=304, headers=headers)
+
+    start, length, status_code = 0, size, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            f.close()
+            return Response(status_code=416, headers=dict(headers, **{"Content-Range": f"bytes */{size}"}))
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        f.close()
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(_iter_file(f, start, length), status_code=status_code, headers=headers, media_type=media_type)
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range, or None when the header should be
+    ignored (other units, malformed, several ranges) and the whole file sent.
+    Raises ValueError if the range cannot be satisfied for a file of `size` bytes.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _iter_file(f: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    with f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(MEDIA_STREAM_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
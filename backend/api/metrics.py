@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Response
+from backend.config import METRICS_ENABLED
+from backend.services.job_queue import get_job_queue
+from backend.services.chunk_jobs import get_chunk_jobs
+from backend.services import run_manager  # noqa: F401  (registers the run metrics)
+from src import metrics
+
+router = APIRouter(tags=["metrics"])
+
+QUEUE_JOBS = metrics.gauge("ytminer_queue_jobs", "Jobs per queue (runs, chunks) that are running or waiting.", ("queue", "state"))
+
+def _queue_jobs():
+    values = {}
+    for queue, stats in (("runs", get_job_queue().stats()), ("chunks", get_chunk_jobs().stats())):
+        values[(queue, "running")] = stats["running"]
+        values[(queue, "queued")] = stats["depth"]
+    return values
+
+QUEUE_JOBS.set_function(_queue_jobs)
+
+@router.get("/metrics")
+def get_metrics():
+    """All metrics in the Prometheus text exposition format, for scraping."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (YTMINER_METRICS=0).")
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
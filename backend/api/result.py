@@ -1,93 +1,281 @@
 import os
-from fastapi import APIRouter, Request
+import json
+import hashlib
+import functools
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from backend.services.run_manager import get_run_result
+from backend.services.executor import get_executor
+from backend.services.chunk_jobs import get_chunk_jobs
+from backend.services.job_queue import QueueFullError
+from backend.services.storage import save_chunk_result
+from backend.services.retention import get_retention, record_run_files
+from backend.api.media import etag_matches
 from backend.services.pipeline_wrapper import process_chunk_for_comparison, PipelineRunError
-from backend.config import DEFAULT_LANGUAGE, DEFAULT_MODEL_SIZE, CHUNKS_DIRNAME, TRANSCRIPT_FILENAME
+from backend.config import DEFAULT_LANGUAGE, DEFAULT_MODEL_SIZE, CHUNKS_DIRNAME, TRANSCRIPT_FILENAME, YOUTUBE_CAPTIONS_TEXT_FILENAME, JOB_RETRY_AFTER_SECONDS, CHUNK_JOB_WAIT_MAX_SECONDS, STATUS_SSE_KEEPALIVE_SECONDS, RESULT_CHUNKS_PAGE_SIZE, RESULT_CHUNKS_PAGE_MAX, PROFILE_BASENAME
+from src.manifest import load_manifest, write_manifest, update_manifest
 
 router = APIRouter(prefix="/result", tags=["result"])
 
 @router.get("/{run_id}")
-def get_result(run_id: str):
+def get_result(run_id: str, request: Request, offset: int = 0, limit: int = RESULT_CHUNKS_PAGE_SIZE):
+    """
+    Run artifacts from the run's manifest: media URLs plus one page of chunks
+    (`offset`/`limit`; `next_offset` is null on the last page). Answers 304 when
+    If-None-Match carries the current ETag.
+    """
     result = get_run_result(run_id)
     if not result:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Result unavailable or not finished.")
+    if offset < 0 or not 1 <= limit <= RESULT_CHUNKS_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit between 1 and {RESULT_CHUNKS_PAGE_MAX}")
     output_dir = result.get("output_dir")
+    if not output_dir:
+        # Failed or legacy records without a directory; never resolve against the working directory
+        raise HTTPException(status_code=404, detail="Run has no output directory.")
+    manifest = _run_manifest(run_id, output_dir, result.get("chunk_starts"))
+    retention = get_retention()
+    retention.touch(run_id)
+    # Artifacts removed by retention: [{path, kind, bytes, reason, evicted_at}]
+    evicted = retention.tombstones(run_id)
+
+    revision = f"{manifest['revision']}|{manifest['updated_at']}" if manifest else "none"
+    validator = f"{revision}|{offset}|{limit}|" + "|".join(f"{t['path']}@{t['evicted_at']}" for t in evicted)
+    etag = f'"result-{hashlib.sha1(validator.encode("utf-8")).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    page = _result_page(run_id, output_dir, manifest, evicted, offset, limit)
+    page["stages"] = result.get("stages")
+    return JSONResponse(page, headers=headers)
+
+def _run_manifest(run_id: str, output_dir: str, chunk_starts: Optional[dict]) -> Optional[dict]:
+    manifest = load_manifest(output_dir)
+    if manifest is None and os.path.isdir(output_dir):
+        # Runs from before manifests (or whose manifest was evicted): build it once
+        try:
+            manifest = write_manifest(run_id, output_dir, chunk_starts)
+        except Exception as e:
+            print(f"[ERROR] Could not build manifest for {run_id}: {e}")
+    return manifest
+
+def _result_page(run_id: str, output_dir: str, manifest: Optional[dict], evicted: list, offset: int, limit: int) -> dict:
+    gone = {t["path"] for t in evicted}
+    artifacts = {path: entry for path, entry in (manifest or {}).get("artifacts", {}).items() if path not in gone}
     base_name = os.path.basename(output_dir) if output_dir else run_id
 
+    # Audio and captions go through /media (Range, ETag, optional Opus transcode)
     webm_url = wav_url = caption_url = None
-    if output_dir and os.path.isdir(output_dir):
-        files = os.listdir(output_dir)
-        if "audio.webm" in files:
-            webm_url = f"/output/{base_name}/audio.webm"
-        if "audio.wav" in files:
-            wav_url = f"/output/{base_name}/audio.wav"
-        for file in files:
-            if file.endswith(".vtt") or file.endswith(".srt"):
-                caption_url = f"/output/{base_name}/{file}"
-
-    chunkFiles = []
-    chunk_dir = os.path.join(output_dir, CHUNKS_DIRNAME)
-    if os.path.isdir(chunk_dir):
-        for file in sorted(os.listdir(chunk_dir)):
-            if file.endswith('.wav'):
-                chunkFiles.append(f"/output/{base_name}/{CHUNKS_DIRNAME}/{file}")
-
-    # Transcript download URL (shown only if file exists)
-    transcript_path = os.path.join(output_dir, TRANSCRIPT_FILENAME)
+    if "audio.webm" in artifacts:
+        webm_url = f"/media/{run_id}/audio.webm"
+    if "audio.wav" in artifacts:
+        wav_url = f"/media/{run_id}/audio.wav"
+    for path in artifacts:
+        if "/" not in path and path.endswith((".vtt", ".srt")):
+            caption_url = f"/media/{run_id}/{path}"
+
+    # cProfile capture of runs started with "profile": true
+    profile_urls = {ext: f"/media/{run_id}/{PROFILE_BASENAME}.{ext}" for ext in ("pstats", "txt") if f"{PROFILE_BASENAME}.{ext}" in artifacts}
+
+    # Transcript download URL (shown only if file exists): runs before per-chunk results had one
+    # at the top, newer runs point at the most recently written chunk transcript
     transcript_url = None
-    if os.path.exists(transcript_path):
-        transcript_url = f"/output/{base_name}/whisper_transcript.txt"
+    transcripts = [path for path in artifacts if path == TRANSCRIPT_FILENAME or path.endswith("/" + TRANSCRIPT_FILENAME)]
+    if transcripts:
+        latest = max(transcripts, key=lambda path: (path == TRANSCRIPT_FILENAME, artifacts[path].get("mtime") or 0, path))
+        transcript_url = f"/output/{base_name}/{latest}"
 
+    all_chunks = [chunk for chunk in (manifest or {}).get("chunks", []) if chunk["path"] not in gone]
+    page = all_chunks[offset:offset + limit]
+    chunks = []
+    for chunk in page:
+        results = [path for path in chunk.get("results", []) if path in artifacts]
+        transcripts = [path for path in results if path.endswith("/" + TRANSCRIPT_FILENAME)]
+        chunks.append({
+            "index": chunk["index"],
+            "name": chunk["name"],
+            "url": f"/media/{run_id}/{chunk['path']}",
+            "offset": chunk.get("offset"),
+            "duration": chunk.get("duration"),
+            "bytes": chunk["bytes"],
+            "sha256": chunk["sha256"],
+            "transcript_url": f"/output/{base_name}/{transcripts[0]}" if transcripts else None,
+        })
     return {
         "run_id": run_id,
         "webm_url": webm_url,
         "wav_url": wav_url,
         "caption_url": caption_url,
-        "chunkFiles": chunkFiles,
-        "transcript_url": transcript_url
+        "chunkFiles": [chunk["url"] for chunk in chunks],
+        "chunks": chunks,
+        "chunks_total": len(all_chunks),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < len(all_chunks) else None,
+        "artifacts": [dict(entry, path=path) for path, entry in sorted(artifacts.items())],
+        "manifest_revision": manifest["revision"] if manifest else None,
+        "transcript_url": transcript_url,
+        "profile_urls": profile_urls or None,
+        "evicted": evicted
     }
 
-@router.post("/{run_id}/process_chunk")
+@router.post("/{run_id}/process_chunk", status_code=202)
 async def process_chunk(run_id: str, request: Request):
+    """
+    Queue transcription + caption comparison of one chunk and answer 202 at once with the
+    job ({job_id, state, position, ...}, plus status_url). Poll status_url, or add ?wait=<s>
+    to hold the request until the job is done; the finished job carries the same `result`
+    payload this endpoint used to return. An identical queued/running job is reused.
+    """
     print(f"[DEBUG] process_chunk endpoint called for {run_id}")
     data = await request.json()
     chunk_path = data.get('chunk_path')
     print(f"[DEBUG] chunk_path: {chunk_path}")
     if not chunk_path:
         print("[ERROR] Missing chunk_path")
-        from fastapi import HTTPException
         raise HTTPException(status_code=400, detail="Missing chunk_path")
+    job = _submit_chunk_job(run_id, chunk_path, data.get('cascade'), data.get('profile'))
+    status_url = f"/result/{run_id}/chunk_jobs/{job['job_id']}"
+    return JSONResponse(status_code=202, content=dict(job, status_url=status_url), headers={"Location": status_url})
+
+def _submit_chunk_job(run_id: str, chunk_path: str, cascade: Optional[bool], profile: Optional[bool]) -> dict:
+    # Shared by POST process_chunk and its SSE variant: same queue, backpressure and dedupe
+    meta = get_run_result(run_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="Result unavailable or not finished.")
+    if not meta.get("output_dir"):
+        raise HTTPException(status_code=404, detail="Run has no output directory.")
+    chunk_filename = os.path.basename(chunk_path)
+    output_dir = meta.get("output_dir")
+    args = meta.get('args', {})
+    cascade = args.get('cascade') if cascade is None else cascade
+    profile = bool(args.get('profile') if profile is None else profile)
+    kwargs = dict(
+        run_id=run_id,
+        chunk_path=os.path.join(output_dir, CHUNKS_DIRNAME, chunk_filename),
+        youtube_url=args.get('youtube_url'),
+        language=args.get('language', DEFAULT_LANGUAGE),
+        model_size=args.get('model_size', DEFAULT_MODEL_SIZE),
+        cascade=cascade,
+        profile=profile,
+    )
     try:
-        from backend.services.run_manager import get_run_result
-        meta = get_run_result(run_id)
-        chunk_filename = os.path.basename(chunk_path)
-        output_dir = meta.get("output_dir")
-        full_chunk_path = os.path.join(output_dir, CHUNKS_DIRNAME, chunk_filename)
-        print(f"[DEBUG] Calling process_chunk_for_comparison with: chunk={full_chunk_path}, run_id={run_id}, youtube_url={meta['args'].get('youtube_url')}")
-        cmp_result = process_chunk_for_comparison(
-            run_id=run_id,
-            chunk_path=full_chunk_path,
-            youtube_url=meta['args'].get('youtube_url'),
-            language=meta['args'].get('language', DEFAULT_LANGUAGE),
-            model_size=meta['args'].get('model_size', DEFAULT_MODEL_SIZE),
+        job, created = get_chunk_jobs().submit(
+            run_id, chunk_filename,
+            functools.partial(_compare_chunk, output_dir, kwargs),
+            dedupe_key=(run_id, chunk_filename, cascade, profile),
         )
-        print(f"[DEBUG] Chunk processing complete. Result: {cmp_result}")
-        transcript_url = None
-        transcript_path = cmp_result.get('transcript_file')
-        if transcript_path and os.path.exists(transcript_path):
-            base_name = os.path.basename(output_dir)
-            transcript_url = f"/output/{base_name}/{TRANSCRIPT_FILENAME}"
-        return {
-            "compare_text": cmp_result.get("compare_text"),
-            "similarity_percent": cmp_result.get("similarity_percent"),
-            "transcript_url": transcript_url
-        }
-    except PipelineRunError as e:
-        print(f"[ERROR] PipelineRunError: {str(e)}")
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+    print(f"[DEBUG] Chunk job {job['job_id']} {'queued' if created else 'reused'} for {chunk_filename}")
+    return job
+
+@router.get("/{run_id}/chunk_jobs/{job_id}")
+async def get_chunk_job(run_id: str, job_id: str, wait: float = 0.0):
+    """
+    State of a chunk job queued by POST process_chunk. With `wait` (seconds), the response
+    is held until the job is done/failed or `wait` expires.
+    """
+    jobs = get_chunk_jobs()
+    if wait > 0:
+        job = await jobs.wait(job_id, min(wait, CHUNK_JOB_WAIT_MAX_SECONDS))
+    else:
+        job = jobs.job(job_id)
+    if not job or job["run_id"] != run_id:
+        raise HTTPException(status_code=404, detail="Unknown chunk job.")
+    return job
+
+def _compare_chunk(output_dir: str, kwargs: dict, segment_fn) -> dict:
+    # Runs on a chunk job worker thread; the executor moves the work off the API process
+    print(f"[DEBUG] Calling process_chunk_for_comparison with: chunk={kwargs['chunk_path']}, run_id={kwargs['run_id']}, youtube_url={kwargs['youtube_url']}")
+    try:
+        cmp_result = get_executor().call(process_chunk_for_comparison, callbacks={"segment_fn": segment_fn}, **kwargs)
+    except PipelineRunError:
+        raise
     except Exception as e:
-        print(f"[ERROR] Failed to process chunk: {str(e)}")
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=f"Failed to process chunk: {str(e)}")
+        raise PipelineRunError(f"Failed to process chunk: {str(e)}")
+    print(f"[DEBUG] Chunk processing complete. Result: {cmp_result}")
+    response = _chunk_response(cmp_result, output_dir)
+    save_chunk_result(kwargs["run_id"], os.path.basename(kwargs["chunk_path"]), dict(response, model_size=kwargs["model_size"]))
+    _record_chunk_outputs(kwargs["run_id"], output_dir, _chunk_output_files(cmp_result, output_dir))
+    return response
+
+@router.get("/{run_id}/process_chunk/stream")
+async def stream_process_chunk(run_id: str, chunk_path: str, request: Request, cascade: Optional[bool] = None, profile: Optional[bool] = None):
+    """
+    Server-Sent Events variant of process_chunk: queues (or joins) the same chunk job, then
+    emits one `segment` event per decoded Whisper segment ({text, start, end}) as soon as it
+    is produced, and a `result` event with the same payload as the finished job (or an
+    `error` event). 429 when the chunk queue is full.
+    """
+    job = _submit_chunk_job(run_id, chunk_path, cascade, profile)
+    jobs = get_chunk_jobs()
+
+    async def event_stream():
+        sent = 0
+        while True:
+            current = await jobs.wait(job["job_id"], STATUS_SSE_KEEPALIVE_SECONDS, segments_seen=sent)
+            if current is None:
+                yield _sse_event("error", {"detail": "Unknown chunk job."})
+                return
+            for segment in current["segments"][sent:]:
+                yield _sse_event("segment", segment)
+            if len(current["segments"]) == sent and current["state"] not in ("done", "error"):
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+            sent = len(current["segments"])
+            if current["state"] == "done":
+                yield _sse_event("result", current["result"])
+                return
+            if current["state"] == "error":
+                print(f"[ERROR] Streamed chunk processing failed: {current['error']}")
+                yield _sse_event("error", {"detail": current["error"]})
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _record_chunk_outputs(run_id: str, output_dir: str, relpaths: list):
+    record_run_files(run_id, relpaths)
+    try:
+        update_manifest(output_dir, relpaths)
+    except Exception as e:
+        print(f"[ERROR] Could not update manifest for {run_id}: {e}")
+
+def _chunk_output_files(cmp_result: dict, output_dir: str) -> list:
+    # Paths (relative to the run directory) written by one chunk's processing
+    paths = [cmp_result.get("transcript_file"), cmp_result.get("compare_file")]
+    relpaths = [os.path.relpath(path, output_dir) for path in paths if path]
+    profile_files = (cmp_result.get("profile") or {}).get("files", [])
+    return relpaths + profile_files + [YOUTUBE_CAPTIONS_TEXT_FILENAME]
+
+def _chunk_response(cmp_result: dict, output_dir: str) -> dict:
+    transcript_url = None
+    transcript_path = cmp_result.get('transcript_file')
+    if transcript_path and os.path.exists(transcript_path):
+        base_name = os.path.basename(output_dir)
+        relpath = os.path.relpath(transcript_path, output_dir).replace(os.sep, "/")
+        transcript_url = f"/output/{base_name}/{relpath}"
+    return {
+        "compare_text": cmp_result.get("compare_text"),
+        "similarity_percent": cmp_result.get("similarity_percent"),
+        "transcript_url": transcript_url,
+        "cascade": cmp_result.get("cascade"),
+        "stages": cmp_result.get("stages"),
+        "profile_urls": _chunk_profile_urls(cmp_result, output_dir)
+    }
+
+def _chunk_profile_urls(cmp_result: dict, output_dir: str) -> Optional[dict]:
+    files = (cmp_result.get("profile") or {}).get("files")
+    if not files:
+        return None
+    run_id = cmp_result.get("run_id") or os.path.basename(output_dir)
+    return {path.rsplit(".", 1)[-1]: f"/media/{run_id}/{path}" for path in files}
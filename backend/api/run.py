@@ -1,7 +1,10 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 from typing import Optional
 from backend.services.run_manager import start_pipeline_run
+from backend.services.job_queue import QueueFullError
+from backend.config import JOB_RETRY_AFTER_SECONDS, JOB_PRIORITY_MIN, JOB_PRIORITY_MAX
+from src.downloader import make_time_range
 
 router = APIRouter(prefix="/run", tags=["run"])
 
@@ -10,13 +13,29 @@ class RunRequest(BaseModel):
     language: str
     model_size: str
     chunk_index: Optional[int] = 0
+    cascade: Optional[bool] = None
+    start_time: Optional[float] = None  # seconds; process only [start_time, end_time) of the video
+    end_time: Optional[float] = None
+    priority: Optional[int] = Field(0, ge=JOB_PRIORITY_MIN, le=JOB_PRIORITY_MAX)  # Higher runs sooner when the run queue is backed up
+    coalesce: Optional[bool] = None  # Attach to an identical in-flight/recent run (default: RUN_COALESCE_ENABLED)
+    profile: Optional[bool] = False  # cProfile the run (and its chunk jobs); saved as profile.pstats/profile.txt
 
 class RunResponse(BaseModel):
     run_id: str
     message: str
+    coalesced: bool = False
 
 @router.post("", response_model=RunResponse)
 def start_run(request: RunRequest):
+    try:
+        make_time_range(request.start_time, request.end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     run_args = request.dict()
-    run_id = start_pipeline_run(run_args)
+    try:
+        run_id, coalesced = start_pipeline_run(run_args)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+    if coalesced:
+        return RunResponse(run_id=run_id, message="Attached to an identical run.", coalesced=True)
     return RunResponse(run_id=run_id, message="Run started.")
@@ -1,8 +1,61 @@
-from fastapi import APIRouter
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 from backend.services.run_manager import get_run_status
+from backend.services.status_broker import get_status_broker
+from backend.config import STATUS_PUSH_MIN_INTERVAL, STATUS_SSE_KEEPALIVE_SECONDS, STATUS_LONG_POLL_MAX_SECONDS
 
 router = APIRouter(prefix="/status", tags=["status"])
 
+# Steps after which a run's status never changes again
+FINAL_STEPS = ("done", "error", "not_found")
+
 @router.get("/{run_id}")
-def get_status(run_id: str):
-    return get_run_status(run_id)
+async def get_status(run_id: str, since: Optional[int] = None, wait: float = 0.0):
+    """
+    Current status of run_id. Long-poll: with `since` (a previously seen "version") and
+    `wait` (seconds), the response is held until the status changes or `wait` expires.
+    """
+    status = get_run_status(run_id)
+    # Finished runs never change again (and their version counter is released), so never hold those
+    if since is not None and wait > 0 and status["step"] not in FINAL_STEPS:
+        await get_status_broker().wait(run_id, since, min(wait, STATUS_LONG_POLL_MAX_SECONDS))
+        status = get_run_status(run_id)
+    return status
+
+@router.get("/{run_id}/events")
+async def status_events(run_id: str, request: Request):
+    """
+    Server-Sent Events stream of run_id's status: a `status` event (same payload as
+    GET /status/{run_id}) now and after every change, at most every STATUS_PUSH_MIN_INTERVAL
+    seconds. The stream ends after the run reaches "done" or "error".
+    """
+    broker = get_status_broker()
+
+    async def event_stream():
+        while True:
+            # Read the version before the snapshot so a change in between is never missed
+            version = broker.version(run_id)
+            status = get_run_status(run_id)
+            yield _sse_event("status", status, version)
+            if status["step"] in FINAL_STEPS:
+                return
+            while True:
+                if await request.is_disconnected():
+                    return
+                if await broker.wait(run_id, version, STATUS_SSE_KEEPALIVE_SECONDS) > version:
+                    break
+                yield ": keepalive\n\n"
+            # Let bursts of progress ticks collapse into one event
+            await asyncio.sleep(STATUS_PUSH_MIN_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _sse_event(event: str, payload: dict, event_id: int) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
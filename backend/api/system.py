@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+from backend.services.cpu_budget import get_cpu_budget
+from backend.services.job_queue import get_job_queue
+from backend.services.executor import get_executor
+from backend.services.chunk_jobs import get_chunk_jobs
+from backend.services.retention import get_retention
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/cpu")
+def get_cpu_allocations():
+    """
+    Current CPU thread allotments per stage and stages queued for the budget. In process
+    mode, `workers` holds each worker process's own budget and its entries (tagged with
+    "pid") are listed in `active`/`waiting` next to the API process's.
+    """
+    allocations = get_cpu_budget().allocations()
+    workers = get_executor().cpu_allocations()
+    if workers:
+        allocations["active"] += [dict(entry, pid=worker["pid"]) for worker in workers for entry in worker["active"]]
+        allocations["waiting"] += [dict(entry, pid=worker["pid"]) for worker in workers for entry in worker["waiting"]]
+        allocations["workers"] = [
+            {"pid": worker["pid"], "total_threads": worker["total_threads"], "available_threads": worker["available_threads"]}
+            for worker in workers
+        ]
+    return allocations
+
+@router.get("/queue")
+def get_queue_stats():
+    """Run queue depth, running jobs, rejections and recent wait times."""
+    return get_job_queue().stats()
+
+@router.get("/executor")
+def get_executor_stats():
+    """Execution mode (thread/process), worker processes and completed/failed calls."""
+    return get_executor().stats()
+
+@router.get("/chunk_jobs")
+def get_chunk_job_stats():
+    """Chunk job queue depth, running jobs, rejections and jobs kept per state."""
+    return get_chunk_jobs().stats()
+
+@router.get("/retention")
+def get_retention_stats():
+    """Ledger usage (bytes total and per artifact kind) against RETENTION_MAX_BYTES, and evictions so far."""
+    return get_retention().usage()
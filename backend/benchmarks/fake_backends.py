@@ -0,0 +1,98 @@
+"""
+Deterministic stand-ins for the model backends used by the pipeline benchmarks, so they run
+without network access or downloaded models:
+- Silero VAD: torch.hub.load returns (model, (get_speech_timestamps, ...)) where the
+  detector thresholds frame energy; src/vad.py runs unchanged around it.
+- SentenceTransformer: hashed bag-of-words embeddings (each word gets a fixed random
+  vector derived from its CRC32), so the comparator's window loop does real vector work.
+"""
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+FRAME_SAMPLES = 512
+
+class FakeVADModel:
+    pass
+
+def fake_get_speech_timestamps(audio, model, sampling_rate: int = 16000, min_speech_duration_ms: int = 250,
+                               min_silence_duration_ms: int = 250, progress_tracking_callback=None, **kwargs) -> List[Dict[str, int]]:
+    """Frame-energy speech detection with Silero's return format ([{"start", "end"}] in samples)."""
+    samples = audio.numpy() if hasattr(audio, "numpy") else np.asarray(audio)
+    frames = len(samples) // FRAME_SAMPLES
+    if frames == 0:
+        return []
+    rms = np.sqrt(np.mean(samples[:frames * FRAME_SAMPLES].reshape(frames, FRAME_SAMPLES) ** 2, axis=1))
+    threshold = max(1e-3, 8 * float(np.percentile(rms, 10)))
+    voiced = rms > threshold
+    min_gap = int(min_silence_duration_ms * sampling_rate / 1000 / FRAME_SAMPLES)
+    min_len = int(min_speech_duration_ms * sampling_rate / 1000 / FRAME_SAMPLES)
+    segments = []
+    start = None
+    silent = 0
+    for i, is_voiced in enumerate(voiced):
+        if is_voiced:
+            if start is None:
+                start = i
+            silent = 0
+        elif start is not None:
+            silent += 1
+            if silent > min_gap:
+                end = i - silent + 1
+                if end - start >= min_len:
+                    segments.append({"start": start * FRAME_SAMPLES, "end": end * FRAME_SAMPLES})
+                start, silent = None, 0
+    if start is not None and frames - silent - start >= min_len:
+        segments.append({"start": start * FRAME_SAMPLES, "end": (frames - silent) * FRAME_SAMPLES})
+    if progress_tracking_callback is not None:
+        progress_tracking_callback(100.0)
+    return segments
+
+def fake_hub_load(repo_or_dir: str, model: str, *args, **kwargs):
+    return FakeVADModel(), (fake_get_speech_timestamps, None, None, None, None)
+
+class FakeSentenceTransformer:
+    def __init__(self, model_name: str = "", *args, **kwargs):
+        self.model_name = model_name
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    def _vector(self, word: str) -> np.ndarray:
+        vector = self._vectors.get(word)
+        if vector is None:
+            vector = np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(EMBEDDING_DIM).astype(np.float32)
+            self._vectors[word] = vector
+        return vector
+
+    def encode(self, sentences: Any, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.stack([self._encode_one(s) for s in sentences])
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        words = text.split()
+        if not words:
+            return np.zeros(EMBEDDING_DIM, dtype=np.float32)
+        total = np.sum([self._vector(w) for w in words], axis=0)
+        return total / (np.linalg.norm(total) or 1.0)
+
+@contextmanager
+def fake_backends():
+    """Swap in the fake VAD and embedding backends for the duration of the block."""
+    import torch
+    from src import comparator, vad
+    saved = (torch.hub.load, comparator.SentenceTransformer)
+    torch.hub.load = fake_hub_load
+    comparator.SentenceTransformer = FakeSentenceTransformer
+    try:
+        yield
+    finally:
+        torch.hub.load, comparator.SentenceTransformer = saved
+        # Cached models are keyed by loader/class; drop the fakes so later real runs never see them
+        if getattr(vad._thread_model, "entry", (None,))[0] is fake_hub_load:
+            del vad._thread_model.entry
+        with comparator._model_cache_lock:
+            for key in [k for k in comparator._model_cache if k[0] is FakeSentenceTransformer]:
+                comparator._model_cache.pop(key)
@@ -0,0 +1,266 @@
+"""
+Benchmark: the pipeline's CPU stages on synthetic input, with a JSON history and regression gate.
+
+Generates speech-and-silence audio plus a matching VTT of --minutes (1 minute to 3 hours;
+see synthetic.py), then runs each stage the way the pipeline does:
+- vad: src.vad.run_silero_vad on the whole file
+- chunking: src.chunker.create_speech_chunks on the VAD segments
+- captions: src.captions.load_captions (parse + persist the cue index) and extract_captions_text
+- compare: src.comparator.compare_transcripts for --compare-chunks chunks against the full captions
+With --backend fake (the default) Silero VAD and the sentence embedding model are replaced
+by deterministic fakes (fake_backends.py); with --backend real they must already be in the
+local torch hub / Hugging Face caches. Nothing is downloaded either way.
+
+Each stage runs in a fresh process (unless --in-process), so its peak RSS is its own. Recorded
+per stage: wall and CPU seconds, peak RSS, and throughput (audio seconds, cues or chunks per
+second). The entry is appended to the history file, and the run fails (exit code 1) when a
+stage's wall time or peak RSS exceeds the median of the last BENCHMARK_BASELINE_RUNS entries
+with the same settings by more than the configured thresholds.
+
+Usage:
+    python -m backend.benchmarks.pipeline_stages --minutes 10
+    python -m backend.benchmarks.pipeline_stages --minutes 180 --compare-chunks 3 --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.benchmarks import synthetic
+from backend.benchmarks.fake_backends import fake_backends
+from backend.config import (
+    DEFAULT_CHUNK_DURATION,
+    DEFAULT_CHUNK_TOLERANCE,
+    BENCHMARK_HISTORY_PATH,
+    BENCHMARK_REGRESSION_THRESHOLD,
+    BENCHMARK_MEMORY_THRESHOLD,
+    BENCHMARK_BASELINE_RUNS,
+    BENCHMARK_MIN_STAGE_SECONDS,
+)
+from src.fileio import atomic_write_text
+from src.profiling import StageRecorder, peak_rss_bytes
+
+STAGES = ("vad", "chunking", "captions", "compare")
+BACKENDS = ("fake", "real")
+# Share of ASR words the fake transcripts swap, so comparisons are not trivially exact
+ASR_ERROR_RATE = 0.1
+
+def _offline():
+    # Real backends must come from local caches; fail instead of reaching the network
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+def _fake_transcripts(cues: List[Tuple[float, float, str]], chunks: int, chunk_seconds: float) -> List[str]:
+    # One "ASR" text per chunk: the words of consecutive cues covering chunk_seconds of speech, some swapped
+    groups: List[List[str]] = []
+    words: List[str] = []
+    covered = 0.0
+    for start, end, text in cues:
+        words.extend(text.split())
+        covered += end - start
+        if covered >= chunk_seconds:
+            groups.append(words)
+            words, covered = [], 0.0
+    if words:
+        groups.append(words)  # The last chunk is shorter, as in the pipeline
+    every = int(round(1 / ASR_ERROR_RATE))
+    return [" ".join("uh" if (i + n) % every == 0 else w for i, w in enumerate(group)) for n, group in enumerate(groups[:chunks])]
+
+def _stage_vad(inputs: Dict[str, Any], stage) -> Dict[str, Any]:
+    from src.vad import run_silero_vad
+    segments = run_silero_vad(inputs["audio_path"], sampling_rate=inputs["sample_rate"])
+    stage.set(audio_seconds=inputs["seconds"], segments=len(segments))
+    return {"segments": segments}
+
+def _stage_chunking(inputs: Dict[str, Any], stage) -> Dict[str, Any]:
+    from src.chunker import create_speech_chunks
+    chunks = create_speech_chunks(inputs["audio_path"], inputs["segments"], chunk_duration=DEFAULT_CHUNK_DURATION,
+                                  chunk_tol=DEFAULT_CHUNK_TOLERANCE, chunk_folder=os.path.join(inputs["workdir"], "chunks"),
+                                  orig_sr=inputs["sample_rate"])
+    stage.set(audio_seconds=inputs["seconds"], chunks=len(chunks))
+    return {"chunks": len(chunks)}
+
+def _stage_captions(inputs: Dict[str, Any], stage) -> Dict[str, Any]:
+    from src.captions import load_captions
+    from src.downloader import extract_captions_text
+    track = load_captions(inputs["captions_path"])
+    text_path = os.path.join(inputs["workdir"], "youtube_captions.txt")
+    extract_captions_text(inputs["captions_path"], text_output=text_path)
+    stage.set(cues=len(track))
+    return {"captions_text_path": text_path}
+
+def _stage_compare(inputs: Dict[str, Any], stage) -> Dict[str, Any]:
+    from src.comparator import compare_transcripts
+    with open(inputs["captions_text_path"], "r", encoding="utf-8") as f:
+        captions_text = f.read()
+    transcripts = _fake_transcripts(inputs["cues"], inputs["compare_chunks"], DEFAULT_CHUNK_DURATION)
+    for i, text in enumerate(transcripts):
+        compare_transcripts(text, captions_text, output_path=os.path.join(inputs["workdir"], "compare", f"comparison_{i:03d}.txt"))
+    stage.set(chunks=len(transcripts))
+    return {}
+
+_STAGE_FUNCTIONS = {"vad": _stage_vad, "chunking": _stage_chunking, "captions": _stage_captions, "compare": _stage_compare}
+
+def run_stage(name: str, inputs: Dict[str, Any], backend: str = "fake") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Run one stage in this process; returns (record, outputs for later stages)."""
+    recorder = StageRecorder()
+    backends = fake_backends() if backend == "fake" else contextlib.nullcontext()
+    # The pipeline modules print debug lines per call; keep the report readable
+    with backends, contextlib.redirect_stdout(io.StringIO()):
+        with recorder.stage(name) as stage:
+            outputs = _STAGE_FUNCTIONS[name](inputs, stage)
+    record = recorder.records()[0]
+    record["peak_rss_bytes"] = peak_rss_bytes()
+    wall = record["wall_seconds"]
+    for field in ("cues", "chunks"):
+        if record.get(field) is not None:
+            record[field + "_per_second"] = round(record[field] / wall, 3) if wall > 0 else None
+    return record, outputs
+
+def _run_stage_in_process(name: str, inputs: Dict[str, Any], backend: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    if backend == "real":
+        _offline()
+    return run_stage(name, inputs, backend)
+
+def run_suite(minutes: float, backend: str = "fake", seed: int = 0, compare_chunks: int = 5,
+              workdir: Optional[str] = None, isolate: bool = True, sample_rate: int = 16000) -> Dict[str, Any]:
+    """Generate inputs, run every stage and return the history entry (not yet saved)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if minutes <= 0:
+        raise ValueError("minutes must be positive")
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="ytminer_bench_"))
+        started = time.perf_counter()
+        generated = synthetic.generate(workdir, minutes, seed, sample_rate)
+        generate_seconds = time.perf_counter() - started
+        inputs = dict(generated, workdir=workdir, compare_chunks=compare_chunks)
+        stages = {}
+        for name in STAGES:
+            if isolate:
+                # A fresh interpreter per stage: peak RSS and warm caches belong to that stage alone
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    record, outputs = pool.submit(_run_stage_in_process, name, inputs, backend).result()
+            else:
+                record, outputs = _run_stage_in_process(name, inputs, backend)
+            stages[name] = record
+            inputs.update(outputs)
+    return {
+        "timestamp": round(time.time(), 3),
+        "commit": _git_commit(),
+        "config": {"minutes": minutes, "backend": backend, "seed": seed, "compare_chunks": compare_chunks,
+                   "sample_rate": sample_rate, "isolate": isolate},
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "audio_seconds": generated["seconds"],
+        "speech_segments": len(generated["segments"]),
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": stages,
+        "peak_rss_bytes": max((r["peak_rss_bytes"] or 0) for r in stages.values()) or None,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        return []
+    if not isinstance(history, list):
+        raise ValueError(f"Benchmark history {path} is not a JSON list")
+    return history
+
+def append_history(path: str, entry: Dict[str, Any]):
+    history = load_history(path)
+    history.append(entry)
+    atomic_write_text(path, json.dumps(history, indent=1))
+
+def find_regressions(entry: Dict[str, Any], history: List[Dict[str, Any]], threshold: float = BENCHMARK_REGRESSION_THRESHOLD,
+                     memory_threshold: float = BENCHMARK_MEMORY_THRESHOLD, baseline_runs: int = BENCHMARK_BASELINE_RUNS,
+                     min_seconds: float = BENCHMARK_MIN_STAGE_SECONDS) -> List[Dict[str, Any]]:
+    """
+    Stages of entry whose wall time or peak RSS exceeds the baseline (median of the last
+    baseline_runs history entries with the same config) by more than the threshold fractions.
+    """
+    comparable = [h for h in history if h.get("config") == entry["config"]][-baseline_runs:]
+    regressions = []
+    for name, record in entry["stages"].items():
+        checks = (("wall_seconds", threshold, min_seconds), ("peak_rss_bytes", memory_threshold, 0))
+        for field, limit, floor in checks:
+            values = [h["stages"][name][field] for h in comparable if name in h.get("stages", {}) and h["stages"][name].get(field)]
+            if not values or record.get(field) is None:
+                continue
+            baseline = statistics.median(values)
+            if baseline < floor or baseline <= 0:
+                continue
+            change = record[field] / baseline - 1
+            if change > limit:
+                regressions.append({"stage": name, "metric": field, "value": record[field], "baseline": baseline,
+                                    "change": round(change, 3), "limit": limit})
+    return regressions
+
+def _print_report(entry: Dict[str, Any], regressions: List[Dict[str, Any]]):
+    print(f"{entry['config']['minutes']} min synthetic audio, {entry['speech_segments']} speech segments, "
+          f"backend={entry['config']['backend']}, commit={entry['commit']}")
+    columns = ("stage", "wall_s", "cpu_s", "peak_rss_mb", "throughput")
+    print(" | ".join(f"{c:>14}" for c in columns))
+    for name, r in entry["stages"].items():
+        if r.get("audio_seconds_per_second"):
+            throughput = f"{r['audio_seconds_per_second']:.1f} audio s/s"
+        elif r.get("cues_per_second"):
+            throughput = f"{r['cues_per_second']:.0f} cues/s"
+        elif r.get("chunks_per_second"):
+            throughput = f"{r['chunks_per_second']:.2f} chunks/s"
+        else:
+            throughput = "-"
+        peak = f"{r['peak_rss_bytes'] / 1024 ** 2:.0f}" if r.get("peak_rss_bytes") else "-"
+        print(" | ".join(f"{str(v):>14}" for v in (name, r["wall_seconds"], r["cpu_seconds"], peak, throughput)))
+    for reg in regressions:
+        print(f"REGRESSION {reg['stage']} {reg['metric']}: {reg['value']} vs baseline {reg['baseline']} "
+              f"(+{reg['change'] * 100:.0f}%, limit {reg['limit'] * 100:.0f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VAD, chunking, caption parsing and comparison on synthetic input.")
+    parser.add_argument("--minutes", type=float, default=5.0, help="Length of the synthetic video (1 to 180)")
+    parser.add_argument("--backend", choices=BACKENDS, default="fake", help="Fake (deterministic) or real cached models")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare-chunks", type=int, default=5, help="Chunks compared against the full captions")
+    parser.add_argument("--history", default=BENCHMARK_HISTORY_PATH, help="JSON history file")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_THRESHOLD, help="Allowed wall time increase (fraction)")
+    parser.add_argument("--memory-threshold", type=float, default=BENCHMARK_MEMORY_THRESHOLD, help="Allowed peak RSS increase (fraction)")
+    parser.add_argument("--baseline-runs", type=int, default=BENCHMARK_BASELINE_RUNS)
+    parser.add_argument("--in-process", action="store_true", help="Run all stages in this process (faster, shared peak RSS)")
+    parser.add_argument("--no-record", action="store_true", help="Check against the history without appending to it")
+    parser.add_argument("--workdir", help="Keep generated inputs and outputs here instead of a temp directory")
+    args = parser.parse_args()
+    if not 1 <= args.minutes <= 180:
+        parser.error("--minutes must be between 1 and 180")
+    entry = run_suite(args.minutes, args.backend, args.seed, args.compare_chunks, args.workdir, isolate=not args.in_process)
+    history = load_history(args.history)
+    regressions = find_regressions(entry, history, args.threshold, args.memory_threshold, args.baseline_runs)
+    entry["regressions"] = regressions
+    if not args.no_record:
+        append_history(args.history, entry)
+    _print_report(entry, regressions)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: polling GET /status versus pushed status updates, for N simulated clients.
+
+A simulated run publishes progress ticks (--tick-hz) and changes step every --step-every
+seconds while N clients watch it:
+- poll: every client requests the status every --poll-interval seconds (the frontend's old
+  2 s loop); each request loads the run's state from the run store, as /status did before.
+- push: every client waits on the status broker and re-reads the in-memory status after
+  each change (at most every STATUS_PUSH_MIN_INTERVAL), as /status/{run_id}/events does.
+Reported per mode: CPU seconds, status builds, run store reads, and step-change lag (time from a
+step change until a client sees it). HTTP framing is left out; it scales with status builds.
+
+Usage:
+    python -m backend.benchmarks.status_push_vs_poll --clients 200 --seconds 10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from backend.services import run_manager, storage
+from backend.services.status_broker import get_status_broker
+from backend.config import STATUS_PUSH_MIN_INTERVAL, STATUS_SSE_KEEPALIVE_SECONDS
+
+RUN_ID = "run_benchmark_status"
+STEPS = ["downloading", "vad", "chunking", "done"]
+
+def _simulate_run(seconds: float, tick_hz: float, step_every: float, step_times: Dict[str, float]):
+    started = time.monotonic()
+    step_index = 0
+    step_times[STEPS[0]] = time.monotonic()
+    while time.monotonic() - started < seconds:
+        time.sleep(1.0 / tick_hz)
+        elapsed = time.monotonic() - started
+        run_manager.update_run_progress(RUN_ID, "download", {"fraction": round(elapsed / seconds, 4)})
+        if elapsed >= (step_index + 1) * step_every and step_index < len(STEPS) - 2:
+            step_index += 1
+            run_manager.update_pipeline_step(RUN_ID, STEPS[step_index])
+            step_times[STEPS[step_index]] = time.monotonic()
+    run_manager.update_pipeline_step(RUN_ID, "done")
+    step_times["done"] = time.monotonic()
+
+def _legacy_status(counters: Dict[str, int]) -> dict:
+    # What GET /status did before pushed updates: load the stored state per request
+    counters["store_reads"] += 1
+    counters["status_builds"] += 1
+    state = storage.load_run_state(RUN_ID)
+    return {"run_id": RUN_ID, "step": state["step"], "error_message": state["error"]}
+
+def _push_status(counters: Dict[str, int]) -> dict:
+    counters["status_builds"] += 1
+    return run_manager.get_run_status(RUN_ID)
+
+async def _poll_client(poll_interval: float, counters: Dict[str, int], seen: Dict[str, float]):
+    await asyncio.sleep(random.uniform(0, poll_interval))
+    while True:
+        status = await asyncio.to_thread(_legacy_status, counters)
+        seen.setdefault(status["step"], time.monotonic())
+        if status["step"] == "done":
+            return
+        await asyncio.sleep(poll_interval)
+
+async def _push_client(counters: Dict[str, int], seen: Dict[str, float]):
+    broker = get_status_broker()
+    while True:
+        version = broker.version(RUN_ID)
+        status = _push_status(counters)
+        seen.setdefault(status["step"], time.monotonic())
+        if status["step"] == "done":
+            return
+        await broker.wait(RUN_ID, version, STATUS_SSE_KEEPALIVE_SECONDS)
+        await asyncio.sleep(STATUS_PUSH_MIN_INTERVAL)
+
+def run_mode(mode: str, clients: int, seconds: float, poll_interval: float, tick_hz: float, step_every: float) -> dict:
+    counters = {"store_reads": 0, "status_builds": 0}
+    step_times: Dict[str, float] = {}
+    client_seen: List[Dict[str, float]] = [{} for _ in range(clients)]
+    run_manager.run_states[RUN_ID] = {"step": STEPS[0], "error": None, "result": None, "args": {}}
+    storage.save_run_state(RUN_ID, run_manager.run_states[RUN_ID])
+
+    async def main():
+        if mode == "poll":
+            tasks = [_poll_client(poll_interval, counters, seen) for seen in client_seen]
+        else:
+            tasks = [_push_client(counters, seen) for seen in client_seen]
+        await asyncio.gather(*tasks)
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    runner = threading.Thread(target=_simulate_run, args=(seconds, tick_hz, step_every, step_times))
+    runner.start()
+    asyncio.run(main())
+    runner.join()
+    cpu = time.process_time() - cpu_start
+    lags = sorted(
+        seen[step] - step_times[step]
+        for seen in client_seen for step in STEPS[1:] if step in seen and step in step_times
+    )
+    run_manager.run_states.pop(RUN_ID, None)
+    run_manager.run_progress.pop(RUN_ID, None)
+    return {
+        "mode": mode,
+        "clients": clients,
+        "wall_seconds": round(time.monotonic() - wall_start, 2),
+        "cpu_seconds": round(cpu, 3),
+        "status_builds": counters["status_builds"],
+        "store_reads": counters["store_reads"],
+        "lag_mean_ms": round(1000 * sum(lags) / len(lags), 1) if lags else None,
+        "lag_p95_ms": round(1000 * lags[int(0.95 * (len(lags) - 1))], 1) if lags else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polled and pushed run status under N clients.")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Simulated run duration")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--tick-hz", type=float, default=10.0, help="Progress ticks per second")
+    parser.add_argument("--step-every", type=float, default=2.5, help="Seconds between step changes")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as runs_dir:
+        storage._store = storage.RunStore(os.path.join(runs_dir, "runs.sqlite3"))
+        results = []
+        # storage and run_manager print on every read/write; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for mode in ("poll", "push"):
+                results.append(run_mode(mode, args.clients, args.seconds, args.poll_interval, args.tick_hz, args.step_every))
+    columns = list(results[0])
+    print(" | ".join(f"{c:>14}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{str(row[c]):>14}" for c in columns))
+
+if __name__ == "__main__":
+    main()
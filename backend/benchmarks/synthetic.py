@@ -0,0 +1,99 @@
+"""
+Synthetic inputs for the offline pipeline benchmarks: speech-like audio (voiced harmonics
+with syllable-rate envelopes) alternating with near-silence, plus a VTT caption file whose
+cues cover the speech. Everything is derived from a seed, so equal settings give equal files.
+
+Audio is written segment by segment, so even multi-hour inputs need little memory to generate.
+"""
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import soundfile as sf
+
+WORDS = (
+    "the", "video", "speaker", "caption", "model", "audio", "signal", "people", "music", "today",
+    "really", "think", "going", "about", "because", "little", "story", "should", "before", "after",
+    "again", "number", "world", "little", "always", "never", "second", "minute", "question", "answer",
+    "example", "moment", "simple", "channel", "another", "every", "where", "there", "would", "could",
+    "market", "science", "history", "future", "kitchen", "garden", "engine", "window", "river", "mountain",
+)
+
+def speech_segments(seconds: float, seed: int = 0, speech: Tuple[float, float] = (1.0, 8.0),
+                    silence: Tuple[float, float] = (0.3, 3.0)) -> List[Tuple[float, float]]:
+    """(start, end) of each speech stretch in a timeline of `seconds`, separated by silences."""
+    rng = random.Random(seed)
+    segments = []
+    t = rng.uniform(*silence)
+    while t < seconds:
+        end = min(t + rng.uniform(*speech), seconds)
+        if end - t >= 0.5:
+            segments.append((round(t, 3), round(end, 3)))
+        t = end + rng.uniform(*silence)
+    return segments
+
+def _voice(n: int, sample_rate: int, rng: np.random.Generator) -> np.ndarray:
+    t = np.arange(n) / sample_rate
+    f0 = rng.uniform(90.0, 220.0) * (1 + 0.03 * np.sin(2 * np.pi * rng.uniform(4.0, 6.0) * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    # Syllables: 3-5 per second, each a raised-cosine burst
+    envelope = np.abs(np.sin(np.pi * rng.uniform(3.0, 5.0) * t)) ** 1.5
+    return (0.25 * voiced * envelope + rng.normal(0.0, 0.01, n)).astype(np.float32)
+
+def write_audio(path: str, seconds: float, segments: List[Tuple[float, float]], sample_rate: int = 16000, seed: int = 0):
+    """Mono 16-bit WAV of `seconds`: voice inside segments, faint noise elsewhere."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    with sf.SoundFile(path, "w", samplerate=sample_rate, channels=1, subtype="PCM_16") as f:
+        position = 0
+        for start, end in segments:
+            gap = int(start * sample_rate) - position
+            if gap > 0:
+                f.write(rng.normal(0.0, 0.002, gap).astype(np.float32))
+                position += gap
+            n = int(end * sample_rate) - position
+            if n > 0:
+                f.write(_voice(n, sample_rate, rng))
+                position += n
+        if total > position:
+            f.write(rng.normal(0.0, 0.002, total - position).astype(np.float32))
+
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+def caption_cues(segments: List[Tuple[float, float]], seed: int = 0, cue_seconds: float = 4.0,
+                 words_per_second: float = 2.5) -> List[Tuple[float, float, str]]:
+    """(start, end, text) cues of at most cue_seconds covering every speech segment."""
+    rng = random.Random(seed)
+    cues = []
+    for start, end in segments:
+        t = start
+        while t < end - 0.05:
+            cue_end = min(t + cue_seconds, end)
+            count = max(1, int(round((cue_end - t) * words_per_second)))
+            cues.append((t, cue_end, " ".join(rng.choice(WORDS) for _ in range(count))))
+            t = cue_end
+    return cues
+
+def write_vtt(path: str, cues: List[Tuple[float, float, str]]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\nKind: captions\nLanguage: en\n\n")
+        for start, end, text in cues:
+            f.write(f"{_timestamp(start)} --> {_timestamp(end)}\n{text}\n\n")
+
+def generate(workdir: str, minutes: float, seed: int = 0, sample_rate: int = 16000) -> Dict[str, Any]:
+    """Write audio.wav and captions.vtt into workdir; returns their paths, segments and cues."""
+    os.makedirs(workdir, exist_ok=True)
+    seconds = minutes * 60.0
+    segments = speech_segments(seconds, seed)
+    cues = caption_cues(segments, seed)
+    audio_path = os.path.join(workdir, "audio.wav")
+    captions_path = os.path.join(workdir, "captions.vtt")
+    write_audio(audio_path, seconds, segments, sample_rate, seed)
+    write_vtt(captions_path, cues)
+    return {"audio_path": audio_path, "captions_path": captions_path, "seconds": seconds,
+            "sample_rate": sample_rate, "segments": segments, "cues": cues}
@@ -5,15 +5,22 @@ This module centralizes all default configuration values used throughout
 the pipeline, making it easy to modify settings without searching through
 multiple files.
 """
+import os
 
 # Audio Processing Configuration
 DEFAULT_SAMPLE_RATE = 16000  # Hz - Standard for speech recognition
 DEFAULT_CHUNK_DURATION = 30.0  # seconds - Target duration for audio chunks
 DEFAULT_CHUNK_TOLERANCE = 5.0  # seconds - Tolerance for chunk duration (±5s)
+STREAMING_INGEST = True  # Pipe yt-dlp straight into ffmpeg (mono WAV, no intermediate file)
+CONCURRENT_ACQUISITION = True  # Fetch captions while the audio is downloading (requires STREAMING_INGEST)
+AUDIO_DOWNLOAD_TIMEOUT = 3600  # seconds - kill the audio ingest after this long
+CAPTIONS_DOWNLOAD_TIMEOUT = 300  # seconds - give up on captions after this long (not fatal)
 
 # Output Configuration
 DEFAULT_OUTPUT_DIR = "output"  # Base directory for all pipeline outputs
 DEFAULT_RUNS_DIR = "runs"  # Directory for storing run state/metadata
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_ROOT = os.path.join(PROJECT_ROOT, "cache")  # Persistent caches (not under output/), independent of the working directory
 
 # Language & Model Configuration
 DEFAULT_LANGUAGE = "en"  # Default language code (ISO 639-1)
@@ -49,6 +56,129 @@ VAD_SAMPLING_RATE = 16000  # Hz - Must match audio sample rate
 DEFAULT_COMPUTE_TYPE = "int8"  # Whisper compute type (int8, float16, float32)
 DEFAULT_BEAM_SIZE = 1  # Whisper beam search size (1 = greedy decoding, faster)
 
+# ASR Cascade Configuration
+# Decode with the run's (fast) model first; re-decode only low-confidence segments
+# with the strong model. Thresholds match Whisper's own fallback defaults.
+ASR_CASCADE_ENABLED = False  # Default when a run does not specify "cascade"
+ASR_CASCADE_STRONG_MODEL = "medium"
+ASR_CASCADE_MIN_AVG_LOGPROB = -1.0
+ASR_CASCADE_MAX_NO_SPEECH_PROB = 0.6
+ASR_CASCADE_MAX_COMPRESSION_RATIO = 2.4
+ASR_CASCADE_FULL_REDECODE_FRACTION = 0.5  # Re-decode the whole chunk past this low-confidence share
+
+# Transcript Cache Configuration
+# Transcripts are cached by chunk audio hash + model/decode options
+TRANSCRIPT_CACHE_ENABLED = True
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_ROOT, "transcripts")
+TRANSCRIPT_CACHE_MAX_ENTRIES = 5000  # Least-recently-used entries are evicted past this bound
+
+# Media Cache Configuration
+# Downloaded audio/captions are cached by YouTube video ID + sample rate / caption language
+MEDIA_CACHE_ENABLED = True
+MEDIA_CACHE_DIR = os.path.join(CACHE_ROOT, "media")
+MEDIA_CACHE_MAX_BYTES = 20 * 1024 ** 3  # Least-recently-used entries are evicted past this size
+MEDIA_CACHE_VERIFY = True  # Re-check SHA-256 of cached files whose size/mtime changed since they were stored
+
+# Run Queue Configuration
+# /run submissions wait in a bounded priority queue served by a fixed worker pool
+JOB_WORKERS = 2  # Pipeline runs (download/VAD/chunking) executing at once
+JOB_QUEUE_MAX = 20  # Waiting runs beyond this are rejected with HTTP 429
+JOB_RETRY_AFTER_SECONDS = 30  # Retry-After hint sent with 429
+JOB_PRIORITY_MIN = -10  # Accepted range of a /run request's priority (higher runs sooner)
+JOB_PRIORITY_MAX = 10
+RUN_COALESCE_ENABLED = True  # Identical submissions attach to an in-flight or recently finished run
+RUN_COALESCE_TTL_SECONDS = 600  # How long a finished run keeps absorbing identical submissions
+
+# Executor Configuration
+# Pipeline runs and chunk processing execute either in the API process ("thread", the default:
+# one copy of each model) or in long-lived worker processes ("process"), outside the API's GIL.
+# Every worker process holds its own copy of each model it uses
+EXECUTOR_MODE = os.environ.get("YTMINER_EXECUTOR_MODE", "thread")
+EXECUTOR_PROCESSES = JOB_WORKERS + 2  # JOB_WORKERS plus CHUNK_JOB_WORKERS, so chunk processing never waits behind runs
+EXECUTOR_PRELOAD_MODELS = True  # Process mode: load Whisper (DEFAULT_MODEL_SIZE), embedding and VAD models at worker start
+
+# Status Push Configuration
+# /status/{run_id}/events (SSE) and /status/{run_id}?since=&wait= (long-poll) push changes
+STATUS_PUSH_MIN_INTERVAL = 0.25  # seconds - SSE batches progress ticks arriving faster than this
+STATUS_SSE_KEEPALIVE_SECONDS = 15  # Comment line sent on idle SSE streams so proxies keep them open
+STATUS_LONG_POLL_MAX_SECONDS = 30  # Upper bound for the long-poll `wait` parameter
+
+# Chunk Job Configuration
+# POST /result/{run_id}/process_chunk queues a job (HTTP 202) instead of transcribing inline;
+# GET /result/{run_id}/chunk_jobs/{job_id}?wait= polls or awaits it
+CHUNK_JOB_WORKERS = 2  # Chunks transcribed at once, also of the same run (each takes an executor slot kept free for chunks)
+CHUNK_JOB_QUEUE_MAX = 50  # Waiting chunk jobs beyond this are rejected with HTTP 429
+CHUNK_JOBS_KEPT = 500  # Finished jobs kept in memory for polling (results also go to the run store)
+CHUNK_JOB_WAIT_MAX_SECONDS = 30  # Upper bound for the `wait` parameter
+
+# Result Configuration
+# GET /result/{run_id} serves the run's manifest.json (written by the pipeline, see src/manifest.py)
+# with chunks paginated and a strong ETag for conditional requests
+RESULT_CHUNKS_PAGE_SIZE = 500  # Chunks per page when `limit` is not given
+RESULT_CHUNKS_PAGE_MAX = 5000  # Upper bound for `limit`
+
+# Media Serving Configuration
+# GET /media/{run_id}/{path} serves run artifacts with Range requests and strong ETags;
+# ?format=opus serves an Opus/WebM transcode of audio, cached on disk
+MEDIA_IMMUTABLE_EXTENSIONS = (".wav", ".webm", ".m4a", ".mp3", ".vtt", ".srt")  # Written once per run
+MEDIA_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MEDIA_REVALIDATE_CACHE_CONTROL = "no-cache"  # Everything else (e.g. transcripts): revalidate via ETag
+MEDIA_TRANSCODE_DIR = os.path.join(CACHE_ROOT, "transcodes")
+MEDIA_TRANSCODE_MAX_BYTES = 5 * 1024 ** 3  # Least-recently-used transcodes are evicted past this size
+MEDIA_OPUS_BITRATE = "48k"
+MEDIA_STREAM_BLOCK_BYTES = 64 * 1024
+
+# Download (ZIP export) Configuration
+# GET /download/{run_id} streams a ZIP of the run's artifacts straight from disk (no temp archive)
+DOWNLOAD_READ_BLOCK_BYTES = 1024 * 1024  # Per-read block size while streaming members
+
+# Retention Configuration
+# Run outputs are tracked in a ledger (sizes, kinds, last access) and evicted in the background;
+# evicted artifacts leave tombstones that /result reports (see src/retention.py)
+RETENTION_ENABLED = True
+RETENTION_LEDGER_PATH = os.environ.get("YTMINER_RETENTION_LEDGER", os.path.join(CACHE_ROOT, "retention.sqlite3"))
+RETENTION_MAX_BYTES = 50 * 1024 ** 3  # Budget for everything under DEFAULT_OUTPUT_DIR
+RETENTION_INTERVAL_SECONDS = 300  # How often the background worker enforces policies and budget
+RETENTION_POLICIES = {
+    "audio": {"max_age_days": 14},
+    "chunks": {"max_age_days": 7},  # Chunk WAVs can be re-created by re-running; transcripts cannot
+    "captions": {"keep": True},
+    "transcripts": {"keep": True},
+    "comparisons": {"keep": True},
+    "profiles": {"max_age_days": 14},  # cProfile captures of runs started with "profile": true
+    "other": {},
+}
+
+# CPU Budget Configuration
+# All concurrent runs share one thread budget; stages queue when it is exhausted.
+CPU_BUDGET_TOTAL_THREADS = os.cpu_count() or 1
+CPU_STAGE_THREADS = {
+    "vad": 2,        # torch intra-op threads for Silero VAD
+    "asr": 4,        # CTranslate2 cpu_threads for faster-whisper
+    "embedding": 2,  # torch intra-op threads for sentence-transformers
+}
+WHISPER_NUM_WORKERS = 1  # faster-whisper num_workers (parallel transcribe calls per model)
+
+# Tracing Configuration (structured JSON-lines trace written off the hot path, see src/tracing.py)
+TRACE_LEVEL = os.environ.get("YTMINER_TRACE_LEVEL", "off")  # debug, info, warning, error, off
+TRACE_FILE = os.environ.get("YTMINER_TRACE_FILE", ".cursor/debug.log")
+TRACE_SAMPLE_RATE = float(os.environ.get("YTMINER_TRACE_SAMPLE", "1.0"))  # Fraction of debug records kept
+TRACE_QUEUE_SIZE = 10000  # Records buffered for the writer thread before dropping
+
+# Metrics Configuration
+# Stage latencies, model loads, bytes and cache hit ratios in Prometheus text format at GET /metrics
+# (see src/metrics.py); worker processes forward theirs to the API process after each job
+METRICS_ENABLED = os.environ.get("YTMINER_METRICS", "1") != "0"
+
+# Benchmark Configuration
+# Offline pipeline benchmarks (python -m backend.benchmarks.pipeline_stages) append to a JSON history
+# and fail when a stage is slower or uses more memory than the median of recent comparable runs
+BENCHMARK_HISTORY_PATH = os.path.join(CACHE_ROOT, "benchmarks", "history.json")
+BENCHMARK_REGRESSION_THRESHOLD = 0.25  # Fail when wall time exceeds the baseline by more than this fraction
+BENCHMARK_MEMORY_THRESHOLD = 0.5  # Same for a stage's peak RSS
+BENCHMARK_BASELINE_RUNS = 5  # Recent history entries with the same settings that form the baseline
+BENCHMARK_MIN_STAGE_SECONDS = 0.05  # Stages faster than this in the baseline are too noisy to judge
+
 # File Naming Conventions
 AUDIO_FILENAME = "audio.wav"
 CAPTIONS_FILENAME = "captions.vtt"
@@ -56,6 +186,8 @@ TRANSCRIPT_FILENAME = "whisper_transcript.txt"
 YOUTUBE_CAPTIONS_TEXT_FILENAME = "youtube_captions.txt"
 COMPARISON_FILENAME = "comparison.txt"
 CHUNKS_DIRNAME = "chunks"
+CHUNK_RESULTS_DIRNAME = "chunk_results"  # Per-chunk transcript/comparison: chunk_results/<chunk name>/
+PROFILE_BASENAME = "profile"  # Profiled runs/chunks write profile.pstats and profile.txt
 
 # API Configuration (if needed)
 # API_HOST = "0.0.0.0"
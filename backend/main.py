@@ -1,10 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+from src import metrics, tracing
+from backend.config import TRACE_LEVEL, TRACE_FILE, TRACE_SAMPLE_RATE, TRACE_QUEUE_SIZE, RETENTION_ENABLED, METRICS_ENABLED
+from backend.services.retention import start_retention_worker, stop_retention_worker
 os.makedirs("output", exist_ok=True)
+tracing.configure(level=TRACE_LEVEL, path=TRACE_FILE, sample_rate=TRACE_SAMPLE_RATE, queue_size=TRACE_QUEUE_SIZE)
+metrics.configure(enabled=METRICS_ENABLED)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Evict old/over-budget run outputs in the background while the server runs
+    if RETENTION_ENABLED:
+        start_retention_worker()
+    yield
+    stop_retention_worker()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,10 +35,13 @@ app.mount(
     name="output",
 )
 
-# Import routers (excluding history)
-from backend.api import run, status, result, download
+# Import routers
+from backend.api import run, status, result, media, download, system, history, metrics as metrics_api
 app.include_router(run.router)
 app.include_router(status.router)
 app.include_router(result.router)
-# app.include_router(history.router)  # DISABLED: Not used in project
+app.include_router(media.router)
+app.include_router(history.router)
 app.include_router(download.router)
+app.include_router(system.router)
+app.include_router(metrics_api.router)
@@ -1,21 +1,34 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Any, Dict, List
 
+from backend.config import JOB_PRIORITY_MIN, JOB_PRIORITY_MAX
+
 class RunRequest(BaseModel):
     youtube_url: str
     language: str
     model_size: str
     chunk_index: Optional[int] = None
+    cascade: Optional[bool] = None
+    start_time: Optional[float] = None  # seconds; process only [start_time, end_time) of the video
+    end_time: Optional[float] = None
+    priority: Optional[int] = Field(0, ge=JOB_PRIORITY_MIN, le=JOB_PRIORITY_MAX)
+    coalesce: Optional[bool] = None
+    profile: Optional[bool] = False
 
 class RunResponse(BaseModel):
     run_id: str
     message: str
+    coalesced: bool = False
 
 class StatusResponse(BaseModel):
     run_id: str
     step: str
     error_message: Optional[str] = None
     logs: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    queue: Optional[Dict[str, Any]] = None
+    coalesced_submissions: Optional[int] = None
+    stages: Optional[List[Dict[str, Any]]] = None
 
 class ResultResponse(BaseModel):
     run_id: str
@@ -27,9 +40,15 @@ class ResultResponse(BaseModel):
 
 class RunItem(BaseModel):
     run_id: str
-    youtube_url: str
-    started_at: str
-    status: str
+    created_at: float
+    updated_at: float
+    step: str
+    youtube_url: Optional[str] = None
+    video_id: Optional[str] = None
+    language: Optional[str] = None
+    model_size: Optional[str] = None
+    error: Optional[str] = None
 
 class HistoryResponse(BaseModel):
     runs: List[RunItem]
+    next_cursor: Optional[str] = None
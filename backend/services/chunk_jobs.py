@@ -0,0 +1,161 @@
+"""
+Chunk comparison jobs.
+
+POST /result/{run_id}/process_chunk only queues a job and answers 202 with its handle;
+Whisper and the comparator then run on a worker of this module's own JobQueue (through the
+executor), never on the API's event loop. Clients poll the job, or long-poll it with
+?wait=, until it is "done" (result attached) or "error". Segments are appended to the job
+as Whisper decodes them, so GET /result/{run_id}/process_chunk/stream can forward them over
+SSE. Finished jobs stay in memory for the most recent CHUNK_JOBS_KEPT; their results are
+also saved to the run store.
+"""
+import functools
+import time
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from backend.services.job_queue import JobQueue
+from backend.services.status_broker import get_status_broker
+from backend.config import CHUNK_JOB_WORKERS, CHUNK_JOB_QUEUE_MAX, CHUNK_JOBS_KEPT
+
+FINAL_STATES = ("done", "error")
+
+def new_job_id() -> str:
+    return f"chunk_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+def _broker_key(job_id: str) -> str:
+    # Job versions live in the status broker next to run versions
+    return f"chunk_job:{job_id}"
+
+class ChunkJobs:
+    """
+    Registry of chunk jobs run on a bounded JobQueue. Thread-safe; wait() is async.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 50, kept: int = 500):
+        self._queue = JobQueue(workers, max_queue)
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active: Dict[Hashable, str] = {}
+        self.kept = kept
+        self.deduplicated = 0
+
+    def submit(self, run_id: str, chunk: str, fn: Callable[[Callable[[Dict[str, Any]], None]], Dict[str, Any]],
+               dedupe_key: Optional[Hashable] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue fn(segment_fn) (returns the chunk's result dict) as a job for run_id/chunk;
+        fn passes each decoded segment to segment_fn, which appends it to the job's "segments".
+        Returns (job view, created). A queued or running job with the same dedupe_key is
+        returned instead of queueing fn again (created=False).
+        Raises QueueFullError if the chunk queue is full.
+        """
+        with self._lock:
+            existing = self._active.get(dedupe_key) if dedupe_key is not None else None
+            if existing is not None:
+                self.deduplicated += 1
+                return self._view_locked(existing), False
+            job_id = new_job_id()
+            job = {"job_id": job_id, "run_id": run_id, "chunk": chunk, "state": "queued",
+                   "created_at": time.time(), "started_at": None, "finished_at": None,
+                   "segments": [], "result": None, "error": None, "dedupe_key": dedupe_key}
+            self._queue.submit(job_id, lambda: self._execute(job_id, fn))
+            self._jobs[job_id] = job
+            if dedupe_key is not None:
+                self._active[dedupe_key] = job_id
+            view = self._view_locked(job_id)
+        get_status_broker().publish(_broker_key(job_id))
+        return view, True
+
+    def _execute(self, job_id: str, fn: Callable[[Callable[[Dict[str, Any]], None]], Dict[str, Any]]):
+        self._update(job_id, state="running", started_at=time.time())
+        try:
+            result = fn(functools.partial(self._add_segment, job_id))
+        except Exception as e:
+            print(f"[ChunkJobs] Job {job_id} failed: {e}")
+            self._update(job_id, state="error", error=str(e), finished_at=time.time())
+        else:
+            self._update(job_id, state="done", result=result, finished_at=time.time())
+
+    def _add_segment(self, job_id: str, segment: Dict[str, Any]):
+        with self._lock:
+            self._jobs[job_id]["segments"].append(segment)
+        get_status_broker().publish(_broker_key(job_id))
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            if job["state"] in FINAL_STATES:
+                if job["dedupe_key"] is not None and self._active.get(job["dedupe_key"]) == job_id:
+                    del self._active[job["dedupe_key"]]
+                self._prune_locked()
+        get_status_broker().publish(_broker_key(job_id))
+
+    def _prune_locked(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["state"] in FINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - self.kept)]:
+            del self._jobs[job_id]
+            get_status_broker().forget(_broker_key(job_id))
+
+    def _view_locked(self, job_id: str) -> Dict[str, Any]:
+        job = self._jobs[job_id]
+        view = {k: v for k, v in job.items() if k != "dedupe_key"}
+        view["segments"] = list(job["segments"])
+        queue_info = self._queue.job_info(job_id) if job["state"] == "queued" else None
+        view["position"] = queue_info["position"] if queue_info else 0
+        return view
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        {"job_id", "run_id", "chunk", "state" (queued/running/done/error), "position"
+        (1-based while queued), "created_at", "started_at", "finished_at", "segments"
+        (decoded so far), "result", "error"}, or None for unknown (or pruned) jobs.
+        """
+        with self._lock:
+            if job_id not in self._jobs:
+                return None
+            return self._view_locked(job_id)
+
+    async def wait(self, job_id: str, timeout: float, segments_seen: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the job once it is done/failed (or, with segments_seen, once it has more than
+        that many segments), or as it is after `timeout` seconds.
+        """
+        broker = get_status_broker()
+        deadline = time.monotonic() + timeout
+        while True:
+            # Read the version before the snapshot so a change in between is never missed
+            version = broker.version(_broker_key(job_id))
+            job = self.job(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["state"] in FINAL_STATES or remaining <= 0:
+                return job
+            if segments_seen is not None and len(job["segments"]) > segments_seen:
+                return job
+            await broker.wait(_broker_key(job_id), version, remaining)
+
+    def active_run_ids(self) -> Set[str]:
+        """Runs with a queued or running chunk job."""
+        with self._lock:
+            return {job["run_id"] for job in self._jobs.values() if job["state"] not in FINAL_STATES}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job["state"]] = states.get(job["state"], 0) + 1
+            deduplicated = self.deduplicated
+        return dict(self._queue.stats(), jobs=states, deduplicated=deduplicated)
+
+_jobs: Optional[ChunkJobs] = None
+_jobs_lock = threading.Lock()
+
+def get_chunk_jobs() -> ChunkJobs:
+    """Return the process-wide chunk job registry, built from backend.config on first use."""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = ChunkJobs(CHUNK_JOB_WORKERS, CHUNK_JOB_QUEUE_MAX, CHUNK_JOBS_KEPT)
+        return _jobs
@@ -0,0 +1,124 @@
+"""
+Process-wide CPU budget shared by all concurrent runs.
+
+Each CPU-heavy stage (VAD, ASR, embedding) asks for a thread allotment before it
+starts and returns it when done. When the budget is exhausted, stages queue in
+FIFO order instead of oversubscribing the machine. The granted thread count is
+what the stage passes on to torch / CTranslate2 / sentence-transformers.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.config import CPU_BUDGET_TOTAL_THREADS, CPU_STAGE_THREADS
+
+class CPUBudget:
+    """
+    Counting allocator of CPU threads with FIFO queueing. Thread-safe.
+    """
+
+    def __init__(self, total_threads: Optional[int] = None, stage_threads: Optional[Dict[str, int]] = None,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.total_threads = max(1, total_threads or os.cpu_count() or 1)
+        self.stage_threads = dict(stage_threads or {})
+        # Called with allocations() after every queue/grant/release (executor workers report them)
+        self.on_change = on_change
+        self._report_lock = threading.Lock()  # Reports go out in the order their snapshots were taken
+        self._cond = threading.Condition()
+        self._available = self.total_threads
+        self._waiting: deque = deque()
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._next_ticket = 0
+
+    def threads_for(self, stage: str) -> int:
+        wanted = self.stage_threads.get(stage, 1)
+        return max(1, min(wanted, self.total_threads))
+
+    @contextmanager
+    def allocate(self, stage: str, run_id: Optional[str] = None, threads: Optional[int] = None):
+        """
+        Block until `threads` (default: the stage's configured share) are free, then yield
+        the granted thread count. The allotment is returned when the block exits.
+        """
+        want = max(1, min(threads or self.threads_for(stage), self.total_threads))
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            entry = {"ticket": ticket, "stage": stage, "run_id": run_id, "threads": want, "queued_at": time.time()}
+            self._waiting.append(entry)
+        self._changed()
+        with self._cond:
+            # FIFO: only the head of the queue may take threads, so large requests cannot starve
+            while self._waiting[0]["ticket"] != ticket or self._available < want:
+                self._cond.wait()
+            self._waiting.popleft()
+            self._available -= want
+            entry["started_at"] = time.time()
+            self._active[ticket] = entry
+            self._cond.notify_all()
+        self._changed()
+        try:
+            yield want
+        finally:
+            with self._cond:
+                self._active.pop(ticket, None)
+                self._available += want
+                self._cond.notify_all()
+            self._changed()
+
+    def _changed(self):
+        if self.on_change is None:
+            return
+        try:
+            with self._report_lock:
+                self.on_change(self.allocations())
+        except Exception as e:
+            print(f"[CPUBudget] Reporting allocations failed: {e}")
+
+    def allocations(self) -> Dict[str, Any]:
+        """Snapshot of current allotments and queued stages, for monitoring."""
+        now = time.time()
+        with self._cond:
+            active: List[Dict[str, Any]] = [
+                {"stage": e["stage"], "run_id": e["run_id"], "threads": e["threads"],
+                 "running_seconds": round(now - e["started_at"], 3),
+                 "waited_seconds": round(e["started_at"] - e["queued_at"], 3)}
+                for e in self._active.values()
+            ]
+            waiting: List[Dict[str, Any]] = [
+                {"stage": e["stage"], "run_id": e["run_id"], "threads": e["threads"],
+                 "waiting_seconds": round(now - e["queued_at"], 3)}
+                for e in self._waiting
+            ]
+            return {
+                "total_threads": self.total_threads,
+                "available_threads": self._available,
+                "stage_threads": {stage: self.threads_for(stage) for stage in self.stage_threads},
+                "active": active,
+                "waiting": waiting,
+            }
+
+_budget: Optional[CPUBudget] = None
+_budget_lock = threading.Lock()
+
+def get_cpu_budget() -> CPUBudget:
+    """Return the process-wide CPUBudget, built from backend.config on first use."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = CPUBudget(CPU_BUDGET_TOTAL_THREADS, CPU_STAGE_THREADS)
+        return _budget
+
+def configure_cpu_budget(total_threads: int, on_change: Optional[Callable[[Dict[str, Any]], None]] = None) -> CPUBudget:
+    """
+    Replace the process-wide CPUBudget with one of total_threads (stage shares from backend.config).
+    Executor worker processes call this so that together they stay within CPU_BUDGET_TOTAL_THREADS,
+    and pass on_change to report their allocations back to the API process.
+    """
+    global _budget
+    with _budget_lock:
+        _budget = CPUBudget(total_threads, CPU_STAGE_THREADS, on_change=on_change)
+        return _budget
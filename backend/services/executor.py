@@ -0,0 +1,287 @@
+"""
+Execution backend for pipeline runs and chunk processing.
+
+In "thread" mode (the default) work runs in the calling thread, inside the API process. In
+"process" mode it runs in a pool of long-lived worker processes that preload the Whisper, embedding
+and VAD models at start-up, so the Python-heavy stages (caption parsing, comparator window
+loops, difflib, NumPy glue) no longer hold the API process's GIL and /status stays fast
+while runs are active.
+
+Metrics recorded in a worker during a job (see src/metrics.py) are sent back with the job's
+events and merged into the API process's registry, so /metrics covers all processes.
+
+Callers use the same interface in both modes:
+    get_executor().call(fn, *args, callbacks={"progress_fn": f}, **kwargs)
+fn must be a module-level function. Callbacks stay in the API process: in process mode the
+worker receives proxies that forward each call over an event queue, and call() only returns
+once every callback the job made has been applied. Arguments and results are pickled, so
+jobs take and return file paths and small dicts rather than audio arrays.
+"""
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from src import metrics, tracing
+from backend.config import (
+    EXECUTOR_MODE,
+    EXECUTOR_PROCESSES,
+    EXECUTOR_PRELOAD_MODELS,
+    CPU_BUDGET_TOTAL_THREADS,
+    DEFAULT_MODEL_SIZE,
+    WHISPER_NUM_WORKERS,
+    TRACE_LEVEL,
+    TRACE_FILE,
+    TRACE_SAMPLE_RATE,
+    TRACE_QUEUE_SIZE,
+    METRICS_ENABLED,
+)
+
+# How long call() waits for a finished job's remaining callback events
+_CALLBACK_DRAIN_TIMEOUT = 10.0
+
+class ExecutorError(Exception):
+    pass
+
+def preload_models():
+    """
+    Load the models a worker is going to need so the first run or chunk does not pay for it.
+    Failures (e.g. no network for a first download) are logged; the model then loads on first use.
+    """
+    from backend.services.cpu_budget import get_cpu_budget
+    from src.transcriber import load_whisper_model
+    from src.comparator import load_embedding_model
+    from src.vad import load_vad_model
+    asr_threads = get_cpu_budget().threads_for("asr")
+    loaders = [
+        ("whisper", lambda: load_whisper_model(DEFAULT_MODEL_SIZE, cpu_threads=asr_threads, num_workers=WHISPER_NUM_WORKERS)),
+        ("embedding", load_embedding_model),
+        ("vad", load_vad_model),
+    ]
+    for name, load in loaders:
+        try:
+            with tracing.span("preload_model", model=name):
+                load()
+        except Exception as e:
+            print(f"[Executor] Preloading {name} model failed: {e}")
+
+# --- Worker process side ---
+
+_worker_events = None
+
+class _RemoteCallback:
+    """Stands in for an API-process callback inside a worker; forwards calls over the event queue."""
+
+    def __init__(self, call_id: int, name: str):
+        self.call_id = call_id
+        self.name = name
+
+    def __call__(self, *args):
+        _worker_events.put(("callback", self.call_id, self.name, args))
+
+def _init_worker(events, cpu_threads: int, preload: bool):
+    global _worker_events
+    _worker_events = events
+    from backend.services.cpu_budget import configure_cpu_budget
+    # Workers split the machine's thread budget instead of each claiming all of it, and report
+    # their allocations so /system/cpu covers them
+    configure_cpu_budget(cpu_threads, on_change=_report_cpu)
+    tracing.configure(level=TRACE_LEVEL, path=TRACE_FILE, sample_rate=TRACE_SAMPLE_RATE, queue_size=TRACE_QUEUE_SIZE)
+    metrics.configure(enabled=METRICS_ENABLED)
+    if preload:
+        preload_models()
+
+def _report_cpu(allocations: Dict[str, Any]):
+    _worker_events.put(("cpu", None, None, (os.getpid(), allocations)))
+
+def _run_in_worker(call_id: int, fn: Callable, args: tuple, kwargs: dict, callback_names: List[str], run_id: Optional[str]):
+    try:
+        for name in callback_names:
+            kwargs[name] = _RemoteCallback(call_id, name)
+        with tracing.run_context(run_id):
+            return fn(*args, **kwargs)
+    finally:
+        # Includes anything recorded since the previous job (e.g. model preloading)
+        delta = metrics.drain()
+        if delta:
+            _worker_events.put(("metrics", call_id, None, (delta,)))
+        # Queued after every callback event of this job, so the API process can wait for it
+        _worker_events.put(("done", call_id, None, None))
+
+# --- API process side ---
+
+class ThreadExecutor:
+    """Runs work in the calling thread, inside the API process (the default)."""
+
+    mode = "thread"
+
+    def call(self, fn: Callable, *args, callbacks: Optional[Dict[str, Callable]] = None, **kwargs) -> Any:
+        if callbacks:
+            kwargs.update(callbacks)
+        return fn(*args, **kwargs)
+
+    async def acall(self, fn: Callable, *args, callbacks: Optional[Dict[str, Callable]] = None, **kwargs) -> Any:
+        """call() without blocking the event loop."""
+        return await asyncio.to_thread(self.call, fn, *args, callbacks=callbacks, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode}
+
+    def cpu_allocations(self) -> List[Dict[str, Any]]:
+        """CPU budget snapshots of worker processes ({"pid", ...CPUBudget.allocations()}); none in thread mode."""
+        return []
+
+    def shutdown(self):
+        pass
+
+class ProcessExecutor(ThreadExecutor):
+    """
+    Runs work in a pool of long-lived worker processes. The pool (and model preloading)
+    starts on the first call; a pool broken by a crashed worker is replaced on the next one.
+    """
+
+    mode = "process"
+
+    def __init__(self, processes: int = 2, preload: bool = True, total_threads: int = CPU_BUDGET_TOTAL_THREADS,
+                 start_method: str = "spawn"):
+        self.processes = max(1, processes)
+        self.preload = preload
+        self.threads_per_process = max(1, total_threads // self.processes)
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._events = None
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        # pid -> latest CPU budget snapshot reported by that worker
+        self._worker_cpu: Dict[int, Dict[str, Any]] = {}
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._events = self._context.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=self._context,
+                    initializer=_init_worker,
+                    initargs=(self._events, self.threads_per_process, self.preload),
+                )
+                threading.Thread(target=self._listen, args=(self._events,), name="executor-events", daemon=True).start()
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.restarts += 1
+            self._worker_cpu.clear()
+            self._events.put(None)  # stops that pool's listener
+        pool.shutdown(wait=False)
+
+    def _listen(self, events):
+        while True:
+            message = events.get()
+            if message is None:
+                return
+            kind, call_id, name, args = message
+            if kind == "metrics":
+                # Merged even if the caller already gave up on the call
+                metrics.merge(*args)
+                continue
+            if kind == "cpu":
+                pid, allocations = args
+                with self._lock:
+                    if self._pool is not None:
+                        self._worker_cpu[pid] = allocations
+                continue
+            with self._lock:
+                call = self._calls.get(call_id)
+            if call is None:
+                continue
+            if kind == "done":
+                call["done"].set()
+                continue
+            try:
+                call["callbacks"][name](*args)
+            except Exception as e:
+                print(f"[Executor] Callback {name} failed: {e}")
+
+    def call(self, fn: Callable, *args, callbacks: Optional[Dict[str, Callable]] = None, **kwargs) -> Any:
+        callbacks = callbacks or {}
+        call_id = next(self._ids)
+        done = threading.Event()
+        with self._lock:
+            self._calls[call_id] = {"callbacks": callbacks, "done": done}
+        try:
+            pool = self._ensure_pool()
+            future = pool.submit(_run_in_worker, call_id, fn, args, kwargs, list(callbacks), tracing.current_run_id())
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                self._reset_pool(pool)
+                self._count("failed")
+                raise ExecutorError(f"Worker process died: {e}")
+            except Exception:
+                done.wait(_CALLBACK_DRAIN_TIMEOUT)
+                self._count("failed")
+                raise
+            done.wait(_CALLBACK_DRAIN_TIMEOUT)
+            self._count("completed")
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(call_id, None)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "processes": self.processes,
+                "threads_per_process": self.threads_per_process,
+                "started": self._pool is not None,
+                "active_calls": len(self._calls),
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+            }
+
+    def cpu_allocations(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(allocations, pid=pid) for pid, allocations in sorted(self._worker_cpu.items())]
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._worker_cpu.clear()
+            if pool is not None:
+                self._events.put(None)
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+_executor: Optional[ThreadExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadExecutor:
+    """Return the process-wide executor for EXECUTOR_MODE ("thread" or "process")."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if EXECUTOR_MODE == "process":
+                _executor = ProcessExecutor(EXECUTOR_PROCESSES, preload=EXECUTOR_PRELOAD_MODELS)
+            elif EXECUTOR_MODE == "thread":
+                _executor = ThreadExecutor()
+            else:
+                raise ExecutorError(f"Unknown EXECUTOR_MODE: {EXECUTOR_MODE!r} (expected 'thread' or 'process')")
+        return _executor
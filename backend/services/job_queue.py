@@ -0,0 +1,177 @@
+"""
+Bounded priority job queue with a fixed worker pool.
+
+Pipeline runs are submitted here instead of each getting its own thread, so at most
+`workers` runs download/VAD/chunk at once no matter how many requests arrive. Waiting
+jobs sit in a bounded queue ordered by priority (higher first), then submission order;
+when the queue is full, submit() raises QueueFullError and the API answers 429.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.config import JOB_WORKERS, JOB_QUEUE_MAX
+
+_FINISHED_JOBS_KEPT = 1000
+
+class QueueFullError(Exception):
+    def __init__(self, depth: int, max_queue: int):
+        super().__init__(f"Run queue is full ({depth}/{max_queue} waiting); try again later.")
+        self.depth = depth
+        self.max_queue = max_queue
+
+class JobQueue:
+    """
+    Priority queue + worker threads. Thread-safe. Workers are started on first submit.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 20):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._running = 0
+        self._threads: List[threading.Thread] = []
+        self._recent_waits: List[float] = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, job_id: str, fn: Callable[[], Any], priority: int = 0,
+               on_error: Optional[Callable[[Exception], None]] = None) -> int:
+        """
+        Queue fn() to run on a worker. Returns the job's 1-based queue position.
+        If fn raises, the job finishes with its "error" set and on_error(exc) is called, so
+        the owner can record the failure in its own state.
+        Raises QueueFullError if max_queue jobs are already waiting.
+        """
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(len(self._heap), self.max_queue)
+            job = {"job_id": job_id, "fn": fn, "on_error": on_error, "priority": priority, "state": "queued",
+                   "enqueued_at": time.time(), "started_at": None, "finished_at": None, "error": None}
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job_id))
+            self._ensure_workers()
+            self._cond.notify()
+            return self._position_locked(job_id)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs[job_id]
+                job["state"] = "running"
+                job["started_at"] = time.time()
+                self._running += 1
+                self._recent_waits = (self._recent_waits + [job["started_at"] - job["enqueued_at"]])[-50:]
+            error = None
+            try:
+                job["fn"]()
+            except Exception as e:
+                # Never let a worker die; the failure goes to the job record and its owner
+                error = e
+                if job["on_error"] is not None:
+                    try:
+                        job["on_error"](e)
+                    except Exception:
+                        pass
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self.completed += 1
+                    if error is not None:
+                        self.failed += 1
+                        job["error"] = f"{type(error).__name__}: {error}"
+                    job["state"] = "finished"
+                    job["finished_at"] = time.time()
+                    job["fn"] = job["on_error"] = None
+                    self._prune_locked()
+                    self._cond.notify_all()
+
+    def _prune_locked(self):
+        # Keep bookkeeping for recent finished jobs only
+        finished = [j for j in self._jobs.values() if j["state"] == "finished"]
+        if len(finished) > _FINISHED_JOBS_KEPT:
+            finished.sort(key=lambda j: j["finished_at"])
+            for job in finished[:len(finished) - _FINISHED_JOBS_KEPT]:
+                del self._jobs[job["job_id"]]
+
+    def _position_locked(self, job_id: str) -> int:
+        ordered = sorted(self._heap)
+        for i, (_, _, queued_id) in enumerate(ordered):
+            if queued_id == job_id:
+                return i + 1
+        return 0
+
+    def job_info(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queue view of one job: {"state", "position" (1-based, 0 once running), "depth",
+        "wait_seconds", "priority", "error" (set if the job raised)}, or None for unknown jobs.
+        """
+        now = time.time()
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            started = job["started_at"]
+            return {
+                "state": job["state"],
+                "priority": job["priority"],
+                "position": self._position_locked(job_id) if job["state"] == "queued" else 0,
+                "depth": len(self._heap),
+                "wait_seconds": round((started or now) - job["enqueued_at"], 3),
+                "error": job["error"],
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = self._recent_waits
+            now = time.time()
+            oldest = min((self._jobs[j]["enqueued_at"] for _, _, j in self._heap), default=None)
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "depth": len(self._heap),
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or running (used by tests and shutdown)."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._heap or self._running:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide run queue, built from backend.config on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(JOB_WORKERS, JOB_QUEUE_MAX)
+        return _queue
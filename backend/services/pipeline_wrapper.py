@@ -1,22 +1,52 @@
 import os
 import shutil
 import time
-from src.downloader import download_audio, download_captions, extract_aligned_captions, extract_captions_text
+from src.downloader import download_audio, download_captions, extract_aligned_captions, extract_captions_text, make_time_range
+from src.acquire import acquire_media_sync
 from src.vad import run_silero_vad, VADException
 from src.chunker import create_speech_chunks, ChunkingException
-from src.transcriber import transcribe_chunk, TranscriptionError
+from src.transcriber import transcribe_chunk, transcribe_chunk_cascade, TranscriptionError
+from src.transcript_cache import get_transcript_cache
+from src.media_cache import get_media_cache
+from src.captions import load_captions
 from src.comparator import compare_transcripts
+from src import metrics, tracing
+from src.fileio import atomic_write_text, path_lock, temp_path
+from src.manifest import write_manifest, update_manifest
+from src.profiling import StageRecorder, profile_capture
+from backend.services.cpu_budget import get_cpu_budget
 from backend.config import (
     DEFAULT_SAMPLE_RATE,
     DEFAULT_CHUNK_DURATION,
     DEFAULT_CHUNK_TOLERANCE,
+    STREAMING_INGEST,
+    CONCURRENT_ACQUISITION,
+    AUDIO_DOWNLOAD_TIMEOUT,
+    CAPTIONS_DOWNLOAD_TIMEOUT,
     DEFAULT_OUTPUT_DIR,
     DEFAULT_MODEL_SIZE,
+    DEFAULT_BEAM_SIZE,
+    ASR_CASCADE_ENABLED,
+    ASR_CASCADE_STRONG_MODEL,
+    ASR_CASCADE_MIN_AVG_LOGPROB,
+    ASR_CASCADE_MAX_NO_SPEECH_PROB,
+    ASR_CASCADE_MAX_COMPRESSION_RATIO,
+    ASR_CASCADE_FULL_REDECODE_FRACTION,
+    WHISPER_NUM_WORKERS,
+    TRANSCRIPT_CACHE_ENABLED,
+    TRANSCRIPT_CACHE_DIR,
+    TRANSCRIPT_CACHE_MAX_ENTRIES,
+    MEDIA_CACHE_ENABLED,
+    MEDIA_CACHE_DIR,
+    MEDIA_CACHE_MAX_BYTES,
+    MEDIA_CACHE_VERIFY,
     CHUNKS_DIRNAME,
+    CHUNK_RESULTS_DIRNAME,
     CAPTIONS_FILENAME,
     TRANSCRIPT_FILENAME,
     YOUTUBE_CAPTIONS_TEXT_FILENAME,
-    COMPARISON_FILENAME
+    COMPARISON_FILENAME,
+    PROFILE_BASENAME
 )
 
 class PipelineRunError(Exception):
@@ -27,22 +57,110 @@ def prepare_new_output_dir(run_id: str, base=DEFAULT_OUTPUT_DIR):
     os.makedirs(outdir, exist_ok=True)
     return outdir
 
+def chunk_output_dir(output_dir: str, chunk_path: str) -> str:
+    """Directory of one chunk's transcript and comparison, so chunks of a run never share files."""
+    name = os.path.splitext(os.path.basename(chunk_path))[0]
+    chunk_dir = os.path.join(output_dir, CHUNK_RESULTS_DIRNAME, name)
+    os.makedirs(chunk_dir, exist_ok=True)
+    return chunk_dir
+
+def _metered_progress(progress_fn):
+    # Counts yt-dlp's downloaded_bytes into ytminer_download_bytes_total, then forwards the tick
+    if progress_fn is None:
+        return None
+    last = {"bytes": 0}
+    def metered(stage, info):
+        if stage == "download" and info.get("downloaded_bytes") is not None:
+            downloaded = info["downloaded_bytes"]
+            # A smaller value means yt-dlp started another file (or retried from the start)
+            metrics.DOWNLOAD_BYTES.inc(downloaded - last["bytes"] if downloaded >= last["bytes"] else downloaded)
+            last["bytes"] = downloaded
+        progress_fn(stage, info)
+    return metered
+
+def _audio_seconds(path: str) -> float:
+    # Header read only; 0.0 if the file is not readable audio
+    try:
+        import soundfile as sf
+        return float(sf.info(path).duration)
+    except Exception:
+        return 0.0
+
+def _fraction_progress(progress_fn, stage: str):
+    # Adapts a stage-local fraction callback (VAD, chunking) to progress_fn(stage, info)
+    if progress_fn is None:
+        return None
+    return lambda fraction: progress_fn(stage, {"fraction": round(fraction, 4)})
+
+def _profile_report(capture, output_dir: str):
+    # Profile files as paths relative to the run directory (served by /media like any artifact)
+    report = capture.report()
+    report["files"] = [os.path.relpath(path, output_dir).replace(os.sep, "/") for path in report["files"]]
+    return report
+
 # Initial run: only preprocessing, chunking, no transcription/comparison
-def run_initial_pipeline(run_id: str, youtube_url, language, model_size, sample_rate=DEFAULT_SAMPLE_RATE, chunk_duration=DEFAULT_CHUNK_DURATION, base_output_dir=DEFAULT_OUTPUT_DIR, update_step_fn=None):
+def run_initial_pipeline(run_id: str, youtube_url, language, model_size, sample_rate=DEFAULT_SAMPLE_RATE, chunk_duration=DEFAULT_CHUNK_DURATION, base_output_dir=DEFAULT_OUTPUT_DIR, update_step_fn=None, start_time=None, end_time=None, progress_fn=None, profile=False):
+    """
+    Download, VAD and chunk a video into base_output_dir/run_id. The result's "stages" lists
+    wall/CPU time, peak RSS delta and audio throughput per stage; with profile=True the run is
+    profiled with cProfile and "profile" lists the written profile.pstats/profile.txt.
+    If the run fails, the raised exception carries the same two fields as `run_report`.
+    """
+    output_dir = prepare_new_output_dir(run_id, base_output_dir)
+    stages = StageRecorder()
+    try:
+        with profile_capture(os.path.join(output_dir, PROFILE_BASENAME), enabled=profile) as capture:
+            result = _run_initial_pipeline(run_id, youtube_url, language, model_size, sample_rate, chunk_duration, base_output_dir,
+                                           update_step_fn, start_time, end_time, progress_fn, stages)
+    except Exception as e:
+        # Slow and failed runs are the ones worth explaining; keep what was measured up to the failure
+        e.run_report = {"stages": stages.records(), "profile": _profile_report(capture, output_dir) if profile else None}
+        raise
+    result["stages"] = stages.records()
+    result["profile"] = None
+    if profile:
+        result["profile"] = _profile_report(capture, output_dir)
+        _update_manifest(output_dir, result["profile"]["files"])
+    return result
+
+def _run_initial_pipeline(run_id: str, youtube_url, language, model_size, sample_rate, chunk_duration, base_output_dir, update_step_fn, start_time, end_time, progress_fn, stages: StageRecorder):
+    try:
+        # Optional [start_time, end_time) window: only that section is fetched, VAD'd and chunked
+        time_range = make_time_range(start_time, end_time)
+    except ValueError as e:
+        raise PipelineRunError(f"Invalid time range: {e}")
     output_dir = prepare_new_output_dir(run_id, base_output_dir)
+    progress_fn = _metered_progress(progress_fn)
     if update_step_fn: update_step_fn("downloading")
     audio_path = os.path.join(output_dir, "audio.wav")
     # Find the caption file in output directory after download
     captions_path = None
+    acquisition = None
     try:
-        print(f"[DEBUG] Initial download_audio: {youtube_url} -> {audio_path}")
-        audio_file = download_audio(youtube_url, output_path=audio_path, sample_rate=sample_rate)
+        if STREAMING_INGEST and CONCURRENT_ACQUISITION:
+            print(f"[DEBUG] Initial acquire_media: {youtube_url} -> {output_dir}")
+            # Audio and captions are fetched concurrently, so both are one "download" stage here
+            with tracing.span("acquire_media", url=youtube_url, language=language) as span, stages.stage("download"):
+                acquisition = acquire_media_sync(
+                    youtube_url, audio_path, os.path.join(output_dir, CAPTIONS_FILENAME),
+                    sample_rate=sample_rate, sub_lang=language,
+                    audio_timeout=AUDIO_DOWNLOAD_TIMEOUT, captions_timeout=CAPTIONS_DOWNLOAD_TIMEOUT,
+                    media_cache=_media_cache(), time_range=time_range, progress_fn=progress_fn
+                )
+                span.set(seconds=acquisition["seconds"], cache=acquisition["cache"])
+            audio_file = acquisition["audio_path"]
+        else:
+            print(f"[DEBUG] Initial download_audio: {youtube_url} -> {audio_path}")
+            with tracing.span("download_audio", url=youtube_url), stages.stage("download"):
+                audio_file = download_audio(youtube_url, output_path=audio_path, sample_rate=sample_rate, streaming=STREAMING_INGEST, media_cache=_media_cache(), time_range=time_range, progress_fn=progress_fn)
         if update_step_fn: update_step_fn("vad")
     except Exception as e:
         print(f"[ERROR] Audio download failed: {e}")
         raise PipelineRunError(f"Audio download failed: {e}")
-    # Download captions, but don't assume file name
-    download_captions(youtube_url, output_path=os.path.join(output_dir, CAPTIONS_FILENAME), sub_lang=language)
+    if acquisition is None:
+        # Download captions, but don't assume file name
+        with tracing.span("download_captions", url=youtube_url, language=language), stages.stage("captions"):
+            download_captions(youtube_url, output_path=os.path.join(output_dir, CAPTIONS_FILENAME), sub_lang=language, media_cache=_media_cache())
     # Find any .vtt or .srt file
     for file in os.listdir(output_dir):
         if file.endswith(".vtt") or file.endswith(".srt"):
@@ -50,14 +168,27 @@ def run_initial_pipeline(run_id: str, youtube_url, language, model_size, sample_
             break
     if not captions_path:
         print("[ERROR] No captions to compare; processing stops.")
+        _write_manifest(run_id, output_dir)
         return {
             "run_id": run_id,
             "output_dir": output_dir,
-            "error": "No captions to compare; see output directory for details."
+            "error": "No captions to compare; see output directory for details.",
+            "acquisition": acquisition,
+            "time_range": list(time_range) if time_range else None
         }
+    # Parse the captions once per run; chunk comparisons reuse the persisted cue arrays
+    with tracing.span("index_captions", captions_path=captions_path) as span, stages.stage("index_captions"):
+        span.set(cues=len(load_captions(captions_path)))
+    if time_range:
+        # Comparisons read this file if present, so captions are clipped to the same window as the audio
+        extract_captions_text(captions_path, text_output=os.path.join(output_dir, YOUTUBE_CAPTIONS_TEXT_FILENAME), time_range=time_range)
     try:
         print(f"[DEBUG] Running VAD on {audio_file}")
-        speech_segments = run_silero_vad(audio_file, sampling_rate=sample_rate)
+        audio_seconds = _audio_seconds(audio_file)
+        with get_cpu_budget().allocate("vad", run_id) as threads, tracing.span("vad", wav_path=audio_file, threads=threads) as span, stages.stage("vad") as stage:
+            speech_segments = run_silero_vad(audio_file, sampling_rate=sample_rate, num_threads=threads, progress_fn=_fraction_progress(progress_fn, "vad"))
+            span.set(segments=len(speech_segments))
+            stage.set(audio_seconds=audio_seconds)
         if update_step_fn: update_step_fn("chunking")
     except VADException as e:
         print(f"[ERROR] VAD failed: {e}")
@@ -65,23 +196,48 @@ def run_initial_pipeline(run_id: str, youtube_url, language, model_size, sample_
     chunk_dir = os.path.join(output_dir, CHUNKS_DIRNAME)
     try:
         print(f"[DEBUG] Creating speech chunks in {chunk_dir}")
-        chunks = create_speech_chunks(
-            audio_path=audio_file,
-            speech_segments=speech_segments,
-            chunk_duration=chunk_duration,
-            chunk_tol=DEFAULT_CHUNK_TOLERANCE,
-            chunk_folder=chunk_dir,
-            orig_sr=sample_rate
-        )
+        with tracing.span("chunking", chunk_duration=chunk_duration) as span, stages.stage("chunking") as stage:
+            chunks = create_speech_chunks(
+                audio_path=audio_file,
+                speech_segments=speech_segments,
+                chunk_duration=chunk_duration,
+                chunk_tol=DEFAULT_CHUNK_TOLERANCE,
+                chunk_folder=chunk_dir,
+                orig_sr=sample_rate,
+                time_offset=time_range[0] if time_range else 0.0,
+                progress_fn=_fraction_progress(progress_fn, "chunking")
+            )
+            span.set(chunks=len(chunks))
+            stage.set(audio_seconds=audio_seconds, chunks=len(chunks))
         print(f"[DEBUG] Created {len(chunks)} chunks.")
     except ChunkingException as e:
         print(f"[ERROR] Chunking failed: {e}")
         raise PipelineRunError(f"Chunking failed: {e}")
+    chunk_starts = {os.path.basename(path): round(start, 3) for path, start in chunks}
+    with stages.stage("write_manifest"):
+        _write_manifest(run_id, output_dir, chunk_starts)
     return {
         "run_id": run_id,
-        "output_dir": output_dir
+        "output_dir": output_dir,
+        "acquisition": acquisition,
+        "time_range": list(time_range) if time_range else None,
+        "chunk_starts": chunk_starts
     }
 
+def _write_manifest(run_id: str, output_dir: str, chunk_starts=None):
+    # /result rebuilds a missing manifest, so a failure here never fails the run
+    try:
+        with tracing.span("write_manifest", chunks=len(chunk_starts or {})):
+            write_manifest(run_id, output_dir, chunk_starts)
+    except Exception as e:
+        print(f"[WARN] Could not write run manifest: {e}")
+
+def _update_manifest(output_dir: str, relpaths):
+    try:
+        update_manifest(output_dir, relpaths)
+    except Exception as e:
+        print(f"[WARN] Could not update run manifest: {e}")
+
 # --- Helper: Parse compare_result for reasons ---
 def parse_compare_result(compare_result: str):
     lines = compare_result.splitlines()
@@ -108,41 +264,126 @@ def parse_compare_result(compare_result: str):
             caption.append(line)
     return " ".join(asr).strip(), " ".join(caption).strip()
 
+def _media_cache():
+    if not MEDIA_CACHE_ENABLED:
+        return None
+    return get_media_cache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, verify=MEDIA_CACHE_VERIFY)
+
+def _transcript_cache():
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return None
+    return get_transcript_cache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_ENTRIES)
+
 # On-demand chunk process for transcript+compare
-def process_chunk_for_comparison(run_id: str, chunk_path: str, youtube_url: str, language: str, model_size: str, base_output_dir=DEFAULT_OUTPUT_DIR):
+def process_chunk_for_comparison(run_id: str, chunk_path: str, youtube_url: str, language: str, model_size: str, base_output_dir=DEFAULT_OUTPUT_DIR, cascade=None, profile=False, segment_fn=None):
+    """
+    Transcribe one chunk and compare it with the run's captions. Like run_initial_pipeline, the
+    result carries per-stage "stages" and, with profile=True, a "profile" written to the chunk's
+    chunk_results/<chunk>/ directory. segment_fn, if given, receives each {"start", "end", "text"}
+    segment as soon as it is decoded (with cascade: once the cascade has settled it).
+    """
+    with tracing.run_context(run_id):
+        return _process_chunk_for_comparison(run_id, chunk_path, youtube_url, language, model_size, base_output_dir, cascade, profile, segment_fn)
+
+def _process_chunk_for_comparison(run_id: str, chunk_path: str, youtube_url: str, language: str, model_size: str, base_output_dir=DEFAULT_OUTPUT_DIR, cascade=None, profile=False, segment_fn=None):
     output_dir = prepare_new_output_dir(run_id, base_output_dir)
-    transcript_path = os.path.join(output_dir, TRANSCRIPT_FILENAME)
     chunk_file = os.path.normpath(chunk_path)
+    chunk_dir = chunk_output_dir(output_dir, chunk_file)
+    stages = StageRecorder()
+    # Other chunks of the run proceed in parallel; only the same chunk (e.g. cascade on and off) waits
+    with path_lock(os.path.join(chunk_dir, ".lock")):
+        with profile_capture(os.path.join(chunk_dir, PROFILE_BASENAME), enabled=profile) as capture:
+            result = _transcribe_and_compare_chunk(run_id, output_dir, chunk_dir, chunk_file, language, model_size, cascade, stages, segment_fn)
+    result["stages"] = stages.records()
+    result["profile"] = _profile_report(capture, output_dir) if profile else None
+    return result
+
+def _transcribe_and_compare_chunk(run_id: str, output_dir: str, chunk_dir: str, chunk_file: str, language: str, model_size: str, cascade, stages: StageRecorder, segment_fn=None):
+    transcript_path = os.path.join(chunk_dir, TRANSCRIPT_FILENAME)
+    model_size = model_size or DEFAULT_MODEL_SIZE
+    if cascade is None:
+        cascade = ASR_CASCADE_ENABLED
+    # Cascading only makes sense when the strong model is actually larger
+    cascade = cascade and model_size != ASR_CASCADE_STRONG_MODEL
+    cascade_report = None
     print(f"[DEBUG] [PROCESS] Starting transcript & compare for CHUNK: {chunk_file}")
     # Transcribe
     try:
-        whisper_text, asr_end_time = transcribe_chunk(
-            chunk_file,
-            output_path=transcript_path,
-            language=language,
-            model_size=model_size or DEFAULT_MODEL_SIZE
-        )
-        with open(transcript_path, "w", encoding="utf-8") as x:
-            x.write(whisper_text.strip() + "\n")
+        audio_seconds = _audio_seconds(chunk_file)
+        with get_cpu_budget().allocate("asr", run_id) as threads, tracing.span("transcribe", chunk_path=chunk_file, model_size=model_size, cascade=cascade, threads=threads), stages.stage("transcribe") as stage:
+            stage.set(audio_seconds=audio_seconds)
+            if cascade:
+                whisper_text, asr_end_time, cascade_report = transcribe_chunk_cascade(
+                    chunk_file,
+                    output_path=transcript_path,
+                    fast_model_size=model_size,
+                    strong_model_size=ASR_CASCADE_STRONG_MODEL,
+                    language=language,
+                    beam_size=DEFAULT_BEAM_SIZE,
+                    thresholds={
+                        "min_avg_logprob": ASR_CASCADE_MIN_AVG_LOGPROB,
+                        "max_no_speech_prob": ASR_CASCADE_MAX_NO_SPEECH_PROB,
+                        "max_compression_ratio": ASR_CASCADE_MAX_COMPRESSION_RATIO,
+                    },
+                    full_redecode_fraction=ASR_CASCADE_FULL_REDECODE_FRACTION,
+                    use_cache=TRANSCRIPT_CACHE_ENABLED,
+                    cache=_transcript_cache(),
+                    cpu_threads=threads,
+                    num_workers=WHISPER_NUM_WORKERS,
+                    segment_fn=segment_fn
+                )
+            else:
+                whisper_text, asr_end_time = transcribe_chunk(
+                    chunk_file,
+                    output_path=transcript_path,
+                    language=language,
+                    model_size=model_size,
+                    beam_size=DEFAULT_BEAM_SIZE,
+                    use_cache=TRANSCRIPT_CACHE_ENABLED,
+                    cache=_transcript_cache(),
+                    cpu_threads=threads,
+                    num_workers=WHISPER_NUM_WORKERS,
+                    segment_fn=segment_fn
+                )
+        atomic_write_text(transcript_path, whisper_text.strip() + "\n")
         print(f"[DEBUG] Wrote transcript to: {transcript_path}")
     except TranscriptionError as e:
         print(f"[ERROR] Transcription failed for {chunk_file}: {e}")
         raise PipelineRunError(f"Transcription failed: {e}")
-    # Find the captions file for comparison (.vtt or .srt)
-    captions_file = None
-    for file in os.listdir(output_dir):
-        if file.endswith(".vtt") or file.endswith(".srt"):
-            captions_file = os.path.join(output_dir, file)
-            break
-    if not captions_file or not os.path.exists(captions_file):
-        raise PipelineRunError("No caption file (.vtt or .srt) found for comparison.")
+    result = _compare_chunk_transcript(run_id, output_dir, chunk_dir, whisper_text, transcript_path, stages)
+    result["cascade"] = cascade_report
+    return result
+
+def run_captions_text(output_dir: str) -> str:
+    """
+    Plain caption text of a run, shared by all of its chunks: extracted from the .vtt/.srt
+    once (under a per-run lock, atomically) and read from youtube_captions.txt afterwards.
+    """
     caption_text_path = os.path.join(output_dir, YOUTUBE_CAPTIONS_TEXT_FILENAME)
-    if not os.path.exists(caption_text_path):
-        extract_captions_text(captions_file, text_output=caption_text_path)
+    with path_lock(os.path.join(output_dir, ".captions.lock")):
+        if not os.path.exists(caption_text_path):
+            # Find the captions file for comparison (.vtt or .srt)
+            captions_file = None
+            for file in sorted(os.listdir(output_dir)):
+                if file.endswith(".vtt") or file.endswith(".srt"):
+                    captions_file = os.path.join(output_dir, file)
+                    break
+            if not captions_file:
+                raise PipelineRunError("No caption file (.vtt or .srt) found for comparison.")
+            tmp_path = temp_path(caption_text_path)
+            extract_captions_text(captions_file, text_output=tmp_path)
+            os.replace(tmp_path, caption_text_path)
     with open(caption_text_path, "r", encoding="utf-8") as f:
-        captions_text = f.read()
-    compare_path = os.path.join(output_dir, COMPARISON_FILENAME)
-    compare_transcripts(whisper_text, captions_text, output_path=compare_path)
+        return f.read()
+
+def _compare_chunk_transcript(run_id: str, output_dir: str, chunk_dir: str, whisper_text: str, transcript_path: str, stages: StageRecorder):
+    captions_text = run_captions_text(output_dir)
+    compare_path = os.path.join(chunk_dir, COMPARISON_FILENAME)
+    with get_cpu_budget().allocate("embedding", run_id) as threads, tracing.span("compare", threads=threads), stages.stage("compare"):
+        # Rename into place so readers never see a partial report
+        tmp_compare_path = temp_path(compare_path)
+        compare_transcripts(whisper_text, captions_text, output_path=tmp_compare_path, num_threads=threads)
+        os.replace(tmp_compare_path, compare_path)
     compare_result = None
     similarity_percent = None
     with open(compare_path, "r", encoding="utf-8") as f:
@@ -0,0 +1,81 @@
+"""
+Background retention of run outputs under DEFAULT_OUTPUT_DIR (ledger and policies: src/retention.py).
+
+Runs are recorded in the ledger when they end (done or error) and whenever chunk processing
+writes new files; API reads (/result, /media, /download) touch them. A daemon thread started
+with the app first records run directories the ledger does not know yet, then calls enforce()
+every RETENTION_INTERVAL_SECONDS, skipping runs that are still queued or running and runs
+with chunk jobs in flight.
+"""
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from src.retention import RetentionManager, get_retention_manager
+from backend.config import (
+    DEFAULT_OUTPUT_DIR,
+    RETENTION_LEDGER_PATH,
+    RETENTION_MAX_BYTES,
+    RETENTION_INTERVAL_SECONDS,
+    RETENTION_POLICIES,
+)
+
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+_worker_lock = threading.Lock()
+
+def get_retention() -> RetentionManager:
+    """Return the process-wide RetentionManager, built from backend.config."""
+    return get_retention_manager(DEFAULT_OUTPUT_DIR, RETENTION_LEDGER_PATH, RETENTION_MAX_BYTES, RETENTION_POLICIES)
+
+def record_run_files(run_id: str, relpaths: Optional[Iterable[str]] = None):
+    """Record new/rewritten files of run_id (all of its directory if relpaths is None). Never raises."""
+    try:
+        if relpaths is None:
+            get_retention().record_run(run_id)
+        else:
+            get_retention().record_files(run_id, relpaths)
+    except Exception as e:
+        print(f"[Retention] Could not record files of {run_id}: {e}")
+
+def active_run_ids() -> Set[str]:
+    from backend.services.run_manager import run_states
+    from backend.services.chunk_jobs import get_chunk_jobs
+    active = {run_id for run_id, state in list(run_states.items()) if state.get("step") not in ("done", "error")}
+    return active | get_chunk_jobs().active_run_ids()
+
+def enforce_retention() -> Dict[str, Any]:
+    return get_retention().enforce(protected=active_run_ids())
+
+def record_untracked_runs():
+    try:
+        recorded = get_retention().record_untracked_runs()
+    except Exception as e:
+        print(f"[Retention] Could not scan for untracked runs: {e}")
+        return
+    if recorded:
+        print(f"[Retention] Recorded {len(recorded)} run(s) missing from the ledger")
+
+def _loop():
+    record_untracked_runs()
+    while not _stop.wait(RETENTION_INTERVAL_SECONDS):
+        try:
+            enforce_retention()
+        except Exception as e:
+            print(f"[Retention] Enforcement failed: {e}")
+
+def start_retention_worker() -> bool:
+    """Start the background enforcement thread (once). Returns False if it was already running."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return False
+        _stop.clear()
+        _worker = threading.Thread(target=_loop, name="retention", daemon=True)
+        _worker.start()
+        return True
+
+def stop_retention_worker():
+    global _worker
+    with _worker_lock:
+        _stop.set()
+        _worker = None
@@ -1,55 +1,222 @@
+import functools
+import os
 import threading
 import time
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Optional, Tuple
 from backend.services.pipeline_wrapper import run_initial_pipeline, PipelineRunError
-from backend.services.storage import save_run_state, load_run_state
-from backend.config import PIPELINE_STEPS
+from backend.services.storage import save_run_state, load_run_state, delete_run_state, record_stage_timing, get_run_store
+from backend.services.job_queue import get_job_queue
+from backend.services.executor import get_executor
+from backend.services.status_broker import get_status_broker
+from backend.services.retention import get_retention, record_run_files
+from backend.config import PIPELINE_STEPS, RUN_COALESCE_ENABLED, RUN_COALESCE_TTL_SECONDS
+from src.media_cache import parse_video_id
+from src import metrics, tracing
 
+# Authoritative state of the runs started by this process; the JSON files are for durability
+# and for runs from earlier processes. Every change is published to the status broker.
 run_states: Dict[str, Dict[str, Any]] = {}
+# Live per-stage progress, kept in memory only: ticks arrive many times per second and must
+# not rewrite the JSON state file. A final snapshot is persisted when the run ends.
+run_progress: Dict[str, Dict[str, Dict[str, Any]]] = {}
+# Coalescing: submission key -> run_id of the latest run started for it
+_coalesce_index: Dict[tuple, str] = {}
+_submit_lock = threading.Lock()
+# Run arguments that change what a run produces (priority only affects scheduling)
+COALESCE_KEY_FIELDS = ("language", "model_size", "cascade", "start_time", "end_time")
+
+RUN_SECONDS = metrics.histogram("ytminer_run_seconds", "Wall time of initial pipeline runs, by outcome (done or error).", ("outcome",))
+RUNS = metrics.gauge("ytminer_runs", "Runs started by this process, by current step.", ("step",))
+
+def _runs_by_step() -> Dict[tuple, int]:
+    counts: Dict[tuple, int] = {}
+    for state in list(run_states.values()):
+        key = (state.get("step") or "unknown",)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+RUNS.set_function(_runs_by_step)
+
+def new_run_id() -> str:
+    # Seconds prefix keeps IDs ordered by creation time; the random suffix makes them collision-free
+    return f"run_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+def coalesce_key(run_args: dict) -> tuple:
+    url = run_args.get("youtube_url") or ""
+    # Different URL forms of one video (youtu.be, watch?v=, shorts/) share a key
+    return (parse_video_id(url) or url,) + tuple(run_args.get(field) for field in COALESCE_KEY_FIELDS)
+
+def _coalescable_run(key: tuple) -> Optional[str]:
+    run_id = _coalesce_index.get(key)
+    state = run_states.get(run_id) if run_id else None
+    if not state:
+        return None
+    if state["step"] == "done":
+        result = state.get("result") or {}
+        fresh = time.time() - state.get("finished_at", 0) <= RUN_COALESCE_TTL_SECONDS
+        usable = not result.get("error") and os.path.isdir(result.get("output_dir") or "") and not get_retention().tombstones(run_id)
+        return run_id if fresh and usable else None
+    if state["step"] == "error":
+        return None
+    # Not finished: only attach if the job is really still queued or running
+    info = get_job_queue().job_info(run_id)
+    return run_id if info and info["state"] != "finished" else None
+
+def _commit_state(run_id: str):
+    save_run_state(run_id, run_states[run_id])
+    get_status_broker().publish(run_id)
+
+def _set_step(run_id: str, step: str):
+    # Closes the previous step's timing (stage_timings table) and starts the new one
+    state = run_states[run_id]
+    if state.get("step") == step:
+        return
+    now = time.time()
+    if state.get("step") and state.get("step_started_at"):
+        record_stage_timing(run_id, state["step"], state["step_started_at"], round(now - state["step_started_at"], 3))
+    state["step"] = step
+    state["step_started_at"] = round(now, 3)
 
 def update_pipeline_step(run_id: str, step: str):
     if run_id in run_states:
-        run_states[run_id]["step"] = step
-        save_run_state(run_id, run_states[run_id])
+        _set_step(run_id, step)
+        _commit_state(run_id)
+
+def update_run_progress(run_id: str, stage: str, info: Dict[str, Any]):
+    stages = run_progress.setdefault(run_id, {})
+    stages[stage] = dict(info, updated_at=round(time.time(), 3))
+    get_status_broker().publish(run_id)
+
+def _persist_progress(run_id: str):
+    if run_id in run_progress:
+        run_states[run_id]["progress"] = run_progress.pop(run_id)
 
 def background_run(run_args: dict, run_id: str):
+    with tracing.run_context(run_id):
+        _background_run(run_args, run_id)
+
+def _background_run(run_args: dict, run_id: str):
+    started = time.perf_counter()
     try:
         print(f"[Pipeline] Started for {run_id} with args: {run_args}")
-        run_states[run_id]["step"] = "downloading"
-        save_run_state(run_id, run_states[run_id])
+        _set_step(run_id, "downloading")
+        _commit_state(run_id)
         initial_args = run_args.copy()
         initial_args.pop("chunk_index", None)
-        result = run_initial_pipeline(run_id=run_id, update_step_fn=lambda step: update_pipeline_step(run_id, step), **initial_args)
-        run_states[run_id]["step"] = "done"
+        initial_args.pop("cascade", None)  # Only used for chunk processing
+        initial_args.pop("priority", None)  # Only used for queueing
+        result = get_executor().call(
+            run_initial_pipeline,
+            run_id=run_id,
+            callbacks={
+                "update_step_fn": lambda step: update_pipeline_step(run_id, step),
+                "progress_fn": lambda stage, info: update_run_progress(run_id, stage, info),
+            },
+            **initial_args
+        )
+        _persist_progress(run_id)
+        _set_step(run_id, "done")
+        run_states[run_id]["finished_at"] = round(time.time(), 3)
         run_states[run_id]["result"] = result
         run_states[run_id]["args"] = run_args  # Persist original args for chunk processing
         run_states[run_id]["error"] = None
-        save_run_state(run_id, run_states[run_id])
+        _commit_state(run_id)
+        RUN_SECONDS.observe(time.perf_counter() - started, outcome="done")
         print(f"[Pipeline] Done for {run_id} -> {result}")
     except PipelineRunError as err:
-        run_states[run_id]["step"] = "error"
-        run_states[run_id]["error"] = str(err)
-        save_run_state(run_id, run_states[run_id])
+        _fail_run(run_id, str(err), getattr(err, "run_report", None))
+        RUN_SECONDS.observe(time.perf_counter() - started, outcome="error")
         print(f"[Pipeline ERROR] {run_id}: {err}")
     except Exception as e:
-        run_states[run_id]["step"] = "error"
-        run_states[run_id]["error"] = f"Unknown error: {e}"
-        save_run_state(run_id, run_states[run_id])
+        _fail_run(run_id, f"Unknown error: {e}", getattr(e, "run_report", None))
+        RUN_SECONDS.observe(time.perf_counter() - started, outcome="error")
         print(f"[Pipeline FATAL ERROR] {run_id}: {e}")
+    finally:
+        # Failed runs can leave audio and partial chunks behind; they are evicted like any other
+        record_run_files(run_id)
+        _release_status(run_id)
 
-def start_pipeline_run(run_args: dict) -> str:
-    run_id = f"run_{int(time.time())}"
-    run_states[run_id] = {"step": "starting", "error": None, "result": None, "args": run_args}
-    save_run_state(run_id, run_states[run_id])
-    thread = threading.Thread(target=background_run, args=(run_args, run_id))
-    thread.start()
-    return run_id
+def _release_status(run_id: str):
+    # A finished run's status never changes again; release its version counter once waiters have it
+    if run_states.get(run_id, {}).get("step") in ("done", "error"):
+        get_status_broker().forget(run_id)
+
+def _fail_run(run_id: str, message: str, report: Optional[Dict[str, Any]] = None):
+    _persist_progress(run_id)
+    _set_step(run_id, "error")
+    run_states[run_id]["error"] = message
+    if report:
+        # Stage records (and profile files) of the failed attempt: {"stages": [...], "profile": ...}
+        run_states[run_id]["stages"] = report.get("stages")
+        run_states[run_id]["profile"] = report.get("profile")
+    _commit_state(run_id)
+
+def _run_job_failed(run_id: str, error: Exception):
+    # background_run records its own failures; this covers anything that escaped it
+    state = run_states.get(run_id)
+    if state is not None and state.get("step") not in ("done", "error"):
+        _fail_run(run_id, f"Unknown error: {error}")
+        _release_status(run_id)
+
+def start_pipeline_run(run_args: dict) -> Tuple[str, bool]:
+    """
+    Queue a pipeline run on the shared worker pool. Returns (run_id, coalesced).
+    With coalescing on (RUN_COALESCE_ENABLED, or run_args["coalesce"]), a submission identical
+    to an in-flight run, or to one finished within RUN_COALESCE_TTL_SECONDS, returns that run's
+    id instead of starting new work; the run's record counts the attached submissions.
+    Raises job_queue.QueueFullError when the queue is at capacity (nothing is recorded then).
+    """
+    coalesce = run_args.pop("coalesce", None)
+    if coalesce is None:
+        coalesce = RUN_COALESCE_ENABLED
+    key = coalesce_key(run_args)
+    with _submit_lock:
+        # A profiling request needs work of its own to profile
+        existing = _coalescable_run(key) if coalesce and not run_args.get("profile") else None
+        if existing:
+            state = run_states[existing]
+            state["coalesced_submissions"] = state.get("coalesced_submissions", 0) + 1
+            state["last_coalesced_at"] = round(time.time(), 3)
+            _commit_state(existing)
+            _release_status(existing)
+            print(f"[Pipeline] Submission attached to {existing}")
+            return existing, True
+        run_id = new_run_id()
+        now = round(time.time(), 3)
+        run_states[run_id] = {"step": "queued", "error": None, "result": None, "args": run_args,
+                              "created_at": now, "step_started_at": now, "coalesced_submissions": 0}
+        # Saved before submitting so a worker's first state write can never be overwritten by ours
+        _commit_state(run_id)
+        try:
+            get_job_queue().submit(run_id, functools.partial(background_run, run_args, run_id), priority=run_args.get("priority") or 0,
+                                   on_error=functools.partial(_run_job_failed, run_id))
+        except Exception:
+            run_states.pop(run_id, None)
+            delete_run_state(run_id)
+            raise
+        _coalesce_index[key] = run_id
+    return run_id, False
 
 def get_run_status(run_id: str):
-    state = load_run_state(run_id)
+    """
+    Status snapshot of run_id. Served from memory for runs of this process (no disk read);
+    "version" increases with every change and can be passed to the long-poll/SSE endpoints.
+    """
+    state = run_states.get(run_id) or load_run_state(run_id)
     if not state:
         return {"run_id": run_id, "step": "not_found", "error_message": "No such run."}
-    return {"run_id": run_id, "step": state["step"], "error_message": state["error"]}
+    progress = run_progress.get(run_id) or state.get("progress")
+    return {
+        "run_id": run_id,
+        "step": state["step"],
+        "error_message": state["error"],
+        "progress": progress,
+        "queue": get_job_queue().job_info(run_id),
+        "coalesced_submissions": state.get("coalesced_submissions", 0),
+        "stages": state.get("stages"),
+        "version": get_status_broker().version(run_id),
+    }
 
 def get_run_result(run_id: str):
     state = load_run_state(run_id)
@@ -60,8 +227,17 @@ def get_run_result(run_id: str):
         state["result"]["args"] = state["args"]
     return state["result"]
 
-def get_all_runs():
-    return [
-        {"run_id": rid, "step": st["step"], "args": st.get("args", {}), "result": st.get("result", None)}
-        for rid, st in run_states.items()
-    ]
+def get_run_history(limit: int = 50, cursor: Optional[str] = None, step: Optional[str] = None,
+                    youtube_url: Optional[str] = None, created_after: Optional[float] = None,
+                    created_before: Optional[float] = None) -> Dict[str, Any]:
+    """Page of stored runs, newest first: {"runs": [...], "next_cursor"} (see RunStore.list_runs)."""
+    return get_run_store().list_runs(limit=limit, cursor=cursor, step=step, youtube_url=youtube_url,
+                                     created_after=created_after, created_before=created_before)
+
+def get_run_details(run_id: str) -> Optional[Dict[str, Any]]:
+    """Stored state of run_id plus its stage timings and chunk results, or None."""
+    state = load_run_state(run_id)
+    if not state:
+        return None
+    store = get_run_store()
+    return {"run_id": run_id, "state": state, "stage_timings": store.stage_timings(run_id), "chunk_results": store.chunk_results(run_id)}
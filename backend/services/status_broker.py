@@ -0,0 +1,94 @@
+"""
+Change notifications for run status.
+
+Every change to a run's in-memory state (step transition, progress tick, completion) bumps
+that run's version and wakes the clients waiting on it, so /status/{run_id}/events (SSE)
+and /status/{run_id}?since=&wait= (long-poll) push updates instead of being polled.
+Waiters are asyncio events resolved from whichever thread published the change.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Set, Tuple
+
+class StatusBroker:
+    """
+    Per-run version counters plus the asyncio waiters subscribed to them. Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        # Forgotten while clients were still waiting: dropped when the last one leaves
+        self._retiring: Set[str] = set()
+        self.published = 0
+
+    def version(self, run_id: str) -> int:
+        with self._lock:
+            return self._versions.get(run_id, 0)
+
+    def publish(self, run_id: str) -> int:
+        """Record a change to run_id and wake its waiters. Returns the new version."""
+        with self._lock:
+            version = self._versions.get(run_id, 0) + 1
+            self._versions[run_id] = version
+            self.published += 1
+            waiters = list(self._waiters.get(run_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that client's event loop is already closed
+        return version
+
+    async def wait(self, run_id: str, since: int, timeout: float) -> int:
+        """
+        Return run_id's version as soon as it is greater than `since`, or the
+        current version once `timeout` seconds pass without a change.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._versions.get(run_id, 0) > since:
+                return self._versions[run_id]
+            self._waiters.setdefault(run_id, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                version = self._versions.get(run_id, 0)
+                waiters = self._waiters.get(run_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[run_id]
+                        if run_id in self._retiring:
+                            self._retiring.discard(run_id)
+                            self._versions.pop(run_id, None)
+        return version
+
+    def forget(self, run_id: str):
+        """
+        Drop run_id's version counter once it can no longer change (a finished run or job).
+        With clients still waiting, it is dropped when the last of them is released.
+        """
+        with self._lock:
+            if run_id in self._waiters:
+                self._retiring.add(run_id)
+            else:
+                self._versions.pop(run_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": len(self._versions),
+                "subscribers": sum(len(w) for w in self._waiters.values()),
+                "published": self.published,
+            }
+
+_broker = StatusBroker()
+
+def get_status_broker() -> StatusBroker:
+    """Return the process-wide StatusBroker."""
+    return _broker
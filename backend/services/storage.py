@@ -1,27 +1,274 @@
-import os
+"""
+Run store: SQLite database (WAL mode) holding run records, per-stage timings and per-chunk results.
+
+Each run is one row whose `state` column holds the full state dict as JSON; the fields
+history queries filter on (step, URL, creation time) are also stored as indexed columns.
+Step changes update one row instead of rewriting a whole file, and WAL lets /history
+and /status readers run alongside writers. Runs saved as JSON files in backend/runs/ by
+older versions are still readable (load_run_state falls back to them) and can be copied
+into the database with:
+    python -m backend.services.storage import-json
+"""
+import base64
 import json
-from typing import Any, Dict
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.media_cache import parse_video_id
 
 RUNS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "runs")
 print(f"[DEBUG] RUNS_DIR resolved to: {RUNS_DIR}")
+RUN_DB_PATH = os.environ.get("YTMINER_RUN_DB", os.path.join(RUNS_DIR, "runs.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    step TEXT NOT NULL,
+    youtube_url TEXT,
+    video_id TEXT,
+    language TEXT,
+    model_size TEXT,
+    error TEXT,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_step ON runs (step, created_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_url ON runs (youtube_url, created_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_video ON runs (video_id, created_at DESC, run_id DESC);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE TABLE IF NOT EXISTS chunk_results (
+    run_id TEXT NOT NULL,
+    chunk TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    similarity_percent REAL,
+    model_size TEXT,
+    result TEXT NOT NULL,
+    PRIMARY KEY (run_id, chunk)
+);
+"""
+
+_HISTORY_COLUMNS = "run_id, created_at, updated_at, step, youtube_url, video_id, language, model_size, error"
+
+class RunStoreError(Exception):
+    pass
+
+def _created_at(run_id: str, state: Dict[str, Any]) -> float:
+    if state.get("created_at"):
+        return float(state["created_at"])
+    # run_<unix seconds>[_<suffix>]
+    try:
+        return float(run_id.split("_")[1])
+    except (IndexError, ValueError):
+        return time.time()
+
+def encode_cursor(created_at: float, run_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, run_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(created_at), str(run_id)
+    except (ValueError, TypeError):
+        raise RunStoreError("Invalid cursor.")
+
+class RunStore:
+    """
+    SQLite-backed store of runs, stage timings and chunk results. Thread-safe: every thread
+    gets its own connection.
+    """
+
+    def __init__(self, db_path: str = RUN_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialised:
+                    conn.executescript(_SCHEMA)
+                    self._initialised = True
+        return conn
+
+    def save_run(self, run_id: str, state: Dict[str, Any]):
+        args = state.get("args") or {}
+        url = args.get("youtube_url")
+        now = time.time()
+        self._conn().execute(
+            """INSERT INTO runs (run_id, created_at, updated_at, step, youtube_url, video_id, language, model_size, error, state)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(run_id) DO UPDATE SET updated_at=excluded.updated_at, step=excluded.step,
+                   youtube_url=excluded.youtube_url, video_id=excluded.video_id, language=excluded.language,
+                   model_size=excluded.model_size, error=excluded.error, state=excluded.state""",
+            (run_id, _created_at(run_id, state), now, state.get("step") or "unknown", url,
+             parse_video_id(url) if url else None, args.get("language"), args.get("model_size"),
+             state.get("error"), json.dumps(state)),
+        )
+
+    def load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT state FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row["state"]) if row else None
+
+    def delete_run(self, run_id: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            for table in ("runs", "stage_timings", "chunk_results"):
+                conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+    def record_stage(self, run_id: str, stage: str, started_at: float, seconds: float):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO stage_timings (run_id, stage, started_at, seconds) VALUES (?, ?, ?, ?)",
+            (run_id, stage, started_at, seconds),
+        )
+
+    def stage_timings(self, run_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT stage, started_at, seconds FROM stage_timings WHERE run_id = ? ORDER BY started_at", (run_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_chunk_result(self, run_id: str, chunk: str, result: Dict[str, Any]):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO chunk_results (run_id, chunk, created_at, similarity_percent, model_size, result) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, chunk, time.time(), result.get("similarity_percent"), result.get("model_size"), json.dumps(result)),
+        )
+
+    def chunk_results(self, run_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT chunk, created_at, similarity_percent, model_size, result FROM chunk_results WHERE run_id = ? ORDER BY chunk", (run_id,)
+        ).fetchall()
+        return [dict(row, result=json.loads(row["result"])) for row in rows]
+
+    def list_runs(self, limit: int = 50, cursor: Optional[str] = None, step: Optional[str] = None,
+                  youtube_url: Optional[str] = None, created_after: Optional[float] = None,
+                  created_before: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Runs newest first, `limit` per page. Returns {"runs": [...], "next_cursor"}; pass
+        next_cursor back to get the following page (keyset pagination: cost does not grow
+        with the page number). youtube_url matches any URL form of the same video.
+        """
+        clauses, params = [], []
+        if step:
+            clauses.append("step = ?")
+            params.append(step)
+        if youtube_url:
+            video_id = parse_video_id(youtube_url)
+            clauses.append("video_id = ?" if video_id else "youtube_url = ?")
+            params.append(video_id or youtube_url)
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        if cursor:
+            created_at, run_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND run_id < ?))")
+            params.extend([created_at, created_at, run_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(int(limit), 500))
+        rows = self._conn().execute(
+            f"SELECT {_HISTORY_COLUMNS} FROM runs {where} ORDER BY created_at DESC, run_id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        runs = [dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(runs[-1]["created_at"], runs[-1]["run_id"]) if len(rows) > limit else None
+        return {"runs": runs, "next_cursor": next_cursor}
+
+    def import_json_dir(self, runs_dir: str = RUNS_DIR) -> Dict[str, int]:
+        """
+        Copy run_*.json files from runs_dir into the database. Runs already in the database
+        are left alone, so the import can be re-run safely. Returns counts.
+        """
+        imported = skipped = failed = 0
+        conn = self._conn()
+        for name in sorted(os.listdir(runs_dir)) if os.path.isdir(runs_dir) else []:
+            if not (name.startswith("run_") and name.endswith(".json")):
+                continue
+            run_id = name[:-len(".json")]
+            try:
+                with open(os.path.join(runs_dir, name), "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Import] Skipping unreadable {name}: {e}")
+                failed += 1
+                continue
+            if conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+                skipped += 1
+                continue
+            state.setdefault("created_at", _created_at(run_id, state))
+            self.save_run(run_id, state)
+            imported += 1
+        return {"imported": imported, "skipped": skipped, "failed": failed}
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+def get_run_store() -> RunStore:
+    """Return the process-wide RunStore at RUN_DB_PATH."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RunStore(RUN_DB_PATH)
+        return _store
 
 def ensure_runs_dir():
     if not os.path.exists(RUNS_DIR):
         os.makedirs(RUNS_DIR, exist_ok=True)
 
 def run_state_path(run_id: str) -> str:
+    # Legacy per-run JSON file (read-only fallback)
     return os.path.join(RUNS_DIR, f"{run_id}.json")
 
 def save_run_state(run_id: str, state: Dict[str, Any]):
-    ensure_runs_dir()
-    path = run_state_path(run_id)
-    print(f"[Save] Writing to {path}")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(state, f)
+    get_run_store().save_run(run_id, state)
 
 def load_run_state(run_id: str) -> Dict[str, Any]:
+    state = get_run_store().load_run(run_id)
+    if state is not None:
+        return state
     path = run_state_path(run_id)
-    print(f"[Load] Reading from {path}")
     if not os.path.exists(path): return None
+    print(f"[Load] Reading legacy run file {path}")
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def record_stage_timing(run_id: str, stage: str, started_at: float, seconds: float):
+    get_run_store().record_stage(run_id, stage, started_at, seconds)
+
+def save_chunk_result(run_id: str, chunk: str, result: Dict[str, Any]):
+    get_run_store().save_chunk_result(run_id, chunk, result)
+
+def delete_run_state(run_id: str):
+    get_run_store().delete_run(run_id)
+    path = run_state_path(run_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run store maintenance.")
+    parser.add_argument("command", choices=["import-json"], help="import-json: copy backend/runs/run_*.json into the database")
+    parser.add_argument("--runs-dir", default=RUNS_DIR)
+    args = parser.parse_args()
+    print(get_run_store().import_json_dir(args.runs_dir))
@@ -0,0 +1,160 @@
+"""
+Shared fixtures for backend tests.
+
+`stub_media_tools` puts fake `yt-dlp` and `ffmpeg` executables first on PATH so the
+download paths can be exercised end to end without network or real media tools:
+- yt-dlp streams a fixture stereo 44.1 kHz WAV to stdout for `-o -`, writes it to the
+  output template otherwise, and writes a fixture VTT for `--skip-download`.
+  `--download-sections "*START-END"` trims the media to that section; `--progress-template`
+  lines are printed on stderr.
+- ffmpeg decodes WAV from stdin or a file, honours `-ac`/`-ar`, and writes PCM16 WAV;
+  `-progress pipe:1` prints progress blocks on stdout.
+Every invocation's argv is appended to `calls.jsonl`.
+Set STUB_YTDLP_FAIL=1 or STUB_YTDLP_SLEEP=<seconds> to simulate failures and slow downloads.
+"""
+import json
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Tests patch pipeline functions in-process, so pipeline work must not move to worker processes
+os.environ.setdefault("YTMINER_EXECUTOR_MODE", "thread")
+# Runs recorded by tests go to a throwaway database, not backend/runs/
+os.environ.setdefault("YTMINER_RUN_DB", os.path.join(tempfile.mkdtemp(prefix="ytminer-test-runs-"), "runs.sqlite3"))
+os.environ.setdefault("YTMINER_RETENTION_LEDGER", os.path.join(tempfile.mkdtemp(prefix="ytminer-test-retention-"), "retention.sqlite3"))
+
+FIXTURE_VTT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000
+hello from the stub captions
+
+00:00:02.000 --> 00:00:04.000
+second line of speech here
+"""
+
+YTDLP_STUB = '''
+import json, os, sys, time
+args = sys.argv[1:]
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write(json.dumps({"tool": "yt-dlp", "argv": args}) + "\\n")
+if os.environ.get("STUB_YTDLP_SLEEP"):
+    time.sleep(float(os.environ["STUB_YTDLP_SLEEP"]))
+if os.environ.get("STUB_YTDLP_FAIL"):
+    sys.stderr.write("ERROR: stub failure\\n")
+    sys.exit(1)
+out = args[args.index("-o") + 1] if "-o" in args else None
+if "--skip-download" in args:
+    lang = args[args.index("--sub-lang") + 1] if "--sub-lang" in args else "en"
+    base = os.path.splitext(out)[0]
+    with open(os.environ["STUB_VTT"], "rb") as src, open(base + "." + lang + ".vtt", "wb") as dst:
+        dst.write(src.read())
+    sys.exit(0)
+with open(os.environ["STUB_MEDIA"], "rb") as src:
+    data = src.read()
+if "--download-sections" in args:
+    import io
+    import soundfile as sf
+    spec = args[args.index("--download-sections") + 1].lstrip("*")
+    start, end = spec.split("-")
+    audio, sr = sf.read(io.BytesIO(data), always_2d=True)
+    section = audio[int(float(start) * sr):None if end == "inf" else int(float(end) * sr)]
+    buf = io.BytesIO()
+    sf.write(buf, section, sr, format="WAV", subtype="PCM_16")
+    data = buf.getvalue()
+if "--progress-template" in args:
+    # Expand the template's %(field,alt)s placeholders like yt-dlp would, for a few ticks
+    import re
+    template = args[args.index("--progress-template") + 1].split(":", 1)[1]
+    total = len(data)
+    for done in (total // 4, total // 2, total):
+        values = {"progress.downloaded_bytes": done, "progress.total_bytes": total, "progress.speed": 1048576.0, "progress.eta": 0}
+        line = re.sub(r"%\\(([^)]*)\\)s", lambda m: str(values.get(m.group(1).split(",")[0], "NA")), template)
+        sys.stderr.write(line + "\\n")
+        sys.stderr.flush()
+if out == "-":
+    sys.stdout.buffer.write(data)
+else:
+    with open(out.replace("%(ext)s", "webm"), "wb") as dst:
+        dst.write(data)
+'''
+
+FFMPEG_STUB = '''
+import io, json, os, sys
+import numpy as np
+import soundfile as sf
+args = sys.argv[1:]
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write(json.dumps({"tool": "ffmpeg", "argv": args}) + "\\n")
+def opt(name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+src = opt("-i")
+data = sys.stdin.buffer.read() if src in ("pipe:0", "-", "pipe:") else open(src, "rb").read()
+audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+if opt("-ac") == "1":
+    audio = audio.mean(axis=1, keepdims=True)
+out_sr = int(opt("-ar", sr))
+if out_sr != sr:
+    n = int(round(len(audio) * out_sr / sr))
+    x = np.linspace(0, len(audio) - 1, n)
+    audio = np.stack([np.interp(x, np.arange(len(audio)), audio[:, c]) for c in range(audio.shape[1])], axis=1)
+sf.write(args[-1], audio, out_sr, format="WAV", subtype="PCM_16")
+if opt("-progress") == "pipe:1":
+    seconds = len(audio) / out_sr
+    for t, state in ((seconds / 2, "continue"), (seconds, "end")):
+        sys.stdout.write(f"out_time_us={int(t * 1e6)}\\ntotal_size={int(t * out_sr * 2)}\\nspeed=12.5x\\nprogress={state}\\n")
+    sys.stdout.flush()
+'''
+
+def _write_stub(bin_dir, name, body):
+    path = os.path.join(bin_dir, name)
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\n" + textwrap.dedent(body))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+class StubTools:
+    def __init__(self, root):
+        self.root = root
+        self.log_path = os.path.join(root, "calls.jsonl")
+        self.media_path = os.path.join(root, "source_media.wav")
+        self.vtt_path = os.path.join(root, "fixture.vtt")
+        self.media_seconds = 2.0
+        self.media_rate = 44100
+
+    def calls(self, tool=None):
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [r["argv"] for r in records if tool is None or r["tool"] == tool]
+
+@pytest.fixture
+def stub_media_tools(tmp_path, monkeypatch):
+    root = tmp_path / "stub_tools"
+    bin_dir = root / "bin"
+    bin_dir.mkdir(parents=True)
+    tools = StubTools(str(root))
+    # Stereo source with different channels so a correct downmix is observable
+    t = np.arange(int(tools.media_seconds * tools.media_rate)) / tools.media_rate
+    left = 0.5 * np.sin(2 * np.pi * 220 * t)
+    right = np.zeros_like(left)
+    sf.write(tools.media_path, np.stack([left, right], axis=1), tools.media_rate, subtype="PCM_16")
+    with open(tools.vtt_path, "w", encoding="utf-8") as f:
+        f.write(FIXTURE_VTT)
+    _write_stub(str(bin_dir), "yt-dlp", YTDLP_STUB)
+    _write_stub(str(bin_dir), "ffmpeg", FFMPEG_STUB)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+    monkeypatch.setenv("STUB_LOG", tools.log_path)
+    monkeypatch.setenv("STUB_MEDIA", tools.media_path)
+    monkeypatch.setenv("STUB_VTT", tools.vtt_path)
+    monkeypatch.delenv("STUB_YTDLP_FAIL", raising=False)
+    monkeypatch.delenv("STUB_YTDLP_SLEEP", raising=False)
+    return tools
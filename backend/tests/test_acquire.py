@@ -0,0 +1,51 @@
+"""
+Tests for concurrent audio + caption acquisition (src/acquire.py).
+Run against the stub yt-dlp/ffmpeg executables from conftest.py.
+"""
+import os
+import time
+
+import pytest
+import soundfile as sf
+
+from src.acquire import acquire_media_sync
+from src.downloader import DownloadError
+
+def test_acquire_media_downloads_audio_and_captions(stub_media_tools, tmp_path):
+    out = tmp_path / "run"
+    result = acquire_media_sync("https://youtu.be/abc", str(out / "audio.wav"), str(out / "captions.vtt"), sample_rate=16000)
+    info = sf.info(result["audio_path"])
+    assert info.channels == 1 and info.samplerate == 16000
+    assert result["captions_path"] == str(out / "captions.en.vtt")
+    assert os.path.exists(result["captions_path"])
+    assert sorted(t["process"] for t in result["timings"]) == ["ffmpeg", "yt-dlp:audio", "yt-dlp:captions"]
+    assert all(t["status"] == "ok" and t["seconds"] >= 0 for t in result["timings"])
+    assert not os.path.exists(str(out / "audio.wav") + ".part")
+
+def test_acquire_media_runs_processes_concurrently(stub_media_tools, tmp_path, monkeypatch):
+    # Every yt-dlp call sleeps; sequential acquisition would take at least twice as long
+    monkeypatch.setenv("STUB_YTDLP_SLEEP", "0.6")
+    started = time.perf_counter()
+    result = acquire_media_sync("https://youtu.be/abc", str(tmp_path / "audio.wav"), str(tmp_path / "captions.vtt"))
+    elapsed = time.perf_counter() - started
+    assert result["captions_path"] is not None
+    assert elapsed < 1.2 + 0.5  # generous interpreter start-up slack, still below 2 x sleep + overhead
+    assert len(stub_media_tools.calls("yt-dlp")) == 2
+
+def test_acquire_media_audio_failure_raises(stub_media_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_YTDLP_FAIL", "1")
+    with pytest.raises(DownloadError, match="stub failure"):
+        acquire_media_sync("https://youtu.be/abc", str(tmp_path / "audio.wav"), str(tmp_path / "captions.vtt"))
+    assert not os.path.exists(tmp_path / "audio.wav")
+    assert not os.path.exists(str(tmp_path / "audio.wav") + ".part")
+
+def test_acquire_media_timeout_kills_children(stub_media_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_YTDLP_SLEEP", "5")
+    started = time.perf_counter()
+    with pytest.raises(DownloadError, match="timed out"):
+        acquire_media_sync(
+            "https://youtu.be/abc", str(tmp_path / "audio.wav"), str(tmp_path / "captions.vtt"),
+            audio_timeout=0.5, captions_timeout=10
+        )
+    assert time.perf_counter() - started < 4
+    assert not os.path.exists(str(tmp_path / "audio.wav") + ".part")
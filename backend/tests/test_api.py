@@ -61,3 +61,25 @@ def test_get_result_endpoint_404(mock_res):
     resp = client.get("/result/missingid")
     assert resp.status_code == 404
     assert "unavailable" in resp.text.lower() or "not found" in resp.text.lower()
+
+def fake_chunk_processing(segment_fn=None, **kwargs):
+    segment_fn({"start": 0.0, "end": 2.0, "text": "hello"})
+    segment_fn({"start": 2.0, "end": 4.0, "text": "world"})
+    return {"compare_text": "cmp", "similarity_percent": 91.5, "transcript_file": None}
+
+@patch("backend.api.result.save_chunk_result")
+@patch("backend.api.result.process_chunk_for_comparison", side_effect=fake_chunk_processing)
+@patch("backend.api.result.get_run_result", return_value={"output_dir": "output/run_123456", "args": {"youtube_url": "u", "cascade": True}})
+def test_process_chunk_stream_emits_segments_then_result(mock_res, mock_process, mock_save):
+    resp = client.get("/result/run_123456/process_chunk/stream", params={"chunk_path": "/output/run_123456/chunks/chunk_001.wav", "profile": "true"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in resp.text.strip().split("\n\n") if not block.startswith(":")]
+    assert [e[0] for e in events] == ["event: segment", "event: segment", "event: result"]
+    assert json.loads(events[0][1][len("data: "):])["text"] == "hello"
+    assert json.loads(events[2][1][len("data: "):])["similarity_percent"] == 91.5
+    # Decoded through the chunk job queue, with the run's cascade and the requested profiling
+    kwargs = mock_process.call_args.kwargs
+    assert kwargs["chunk_path"].endswith("chunks/chunk_001.wav")
+    assert kwargs["cascade"] is True and kwargs["profile"] is True
+    assert mock_save.called
@@ -0,0 +1,55 @@
+"""
+Tests for the offline pipeline benchmark (backend/benchmarks/pipeline_stages.py): synthetic
+inputs, a short in-process run on the fake backends, and the regression check against history.
+"""
+import soundfile as sf
+
+from backend.benchmarks import pipeline_stages, synthetic
+from backend.benchmarks.fake_backends import FakeSentenceTransformer, fake_hub_load
+from src import comparator, vad
+
+def test_synthetic_inputs_are_deterministic(tmp_path):
+    first = synthetic.generate(str(tmp_path / "a"), 0.5, seed=3)
+    second = synthetic.generate(str(tmp_path / "b"), 0.5, seed=3)
+    assert first["segments"] == second["segments"] and first["cues"] == second["cues"]
+    assert open(first["audio_path"], "rb").read() == open(second["audio_path"], "rb").read()
+    assert sf.info(first["audio_path"]).duration == 30.0
+    assert all(any(s <= start and end <= e for s, e in first["segments"]) for start, end, _ in first["cues"])
+    assert synthetic.generate(str(tmp_path / "c"), 0.5, seed=4)["segments"] != first["segments"]
+
+def test_fake_backend_run_records_every_stage(tmp_path):
+    entry = pipeline_stages.run_suite(1.0, backend="fake", compare_chunks=2, workdir=str(tmp_path), isolate=False)
+    stages = entry["stages"]
+    assert list(stages) == list(pipeline_stages.STAGES)
+    assert stages["vad"]["segments"] > 0 and stages["chunking"]["chunks"] > 0
+    assert stages["vad"]["audio_seconds"] == 60.0 and stages["vad"]["audio_seconds_per_second"] > 0
+    assert stages["captions"]["cues"] == len(synthetic.caption_cues(synthetic.speech_segments(60.0)))
+    assert stages["compare"]["chunks"] == 2 and stages["compare"]["chunks_per_second"] > 0
+    assert all(r["wall_seconds"] > 0 and "error" not in r for r in stages.values())
+    assert len(list((tmp_path / "compare").iterdir())) == 2
+    # The fakes never stay behind in the model caches
+    assert getattr(vad._thread_model, "entry", (None,))[0] is not fake_hub_load
+    assert not [k for k in comparator._model_cache if k[0] is FakeSentenceTransformer]
+
+    history_path = str(tmp_path / "history.json")
+    pipeline_stages.append_history(history_path, entry)
+    pipeline_stages.append_history(history_path, entry)
+    assert len(pipeline_stages.load_history(history_path)) == 2
+
+def _entry(wall, rss=100 * 1024 ** 2, minutes=5.0):
+    return {"config": {"minutes": minutes, "backend": "fake"},
+            "stages": {"vad": {"wall_seconds": wall, "peak_rss_bytes": rss}, "compare": {"wall_seconds": 1.0, "peak_rss_bytes": rss}}}
+
+def test_regressions_compare_against_median_of_matching_runs():
+    history = [_entry(1.0), _entry(1.1), _entry(0.9), _entry(10.0, minutes=60.0)]
+    assert pipeline_stages.find_regressions(_entry(1.2), history, threshold=0.25) == []
+    slow = pipeline_stages.find_regressions(_entry(1.5), history, threshold=0.25)
+    assert [(r["stage"], r["metric"], r["baseline"]) for r in slow] == [("vad", "wall_seconds", 1.0)]
+    assert pipeline_stages.find_regressions(_entry(1.5), history, threshold=0.6) == []
+
+    hungry = _entry(1.0, rss=200 * 1024 ** 2)
+    assert {(r["stage"], r["metric"]) for r in pipeline_stages.find_regressions(hungry, history, memory_threshold=0.5)} == {
+        ("vad", "peak_rss_bytes"), ("compare", "peak_rss_bytes")}
+    # Stages too short to time reliably, and configs without history, never fail
+    assert pipeline_stages.find_regressions(_entry(0.01), [_entry(0.001)] * 3, min_seconds=0.05) == []
+    assert pipeline_stages.find_regressions(_entry(9.0, minutes=1.0), history) == []
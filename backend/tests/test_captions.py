@@ -0,0 +1,93 @@
+"""
+Tests for the single-pass caption parser, rolling dedup and interval index (src/captions.py).
+"""
+import os
+
+import numpy as np
+import pytest
+
+from src.captions import CUES_SUFFIX, IntervalIndex, load_captions, parse_captions
+
+# Shape of a YouTube auto-caption track: each cue repeats the previous line, plus 10 ms repeat cues
+ROLLING_VTT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+ 
+hello<00:00:00.500><c> world</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+hello world
+
+
+00:00:02.010 --> 00:00:04.000 align:start position:0%
+hello world
+this<00:00:02.500><c> is</c><00:00:03.000><c> new</c>
+
+00:00:04.000 --> 00:00:04.010 align:start position:0%
+this is new
+
+
+00:00:04.010 --> 00:00:06.000 align:start position:0%
+this is new
+Tom &amp; Jerry
+"""
+
+def test_rolling_duplicates_collapsed_and_tags_stripped():
+    track = parse_captions(ROLLING_VTT)
+    assert track.texts() == ["hello world", "this is new", "Tom & Jerry"]
+    assert track.starts.tolist() == [0.0, 2.01, 4.01]
+    # Repeat-only cues are dropped; the remaining cues keep their own timing
+    assert track.ends.tolist() == [2.0, 4.0, 6.0]
+    assert track.full_text() == "hello world this is new Tom & Jerry"
+
+def test_dedup_can_be_disabled():
+    track = parse_captions(ROLLING_VTT, dedup=False)
+    assert track.full_text().count("hello world") == 3
+
+def test_genuine_repeats_survive():
+    srt = "1\n00:00:01,000 --> 00:00:01,800\nNo.\n\n2\n00:00:02,000 --> 00:00:02,800\nNo.\n\n3\n00:00:03,000 --> 00:00:04,000\nNo!\nNo.\n"
+    track = parse_captions(srt)
+    assert track.texts() == ["No.", "No.", "No! No."]
+    assert track.ends.tolist() == [1.8, 2.8, 4.0]
+    manual_vtt = "WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nNo.\n\n00:00:02.000 --> 00:00:03.000\nNo.\n"
+    assert parse_captions(manual_vtt).texts() == ["No.", "No."]
+    # In a rolling track, a new line equal to the one above it is still new text
+    rolling = ROLLING_VTT + "\n00:00:06.000 --> 00:00:08.000 align:start position:0%\nTom &amp; Jerry\nTom<00:00:07.000><c> &amp; Jerry</c>\n"
+    assert parse_captions(rolling).texts()[-2:] == ["Tom & Jerry", "Tom & Jerry"]
+
+def test_srt_timestamps():
+    track = parse_captions("1\n00:00:01,500 --> 00:00:02,000\nfirst\n\n2\n00:01:00,000 --> 00:01:01,250\nsecond\n")
+    assert track.texts() == ["first", "second"]
+    assert track.ends.tolist() == [2.0, 61.25]
+
+def test_interval_index_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    starts = np.sort(rng.uniform(0, 1000, 500))
+    ends = starts + rng.uniform(0, 30, 500)  # overlapping intervals of varied length
+    index = IntervalIndex(starts, ends)
+    for lo, hi in [(0, 10), (100, 130), (500.5, 500.6), (990, 2000), (-5, 0), (300, 300)]:
+        expected = np.nonzero((starts < hi) & (ends > lo))[0]
+        assert index.query(lo, hi).tolist() == expected.tolist()
+
+def test_track_query_open_ended():
+    track = parse_captions(ROLLING_VTT)
+    assert track.query(3.0).tolist() == [1, 2]
+    assert track.query(0.0, 2.005).tolist() == [0]
+
+def test_load_captions_persists_and_invalidates(tmp_path):
+    path = tmp_path / "captions.en.vtt"
+    path.write_text(ROLLING_VTT, encoding="utf-8")
+    first = load_captions(str(path))
+    assert os.path.exists(str(path) + CUES_SUFFIX)
+    assert load_captions(str(path)) is first  # memoised
+    # Changing the file invalidates both the memo and the persisted arrays
+    path.write_text("WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nreplaced\n", encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert load_captions(str(path)).texts() == ["replaced"]
+
+def test_missing_file_raises(tmp_path):
+    from src.captions import CaptionParseError
+    with pytest.raises(CaptionParseError):
+        load_captions(str(tmp_path / "missing.vtt"))
@@ -0,0 +1,100 @@
+"""
+Stress test for concurrent chunk processing within one run: every chunk writes its own
+chunk_results/<chunk>/ files atomically, and the run's caption text is extracted once.
+Whisper and the comparator are patched with slow fakes that write in pieces.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services import pipeline_wrapper
+from src.fileio import atomic_write_text, path_lock
+
+RUN_ID = "run_parallel"
+CHUNKS = 12
+
+def _fake_transcribe(chunk_path, output_path, **kwargs):
+    time.sleep(random.uniform(0, 0.02))
+    text = f"spoken words of {os.path.basename(chunk_path)}"
+    atomic_write_text(output_path, text + "\n")
+    return text, 30.0
+
+def _fake_compare(whisper_text, captions_text, output_path, **kwargs):
+    # Written slowly, line by line: a shared path would interleave reports
+    number = int(whisper_text.rsplit("_", 1)[-1].split(".")[0])
+    lines = ["=== Whisper Transcript (normalized) ===", whisper_text, "",
+             "=== Best-Matching Caption Window (semantic) ===", captions_text.strip(), "",
+             f"Normalized Semantic Similarity Score: {50 + number:.2f}%"]
+    with open(output_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+            f.flush()
+            time.sleep(random.uniform(0, 0.005))
+
+def test_chunks_of_one_run_process_concurrently(tmp_path, monkeypatch):
+    base = tmp_path / "output"
+    run_dir = base / RUN_ID
+    (run_dir / "chunks").mkdir(parents=True)
+    (run_dir / "captions.vtt").write_text("WEBVTT\n\n00:00:00.000 --> 00:00:05.000\nthe caption text\n", encoding="utf-8")
+    chunk_paths = []
+    for i in range(1, CHUNKS + 1):
+        path = run_dir / "chunks" / f"chunk_{i:03d}.wav"
+        path.write_bytes(b"")
+        chunk_paths.append(str(path))
+
+    extractions = []
+    real_extract = pipeline_wrapper.extract_captions_text
+    def counting_extract(captions_file, text_output, **kwargs):
+        extractions.append(threading.get_ident())
+        time.sleep(0.05)
+        return real_extract(captions_file, text_output=text_output, **kwargs)
+    monkeypatch.setattr(pipeline_wrapper, "extract_captions_text", counting_extract)
+    monkeypatch.setattr(pipeline_wrapper, "transcribe_chunk", _fake_transcribe)
+    monkeypatch.setattr(pipeline_wrapper, "compare_transcripts", _fake_compare)
+    monkeypatch.setattr(pipeline_wrapper, "TRANSCRIPT_CACHE_ENABLED", False)
+
+    def process(chunk_path):
+        return chunk_path, pipeline_wrapper.process_chunk_for_comparison(
+            RUN_ID, chunk_path, "https://youtu.be/x", "en", "tiny", base_output_dir=str(base), cascade=False)
+
+    # Every chunk twice, in random order, on more threads than chunks in flight per run
+    jobs = chunk_paths * 2
+    random.shuffle(jobs)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(process, jobs))
+
+    assert len(extractions) == 1
+    for chunk_path, result in results:
+        name = os.path.basename(chunk_path)
+        number = int(name[6:9])
+        assert result["similarity_percent"] == 50 + number
+        assert result["asr_text"] == f"spoken words of {name}"
+        assert result["caption_text"].startswith("the caption text")
+        chunk_dir = run_dir / "chunk_results" / f"chunk_{number:03d}"
+        assert result["transcript_file"] == str(chunk_dir / "whisper_transcript.txt")
+        assert (chunk_dir / "whisper_transcript.txt").read_text(encoding="utf-8") == f"spoken words of {name}\n"
+        assert f"{50 + number:.2f}%" in (chunk_dir / "comparison.txt").read_text(encoding="utf-8")
+    leftovers = [f for _, _, files in os.walk(run_dir) for f in files if f.endswith(".part")]
+    assert leftovers == []
+    assert not (run_dir / "whisper_transcript.txt").exists() and not (run_dir / "comparison.txt").exists()
+
+def test_path_lock_is_exclusive(tmp_path):
+    lock_path = str(tmp_path / ".lock")
+    inside = []
+    overlaps = []
+    def work():
+        for _ in range(20):
+            with path_lock(lock_path):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(True)
+                time.sleep(0.0005)
+                inside.pop()
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
@@ -0,0 +1,182 @@
+"""
+Tests for chunk jobs (backend/services/chunk_jobs.py) behind POST /result/{run_id}/process_chunk.
+Chunk processing is a fake that sleeps; no models load.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from backend.main import app
+from backend.api import result as result_api
+from backend.services import chunk_jobs, run_manager
+from backend.services.chunk_jobs import ChunkJobs
+from backend.services.pipeline_wrapper import PipelineRunError
+
+RUN_ID = "run_chunk_jobs"
+
+@pytest.fixture
+def finished_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_jobs, "_jobs", ChunkJobs(workers=1, max_queue=3, kept=10))
+    monkeypatch.setattr(result_api, "save_chunk_result", lambda run_id, chunk, result: None)
+    state = {"step": "done", "error": None, "result": {"output_dir": str(tmp_path)},
+             "args": {"youtube_url": "https://youtu.be/dQw4w9WgXcQ", "model_size": "tiny"}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == RUN_ID else None)
+    yield RUN_ID
+    # Let queued jobs finish while the fakes are still patched in
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        stats = chunk_jobs.get_chunk_jobs().stats()
+        if not stats["running"] and not stats["depth"]:
+            break
+        time.sleep(0.05)
+
+def _fake_processing(seconds, calls=None, fail=False):
+    def process(**kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        time.sleep(seconds)
+        if fail:
+            raise PipelineRunError("whisper exploded")
+        return {"compare_text": "ok", "similarity_percent": 90.0, "cascade": None}
+    return process
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+def test_process_chunk_returns_202_then_result(finished_run, monkeypatch):
+    calls = []
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", _fake_processing(0.2, calls))
+
+    async def scenario():
+        async with _client() as client:
+            started = time.monotonic()
+            resp = await client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": "/output/x/chunks/chunk_001.wav"})
+            assert resp.status_code == 202 and time.monotonic() - started < 0.15
+            job = resp.json()
+            assert job["state"] in ("queued", "running") and resp.headers["location"] == job["status_url"]
+            done = (await client.get(job["status_url"], params={"wait": 10})).json()
+            assert done["state"] == "done" and done["result"]["similarity_percent"] == 90.0
+            assert (await client.get(f"/result/run_other/chunk_jobs/{job['job_id']}")).status_code == 404
+
+    asyncio.run(scenario())
+    assert calls[0]["chunk_path"].endswith("chunks/chunk_001.wav") and calls[0]["model_size"] == "tiny"
+
+def test_status_latency_unaffected_while_chunks_process(finished_run, monkeypatch):
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", _fake_processing(1.0))
+    run_manager.run_states["run_busy"] = {"step": "chunking", "error": None, "result": None, "args": {}}
+
+    async def scenario():
+        async with _client() as client:
+            for i in range(3):
+                resp = await client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": f"chunk_00{i}.wav"})
+                assert resp.status_code == 202
+            latencies = []
+            for _ in range(20):
+                started = time.monotonic()
+                assert (await client.get("/status/run_busy")).status_code == 200
+                latencies.append(time.monotonic() - started)
+            running = (await client.get("/system/chunk_jobs")).json()
+            return latencies, running
+
+    try:
+        latencies, running = asyncio.run(scenario())
+    finally:
+        run_manager.run_states.pop("run_busy", None)
+    # Chunks were still being transcribed the whole time
+    assert running["running"] == 1 and running["depth"] == 2
+    assert max(latencies) < 0.25
+
+def test_failed_chunk_job_reports_error(finished_run, monkeypatch):
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", _fake_processing(0.0, fail=True))
+
+    async def scenario():
+        async with _client() as client:
+            job = (await client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": "chunk_001.wav"})).json()
+            return (await client.get(job["status_url"], params={"wait": 10})).json()
+
+    failed = asyncio.run(scenario())
+    assert failed["state"] == "error" and "whisper exploded" in failed["error"] and failed["result"] is None
+
+def test_identical_jobs_are_reused_and_full_queue_is_429(finished_run, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", lambda **kwargs: release.wait(10) and {})
+
+    async def scenario():
+        async with _client() as client:
+            post = lambda name: client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": name})
+            first, again = (await post("chunk_001.wav")).json(), (await post("chunk_001.wav")).json()
+            assert first["job_id"] == again["job_id"]
+            while (await client.get(first["status_url"])).json()["state"] != "running":
+                await asyncio.sleep(0.01)
+            # One running plus max_queue=3 waiting
+            for name in ("chunk_002.wav", "chunk_003.wav", "chunk_004.wav"):
+                assert (await post(name)).status_code == 202
+            full = await post("chunk_005.wav")
+            assert full.status_code == 429 and "Retry-After" in full.headers
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    assert chunk_jobs.get_chunk_jobs().stats()["deduplicated"] == 1
+
+def test_process_chunk_unknown_run_is_404(finished_run):
+    async def scenario():
+        async with _client() as client:
+            return await client.post("/result/run_missing/process_chunk", json={"chunk_path": "chunk_001.wav"})
+
+    assert asyncio.run(scenario()).status_code == 404
+
+def test_stream_joins_the_chunk_job_and_replays_its_segments(finished_run, monkeypatch):
+    release = threading.Event()
+
+    def process(segment_fn=None, **kwargs):
+        segment_fn({"start": 0.0, "end": 1.0, "text": "early"})
+        release.wait(10)
+        segment_fn({"start": 1.0, "end": 2.0, "text": "late"})
+        return {"compare_text": "ok", "similarity_percent": 80.0, "cascade": None}
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", process)
+
+    async def scenario():
+        async with _client() as client:
+            job = (await client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": "chunk_001.wav"})).json()
+            while not (await client.get(job["status_url"])).json()["segments"]:
+                await asyncio.sleep(0.01)
+            # The decode runs on the chunk queue, so the run is protected from retention meanwhile
+            assert finished_run in chunk_jobs.get_chunk_jobs().active_run_ids()
+            asyncio.get_running_loop().call_later(0.2, release.set)
+            stream = await client.get(f"/result/{finished_run}/process_chunk/stream", params={"chunk_path": "chunk_001.wav"})
+            return stream.text
+
+    try:
+        text = asyncio.run(scenario())
+    finally:
+        release.set()
+    events = [block.split("\n") for block in text.strip().split("\n\n") if not block.startswith(":")]
+    assert [e[0] for e in events] == ["event: segment", "event: segment", "event: result"]
+    assert [json.loads(e[1][len("data: "):])["text"] for e in events[:2]] == ["early", "late"]
+    assert chunk_jobs.get_chunk_jobs().stats()["deduplicated"] == 1
+
+def test_stream_is_429_when_the_chunk_queue_is_full(finished_run, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(result_api, "process_chunk_for_comparison", lambda **kwargs: release.wait(10) and {})
+
+    async def scenario():
+        async with _client() as client:
+            post = lambda name: client.post(f"/result/{finished_run}/process_chunk", json={"chunk_path": name})
+            first = (await post("chunk_001.wav")).json()
+            while (await client.get(first["status_url"])).json()["state"] != "running":
+                await asyncio.sleep(0.01)
+            for name in ("chunk_002.wav", "chunk_003.wav", "chunk_004.wav"):
+                assert (await post(name)).status_code == 202
+            return await client.get(f"/result/{finished_run}/process_chunk/stream", params={"chunk_path": "chunk_009.wav"})
+
+    try:
+        resp = asyncio.run(scenario())
+    finally:
+        release.set()
+    assert resp.status_code == 429 and "Retry-After" in resp.headers
@@ -0,0 +1,84 @@
+"""
+Tests for collision-free run IDs and coalescing of identical /run submissions (run_manager).
+Runs are queued on a private JobQueue whose worker is held, so no pipeline work executes.
+"""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.services import run_manager
+from backend.services.job_queue import JobQueue
+
+ARGS = {"youtube_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "language": "en", "model_size": "tiny",
+        "cascade": None, "start_time": None, "end_time": None, "priority": 0}
+
+@pytest.fixture
+def held_queue(monkeypatch):
+    """Isolated run_manager state; every queued run blocks until the test ends."""
+    release = threading.Event()
+    queue = JobQueue(workers=1, max_queue=50)
+    monkeypatch.setattr(run_manager, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(run_manager, "background_run", lambda args, run_id: release.wait(5))
+    monkeypatch.setattr(run_manager, "run_states", {})
+    monkeypatch.setattr(run_manager, "_coalesce_index", {})
+    monkeypatch.setattr(run_manager, "save_run_state", lambda run_id, state: None)
+    yield queue
+    release.set()
+    queue.wait_idle(timeout=5)
+
+def test_run_ids_are_unique_within_one_second():
+    ids = {run_manager.new_run_id() for _ in range(2000)}
+    assert len(ids) == 2000
+    assert all(run_id.startswith("run_") for run_id in ids)
+
+def test_identical_submissions_attach_to_in_flight_run(held_queue):
+    first, coalesced = run_manager.start_pipeline_run(dict(ARGS))
+    assert not coalesced
+    # Another URL form of the same video and a different priority still match
+    second, coalesced = run_manager.start_pipeline_run(dict(ARGS, youtube_url="https://youtu.be/dQw4w9WgXcQ", priority=5))
+    assert coalesced and second == first
+    assert run_manager.run_states[first]["coalesced_submissions"] == 1
+    assert held_queue.stats()["depth"] + held_queue.stats()["running"] == 1
+
+def test_different_or_opted_out_submissions_start_new_runs(held_queue):
+    first, _ = run_manager.start_pipeline_run(dict(ARGS))
+    other_model, coalesced = run_manager.start_pipeline_run(dict(ARGS, model_size="small"))
+    assert not coalesced and other_model != first
+    forced, coalesced = run_manager.start_pipeline_run(dict(ARGS, coalesce=False))
+    assert not coalesced and forced not in (first, other_model)
+
+def test_concurrent_identical_submissions_start_one_run(held_queue):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(run_manager.start_pipeline_run(dict(ARGS)))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({run_id for run_id, _ in results}) == 1
+    assert sum(1 for _, coalesced in results if not coalesced) == 1
+
+def test_finished_runs_attach_only_within_ttl(held_queue, monkeypatch, tmp_path):
+    first, _ = run_manager.start_pipeline_run(dict(ARGS))
+    state = run_manager.run_states[first]
+    state.update(step="done", finished_at=time.time(), result={"output_dir": str(tmp_path)})
+    assert run_manager.start_pipeline_run(dict(ARGS)) == (first, True)
+    state["finished_at"] = time.time() - run_manager.RUN_COALESCE_TTL_SECONDS - 1
+    expired, coalesced = run_manager.start_pipeline_run(dict(ARGS))
+    assert not coalesced and expired != first
+    # Failed runs never absorb submissions
+    run_manager.run_states[expired].update(step="error")
+    retried, coalesced = run_manager.start_pipeline_run(dict(ARGS))
+    assert not coalesced and retried != expired
+
+def test_run_endpoint_reports_coalescing(held_queue):
+    from backend.main import app
+    client = TestClient(app)
+    body = {"youtube_url": "https://youtu.be/dQw4w9WgXcQ", "language": "en", "model_size": "tiny"}
+    first = client.post("/run", json=body).json()
+    second = client.post("/run", json=body).json()
+    assert first["coalesced"] is False
+    assert second["coalesced"] is True and second["run_id"] == first["run_id"]
+    fresh = client.post("/run", json=dict(body, coalesce=False)).json()
+    assert fresh["coalesced"] is False and fresh["run_id"] != first["run_id"]
@@ -0,0 +1,130 @@
+"""
+Unit tests for the process-wide CPU budget (backend/services/cpu_budget.py) and the torch
+thread count derived from it (src/torch_threads.py).
+Uses real threads with short sleeps; no models are loaded.
+"""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.services.cpu_budget import CPUBudget
+from src.torch_threads import torch_threads
+
+def test_allotment_defaults_and_caps():
+    budget = CPUBudget(total_threads=4, stage_threads={"asr": 8, "vad": 2})
+    assert budget.threads_for("asr") == 4  # capped at the total
+    assert budget.threads_for("vad") == 2
+    assert budget.threads_for("unknown") == 1
+    with budget.allocate("vad", run_id="r1") as threads:
+        assert threads == 2
+        snap = budget.allocations()
+        assert snap["available_threads"] == 2
+        assert snap["active"][0]["stage"] == "vad" and snap["active"][0]["run_id"] == "r1"
+    assert budget.allocations()["available_threads"] == 4
+
+def test_concurrent_stages_never_exceed_budget():
+    budget = CPUBudget(total_threads=6, stage_threads={"asr": 4, "vad": 2, "embedding": 2})
+    in_use = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def stage(name):
+        with budget.allocate(name) as threads:
+            with lock:
+                in_use.append(threads)
+                peak[0] = max(peak[0], sum(in_use))
+            time.sleep(0.02)
+            with lock:
+                in_use.remove(threads)
+
+    workers = [threading.Thread(target=stage, args=(name,)) for name in ["asr", "vad", "embedding"] * 5]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert 0 < peak[0] <= 6
+    assert budget.allocations()["available_threads"] == 6
+
+def test_stage_queues_when_budget_exhausted():
+    budget = CPUBudget(total_threads=2, stage_threads={"asr": 2})
+    started = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with budget.allocate("asr", run_id="first"):
+            started.set()
+            release.wait(2)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    started.wait(2)
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(budget.allocate("asr", run_id="second").__enter__()))
+    waiter.start()
+    time.sleep(0.05)
+    snap = budget.allocations()
+    assert [w["run_id"] for w in snap["waiting"]] == ["second"]
+    assert got == []
+    release.set()
+    waiter.join(2)
+    t.join(2)
+    assert got == [2]
+
+def test_system_cpu_endpoint():
+    from backend.main import app
+    resp = TestClient(app).get("/system/cpu")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total_threads"] >= 1
+    assert set(data) >= {"available_threads", "active", "waiting", "stage_threads"}
+
+def _in_other_stage(threads, body):
+    # Runs body() while another thread is inside torch_threads(threads)
+    entered, release = threading.Event(), threading.Event()
+
+    def other_stage():
+        with torch_threads(threads):
+            entered.set()
+            release.wait(5)
+
+    other = threading.Thread(target=other_stage)
+    other.start()
+    entered.wait(5)
+    try:
+        body()
+    finally:
+        release.set()
+        other.join(5)
+
+def test_torch_threads_per_stage_with_openmp(monkeypatch):
+    import torch
+    from src import torch_threads as tt
+    monkeypatch.setattr(tt, "_openmp", True)
+    before = torch.get_num_threads()
+
+    def body():
+        with torch_threads(2):
+            assert torch.get_num_threads() == 2  # this stage's own count, not 2 + 3
+        assert torch.get_num_threads() == before
+    _in_other_stage(3, body)
+    assert torch.get_num_threads() == before
+
+def test_torch_threads_sum_concurrent_stages_with_a_shared_pool(monkeypatch):
+    from src import torch_threads as tt
+    counts = []
+    monkeypatch.setattr(tt, "_openmp", False)
+    # A process-wide pool: model it with one shared counter
+    import torch
+    monkeypatch.setattr(torch, "set_num_threads", counts.append)
+    monkeypatch.setattr(torch, "get_num_threads", lambda: counts[-1] if counts else 1)
+
+    def body():
+        assert counts[-1] == 3
+        with torch_threads(2):
+            assert counts[-1] == 5
+        assert counts[-1] == 3
+        with torch_threads(None):
+            assert counts[-1] == 3
+    _in_other_stage(3, body)
+    assert counts[-1] == 1
@@ -0,0 +1,101 @@
+"""
+Tests for the streaming ZIP export (src/zipstream.py, GET /download/{run_id}).
+"""
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import run_manager, storage
+from backend.services.storage import RunStore
+from src.zipstream import ZipEntry, ZipPlan
+
+RUN_ID = "run_export"
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    output_dir = tmp_path / RUN_ID
+    (output_dir / "chunks").mkdir(parents=True)
+    (output_dir / "audio.wav").write_bytes(os.urandom(300_000))
+    (output_dir / "captions.vtt").write_text("WEBVTT\n")
+    (output_dir / "whisper_transcript.txt").write_text("hello world")
+    (output_dir / "comparison.txt").write_text("similar")
+    (output_dir / ".lock").write_text("")
+    for i in range(1, 5):
+        (output_dir / "chunks" / f"chunk_{i:03d}.wav").write_bytes(os.urandom(10_000 + i))
+    state = {"step": "done", "error": None, "result": {"output_dir": str(output_dir)}, "args": {}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == RUN_ID else None)
+    store = RunStore(str(tmp_path / "runs.sqlite3"))
+    for i in (1, 3):
+        store.save_chunk_result(RUN_ID, f"chunk_{i:03d}.wav", {"similarity_percent": 80.0 + i})
+    monkeypatch.setattr(storage, "_store", store)
+    return output_dir
+
+def _names(content):
+    return sorted(zipfile.ZipFile(io.BytesIO(content)).namelist())
+
+def test_full_export_is_a_valid_zip(run_dir):
+    resp = TestClient(app).get(f"/download/{RUN_ID}")
+    assert resp.status_code == 200 and resp.headers["content-type"] == "application/zip"
+    assert int(resp.headers["content-length"]) == len(resp.content)
+    archive = zipfile.ZipFile(io.BytesIO(resp.content))
+    assert archive.testzip() is None
+    assert f"{RUN_ID}/.lock" not in archive.namelist()
+    assert archive.read(f"{RUN_ID}/audio.wav") == (run_dir / "audio.wav").read_bytes()
+    assert archive.read(f"{RUN_ID}/chunks/chunk_004.wav") == (run_dir / "chunks" / "chunk_004.wav").read_bytes()
+    assert '"similarity_percent": 83.0' in archive.read(f"{RUN_ID}/comparisons.json").decode()
+
+def test_subset_selection(run_dir):
+    client = TestClient(app)
+    transcripts = client.get(f"/download/{RUN_ID}", params={"include": "transcripts"})
+    assert _names(transcripts.content) == [f"{RUN_ID}/whisper_transcript.txt"]
+    assert "transcripts" in transcripts.headers["content-disposition"]
+    ranged = client.get(f"/download/{RUN_ID}", params={"include": "chunks,comparisons", "chunks": "2-3"})
+    assert _names(ranged.content) == [f"{RUN_ID}/chunks/chunk_002.wav", f"{RUN_ID}/chunks/chunk_003.wav",
+                                      f"{RUN_ID}/comparison.txt", f"{RUN_ID}/comparisons.json"]
+    records = zipfile.ZipFile(io.BytesIO(ranged.content)).read(f"{RUN_ID}/comparisons.json").decode()
+    assert "chunk_003.wav" in records and "chunk_001.wav" not in records
+    assert client.get(f"/download/{RUN_ID}", params={"include": "everything"}).status_code == 400
+    assert client.get(f"/download/{RUN_ID}", params={"chunks": "3-1"}).status_code == 400
+    assert client.get(f"/download/{RUN_ID}", params={"include": "chunks", "chunks": "9"}).status_code == 404
+    assert client.get("/download/run_missing").status_code == 404
+
+def test_interrupted_download_resumes(run_dir):
+    client = TestClient(app)
+    full = client.get(f"/download/{RUN_ID}")
+    etag = full.headers["etag"]
+    # Resume mid-member, and past every member (only the central directory is left)
+    for offset in (150_000, len(full.content) - 200):
+        rest = client.get(f"/download/{RUN_ID}", headers={"Range": f"bytes={offset}-", "If-Range": etag})
+        assert rest.status_code == 206
+        assert rest.headers["content-range"] == f"bytes {offset}-{len(full.content) - 1}/{len(full.content)}"
+        assert full.content[:offset] + rest.content == full.content
+    # Artifacts changed since the first attempt: If-Range no longer matches, whole archive again
+    (run_dir / "whisper_transcript.txt").write_text("hello world, revised")
+    changed = client.get(f"/download/{RUN_ID}", headers={"Range": "bytes=100-", "If-Range": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert zipfile.ZipFile(io.BytesIO(changed.content)).testzip() is None
+
+def test_zip64_layout_and_bounded_reads(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(os.urandom(3 * 1024 * 1024))
+    small = tmp_path / "small.txt"
+    small.write_text("x")
+    # A tiny threshold exercises the zip64 records without writing 4 GiB
+    plan = ZipPlan([ZipEntry("big.bin", path=str(big)), ZipEntry("small.txt", path=str(small)),
+                    ZipEntry("generated.json", data=b"{}", mtime=1_700_000_000)],
+                   zip64_threshold=1024, block_bytes=64 * 1024)
+    blocks = list(plan.iter_bytes())
+    assert max(len(b) for b in blocks) <= 64 * 1024
+    content = b"".join(blocks)
+    assert len(content) == plan.size and b"PK\x06\x06" in content[-200:]
+    archive = zipfile.ZipFile(io.BytesIO(content))
+    assert archive.testzip() is None and archive.read("big.bin") == big.read_bytes()
+    assert archive.getinfo("big.bin").file_size == 3 * 1024 * 1024
+    # Regenerating any slice gives the same bytes
+    again = ZipPlan([ZipEntry("big.bin", path=str(big)), ZipEntry("small.txt", path=str(small)),
+                     ZipEntry("generated.json", data=b"{}", mtime=1_700_000_000)], zip64_threshold=1024)
+    assert again.etag == plan.etag and b"".join(again.iter_bytes(2_000_000, 2_100_000)) == content[2_000_000:2_100_000]
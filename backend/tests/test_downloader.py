@@ -67,43 +67,58 @@ def test_download_captions_no_candidates():
         assert out is None
 
 # --- extract_captions_text ---
-def test_extract_captions_text_success():
-    fake_caption = MagicMock()
-    fake_caption.text = "<b>Hello</b> world!"
-    with patch('src.downloader.os.makedirs'), \
-         patch('src.downloader.open', mock_open()), \
-         patch('webvtt.read', return_value=[fake_caption]):
-        out = downloader.extract_captions_text('file.vtt')
-        assert "Hello" in out
+def write_vtt(tmp_path, body):
+    path = tmp_path / "file.vtt"
+    path.write_text("WEBVTT\n\n" + body, encoding="utf-8")
+    return str(path)
 
-def test_extract_captions_text_empty():
-    with patch('src.downloader.os.makedirs'), \
-         patch('src.downloader.open', mock_open()), \
-         patch('webvtt.read', return_value=[]):
-        out = downloader.extract_captions_text('file.vtt')
-        assert out == ""
+def test_extract_captions_text_success(tmp_path):
+    vtt = write_vtt(tmp_path, "00:00:01.000 --> 00:00:03.000\n<b>Hello</b> world!\n")
+    out = downloader.extract_captions_text(vtt, text_output=str(tmp_path / "out" / "captions.txt"))
+    assert out == "Hello world!"
+
+def test_extract_captions_text_empty(tmp_path):
+    vtt = write_vtt(tmp_path, "")
+    out = downloader.extract_captions_text(vtt, text_output=str(tmp_path / "out" / "captions.txt"))
+    assert out == ""
 
 # --- extract_aligned_captions ---
-def test_extract_aligned_captions_success():
-    class FakeCaption:
-        text = "<b>Hi there, this is real speech.</b>"
-        start_in_seconds = 2.0
-        end_in_seconds = 5.0
-    fake_caption = FakeCaption()
-    with patch('src.downloader.os.makedirs'), \
-         patch('src.downloader.open', mock_open()), \
-         patch('webvtt.read', return_value=[fake_caption]):
-        out = downloader.extract_aligned_captions('file.vtt', (1, 10))
-        assert "Hi" in out
-
-def test_extract_aligned_captions_nomatch():
-    fake_caption = MagicMock()
-    fake_caption.text = "Nothing"
-    fake_caption.start_in_seconds = 12
-    fake_caption.end_in_seconds = 15
-    with patch('src.downloader.os.makedirs'), \
-         patch('src.downloader.open', mock_open()), \
-         patch('webvtt.read', return_value=[fake_caption]):
-        with pytest.raises(Exception):
-            downloader.extract_aligned_captions('file.vtt', (1, 10))
+def test_extract_aligned_captions_success(tmp_path):
+    vtt = write_vtt(tmp_path, "00:00:02.000 --> 00:00:05.000\n<b>Hi there, this is real speech.</b>\n")
+    out = downloader.extract_aligned_captions(vtt, (1, 10), text_output=str(tmp_path / "out" / "aligned.txt"))
+    assert "Hi" in out
+
+def test_extract_aligned_captions_nomatch(tmp_path):
+    vtt = write_vtt(tmp_path, "00:00:12.000 --> 00:00:15.000\nNothing\n")
+    with pytest.raises(Exception):
+        downloader.extract_aligned_captions(vtt, (1, 10), text_output=str(tmp_path / "out" / "aligned.txt"))
+
+
+# --- download_audio_piped (stub yt-dlp/ffmpeg executables, see conftest.py) ---
+def test_download_audio_piped_writes_mono_16k_without_intermediate(stub_media_tools, tmp_path):
+    import soundfile as sf
+    out_dir = tmp_path / "run"
+    out = downloader.download_audio_piped('https://youtu.be/abc123def45', str(out_dir / 'audio.wav'), sample_rate=16000)
+    assert out == str(out_dir / 'audio.wav')
+    info = sf.info(out)
+    assert info.channels == 1 and info.samplerate == 16000
+    assert abs(info.duration - stub_media_tools.media_seconds) < 0.01
+    assert sorted(p.name for p in out_dir.iterdir()) == ['audio.wav']  # no temp media, no .part left
+    [yt_argv] = stub_media_tools.calls('yt-dlp')
+    [ff_argv] = stub_media_tools.calls('ffmpeg')
+    assert yt_argv[yt_argv.index('-o') + 1] == '-'
+    assert ff_argv[ff_argv.index('-i') + 1] == 'pipe:0'
+    assert ff_argv[ff_argv.index('-ac') + 1] == '1'
+
+def test_download_audio_piped_failure_raises_and_cleans_up(stub_media_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv('STUB_YTDLP_FAIL', '1')
+    out_dir = tmp_path / "run"
+    with pytest.raises(downloader.DownloadError) as exc:
+        downloader.download_audio_piped('https://youtu.be/abc123def45', str(out_dir / 'audio.wav'))
+    assert 'stub failure' in str(exc.value)
+    assert list(out_dir.iterdir()) == []
 
+def test_download_audio_streaming_flag_uses_piped_path(stub_media_tools, tmp_path):
+    out = downloader.download_audio('https://youtu.be/abc123def45', str(tmp_path / 'audio.wav'), streaming=True)
+    assert out.endswith('audio.wav')
+    assert len(stub_media_tools.calls('yt-dlp')) == 1
@@ -0,0 +1,90 @@
+"""
+Tests for the pipeline executor (backend/services/executor.py).
+Process-mode tests start real worker processes (without model preloading) running the
+module-level helpers below.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from backend.services.executor import ExecutorError, ProcessExecutor, ThreadExecutor
+from src.captions import CaptionParseError
+
+def report_steps(n, progress_fn=None):
+    for i in range(n):
+        progress_fn("work", {"step": i})
+    return {"pid": os.getpid(), "steps": n}
+
+def fail_parse():
+    raise CaptionParseError("Cannot read captions file: no such file")
+
+def crash_worker():
+    os._exit(3)
+
+def hold_cpu(seconds):
+    from backend.services.cpu_budget import get_cpu_budget
+    with get_cpu_budget().allocate("asr", run_id="run_held") as threads:
+        time.sleep(seconds)
+    return threads
+
+@pytest.fixture(scope="module")
+def process_executor():
+    executor = ProcessExecutor(processes=1, preload=False)
+    yield executor
+    executor.shutdown()
+
+def test_thread_mode_passes_callbacks_as_kwargs():
+    seen = []
+    result = ThreadExecutor().call(report_steps, 3, callbacks={"progress_fn": lambda stage, info: seen.append(info["step"])})
+    assert result == {"pid": os.getpid(), "steps": 3}
+    assert seen == [0, 1, 2]
+
+def test_process_mode_runs_outside_api_process_and_drains_callbacks(process_executor):
+    seen = []
+    result = process_executor.call(report_steps, 200, callbacks={"progress_fn": lambda stage, info: seen.append(info["step"])})
+    assert result["pid"] != os.getpid()
+    # Every callback is applied, in order, before call() returns
+    assert seen == list(range(200))
+    # The worker is long-lived: later calls reuse the same process
+    assert process_executor.call(report_steps, 0)["pid"] == result["pid"]
+
+def test_worker_exceptions_keep_their_type(process_executor):
+    with pytest.raises(CaptionParseError, match="no such file"):
+        process_executor.call(fail_parse)
+    assert process_executor.stats()["failed"] >= 1
+
+def test_crashed_worker_pool_is_replaced():
+    executor = ProcessExecutor(processes=1, preload=False)
+    try:
+        with pytest.raises(ExecutorError):
+            executor.call(crash_worker)
+        assert executor.call(report_steps, 0)["steps"] == 0
+        assert executor.stats()["restarts"] == 1
+    finally:
+        executor.shutdown()
+
+def test_worker_cpu_allocations_reach_system_endpoint(monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend.api import system
+    from backend.main import app
+    executor = ProcessExecutor(processes=1, preload=False, total_threads=4)
+    monkeypatch.setattr(system, "get_executor", lambda: executor)
+    try:
+        executor.call(report_steps, 0)  # start the pool
+        caller = threading.Thread(target=executor.call, args=(hold_cpu, 1.0))
+        caller.start()
+        deadline = time.time() + 10
+        while time.time() < deadline and not any(w["active"] for w in executor.cpu_allocations()):
+            time.sleep(0.02)
+        data = TestClient(app).get("/system/cpu").json()
+        held = [entry for entry in data["active"] if entry.get("run_id") == "run_held"]
+        assert len(held) == 1 and held[0]["stage"] == "asr" and held[0]["pid"] != os.getpid()
+        assert data["workers"][0]["total_threads"] == 4
+        caller.join(10)
+        # The release is reported before call() returns
+        assert [w["active"] for w in executor.cpu_allocations()] == [[]]
+    finally:
+        executor.shutdown()
+    assert executor.cpu_allocations() == []
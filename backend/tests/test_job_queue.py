@@ -0,0 +1,131 @@
+"""
+Tests for the bounded run queue (backend/services/job_queue.py) and its /run and /status wiring.
+Jobs are plain callables with short sleeps/events; no pipeline work runs.
+"""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.services import run_manager
+from backend.services.job_queue import JobQueue, QueueFullError
+
+def test_concurrency_ceiling_holds_under_load():
+    queue = JobQueue(workers=3, max_queue=200)
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    done = []
+
+    def job(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+            done.append(i)
+
+    # Submit from several threads at once, like a burst of /run requests
+    submitters = [threading.Thread(target=lambda base=base: [queue.submit(f"job{base + k}", lambda i=base + k: job(i)) for k in range(25)])
+                  for base in range(0, 100, 25)]
+    for t in submitters:
+        t.start()
+    for t in submitters:
+        t.join()
+    assert queue.wait_idle(timeout=10)
+    assert sorted(done) == list(range(100))
+    assert peak[0] == 3
+    stats = queue.stats()
+    assert stats["completed"] == 100 and stats["depth"] == 0 and stats["running"] == 0
+
+def _blocked_queue(max_queue):
+    queue = JobQueue(workers=1, max_queue=max_queue)
+    started, release = threading.Event(), threading.Event()
+    queue.submit("blocker", lambda: (started.set(), release.wait(5)))
+    assert started.wait(2)
+    return queue, release
+
+def test_full_queue_rejects_and_reports_positions():
+    queue, release = _blocked_queue(max_queue=2)
+    try:
+        assert queue.submit("a", lambda: None) == 1
+        assert queue.submit("b", lambda: None) == 2
+        with pytest.raises(QueueFullError):
+            queue.submit("c", lambda: None)
+        info = queue.job_info("b")
+        assert info["state"] == "queued" and info["position"] == 2 and info["depth"] == 2
+        assert queue.job_info("blocker")["position"] == 0
+        assert queue.stats()["rejected"] == 1
+    finally:
+        release.set()
+    assert queue.wait_idle(timeout=5)
+    assert queue.job_info("b")["state"] == "finished"
+
+def test_higher_priority_runs_first():
+    queue, release = _blocked_queue(max_queue=10)
+    order = []
+    queue.submit("low", lambda: order.append("low"), priority=-1)
+    queue.submit("normal", lambda: order.append("normal"))
+    queue.submit("high", lambda: order.append("high"), priority=5)
+    queue.submit("normal2", lambda: order.append("normal2"))
+    assert queue.job_info("high")["position"] == 1
+    release.set()
+    assert queue.wait_idle(timeout=5)
+    assert order == ["high", "normal", "normal2", "low"]
+
+def test_run_endpoint_returns_429_when_queue_full(monkeypatch):
+    from backend.main import app
+    full = JobQueue(workers=1, max_queue=0)
+    monkeypatch.setattr(run_manager, "get_job_queue", lambda: full)
+    resp = TestClient(app).post("/run", json={"youtube_url": "https://youtu.be/x", "language": "en", "model_size": "tiny"})
+    assert resp.status_code == 429
+    assert "Retry-After" in resp.headers
+    assert "queue is full" in resp.json()["detail"]
+    assert not any(state["step"] == "queued" and state["args"]["youtube_url"] == "https://youtu.be/x" for state in run_manager.run_states.values())
+
+def test_status_includes_queue_position(monkeypatch):
+    queue, release = _blocked_queue(max_queue=5)
+    try:
+        queue.submit("run_waiting", lambda: None)
+        monkeypatch.setattr(run_manager, "get_job_queue", lambda: queue)
+        monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: {"step": "queued", "error": None})
+        status = run_manager.get_run_status("run_waiting")
+        assert status["step"] == "queued"
+        assert status["queue"]["position"] == 1 and status["queue"]["depth"] == 1
+        assert status["queue"]["wait_seconds"] >= 0
+    finally:
+        release.set()
+        queue.wait_idle(timeout=5)
+
+def test_failed_job_is_recorded_and_reported_to_its_owner(capsys):
+    queue = JobQueue(workers=1, max_queue=5)
+    failures = []
+
+    def boom():
+        raise RuntimeError("escaped")
+
+    queue.submit("bad", boom, on_error=failures.append)
+    queue.submit("good", lambda: None)
+    assert queue.wait_idle(timeout=5)
+    assert [str(e) for e in failures] == ["escaped"]
+    assert queue.job_info("bad")["state"] == "finished" and queue.job_info("bad")["error"] == "RuntimeError: escaped"
+    assert queue.job_info("good")["error"] is None
+    assert queue.stats()["failed"] == 1 and queue.stats()["completed"] == 2
+    assert "escaped" not in capsys.readouterr().out
+
+def test_run_failure_outside_the_pipeline_marks_the_run_failed(monkeypatch):
+    queue = JobQueue(workers=1, max_queue=5)
+    monkeypatch.setattr(run_manager, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(run_manager, "background_run", lambda run_args, run_id: (_ for _ in ()).throw(RuntimeError("lost worker")))
+    run_id, _ = run_manager.start_pipeline_run({"youtube_url": "https://youtu.be/escaped", "language": "en", "model_size": "tiny", "coalesce": False})
+    assert queue.wait_idle(timeout=5)
+    assert run_manager.get_run_status(run_id)["step"] == "error"
+    assert run_manager.get_run_status(run_id)["error_message"] == "Unknown error: lost worker"
+
+@pytest.mark.parametrize("priority", [-10 ** 9, 11])
+def test_run_endpoint_rejects_out_of_range_priority(priority):
+    from backend.main import app
+    resp = TestClient(app).post("/run", json={"youtube_url": "https://youtu.be/x", "language": "en", "model_size": "tiny", "priority": priority})
+    assert resp.status_code == 422
@@ -0,0 +1,125 @@
+"""
+Tests for run manifests (src/manifest.py) and GET /result served from them: pagination over
+chunks, conditional GET, and incremental updates after chunk processing.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import run_manager
+from src import manifest as manifest_module
+from src.manifest import load_manifest, update_manifest, write_manifest
+
+RUN_ID = "run_manifest"
+CHUNKS = 7
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    output_dir = tmp_path / RUN_ID
+    (output_dir / "chunks").mkdir(parents=True)
+    (output_dir / "audio.wav").write_bytes(b"RIFF" + os.urandom(2000))
+    (output_dir / "captions.vtt").write_text("WEBVTT\n")
+    (output_dir / ".captions.lock").write_text("")
+    for i in range(1, CHUNKS + 1):
+        sf.write(str(output_dir / "chunks" / f"chunk_{i:03d}.wav"), np.zeros(1600 * i, dtype="float32"), 16000, subtype="PCM_16")
+    chunk_starts = {f"chunk_{i:03d}.wav": 30.0 * (i - 1) for i in range(1, CHUNKS + 1)}
+    state = {"step": "done", "error": None, "result": {"output_dir": str(output_dir), "chunk_starts": chunk_starts}, "args": {}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == RUN_ID else None)
+    return output_dir
+
+def test_manifest_lists_artifacts_and_chunks(run_dir):
+    manifest = write_manifest(RUN_ID, str(run_dir), {"chunk_003.wav": 60.0})
+    assert manifest["revision"] == 1 and load_manifest(str(run_dir)) == manifest
+    assert sorted(manifest["artifacts"]) == ["audio.wav", "captions.vtt"]
+    audio = manifest["artifacts"]["audio.wav"]
+    assert audio["kind"] == "audio" and audio["bytes"] == 2004
+    assert audio["sha256"] == hashlib.sha256((run_dir / "audio.wav").read_bytes()).hexdigest()
+    third = manifest["chunks"][2]
+    assert (third["index"], third["name"], third["offset"], third["duration"]) == (2, "chunk_003.wav", 60.0, 0.3)
+    assert [c["name"] for c in manifest["chunks"]] == [f"chunk_{i:03d}.wav" for i in range(1, CHUNKS + 1)]
+
+def test_manifest_updates_incrementally(run_dir, monkeypatch):
+    write_manifest(RUN_ID, str(run_dir))
+    hashed = []
+    real_sha256 = manifest_module._sha256
+    monkeypatch.setattr(manifest_module, "_sha256", lambda path: hashed.append(os.path.basename(path)) or real_sha256(path))
+    results = run_dir / "chunk_results" / "chunk_002"
+    results.mkdir(parents=True)
+    (results / "whisper_transcript.txt").write_text("hello")
+    (results / "comparison.txt").write_text("similar")
+    manifest = update_manifest(str(run_dir), ["chunk_results/chunk_002/whisper_transcript.txt", "chunk_results/chunk_002/comparison.txt"])
+    assert manifest["revision"] == 2 and sorted(hashed) == ["comparison.txt", "whisper_transcript.txt"]
+    assert manifest["chunks"][1]["results"] == ["chunk_results/chunk_002/comparison.txt", "chunk_results/chunk_002/whisper_transcript.txt"]
+    # A full rebuild re-hashes nothing that is unchanged
+    hashed.clear()
+    assert write_manifest(RUN_ID, str(run_dir))["revision"] == 3 and hashed == []
+    assert update_manifest(str(run_dir / "missing"), ["audio.wav"]) is None
+
+def test_result_pages_chunks_from_manifest(run_dir, monkeypatch):
+    client = TestClient(app)
+    first = client.get(f"/result/{RUN_ID}", params={"limit": 3}).json()
+    assert os.path.exists(run_dir / "manifest.json")  # built on first request for runs without one
+    assert first["chunks_total"] == CHUNKS and first["next_offset"] == 3
+    assert first["chunkFiles"] == [f"/media/{RUN_ID}/chunks/chunk_{i:03d}.wav" for i in (1, 2, 3)]
+    assert first["chunks"][1]["offset"] == 30.0 and first["chunks"][1]["duration"] == 0.2
+    assert first["wav_url"] == f"/media/{RUN_ID}/audio.wav" and first["caption_url"] == f"/media/{RUN_ID}/captions.vtt"
+    last = client.get(f"/result/{RUN_ID}", params={"offset": 6, "limit": 3}).json()
+    assert [c["index"] for c in last["chunks"]] == [6] and last["next_offset"] is None
+    assert client.get(f"/result/{RUN_ID}", params={"limit": 0}).status_code == 400
+
+    # Served without listing the run directory
+    def no_listing(*args, **kwargs):
+        raise AssertionError("directory listed")
+    monkeypatch.setattr(os, "listdir", no_listing)
+    monkeypatch.setattr(os, "scandir", no_listing)
+    resp = client.get(f"/result/{RUN_ID}")
+    assert resp.status_code == 200 and len(resp.json()["chunkFiles"]) == CHUNKS
+
+def test_result_conditional_get(run_dir):
+    client = TestClient(app)
+    resp = client.get(f"/result/{RUN_ID}")
+    etag = resp.headers["etag"]
+    cached = client.get(f"/result/{RUN_ID}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["etag"] == etag and cached.content == b""
+    # Another page is another representation
+    assert client.get(f"/result/{RUN_ID}", params={"limit": 2}).headers["etag"] != etag
+    # A processed chunk updates the manifest, so the old ETag no longer matches
+    results = run_dir / "chunk_results" / "chunk_001"
+    results.mkdir(parents=True)
+    (results / "whisper_transcript.txt").write_text("hello")
+    update_manifest(str(run_dir), ["chunk_results/chunk_001/whisper_transcript.txt"])
+    fresh = client.get(f"/result/{RUN_ID}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert fresh.json()["chunks"][0]["transcript_url"] == f"/output/{RUN_ID}/chunk_results/chunk_001/whisper_transcript.txt"
+
+def test_result_transcript_url_points_at_latest_chunk_transcript(run_dir):
+    client = TestClient(app)
+    assert client.get(f"/result/{RUN_ID}").json()["transcript_url"] is None
+    for name, mtime in (("chunk_001", 2000), ("chunk_002", 1000)):
+        results = run_dir / "chunk_results" / name
+        results.mkdir(parents=True)
+        (results / "whisper_transcript.txt").write_text(name)
+        os.utime(results / "whisper_transcript.txt", (mtime, mtime))
+    update_manifest(str(run_dir), [f"chunk_results/{name}/whisper_transcript.txt" for name in ("chunk_001", "chunk_002")])
+    assert client.get(f"/result/{RUN_ID}").json()["transcript_url"] == f"/output/{RUN_ID}/chunk_results/chunk_001/whisper_transcript.txt"
+    # Runs from before per-chunk results keep their top-level transcript
+    (run_dir / "whisper_transcript.txt").write_text("whole run")
+    update_manifest(str(run_dir), ["whisper_transcript.txt"])
+    assert client.get(f"/result/{RUN_ID}").json()["transcript_url"] == f"/output/{RUN_ID}/whisper_transcript.txt"
+
+def test_result_without_output_dir_is_404(tmp_path, monkeypatch):
+    # A stray manifest in the working directory must never be served for such runs
+    (tmp_path / "manifest.json").write_text('{"revision": 1}', encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    state = {"step": "error", "error": "boom", "result": {"stages": []}, "args": {}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == "run_no_dir" else None)
+    client = TestClient(app)
+    resp = client.get("/result/run_no_dir")
+    assert resp.status_code == 404 and resp.json()["detail"] == "Run has no output directory."
+    resp = client.post("/result/run_no_dir/process_chunk", json={"chunk_path": "chunks/chunk_001.wav"})
+    assert resp.status_code == 404
@@ -0,0 +1,133 @@
+"""
+Tests for GET /media/{run_id}/{path}: Range requests, ETags, Cache-Control and cached Opus
+transcodes (ffmpeg is the conftest stub).
+"""
+import os
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.api import media
+from backend.api.media import parse_range
+from src.transcode import cached_transcode, opus_transcode, evict_transcodes
+from backend.services import run_manager
+
+RUN_ID = "run_media"
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    output_dir = tmp_path / RUN_ID
+    (output_dir / "chunks").mkdir(parents=True)
+    sf.write(str(output_dir / "chunks" / "chunk_001.wav"), np.zeros(16000, dtype="float32"), 16000, subtype="PCM_16")
+    (output_dir / "whisper_transcript.txt").write_text("hello")
+    (tmp_path / "secret.txt").write_text("outside the run")
+    state = {"step": "done", "error": None, "result": {"output_dir": str(output_dir)}, "args": {}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == RUN_ID else None)
+    monkeypatch.setattr(media, "MEDIA_TRANSCODE_DIR", str(tmp_path / "transcodes"))
+    return output_dir
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    # Ignored: whole file is sent
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=9-3", 100) is None
+    for unsatisfiable in ("bytes=100-", "bytes=-0"):
+        with pytest.raises(ValueError):
+            parse_range(unsatisfiable, 100)
+
+def test_full_and_ranged_reads(run_dir):
+    client = TestClient(app)
+    data = (run_dir / "chunks" / "chunk_001.wav").read_bytes()
+    full = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav")
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["accept-ranges"] == "bytes" and "immutable" in full.headers["cache-control"]
+    assert full.headers["content-type"].startswith("audio/")
+    etag = full.headers["etag"]
+    part = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206 and part.content == data[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(data)}" and part.headers["content-length"] == "100"
+    tail = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"Range": "bytes=-44"})
+    assert tail.content == data[-44:]
+    bad = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"Range": f"bytes={len(data)}-"})
+    assert bad.status_code == 416 and bad.headers["content-range"] == f"bytes */{len(data)}"
+    # Validators: unchanged file is 304; a stale If-Range gets the whole file
+    assert client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"If-None-Match": etag}).status_code == 304
+    stale = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and len(stale.content) == len(data)
+    head = client.head(f"/media/{RUN_ID}/chunks/chunk_001.wav", headers={"Range": "bytes=0-9"})
+    assert head.status_code == 206 and head.headers["content-length"] == "10" and head.content == b""
+
+def test_mutable_files_revalidate_and_paths_stay_in_run(run_dir):
+    client = TestClient(app)
+    transcript = client.get(f"/media/{RUN_ID}/whisper_transcript.txt")
+    assert transcript.text == "hello" and transcript.headers["cache-control"] == "no-cache"
+    assert client.get(f"/media/{RUN_ID}/../secret.txt").status_code == 404
+    assert client.get(f"/media/{RUN_ID}/%2E%2E/secret.txt").status_code == 404
+    assert client.get("/media/run_missing/chunks/chunk_001.wav").status_code == 404
+    assert client.get(f"/media/{RUN_ID}/whisper_transcript.txt", params={"format": "opus"}).status_code == 400
+
+def _wait_for_transcode(source: str, cache_dir: str, timeout: float = 10.0) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        path = cached_transcode(source, cache_dir)
+        if path:
+            return path
+        time.sleep(0.02)
+    raise AssertionError("background transcode did not finish")
+
+def test_opus_transcode_runs_in_background_and_is_cached(run_dir, stub_media_tools):
+    client = TestClient(app)
+    source = run_dir / "chunks" / "chunk_001.wav"
+    # First request: no waiting on ffmpeg; the source plays and must not be cached as the transcode
+    first = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", params={"format": "opus"})
+    assert first.status_code == 200 and first.content == source.read_bytes()
+    assert first.headers["content-type"].startswith("audio/") and first.headers["cache-control"] == "no-cache"
+    transcoded = _wait_for_transcode(str(source), media.MEDIA_TRANSCODE_DIR)
+    ready = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", params={"format": "opus"})
+    assert ready.status_code == 200 and ready.headers["content-type"] == "audio/webm"
+    assert ready.headers["etag"] != first.headers["etag"] and "immutable" in ready.headers["cache-control"]
+    second = client.get(f"/media/{RUN_ID}/chunks/chunk_001.wav", params={"format": "opus"}, headers={"Range": "bytes=0-15"})
+    assert second.status_code == 206 and second.content == ready.content[:16]
+    assert second.headers["etag"] == ready.headers["etag"] and os.path.isfile(transcoded)
+    calls = stub_media_tools.calls("ffmpeg")
+    assert len(calls) == 1 and "libopus" in calls[0]
+
+def test_transcode_evicted_before_open_serves_the_source(run_dir, monkeypatch):
+    # Another request's eviction removed the file between the cache lookup and the open
+    monkeypatch.setattr(media, "cached_transcode", lambda *args: str(run_dir / "evicted.webm"))
+    monkeypatch.setattr(media, "start_transcode", lambda *args, **kwargs: False)
+    response = TestClient(app).get(f"/media/{RUN_ID}/chunks/chunk_001.wav", params={"format": "opus"})
+    assert response.status_code == 200 and response.content == (run_dir / "chunks" / "chunk_001.wav").read_bytes()
+    assert response.headers["cache-control"] == "no-cache"
+
+def test_transcode_cache_evicts_least_recently_used(tmp_path, stub_media_tools):
+    cache_dir = str(tmp_path / "transcodes")
+    sources = []
+    for i in range(3):
+        path = tmp_path / f"source_{i}.wav"
+        sf.write(str(path), np.zeros(1600, dtype="float32"), 16000, subtype="PCM_16")
+        sources.append(str(path))
+    first = opus_transcode(sources[0], cache_dir, max_bytes=None)
+    second = opus_transcode(sources[1], cache_dir, max_bytes=None)
+    os.utime(first, (1000, os.stat(first).st_mtime))
+    os.utime(second, (2000, os.stat(second).st_mtime))
+    mtime = os.stat(first).st_mtime_ns
+    # A hit refreshes the access time only, so the ETag (size + mtime) is unchanged
+    assert opus_transcode(sources[0], cache_dir, max_bytes=None) == first
+    assert os.stat(first).st_mtime_ns == mtime and os.stat(first).st_atime > 2000
+
+    budget = 2 * os.path.getsize(first)
+    third = opus_transcode(sources[2], cache_dir, max_bytes=budget)
+    assert os.path.exists(third) and os.path.exists(first) and not os.path.exists(second)
+    # The transcode just produced is kept even when it alone exceeds the budget
+    assert evict_transcodes(cache_dir, 0, keep=third) == 1
+    assert os.path.exists(third) and not os.path.exists(first)
@@ -0,0 +1,130 @@
+"""
+Tests for the video-ID keyed media cache (src/media_cache.py) and its use by the downloaders.
+Downloads go through the stub yt-dlp/ffmpeg from conftest.py.
+"""
+import os
+import threading
+
+import pytest
+import soundfile as sf
+
+from src.acquire import acquire_media_sync
+from src.downloader import download_audio, download_captions
+from src.media_cache import MediaCache, parse_video_id, audio_cache_key
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s"
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://youtu.be/dQw4w9WgXcQ?si=abc", "dQw4w9WgXcQ"),
+    ("https://m.youtube.com/shorts/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/live/dQw4w9WgXcQ?feature=share", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/playlist?list=PL123", None),
+    ("not a url", None),
+])
+def test_parse_video_id(url, expected):
+    assert parse_video_id(url) == expected
+
+def test_second_download_is_linked_from_cache(stub_media_tools, tmp_path):
+    cache = MediaCache(str(tmp_path / "media"))
+    first = download_audio(URL, str(tmp_path / "run1" / "audio.wav"), 16000, streaming=True, media_cache=cache)
+    # Different URL form, same video: must hit
+    second = download_audio("https://youtu.be/dQw4w9WgXcQ", str(tmp_path / "run2" / "audio.wav"), 16000, streaming=True, media_cache=cache)
+    assert len(stub_media_tools.calls("yt-dlp")) == 1
+    assert sf.info(second).samplerate == 16000
+    assert os.path.samefile(first, second)  # hardlinked from the same cache entry
+    assert cache.stats()["hits"] == 1
+    # Another sample rate is a different entry
+    download_audio(URL, str(tmp_path / "run3" / "audio.wav"), 8000, streaming=True, media_cache=cache)
+    assert len(stub_media_tools.calls("yt-dlp")) == 2
+
+def test_captions_cached_and_missing_captions_not_cached(stub_media_tools, tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path / "media"))
+    monkeypatch.setenv("STUB_YTDLP_FAIL", "1")
+    assert download_captions(URL, str(tmp_path / "run0" / "captions.vtt"), "en", media_cache=cache) is None
+    monkeypatch.delenv("STUB_YTDLP_FAIL")
+    first = download_captions(URL, str(tmp_path / "run1" / "captions.vtt"), "en", media_cache=cache)
+    second = download_captions(URL, str(tmp_path / "run2" / "captions.vtt"), "en", media_cache=cache)
+    assert first.endswith("captions.en.vtt") and second == str(tmp_path / "run2" / "captions.en.vtt")
+    with open(second, encoding="utf-8") as f:
+        assert "hello from the stub captions" in f.read()
+    assert len(stub_media_tools.calls("yt-dlp")) == 2
+
+def test_corrupt_entry_is_redownloaded(stub_media_tools, tmp_path):
+    cache = MediaCache(str(tmp_path / "media"))
+    path = download_audio(URL, str(tmp_path / "run1" / "audio.wav"), 16000, streaming=True, media_cache=cache)
+    os.remove(path)  # drop the run's link so the cached inode can be corrupted in place
+    cached = os.path.join(cache._entry_dir(audio_cache_key("dQw4w9WgXcQ", 16000)), "audio.wav")
+    with open(cached, "r+b") as f:
+        f.seek(100)
+        f.write(b"\x00\xff" * 8)
+    download_audio(URL, str(tmp_path / "run2" / "audio.wav"), 16000, streaming=True, media_cache=cache)
+    assert len(stub_media_tools.calls("yt-dlp")) == 2
+    assert cache.stats()["corrupt"] == 1
+
+def test_hits_hash_only_files_changed_since_stored(tmp_path, monkeypatch):
+    from src import media_cache
+    cache = MediaCache(str(tmp_path / "media"))
+    key = "aaaaaaaaaaa/audio-wav-16000"
+
+    def produce(staging):
+        with open(os.path.join(staging, "audio.wav"), "wb") as f:
+            f.write(b"x" * 100)
+        return True
+
+    cached = cache.fetch(key, produce)["audio.wav"]
+    hashed = []
+    real_sha256 = media_cache._sha256
+    monkeypatch.setattr(media_cache, "_sha256", lambda path: hashed.append(path) or real_sha256(path))
+    assert cache.lookup(key) is not None and hashed == []
+    # Same bytes, new mtime: hashed once, then the new mtime is trusted
+    os.utime(cached, ns=(0, 10 ** 9))
+    assert cache.lookup(key) is not None and cache.lookup(key) is not None
+    assert hashed == [cached]
+    # Rewritten in place with the same size: caught by the hash
+    with open(cached, "r+b") as f:
+        f.write(b"y")
+    assert cache.lookup(key) is None and cache.stats()["corrupt"] == 1
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = MediaCache(str(tmp_path / "media"), max_bytes=250)
+
+    def producer(size):
+        def produce(staging):
+            with open(os.path.join(staging, "audio.wav"), "wb") as f:
+                f.write(b"x" * size)
+            return True
+        return produce
+
+    cache.fetch("aaaaaaaaaaa/audio-wav-16000", producer(100))
+    cache.fetch("bbbbbbbbbbb/audio-wav-16000", producer(100))
+    os.utime(os.path.join(cache._entry_dir("aaaaaaaaaaa/audio-wav-16000"), "meta.json"), (1, 1))
+    os.utime(os.path.join(cache._entry_dir("bbbbbbbbbbb/audio-wav-16000"), "meta.json"), (2, 2))
+    assert cache.lookup("aaaaaaaaaaa/audio-wav-16000") is not None  # touch: a is now most recent
+    cache.fetch("ccccccccccc/audio-wav-16000", producer(100))
+    assert cache.lookup("bbbbbbbbbbb/audio-wav-16000") is None
+    assert cache.lookup("aaaaaaaaaaa/audio-wav-16000") is not None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 200
+
+def test_concurrent_requests_download_once(stub_media_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_YTDLP_SLEEP", "0.3")
+    cache = MediaCache(str(tmp_path / "media"))
+    results, errors = [], []
+
+    def run(i):
+        try:
+            results.append(acquire_media_sync(URL, str(tmp_path / f"run{i}" / "audio.wav"), str(tmp_path / f"run{i}" / "captions.vtt"), media_cache=cache))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(20)
+    assert not errors
+    assert len(results) == 4
+    # One audio + one captions download in total, however many runs raced for the video
+    assert len(stub_media_tools.calls("yt-dlp")) == 2
+    assert sorted(r["cache"]["audio"] for r in results) == ["hit", "hit", "hit", "miss"]
+    assert all(r["captions_path"] and os.path.exists(r["captions_path"]) for r in results)
@@ -0,0 +1,155 @@
+"""
+Tests for the metrics registry (src/metrics.py), GET /metrics, pipeline stage instrumentation,
+and metrics recorded in executor worker processes reaching the API process.
+"""
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import pipeline_wrapper
+from backend.services.executor import ProcessExecutor
+from src import metrics
+from src.fileio import atomic_write_text, record_written
+from src.manifest import manifest_path, write_manifest
+
+def record_in_worker(seconds):
+    metrics.STAGE_SECONDS.observe(seconds, stage="metrics_test")
+    return os.getpid()
+
+def _sample(text, line_prefix):
+    values = [line.rsplit(" ", 1)[1] for line in text.splitlines() if line.startswith(line_prefix + " ")]
+    return float(values[0]) if values else 0.0
+
+def test_render_text_format():
+    registry = metrics.Registry()
+    requests = registry.register(metrics.Counter("t_requests_total", "Requests.", ("path",)))
+    latency = registry.register(metrics.Histogram("t_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0)))
+    depth = registry.register(metrics.Gauge("t_depth", "Depth."))
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="vad")
+    depth.set_function(lambda: 4)
+    assert registry.register(metrics.Counter("t_requests_total", "Requests.", ("path",))) is requests
+    with pytest.raises(metrics.MetricsError):
+        registry.register(metrics.Gauge("t_requests_total", "Requests."))
+    with pytest.raises(metrics.MetricsError):
+        requests.inc(route="/a")
+    assert registry.render().splitlines() == [
+        "# HELP t_depth Depth.",
+        "# TYPE t_depth gauge",
+        "t_depth 4",
+        "# HELP t_latency_seconds Latency.",
+        "# TYPE t_latency_seconds histogram",
+        't_latency_seconds_bucket{stage="vad",le="0.1"} 2',
+        't_latency_seconds_bucket{stage="vad",le="1"} 3',
+        't_latency_seconds_bucket{stage="vad",le="+Inf"} 4',
+        't_latency_seconds_sum{stage="vad"} 3.65',
+        't_latency_seconds_count{stage="vad"} 4',
+        "# HELP t_requests_total Requests.",
+        "# TYPE t_requests_total counter",
+        't_requests_total{path="/a\\"b"} 3',
+    ]
+
+def test_drain_and_merge_across_registries():
+    worker, api = metrics.Registry(), metrics.Registry()
+    for registry in (worker, api):
+        registry.register(metrics.Counter("t_bytes_total", "Bytes."))
+        registry.register(metrics.Histogram("t_seconds", "Seconds.", ("stage",), buckets=(1.0,)))
+    api.get("t_bytes_total").inc(5)
+    worker.get("t_bytes_total").inc(10)
+    worker.get("t_seconds").observe(0.5, stage="vad")
+    api.merge(worker.drain())
+    api.merge(worker.drain())  # nothing new since the last drain
+    assert api.get("t_bytes_total").value() == 15
+    assert api.get("t_seconds").snapshot(stage="vad") == {"buckets": [1, 1], "sum": 0.5, "count": 1}
+    assert worker.get("t_seconds").snapshot(stage="vad") is None
+
+def test_disabled_metrics_record_nothing():
+    histogram = metrics.Histogram("t_off_seconds", "Off.")
+    metrics.configure(enabled=False)
+    try:
+        with histogram.time():
+            pass
+        histogram.observe(1.0)
+    finally:
+        metrics.configure(enabled=True)
+    assert histogram.snapshot() is None
+
+def test_chunk_stages_reach_metrics_endpoint(tmp_path, monkeypatch):
+    run_dir = tmp_path / "run_metrics"
+    (run_dir / "chunks").mkdir(parents=True)
+    (run_dir / "captions.vtt").write_text("WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nhello there\n", encoding="utf-8")
+    chunk_path = run_dir / "chunks" / "chunk_001.wav"
+    sf.write(str(chunk_path), np.zeros(32000, dtype="float32"), 16000, subtype="PCM_16")
+    monkeypatch.setattr(pipeline_wrapper, "transcribe_chunk", lambda chunk, output_path, **kw: ("hello there", 2.0))
+    monkeypatch.setattr(pipeline_wrapper, "compare_transcripts",
+                        lambda asr, captions, output_path, **kw: atomic_write_text(output_path, "Normalized Semantic Similarity Score: 90.00%\n"))
+    client = TestClient(app)
+    before = client.get("/metrics").text
+
+    pipeline_wrapper.process_chunk_for_comparison("run_metrics", str(chunk_path), "https://youtu.be/x", "en", "tiny",
+                                                  base_output_dir=str(tmp_path), cascade=False)
+    resp = client.get("/metrics")
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = resp.text
+    for stage in ("transcribe", "compare"):
+        key = f'ytminer_stage_seconds_count{{stage="{stage}"}}'
+        assert _sample(after, key) == _sample(before, key) + 1
+    key = 'ytminer_audio_seconds_total{stage="transcribe"}'
+    assert _sample(after, key) == _sample(before, key) + 2.0
+    assert "# TYPE ytminer_model_load_seconds histogram" in after
+    assert 'ytminer_queue_jobs{queue="runs",state="queued"}' in after
+    assert 'ytminer_queue_jobs{queue="chunks",state="running"}' in after
+
+def test_download_progress_counts_bytes():
+    ticks = []
+    metered = pipeline_wrapper._metered_progress(lambda stage, info: ticks.append(stage))
+    before = metrics.DOWNLOAD_BYTES.value()
+    for downloaded in (100, 600, 1000, 300):  # the last tick starts a second file
+        metered("download", {"downloaded_bytes": downloaded})
+    metered("convert", {"out_time_seconds": 1.0})
+    assert metrics.DOWNLOAD_BYTES.value() - before == 1300
+    assert ticks == ["download"] * 4 + ["convert"]
+    assert pipeline_wrapper._metered_progress(None) is None
+
+def test_written_bytes_count_writes_not_manifest_rebuilds(tmp_path):
+    run_dir = tmp_path / "run_written"
+    written = {kind: metrics.WRITTEN_BYTES.value(kind=kind) for kind in ("transcripts", "chunks", "other")}
+    atomic_write_text(str(run_dir / "chunk_results" / "chunk_001" / "whisper_transcript.txt"), "hello\n")
+    (run_dir / "chunks").mkdir()
+    sf.write(str(run_dir / "chunks" / "chunk_001.wav"), np.zeros(1600), 16000, subtype="PCM_16")
+    record_written(str(run_dir / "chunks" / "chunk_001.wav"))
+    assert metrics.WRITTEN_BYTES.value(kind="transcripts") - written["transcripts"] == 6
+    chunk_bytes = os.path.getsize(run_dir / "chunks" / "chunk_001.wav")
+    assert metrics.WRITTEN_BYTES.value(kind="chunks") - written["chunks"] == chunk_bytes
+    # Building and rebuilding the manifest only writes manifest.json; existing files are not re-counted
+    for _ in range(3):
+        if os.path.exists(manifest_path(str(run_dir))):
+            os.remove(manifest_path(str(run_dir)))
+        write_manifest("run_written", str(run_dir))
+    assert metrics.WRITTEN_BYTES.value(kind="chunks") - written["chunks"] == chunk_bytes
+    assert metrics.WRITTEN_BYTES.value(kind="transcripts") - written["transcripts"] == 6
+
+def test_cache_hit_ratio():
+    before = {result: metrics.CACHE_REQUESTS.value(cache="metrics_test", result=result) for result in ("hit", "miss")}
+    assert before == {"hit": 0.0, "miss": 0.0}
+    for hit in (True, True, True, False):
+        metrics.cache_lookup("metrics_test", hit)
+    assert 'ytminer_cache_hit_ratio{cache="metrics_test"} 0.75' in metrics.render()
+
+def test_worker_metrics_are_merged_into_api_process():
+    executor = ProcessExecutor(processes=1, preload=False)
+    try:
+        before = metrics.STAGE_SECONDS.snapshot(stage="metrics_test") or {"count": 0, "sum": 0.0}
+        pid = executor.call(record_in_worker, 0.25)
+        executor.call(record_in_worker, 0.5)
+    finally:
+        executor.shutdown()
+    assert pid != os.getpid()
+    after = metrics.STAGE_SECONDS.snapshot(stage="metrics_test")
+    assert after["count"] - before["count"] == 2 and after["sum"] - before["sum"] == pytest.approx(0.75)
@@ -0,0 +1,123 @@
+"""
+Tests for per-stage resource records and on-demand cProfile capture (src/profiling.py):
+stage records in run and chunk results, and profile artifacts served through the API.
+Downloads go through the stub yt-dlp/ffmpeg from conftest.py; VAD is patched.
+"""
+import os
+import pstats
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import pipeline_wrapper, run_manager
+from src import metrics
+from src.fileio import atomic_write_text
+from src.profiling import StageRecorder, profile_capture
+from src.vad import VADException
+
+VTT = "WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nhello there\n"
+
+def _busy_work(n):
+    return sum(i * i for i in range(n))
+
+def test_stage_records_time_memory_and_throughput():
+    stages = StageRecorder()
+    before = metrics.STAGE_SECONDS.snapshot(stage="profiling_test") or {"count": 0}
+    with stages.stage("profiling_test") as stage:
+        _busy_work(200000)
+        ballast = bytearray(64 * 1024 * 1024)
+        stage.set(audio_seconds=30.0, chunks=3)
+    with pytest.raises(RuntimeError):
+        with stages.stage("failing"):
+            raise RuntimeError("boom")
+    del ballast
+    first, failed = stages.records()
+    assert first["stage"] == "profiling_test" and first["chunks"] == 3 and "error" not in first
+    assert first["wall_seconds"] > 0 and first["cpu_seconds"] > 0
+    assert first["peak_rss_delta_bytes"] >= 0
+    assert first["audio_seconds"] == 30.0
+    assert first["audio_seconds_per_second"] == pytest.approx(30.0 / first["wall_seconds"], rel=0.01)
+    assert failed["stage"] == "failing" and failed["error"] == "RuntimeError" and failed["audio_seconds"] is None
+    assert metrics.STAGE_SECONDS.snapshot(stage="profiling_test")["count"] == before["count"] + 1
+
+def test_profile_capture_writes_pstats_and_summary(tmp_path):
+    base = str(tmp_path / "profile")
+    with profile_capture(base) as capture:
+        _busy_work(10000)
+    assert capture.error is None and capture.files == [base + ".pstats", base + ".txt"]
+    functions = {func[2] for func in pstats.Stats(base + ".pstats").stats}
+    assert "_busy_work" in functions
+    assert "_busy_work" in open(base + ".txt", encoding="utf-8").read()
+    with profile_capture(str(tmp_path / "off"), enabled=False) as capture:
+        pass
+    assert capture.files == [] and not os.path.exists(tmp_path / "off.pstats")
+
+def test_profiled_run_and_chunk_are_downloadable(stub_media_tools, tmp_path, monkeypatch):
+    sr = 16000
+    media = tmp_path / "source.wav"
+    sf.write(str(media), 0.1 * np.sin(2 * np.pi * 200 * np.arange(40 * sr) / sr), sr, subtype="PCM_16")
+    vtt = tmp_path / "source.vtt"
+    vtt.write_text(VTT, encoding="utf-8")
+    monkeypatch.setenv("STUB_MEDIA", str(media))
+    monkeypatch.setenv("STUB_VTT", str(vtt))
+    monkeypatch.setattr(pipeline_wrapper, "MEDIA_CACHE_ENABLED", False)
+    monkeypatch.setattr(pipeline_wrapper, "run_silero_vad", lambda path, sampling_rate=16000, **kw: [(0.0, sf.info(path).duration)])
+    monkeypatch.setattr(pipeline_wrapper, "transcribe_chunk", lambda chunk, output_path, **kw: ("hello there", 2.0))
+    monkeypatch.setattr(pipeline_wrapper, "compare_transcripts",
+                        lambda asr, captions, output_path, **kw: atomic_write_text(output_path, "Normalized Semantic Similarity Score: 90.00%\n"))
+
+    result = pipeline_wrapper.run_initial_pipeline("run_profiled", "https://youtu.be/x", "en", "tiny",
+                                                   base_output_dir=str(tmp_path / "output"), profile=True)
+    names = [stage["stage"] for stage in result["stages"]]
+    # Audio and captions are acquired concurrently, as one "download" stage
+    assert names == ["download", "index_captions", "vad", "chunking", "write_manifest"]
+    vad = next(stage for stage in result["stages"] if stage["stage"] == "vad")
+    assert vad["audio_seconds"] == pytest.approx(40.0, abs=0.01) and vad["audio_seconds_per_second"] > 0
+    assert result["profile"] == {"files": ["profile.pstats", "profile.txt"], "error": None}
+
+    state = {"step": "done", "error": None, "result": result, "args": {"profile": True, "model_size": "tiny"}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == "run_profiled" else None)
+    client = TestClient(app)
+    page = client.get("/result/run_profiled").json()
+    assert page["profile_urls"] == {"pstats": "/media/run_profiled/profile.pstats", "txt": "/media/run_profiled/profile.txt"}
+    assert [stage["stage"] for stage in page["stages"]] == names
+    assert {a["path"]: a["kind"] for a in page["artifacts"]}["profile.pstats"] == "profiles"
+    resp = client.get(page["profile_urls"]["txt"])
+    assert resp.status_code == 200 and "run_initial_pipeline" in resp.text
+
+    chunk = pipeline_wrapper.process_chunk_for_comparison(
+        "run_profiled", os.path.join(result["output_dir"], "chunks", "chunk_001.wav"), "https://youtu.be/x", "en", "tiny",
+        base_output_dir=str(tmp_path / "output"), cascade=False, profile=True)
+    assert [stage["stage"] for stage in chunk["stages"]] == ["transcribe", "compare"]
+    assert chunk["profile"]["files"] == ["chunk_results/chunk_001/profile.pstats", "chunk_results/chunk_001/profile.txt"]
+    unprofiled = pipeline_wrapper.process_chunk_for_comparison(
+        "run_profiled", os.path.join(result["output_dir"], "chunks", "chunk_001.wav"), "https://youtu.be/x", "en", "tiny",
+        base_output_dir=str(tmp_path / "output"), cascade=False)
+    assert unprofiled["profile"] is None and len(unprofiled["stages"]) == 2
+
+def test_failed_run_keeps_its_stage_records(stub_media_tools, tmp_path, monkeypatch):
+    sr = 16000
+    media = tmp_path / "source.wav"
+    sf.write(str(media), 0.1 * np.sin(2 * np.pi * 200 * np.arange(5 * sr) / sr), sr, subtype="PCM_16")
+    vtt = tmp_path / "source.vtt"
+    vtt.write_text(VTT, encoding="utf-8")
+    monkeypatch.setenv("STUB_MEDIA", str(media))
+    monkeypatch.setenv("STUB_VTT", str(vtt))
+    monkeypatch.setattr(pipeline_wrapper, "MEDIA_CACHE_ENABLED", False)
+
+    def no_speech(path, sampling_rate=16000, **kw):
+        raise VADException("No speech detected")
+
+    monkeypatch.setattr(pipeline_wrapper, "run_silero_vad", no_speech)
+    monkeypatch.setitem(run_manager.run_states, "run_vad_fails", {"step": "queued", "error": None, "result": None, "args": {}})
+    run_manager._background_run({"youtube_url": "https://youtu.be/x", "language": "en", "model_size": "tiny",
+                                 "base_output_dir": str(tmp_path / "output"), "profile": True}, "run_vad_fails")
+    state = run_manager.run_states["run_vad_fails"]
+    assert state["step"] == "error"
+    assert [stage["stage"] for stage in state["stages"]] == ["download", "index_captions", "vad"]
+    assert state["stages"][-1]["error"] == "VADException"
+    assert state["profile"]["files"] == ["profile.pstats", "profile.txt"]
+    assert run_manager.get_run_status("run_vad_fails")["stages"] == state["stages"]
@@ -0,0 +1,67 @@
+"""
+Tests for live progress reporting: yt-dlp/ffmpeg progress parsing, chunking fractions,
+and the in-memory progress exposed by get_run_status.
+"""
+import numpy as np
+import soundfile as sf
+
+from backend.services import run_manager
+from src.acquire import acquire_media_sync
+from src.chunker import create_speech_chunks
+from src.downloader import download_audio_piped, parse_ffmpeg_progress, parse_ytdlp_progress
+
+def test_parse_ytdlp_progress():
+    info = parse_ytdlp_progress("[ytminer-progress] 2500 10000 524288.0 12\n")
+    assert info == {"downloaded_bytes": 2500, "total_bytes": 10000, "speed_bps": 524288.0, "eta_seconds": 12.0, "fraction": 0.25}
+    unknown = parse_ytdlp_progress("[ytminer-progress] 2500 NA NA NA")
+    assert unknown["total_bytes"] is None and unknown["fraction"] is None
+    assert parse_ytdlp_progress("[youtube] abc: Downloading webpage") is None
+
+def test_parse_ffmpeg_progress_blocks():
+    block = {}
+    lines = ["out_time_us=1500000", "total_size=48000", "speed=3.5x", "progress=continue",
+             "out_time_us=3000000", "speed=N/A", "progress=end"]
+    reports = [r for r in (parse_ffmpeg_progress(line, block) for line in lines) if r is not None]
+    assert reports[0] == {"media_seconds": 1.5, "output_bytes": 48000, "speed": 3.5, "done": False}
+    assert reports[1]["media_seconds"] == 3.0 and reports[1]["speed"] is None and reports[1]["done"] is True
+
+def test_piped_download_reports_progress(stub_media_tools, tmp_path):
+    events = []
+    download_audio_piped("https://youtu.be/x", str(tmp_path / "audio.wav"), progress_fn=lambda stage, info: events.append((stage, info)))
+    downloads = [info["fraction"] for stage, info in events if stage == "download"]
+    converts = [info for stage, info in events if stage == "convert"]
+    assert downloads == [0.25, 0.5, 1.0]
+    assert converts[-1]["done"] is True
+    assert converts[-1]["media_seconds"] == stub_media_tools.media_seconds
+
+def test_concurrent_acquisition_reports_progress(stub_media_tools, tmp_path):
+    events = []
+    acquire_media_sync("https://youtu.be/x", str(tmp_path / "audio.wav"), str(tmp_path / "captions.vtt"),
+                       progress_fn=lambda stage, info: events.append(stage))
+    assert events.count("download") == 3
+    assert "convert" in events
+
+def test_chunking_reports_fraction(tmp_path):
+    sr = 16000
+    audio_path = tmp_path / "audio.wav"
+    sf.write(str(audio_path), np.zeros(95 * sr, dtype=np.float32), sr)
+    fractions = []
+    chunks = create_speech_chunks(str(audio_path), [(0.0, 95.0)], chunk_folder=str(tmp_path / "chunks"), progress_fn=fractions.append)
+    assert len(chunks) == 3
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+def test_status_exposes_progress_without_rewriting_state(monkeypatch):
+    saves = []
+    monkeypatch.setattr(run_manager, "save_run_state", lambda run_id, state: saves.append(run_id))
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: {"step": "downloading", "error": None})
+    run_id = "run_progress_test"
+    try:
+        for done in range(1, 101):
+            run_manager.update_run_progress(run_id, "download", {"fraction": done / 100})
+        status = run_manager.get_run_status(run_id)
+    finally:
+        run_manager.run_progress.pop(run_id, None)
+    assert saves == []
+    assert status["step"] == "downloading"
+    assert status["progress"]["download"]["fraction"] == 1.0
+    assert "updated_at" in status["progress"]["download"]
@@ -0,0 +1,153 @@
+"""
+Tests for the output retention ledger and eviction (src/retention.py), its tombstones in
+/result and /media, and the CLI no longer wiping output/ on every run.
+"""
+import os
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import run_manager
+from backend.services.pipeline_wrapper import PipelineRunError
+from backend.services import retention as retention_service
+from src import main as cli
+from src.retention import RetentionManager, artifact_kind
+
+DAY = 86400
+KEEP_TRANSCRIPTS = {"audio": {"max_age_days": 14}, "chunks": {"max_age_days": 7}, "captions": {"keep": True},
+                    "transcripts": {"keep": True}, "comparisons": {"keep": True}, "other": {}}
+
+def _make_run(root, run_id, audio_bytes=1000, chunks=2):
+    run_dir = root / run_id
+    (run_dir / "chunks").mkdir(parents=True)
+    (run_dir / "audio.wav").write_bytes(b"a" * audio_bytes)
+    (run_dir / "captions.vtt").write_text("WEBVTT\n")
+    (run_dir / "whisper_transcript.txt").write_text("hello")
+    for i in range(1, chunks + 1):
+        (run_dir / "chunks" / f"chunk_{i:03d}.wav").write_bytes(b"c" * 100)
+    return run_dir
+
+def test_artifact_kind():
+    assert artifact_kind("chunks/chunk_001.wav") == "chunks"
+    assert artifact_kind("audio.wav") == "audio"
+    assert artifact_kind("captions.vtt") == "captions"
+    assert artifact_kind("youtube_captions.txt") == "captions"
+    assert artifact_kind("whisper_transcript.txt") == "transcripts"
+    assert artifact_kind("comparison.txt") == "comparisons"
+    assert artifact_kind("chunk_results/chunk_001/profile.pstats") == "profiles"
+    assert artifact_kind("notes.md") == "other"
+
+def test_ledger_tracks_sizes_incrementally(tmp_path):
+    manager = RetentionManager(str(tmp_path / "output"), str(tmp_path / "ledger.sqlite3"), 10 ** 9, KEEP_TRANSCRIPTS)
+    run_dir = _make_run(tmp_path / "output", "run_a")
+    manager.record_run("run_a")
+    usage = manager.usage()
+    assert usage["bytes"] == 1000 + 7 + 5 + 200 and usage["by_kind"]["chunks"] == 200 and usage["runs"] == 1
+    # Rewriting one file only re-records that file; deleted files drop out
+    (run_dir / "whisper_transcript.txt").write_text("hello world")
+    (run_dir / "chunks" / "chunk_002.wav").unlink()
+    manager.record_files("run_a", ["whisper_transcript.txt", "chunks/chunk_002.wav"])
+    assert manager.total_bytes() == 1000 + 7 + 11 + 100
+
+def test_age_policies_expire_artifacts(tmp_path):
+    manager = RetentionManager(str(tmp_path / "output"), str(tmp_path / "ledger.sqlite3"), 10 ** 9, KEEP_TRANSCRIPTS)
+    run_dir = _make_run(tmp_path / "output", "run_old")
+    manager.record_run("run_old")
+    now = os.stat(run_dir / "audio.wav").st_mtime
+    # 8 days later: chunks (7 days) expire, audio (14 days) and kept kinds stay
+    report = manager.enforce(now=now + 8 * DAY)
+    assert report["expired"] == 2 and not (run_dir / "chunks").exists()
+    assert (run_dir / "audio.wav").exists() and (run_dir / "whisper_transcript.txt").exists()
+    assert {t["path"] for t in manager.tombstones("run_old")} == {"chunks/chunk_001.wav", "chunks/chunk_002.wav"}
+    assert manager.enforce(now=now + 30 * DAY, protected={"run_old"})["expired"] == 0
+    assert manager.enforce(now=now + 30 * DAY)["expired"] == 1 and not (run_dir / "audio.wav").exists()
+
+def test_budget_evicts_least_recently_accessed_runs(tmp_path):
+    root = tmp_path / "output"
+    manager = RetentionManager(str(root), str(tmp_path / "ledger.sqlite3"), 2600, KEEP_TRANSCRIPTS)
+    for run_id in ("run_a", "run_b", "run_c"):
+        _make_run(root, run_id)
+        manager.record_run(run_id)
+    now = time.time()
+    manager.touch("run_a", now=now + 3000)
+    manager.touch("run_c", now=now + 2000)
+    # Over budget (3 x 1212 bytes): run_b is the least recently accessed but still running, so run_c goes
+    report = manager.enforce(protected={"run_b"}, now=now + 4000)
+    assert report["evicted"] == 3 and report["bytes"] <= 2600
+    assert not (root / "run_c" / "audio.wav").exists() and (root / "run_b" / "audio.wav").exists()
+    # Kept kinds survive eviction and the run directory stays
+    assert (root / "run_c" / "captions.vtt").exists() and (root / "run_c" / "whisper_transcript.txt").exists()
+    assert {t["kind"] for t in manager.tombstones("run_c")} == {"audio", "chunks"}
+    assert manager.tombstones("run_a") == []
+    # Regenerated files are recorded again and lose their tombstone
+    (root / "run_c" / "audio.wav").write_bytes(b"a")
+    manager.record_files("run_c", ["audio.wav"])
+    assert manager.tombstone("run_c", "audio.wav") is None
+
+def test_evicted_artifacts_are_reported(tmp_path, monkeypatch):
+    root = tmp_path / "output"
+    run_dir = _make_run(root, "run_gone")
+    monkeypatch.setattr(retention_service, "DEFAULT_OUTPUT_DIR", str(root))
+    monkeypatch.setattr(retention_service, "RETENTION_LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(retention_service, "RETENTION_MAX_BYTES", 0)
+    state = {"step": "done", "error": None, "result": {"output_dir": str(run_dir)}, "args": {}}
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: state if run_id == "run_gone" else None)
+    retention_service.record_run_files("run_gone")
+    assert retention_service.enforce_retention()["evicted"] == 3
+
+    client = TestClient(app)
+    result = client.get("/result/run_gone").json()
+    assert {t["path"] for t in result["evicted"]} == {"audio.wav", "chunks/chunk_001.wav", "chunks/chunk_002.wav"}
+    assert all(t["reason"].startswith("budget") for t in result["evicted"])
+    assert client.get("/media/run_gone/audio.wav").status_code == 410
+    assert client.get("/media/run_gone/missing.wav").status_code == 404
+    assert client.get("/media/run_gone/captions.vtt").status_code == 200
+    assert client.get("/system/retention").json()["tombstones"] == 3
+
+def test_cli_keeps_earlier_runs(tmp_path, monkeypatch):
+    base = tmp_path / "output"
+    earlier = _make_run(base, "run_20240101_000000")
+    first = cli.prepare_new_output_dir(str(base))
+    second = cli.prepare_new_output_dir(str(base))
+    assert first != second and os.path.isdir(first) and os.path.isdir(second)
+    assert (earlier / "audio.wav").exists()
+
+    ledger = tmp_path / "ledger.sqlite3"
+    monkeypatch.setattr(cli, "get_retention_manager", lambda base, max_bytes: RetentionManager(base, str(ledger), max_bytes, KEEP_TRANSCRIPTS))
+    monkeypatch.setattr(cli, "run_pipeline", lambda args, output_dir: open(os.path.join(output_dir, "audio.wav"), "wb").write(b"a"))
+    monkeypatch.setattr(sys, "argv", ["ytminer", "https://youtu.be/x", "--output-dir", str(base), "--retention-max-gb", "0"])
+    cli.main()
+    # The new run is recorded but protected; runs the ledger never saw are left alone
+    usage = RetentionManager(str(base), str(ledger)).usage()
+    assert usage["runs"] == 1 and usage["bytes"] == 1
+    assert (earlier / "audio.wav").exists()
+
+def test_failed_and_untracked_runs_enter_the_ledger(tmp_path, monkeypatch):
+    root = tmp_path / "output"
+    ledger = tmp_path / "ledger.sqlite3"
+    monkeypatch.setattr(retention_service, "DEFAULT_OUTPUT_DIR", str(root))
+    monkeypatch.setattr(retention_service, "RETENTION_LEDGER_PATH", str(ledger))
+
+    class FailingExecutor:
+        def call(self, fn, run_id, callbacks=None, **kwargs):
+            # Download succeeded, chunking did not
+            (root / run_id / "chunks").mkdir(parents=True)
+            (root / run_id / "audio.wav").write_bytes(b"a" * 500)
+            (root / run_id / "chunks" / "chunk_001.wav").write_bytes(b"c" * 100)
+            raise PipelineRunError("chunking failed")
+
+    monkeypatch.setattr(run_manager, "get_executor", lambda: FailingExecutor())
+    monkeypatch.setitem(run_manager.run_states, "run_failed", {"step": "queued", "error": None, "result": None, "args": {}})
+    run_manager._background_run({"youtube_url": "https://youtu.be/x"}, "run_failed")
+    manager = retention_service.get_retention()
+    assert run_manager.run_states["run_failed"]["step"] == "error"
+    assert manager.usage()["runs"] == 1 and manager.total_bytes() == 600
+
+    # Directories from before the ledger existed are picked up once; empty ones are not recorded
+    _make_run(root, "run_legacy")
+    (root / "run_empty").mkdir()
+    assert manager.record_untracked_runs() == ["run_legacy"]
+    assert manager.record_untracked_runs() == []
+    assert manager.usage()["runs"] == 2
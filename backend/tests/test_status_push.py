@@ -0,0 +1,118 @@
+"""
+Tests for pushed status updates: the status broker, the SSE stream and long-poll on /status.
+Run state lives only in memory here; disk reads are made to fail.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import run_manager
+from backend.services.status_broker import StatusBroker, get_status_broker
+
+RUN_ID = "run_push_test"
+
+@pytest.fixture
+def live_run(monkeypatch):
+    monkeypatch.setattr(run_manager, "save_run_state", lambda run_id, state: None)
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: pytest.fail("status read the disk"))
+    monkeypatch.setattr("backend.api.status.STATUS_PUSH_MIN_INTERVAL", 0.01)
+    run_manager.run_states[RUN_ID] = {"step": "downloading", "error": None, "result": None, "args": {}}
+    yield RUN_ID
+    run_manager.run_states.pop(RUN_ID, None)
+    run_manager.run_progress.pop(RUN_ID, None)
+
+def _later(delay, *steps):
+    def run():
+        for step in steps:
+            time.sleep(delay)
+            step()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_broker_wait_returns_on_publish_or_timeout():
+    broker = StatusBroker()
+
+    async def scenario():
+        assert await broker.wait("r", since=0, timeout=0.05) == 0
+        _later(0.05, lambda: broker.publish("r"))
+        started = time.monotonic()
+        assert await broker.wait("r", since=0, timeout=5) == 1
+        assert time.monotonic() - started < 2
+        # Already newer than `since`: no waiting at all
+        assert await broker.wait("r", since=0, timeout=5) == 1
+
+    asyncio.run(scenario())
+    assert broker.stats()["subscribers"] == 0
+
+def test_sse_stream_pushes_steps_until_done(live_run):
+    updater = _later(
+        0.1,
+        lambda: run_manager.update_run_progress(live_run, "download", {"fraction": 0.5}),
+        lambda: run_manager.update_pipeline_step(live_run, "vad"),
+        lambda: run_manager.update_pipeline_step(live_run, "done"),
+    )
+    events = []
+    with TestClient(app).stream("GET", f"/status/{live_run}/events") as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        for line in resp.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    updater.join()
+    steps = [event["step"] for event in events]
+    assert steps[0] == "downloading" and steps[-1] == "done"
+    assert "vad" in steps
+    assert any((event.get("progress") or {}).get("download") for event in events)
+    versions = [event["version"] for event in events]
+    assert versions == sorted(versions)
+
+def test_long_poll_waits_for_change(live_run):
+    client = TestClient(app)
+    version = client.get(f"/status/{live_run}").json()["version"]
+    started = time.monotonic()
+    timed_out = client.get(f"/status/{live_run}", params={"since": version, "wait": 0.2}).json()
+    assert timed_out["version"] == version and time.monotonic() - started >= 0.2
+    updater = _later(0.1, lambda: run_manager.update_pipeline_step(live_run, "chunking"))
+    changed = client.get(f"/status/{live_run}", params={"since": version, "wait": 10}).json()
+    updater.join()
+    assert changed["step"] == "chunking" and changed["version"] > version
+
+def test_sse_ends_immediately_for_unknown_run(monkeypatch):
+    monkeypatch.setattr(run_manager, "load_run_state", lambda run_id: None)
+    with TestClient(app).stream("GET", "/status/run_missing/events") as resp:
+        body = "".join(resp.iter_text())
+    assert body.count("event: status") == 1 and "not_found" in body
+    assert get_status_broker().stats()["subscribers"] == 0
+
+def test_forget_waits_for_the_last_waiter():
+    broker = StatusBroker()
+
+    async def scenario():
+        broker.publish("r")
+        waiter = asyncio.ensure_future(broker.wait("r", since=1, timeout=5))
+        await asyncio.sleep(0.01)
+        broker.publish("r")
+        broker.forget("r")  # the waiter is being woken but has not read its version yet
+        assert await waiter == 2
+        assert broker.stats()["runs"] == 0
+
+    asyncio.run(scenario())
+    broker.publish("idle")
+    broker.forget("idle")
+    assert broker.stats() == {"runs": 0, "subscribers": 0, "published": 3}
+
+def test_finished_runs_release_their_version(live_run, monkeypatch):
+    monkeypatch.setattr(run_manager, "record_run_files", lambda run_id: None)
+    monkeypatch.setattr(run_manager, "get_executor", lambda: type("Done", (), {"call": lambda self, fn, **kw: {"output_dir": "x"}})())
+    run_manager._background_run({"youtube_url": "https://youtu.be/x"}, live_run)
+    assert run_manager.run_states[live_run]["step"] == "done"
+    assert get_status_broker().version(live_run) == 0
+    # Long-polling a finished run answers at once instead of waiting for a change that never comes
+    started = time.monotonic()
+    status = TestClient(app).get(f"/status/{live_run}", params={"since": 5, "wait": 10}).json()
+    assert status["step"] == "done" and time.monotonic() - started < 2
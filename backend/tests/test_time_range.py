@@ -0,0 +1,108 @@
+"""
+Tests for time-range partial processing: only [start, end) of the video is fetched,
+VAD'd and chunked, and captions are clipped to the same window.
+Downloads go through the stub yt-dlp/ffmpeg from conftest.py; VAD is patched.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.services import pipeline_wrapper
+from src.downloader import download_audio, make_time_range, parse_timestamp, build_piped_audio_commands
+
+RANGE_VTT = """WEBVTT
+
+00:00:10.000 --> 00:00:12.000
+before the window
+
+00:00:40.000 --> 00:00:42.000
+inside the window
+
+00:01:20.000 --> 00:01:22.000
+after the window
+"""
+
+def test_parse_timestamp_and_make_time_range():
+    assert parse_timestamp("90") == 90.0
+    assert parse_timestamp("1:02:03.5") == 3723.5
+    assert make_time_range(None, None) is None
+    assert make_time_range(None, "00:30") == (0.0, 30.0)
+    assert make_time_range("10", None) == (10.0, None)
+    with pytest.raises(ValueError):
+        make_time_range(30, 10)
+    with pytest.raises(ValueError):
+        parse_timestamp("-5")
+
+def test_piped_commands_request_only_the_section():
+    yt_cmd, _ = build_piped_audio_commands("https://youtu.be/x", "out.wav", 16000, time_range=(30.0, 75.5))
+    assert yt_cmd[yt_cmd.index("--download-sections") + 1] == "*30-75.5"
+    yt_cmd, _ = build_piped_audio_commands("https://youtu.be/x", "out.wav", 16000, time_range=(30.0, None))
+    assert yt_cmd[yt_cmd.index("--download-sections") + 1] == "*30-inf"
+    yt_cmd, _ = build_piped_audio_commands("https://youtu.be/x", "out.wav", 16000)
+    assert "--download-sections" not in yt_cmd
+
+def test_download_audio_time_range_fetches_section(stub_media_tools, tmp_path):
+    out = download_audio("https://youtu.be/x", str(tmp_path / "audio.wav"), 16000, streaming=True, time_range=(0.5, 1.5))
+    assert sf.info(out).duration == pytest.approx(1.0, abs=0.01)
+
+def test_initial_pipeline_scales_with_requested_span(stub_media_tools, tmp_path, monkeypatch):
+    # 90 s source video; only 30-75 s is requested
+    sr = 16000
+    media = tmp_path / "long.wav"
+    sf.write(str(media), 0.1 * np.sin(2 * np.pi * 200 * np.arange(90 * sr) / sr), sr, subtype="PCM_16")
+    vtt = tmp_path / "range.vtt"
+    vtt.write_text(RANGE_VTT, encoding="utf-8")
+    monkeypatch.setenv("STUB_MEDIA", str(media))
+    monkeypatch.setenv("STUB_VTT", str(vtt))
+    monkeypatch.setattr(pipeline_wrapper, "MEDIA_CACHE_ENABLED", False)
+    vad_inputs = []
+
+    def fake_vad(path, sampling_rate=16000, **kwargs):
+        duration = sf.info(path).duration
+        vad_inputs.append(duration)
+        return [(0.0, duration)]
+
+    monkeypatch.setattr(pipeline_wrapper, "run_silero_vad", fake_vad)
+    result = pipeline_wrapper.run_initial_pipeline(
+        "run_range", "https://youtu.be/x", "en", "tiny",
+        base_output_dir=str(tmp_path / "output"), start_time=30, end_time=75
+    )
+    assert vad_inputs == [pytest.approx(45.0, abs=0.01)]
+    assert result["time_range"] == [30.0, 75.0]
+    assert result["chunk_starts"] == {"chunk_001.wav": 30.0}
+    with open(os.path.join(result["output_dir"], "youtube_captions.txt"), encoding="utf-8") as f:
+        assert f.read().strip() == "inside the window"
+
+def test_run_endpoint_rejects_inverted_range():
+    from backend.main import app
+    resp = TestClient(app).post("/run", json={
+        "youtube_url": "https://youtu.be/x", "language": "en", "model_size": "tiny",
+        "start_time": 60, "end_time": 30
+    })
+    assert resp.status_code == 400
+    assert "after start" in resp.json()["detail"]
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_cli_time_range_clips_audio_and_captions(stub_media_tools, tmp_path, monkeypatch, legacy):
+    from src import comparator, main as cli
+    sr = 16000
+    media = tmp_path / "long.wav"
+    sf.write(str(media), 0.1 * np.sin(2 * np.pi * 200 * np.arange(90 * sr) / sr), sr, subtype="PCM_16")
+    vtt = tmp_path / "range.vtt"
+    vtt.write_text(RANGE_VTT, encoding="utf-8")
+    monkeypatch.setenv("STUB_MEDIA", str(media))
+    monkeypatch.setenv("STUB_VTT", str(vtt))
+    monkeypatch.setattr(cli, "run_silero_vad", lambda path, sampling_rate=16000, **kw: [(0.0, sf.info(path).duration)])
+    monkeypatch.setattr(cli, "transcribe_chunk", lambda chunk, output_path, **kw: ("inside the window", 2.0))
+    monkeypatch.setattr(comparator, "compare_transcripts", lambda asr, captions, output_path, **kw: None)
+    monkeypatch.setattr(cli, "enforce_output_retention", lambda *args, **kwargs: None)
+    argv = ["ytminer", "https://youtu.be/x", "--output-dir", str(tmp_path / "output"), "--no-media-cache", "--start", "30", "--end", "75"]
+    monkeypatch.setattr(sys, "argv", argv + (["--legacy-download"] if legacy else []))
+    cli.main()
+    (run_dir,) = (tmp_path / "output").iterdir()
+    assert sf.info(str(run_dir / "audio.wav")).duration == pytest.approx(45.0, abs=0.01)
+    assert (run_dir / "youtube_captions.txt").read_text(encoding="utf-8").strip() == "inside the window"
@@ -0,0 +1,81 @@
+"""
+Unit tests for the structured tracing layer (src/tracing.py).
+Each test uses its own Tracer writing under tmp_path; the global tracer is untouched.
+"""
+import json
+import threading
+
+import pytest
+
+from src import tracing
+from src.tracing import Tracer
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    path = tmp_path / "trace.log"
+    tracer = Tracer(level="off", path=str(path))
+    tracer.event("hello", level="error", x=1)
+    with tracer.span("stage") as span:
+        span.set(y=2)
+    tracer.flush()
+    assert not path.exists()
+    assert tracer._writer is None
+
+def test_span_records_duration_attrs_and_run_id(tmp_path):
+    path = tmp_path / "trace.log"
+    tracer = Tracer(level="info", path=str(path))
+    with tracing.run_context("run_abc"):
+        with tracer.span("vad", wav_path="a.wav") as span:
+            span.set(segments=3)
+    tracer.flush()
+    tracer.close()
+    [record] = read_records(path)
+    assert record["type"] == "span" and record["name"] == "vad"
+    assert record["run_id"] == "run_abc"
+    assert record["attrs"] == {"wav_path": "a.wav", "segments": 3}
+    assert record["status"] == "ok"
+    assert record["end"] >= record["start"] and record["duration_ms"] >= 0
+
+def test_span_records_errors(tmp_path):
+    path = tmp_path / "trace.log"
+    tracer = Tracer(level="info", path=str(path))
+    with pytest.raises(ValueError):
+        with tracer.span("download_audio"):
+            raise ValueError("boom")
+    tracer.flush()
+    tracer.close()
+    [record] = read_records(path)
+    assert record["status"] == "error"
+    assert "boom" in record["error"]
+
+def test_level_filtering_and_sampling(tmp_path):
+    path = tmp_path / "trace.log"
+    tracer = Tracer(level="debug", path=str(path), sample_rate=0.0)
+    tracer.event("dropped by sampling", level="debug")
+    tracer.event("always kept", level="info")
+    tracer.flush()
+    tracer.close()
+    assert [r["name"] for r in read_records(path)] == ["always kept"]
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    tracer = Tracer(level="debug", path=str(tmp_path / "trace.log"), queue_size=1)
+    tracer._writer = object()  # pretend a writer exists but never drains
+    for i in range(5):
+        tracer.event("burst", i=i)
+    assert tracer.dropped == 4
+
+def test_dropped_count_is_exact_across_threads(tmp_path):
+    tracer = Tracer(level="debug", path=str(tmp_path / "trace.log"), queue_size=1)
+    tracer._writer = object()
+    def burst():
+        for i in range(2000):
+            tracer.event("burst", i=i)
+    threads = [threading.Thread(target=burst) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracer.dropped == 8 * 2000 - 1
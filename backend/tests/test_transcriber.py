@@ -87,3 +87,89 @@ Notes:
 - ALL WhisperModel / audio / ffmpeg / IO is fully mocked for CI-friendly test runs.
 - You may extend for more edge paths if required by adding fixtures.
 """
+
+@patch("src.transcriber.os.path.exists", return_value=True)
+@patch("faster_whisper.WhisperModel")
+def test_iter_transcribe_chunk_yields_segments_lazily(mock_fw, mock_exists):
+    """Segments are yielded as the decoder produces them, not after the whole chunk."""
+    produced = []
+    def lazy_segments():
+        for i in range(3):
+            produced.append(i)
+            yield DummySegment(text=f"seg{i}", end=float(i + 1))
+    mock_fw.return_value.transcribe.return_value = (lazy_segments(), {})
+    from src.transcriber import iter_transcribe_chunk
+    it = iter_transcribe_chunk("chunk.wav", use_cache=False)
+    first = next(it)
+    assert first["text"] == "seg0" and first["end"] == 1.0
+    assert produced == [0]
+    assert [s["text"] for s in it] == ["seg1", "seg2"]
+
+# --- Confidence-driven cascade ---
+class StatSegment(DummySegment):
+    def __init__(self, text, start, end, avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=1.3):
+        super().__init__(text=text, end=end)
+        self.start = start
+        self.avg_logprob = avg_logprob
+        self.no_speech_prob = no_speech_prob
+        self.compression_ratio = compression_ratio
+
+def cascade_models(fast_segments, strong_text="strong words"):
+    calls = {"strong": []}
+    def factory(model_size, device, compute_type):
+        class FastModel:
+            def transcribe(self, *a, **k):
+                return (list(fast_segments), {})
+        class StrongModel:
+            def transcribe(self, audio, *a, **k):
+                calls["strong"].append(audio)
+                return ([StatSegment(strong_text, 0.0, 1.0)], {})
+        return FastModel() if model_size == "tiny" else StrongModel()
+    return factory, calls
+
+def write_wav(path, seconds=10.0, sr=16000):
+    import numpy as np
+    import soundfile as sf
+    sf.write(str(path), np.zeros(int(seconds * sr), dtype="float32"), sr)
+
+@patch("faster_whisper.WhisperModel")
+def test_cascade_confident_chunk_skips_strong_model(mock_fw, tmp_path):
+    chunk = tmp_path / "chunk.wav"
+    write_wav(chunk)
+    factory, calls = cascade_models([StatSegment("all good", 0.0, 10.0)])
+    mock_fw.side_effect = factory
+    from src.transcriber import transcribe_chunk_cascade
+    text, end, report = transcribe_chunk_cascade(str(chunk), str(tmp_path / "out.txt"), "tiny", "medium", use_cache=False)
+    assert text == "all good" and end == 10.0
+    assert report["mode"] == "none" and calls["strong"] == []
+    assert report["compute_saved_percent"] == pytest.approx(100 * (1 - 1.0 / 19.7), abs=0.01)
+
+@patch("faster_whisper.WhisperModel")
+def test_cascade_redecodes_only_low_confidence_segments(mock_fw, tmp_path):
+    chunk = tmp_path / "chunk.wav"
+    write_wav(chunk)
+    factory, calls = cascade_models([
+        StatSegment("keep this", 0.0, 7.0),
+        StatSegment("garbled", 7.0, 9.0, avg_logprob=-1.8),
+    ])
+    mock_fw.side_effect = factory
+    from src.transcriber import transcribe_chunk_cascade
+    text, end, report = transcribe_chunk_cascade(str(chunk), str(tmp_path / "out.txt"), "tiny", "medium", use_cache=False)
+    assert text == "keep this strong words"
+    assert report["mode"] == "segments" and report["segments_low_confidence"] == 1
+    assert len(calls["strong"]) == 1
+    # Only the flagged 2 s (plus padding) went through the strong model, not the 10 s chunk
+    assert len(calls["strong"][0]) == int(2.4 * 16000)
+    assert 0 < report["compute_saved_percent"] < 100
+
+@patch("faster_whisper.WhisperModel")
+def test_cascade_full_redecode_when_mostly_low_confidence(mock_fw, tmp_path):
+    chunk = tmp_path / "chunk.wav"
+    write_wav(chunk)
+    factory, calls = cascade_models([StatSegment("noise", 0.0, 9.0, compression_ratio=3.1)])
+    mock_fw.side_effect = factory
+    from src.transcriber import transcribe_chunk_cascade
+    text, end, report = transcribe_chunk_cascade(str(chunk), str(tmp_path / "out.txt"), "tiny", "medium", use_cache=False)
+    assert text == "strong words"
+    assert report["mode"] == "full" and calls["strong"] == [str(chunk)]
+    assert report["compute_saved_percent"] < 0  # fast pass was wasted work
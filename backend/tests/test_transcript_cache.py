@@ -0,0 +1,79 @@
+"""
+Unit tests for the persistent transcript cache and its use in transcribe_chunk.
+All Whisper models are mocked; chunk audio is a small byte file under tmp_path.
+"""
+from unittest.mock import patch
+
+from src.transcript_cache import TranscriptCache, hash_audio_file, make_cache_key
+
+ENTRY = {"text": "hello world", "asr_end_time": 2.5, "segments": [{"start": 0.0, "end": 2.5, "text": "hello world"}]}
+
+class DummySegment:
+    def __init__(self, text="foo bar", start=0.0, end=30.0):
+        self.text = text
+        self.start = start
+        self.end = end
+
+def test_cache_key_depends_on_decode_options():
+    base = make_cache_key("abc", "tiny", "cpu", "int8", "en", 1)
+    assert base == make_cache_key("abc", "tiny", "cpu", "int8", "en", 1)
+    assert base != make_cache_key("abc", "small", "cpu", "int8", "en", 1)
+    assert base != make_cache_key("abc", "tiny", "cpu", "int8", "hi", 1)
+    assert base != make_cache_key("abc", "tiny", "cpu", "int8", "en", 5)
+    assert base != make_cache_key("abc", "tiny", "cpu", "int8", "en", 1, temperature=0.2)
+
+def test_cache_roundtrip_persists_across_instances(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    assert cache.get("k1") is None
+    cache.put("k1", ENTRY)
+    assert cache.get("k1") == ENTRY
+    reopened = TranscriptCache(str(tmp_path))
+    assert reopened.get("k1") == ENTRY
+    assert reopened.stats()["hits"] == 1
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_entries=2)
+    cache.put("aa1", ENTRY)
+    cache.put("bb2", ENTRY)
+    cache.get("aa1")  # aa1 is now most recent
+    cache.put("cc3", ENTRY)
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") == ENTRY
+    assert cache.get("cc3") == ENTRY
+    assert cache.stats()["evictions"] == 1
+
+def test_instances_sharing_a_directory_see_each_others_entries(tmp_path):
+    import os
+    a = TranscriptCache(str(tmp_path), max_entries=2)
+    b = TranscriptCache(str(tmp_path), max_entries=2)
+    assert b.get("aa1") is None  # b has loaded its index
+    a.put("aa1", ENTRY)
+    assert b.get("aa1") == ENTRY
+    b.put("bb2", ENTRY)
+    os.utime(a._entry_path("aa1"), (2000, 2000))
+    os.utime(b._entry_path("bb2"), (1000, 1000))
+    # Eviction goes by the mtimes on disk: bb2 (written by b, unknown to a) is the oldest
+    a.put("cc3", ENTRY)
+    assert not os.path.exists(a._entry_path("bb2"))
+    assert b.get("bb2") is None and b.get("aa1") == ENTRY and b.get("cc3") == ENTRY
+
+def test_transcribe_chunk_second_call_hits_cache(tmp_path):
+    chunk = tmp_path / "chunk_001.wav"
+    chunk.write_bytes(b"RIFF-fake-audio")
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    loads = []
+    def fake_model(*a, **kw):
+        loads.append(a)
+        class DummyModel:
+            def transcribe(self, *a, **k):
+                return ([DummySegment("foo bar", 0.0, 4.0)], {})
+        return DummyModel()
+    from src.transcriber import transcribe_chunk
+    with patch("faster_whisper.WhisperModel", side_effect=fake_model):
+        first = transcribe_chunk(str(chunk), str(tmp_path / "out1.txt"), cache=cache)
+        second = transcribe_chunk(str(chunk), str(tmp_path / "out2.txt"), cache=cache)
+    assert first == second == ("foo bar", 4.0)
+    assert len(loads) == 1
+    assert (tmp_path / "out2.txt").read_text().strip() == "foo bar"
+    key = make_cache_key(hash_audio_file(str(chunk)), "tiny", "cpu", "int8", "en", 1)
+    assert cache.get(key)["segments"] == [{"start": 0.0, "end": 4.0, "text": "foo bar"}]
@@ -51,3 +51,29 @@ def test_vad_gst_raises(monkeypatch):
     monkeypatch.setattr("src.vad.torch.tensor", lambda *a, **k: np.ones(32000))
     with pytest.raises(VADException):
         run_silero_vad("any.wav")
+
+def test_vad_model_is_per_thread_and_released_with_it(monkeypatch):
+    import gc
+    import threading
+    import weakref
+    from src import vad
+    loads = []
+
+    class Model:
+        pass
+
+    def load(*args, **kwargs):
+        loads.append(threading.get_ident())
+        return Model(), [None]
+
+    monkeypatch.setattr("src.vad.torch.hub.load", load)
+    first = vad.load_vad_model()
+    assert vad.load_vad_model() is first and len(loads) == 1
+    models = []
+    thread = threading.Thread(target=lambda: models.append(weakref.ref(vad.load_vad_model()[0])))
+    thread.start()
+    thread.join()
+    del thread
+    gc.collect()
+    # The other thread loaded its own model, and nothing keeps it once that thread is gone
+    assert len(loads) == 2 and models[0]() is None
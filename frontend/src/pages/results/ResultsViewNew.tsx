@@ -65,38 +65,60 @@ const ResultsView: React.FC = () => {
 
   useEffect(() => {
     let interval: NodeJS.Timeout;
+    let events: EventSource | null = null;
     setLoading(true);
     setError(null);
+    const stop = () => {
+      clearInterval(interval);
+      if (events) events.close();
+    };
+    const handleStatus = async (statusData: any) => {
+      setStatus(statusData);
+      if (statusData.step === 'done') {
+        stop();
+        const resultRes = await fetch(`${BACKEND_BASE}/result/${runId}`);
+        const resultData = await resultRes.json();
+        setResult(resultData);
+        setTranscriptUrl(resultData.transcript_url || null);
+        setLoading(false);
+      } else if (statusData.step === 'error') {
+        stop();
+        setError(statusData.error_message || 'Pipeline errored');
+        setLoading(false);
+      } else {
+        setLoading(true);
+      }
+    };
     const poll = async () => {
       try {
-        const controller = new AbortController();
-        const timeout = setTimeout(() => controller.abort(), 300000); // 5 minutes
         const statusRes = await fetch(`${BACKEND_BASE}/status/${runId}`);
-        const statusData = await statusRes.json();
-        setStatus(statusData);
-        if (statusData.step === 'done') {
-          const resultRes = await fetch(`${BACKEND_BASE}/result/${runId}`);
-          const resultData = await resultRes.json();
-          setResult(resultData);
-          setTranscriptUrl(resultData.transcript_url || null);
-          setLoading(false);
-          clearInterval(interval);
-        } else if (statusData.step === 'error') {
-          setError(statusData.error_message || 'Pipeline errored');
-          setLoading(false);
-          clearInterval(interval);
-        } else {
-          setLoading(true);
-        }
+        await handleStatus(await statusRes.json());
       } catch (err: any) {
         setError('Error fetching pipeline status');
         setLoading(false);
-        clearInterval(interval);
+        stop();
       }
     };
-    poll();
-    interval = setInterval(poll, POLL_INTERVAL);
-    return () => { clearInterval(interval); };
+    const startPolling = () => {
+      poll();
+      interval = setInterval(poll, POLL_INTERVAL);
+    };
+    if (typeof EventSource !== 'undefined') {
+      // Pushed updates; fall back to polling if the stream cannot be kept open
+      events = new EventSource(`${BACKEND_BASE}/status/${runId}/events`);
+      events.addEventListener('status', (e: MessageEvent) => {
+        handleStatus(JSON.parse(e.data)).catch(() => setError('Error fetching pipeline status'));
+      });
+      events.onerror = () => {
+        if (events && events.readyState === EventSource.CLOSED) {
+          events = null;
+          startPolling();
+        }
+      };
+    } else {
+      startPolling();
+    }
+    return stop;
   }, [runId]);
 
   console.log('[RENDER] status:', status);
@@ -107,6 +129,16 @@ const ResultsView: React.FC = () => {
   const wavUrl = result?.wav_url ? `${BACKEND_BASE}${result.wav_url}` : '';
   const captionUrl = result?.caption_url ? `${BACKEND_BASE}${result.caption_url}` : '';
   const chunkFiles = result?.chunkFiles || [];
+  const chunksTotal = result?.chunks_total ?? chunkFiles.length;
+
+  const loadMoreChunks = async () => {
+    // /result pages chunks; append the next page to the list shown
+    if (result?.next_offset == null) return;
+    const resp = await fetch(`${BACKEND_BASE}/result/${runId}?offset=${result.next_offset}`);
+    if (!resp.ok) return;
+    const page = await resp.json();
+    setResult((prev: any) => ({ ...prev, chunkFiles: [...(prev?.chunkFiles || []), ...page.chunkFiles], next_offset: page.next_offset }));
+  };
 
   const handleCompare = async () => {
     if (!selectedChunk) return;
@@ -122,14 +154,24 @@ const ResultsView: React.FC = () => {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ chunk_path: selectedChunk })
       });
-      const data = await resp.json();
-      clearTimeout(timeout);
-      if (controller.signal.aborted) throw new Error('Request timed out. Please try again.');
+      let job = await resp.json();
       if (!resp.ok) {
-        if (data && data.error) throw new Error(data.error);
-        if (data && data.detail) throw new Error(data.detail);
+        clearTimeout(timeout);
+        if (job && job.error) throw new Error(job.error);
+        if (job && job.detail) throw new Error(job.detail);
         throw new Error('Chunk processing failed');
       }
+      // The backend queues the chunk (202) and hands back a job; long-poll it until it finishes
+      const statusUrl = job.status_url;
+      while (statusUrl && job.state !== 'done' && job.state !== 'error') {
+        const poll = await fetch(`${BACKEND_BASE}${statusUrl}?wait=25`, { signal: controller.signal });
+        if (!poll.ok) throw new Error('Chunk processing failed');
+        job = await poll.json();
+      }
+      clearTimeout(timeout);
+      if (controller.signal.aborted) throw new Error('Request timed out. Please try again.');
+      if (job.state === 'error') throw new Error(job.error || 'Chunk processing failed');
+      const data = job.result || job;
       setComparisonResult(data.similarity_percent || data.similarity || '(no value)');
       setTranscriptUrl(data.transcript_url ? `${BACKEND_BASE}${data.transcript_url}` : null);
       setCompareText(data.compare_text || '');
@@ -194,7 +236,8 @@ const ResultsView: React.FC = () => {
               {showPostProcessing
                 ? 'Creating results, please wait...'
                 : status && status.step && status.step !== 'starting'
-                  ? (status.step === 'downloading' ? 'Downloading audio/caption file...' :
+                  ? (status.step === 'queued' ? `Waiting in queue${status.queue?.position ? ` (position ${status.queue.position})` : ''}...` :
+                     status.step === 'downloading' ? 'Downloading audio/caption file...' :
                      status.step === 'vad' ? 'Detecting speech regions (VAD)...' :
                      status.step === 'chunking' ? 'Splitting audio into chunks...' :
                      status.step === 'done' ? 'Initial processing complete.' :
@@ -241,13 +284,23 @@ const ResultsView: React.FC = () => {
                   YouTube captions file (VTT format)
                 </Typography>
               </Box>
+              <Box textAlign="left">
+                <Tooltip title="Download all run files (ZIP)">
+                  <span>
+                    <Button variant="outlined" href={`${BACKEND_BASE}/download/${runId}`} download startIcon={<FileDownloadIcon />}>ZIP</Button>
+                  </span>
+                </Tooltip>
+                <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block' }}>
+                  Audio, captions, chunks, transcripts and comparisons
+                </Typography>
+              </Box>
             </Stack>
           </Paper>
 
           <Paper elevation={2} sx={{ mb: 3, p: 2, width: '100%', maxWidth: cardMaxWidth, mx: 'auto' }}>
             <Box display="flex" alignItems="center" justifyContent="space-between" mb={1}>
               <Typography variant="h6">Audio Chunks</Typography>
-              <Typography variant="body2" color="text.secondary" fontWeight="bold">{`Number of chunks: ${chunkFiles.length}`}</Typography>
+              <Typography variant="body2" color="text.secondary" fontWeight="bold">{`Number of chunks: ${chunksTotal}`}</Typography>
             </Box>
             {chunkFiles.length ? (
               <Box sx={chunkBoxStyles}>
@@ -284,6 +337,17 @@ const ResultsView: React.FC = () => {
             ) : (
               <Typography>No chunks available.</Typography>
             )}
+            {result?.next_offset != null && (
+              <Box mt={1} display="flex" justifyContent="center">
+                <Button size="small" onClick={loadMoreChunks}>{`Load more chunks (${chunkFiles.length} of ${chunksTotal})`}</Button>
+              </Box>
+            )}
+            {selectedChunk && (
+              // Opus transcode from /media: playback and seeking start after a few KB instead of the whole WAV
+              <Box mt={1}>
+                <audio key={selectedChunk} controls preload="metadata" style={{ width: '100%' }} src={`${BACKEND_BASE}${selectedChunk}?format=opus`} />
+              </Box>
+            )}
           </Paper>
 
           <Box my={2} display="flex" justifyContent="center">
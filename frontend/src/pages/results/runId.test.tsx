@@ -149,7 +149,14 @@ it('shows semantic matching score result after chunk comparison', async () => {
     }
     if (typeof input === 'string' && input.includes('/result/') && input.includes('/process_chunk')) {
       processChunkCalled = true;
-      return Promise.resolve({ ok: true, json: () => Promise.resolve(mockComparison) });
+      return Promise.resolve({
+        ok: true,
+        status: 202,
+        json: () => Promise.resolve({ job_id: 'chunk_1', state: 'queued', status_url: '/result/testid/chunk_jobs/chunk_1' }),
+      });
+    }
+    if (typeof input === 'string' && input.includes('/chunk_jobs/')) {
+      return Promise.resolve({ ok: true, json: () => Promise.resolve({ job_id: 'chunk_1', state: 'done', result: mockComparison }) });
     }
     if (typeof input === 'string' && input.includes('/result/')) {
       return Promise.resolve({
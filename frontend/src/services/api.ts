@@ -20,13 +20,21 @@ export async function getResult(runId: string) {
 }
 
 export async function processChunk(runId: string, index: number) {
+  // Answers 202 with a chunk job; long-poll the job until it is done or failed
   const resp = await fetch(`/api/result/${runId}/process_chunk`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ chunk_index: index })
   });
   if (!resp.ok) throw new Error(await resp.text());
-  return resp.json();
+  let job = await resp.json();
+  while (job && job.status_url && job.state !== 'done' && job.state !== 'error') {
+    const poll = await fetch(`/api${job.status_url}?wait=25`);
+    if (!poll.ok) throw new Error(await poll.text());
+    job = { ...(await poll.json()), status_url: job.status_url };
+  }
+  if (job && job.state === 'error') throw new Error(job.error);
+  return job && job.result !== undefined ? job.result : job;
 }
 
 export async function getHistory() {
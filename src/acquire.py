@@ -0,0 +1,221 @@
+"""
+Concurrent media acquisition with asyncio subprocesses.
+
+The audio ingest (yt-dlp piped into ffmpeg, see downloader.build_piped_audio_commands)
+and the caption fetch (a separate `yt-dlp --skip-download`) are launched at the same
+time, so the caption fetch is hidden behind the audio download instead of running
+after it. Each process gets its own timeout and wall-clock timing; cancelling the
+acquisition (or an audio failure/timeout) kills every child process.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import tracing
+from src.fileio import record_written
+from src.downloader import DownloadError, ProgressFn, parse_ytdlp_progress, parse_ffmpeg_progress, build_piped_audio_commands, build_captions_command, find_caption_file, link_cached_captions, CACHED_CAPTIONS_NAME
+from src.media_cache import parse_video_id, audio_cache_key, captions_cache_key, link_or_copy
+
+class _ProcTimer:
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.record: Dict[str, Any] = {"process": name}
+        self.done = False
+
+    def finish(self, returncode: Optional[int], status: str) -> Dict[str, Any]:
+        self.done = True
+        self.record.update({
+            "returncode": returncode,
+            "status": status,
+            "seconds": round(time.perf_counter() - self.started, 3),
+        })
+        return self.record
+
+async def _kill(procs: List[asyncio.subprocess.Process]):
+    for proc in procs:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+    for proc in procs:
+        try:
+            await proc.wait()
+        except Exception:
+            pass
+
+async def _acquire_audio(youtube_url: str, output_path: str, sample_rate: int, timeout: Optional[float], timings: List[Dict[str, Any]], time_range: Optional[Tuple[float, Optional[float]]] = None, progress_fn: Optional[ProgressFn] = None) -> str:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_output = output_path + ".part"
+    yt_cmd, ffmpeg_cmd = build_piped_audio_commands(youtube_url, tmp_output, sample_rate, time_range, progress=progress_fn is not None)
+    read_fd, write_fd = os.pipe()
+    procs: List[asyncio.subprocess.Process] = []
+    yt_timer, ff_timer = _ProcTimer("yt-dlp:audio"), _ProcTimer("ffmpeg")
+    try:
+        try:
+            yt_proc = await asyncio.create_subprocess_exec(*yt_cmd, stdout=write_fd, stderr=asyncio.subprocess.PIPE)
+            procs.append(yt_proc)
+            ff_proc = await asyncio.create_subprocess_exec(*ffmpeg_cmd, stdin=read_fd, stdout=asyncio.subprocess.PIPE if progress_fn else asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+            procs.append(ff_proc)
+        finally:
+            # Children hold their own copies; closing ours lets EOF/SIGPIPE propagate
+            os.close(write_fd)
+            os.close(read_fd)
+
+        async def run_yt():
+            err = []
+            # Progress lines are consumed as they arrive; everything else is kept for error messages
+            async for raw in yt_proc.stderr:
+                info = parse_ytdlp_progress(raw.decode("utf-8", "replace")) if progress_fn else None
+                if info is not None:
+                    progress_fn("download", info)
+                else:
+                    err.append(raw)
+            await yt_proc.wait()
+            timings.append(yt_timer.finish(yt_proc.returncode, "ok" if yt_proc.returncode == 0 else "failed"))
+            return b"".join(err)
+
+        async def read_ff_progress():
+            block: Dict[str, str] = {}
+            async for raw in ff_proc.stdout:
+                info = parse_ffmpeg_progress(raw.decode("utf-8", "replace"), block)
+                if info is not None:
+                    progress_fn("convert", info)
+
+        async def run_ff():
+            if progress_fn:
+                _, err = await asyncio.gather(read_ff_progress(), ff_proc.stderr.read())
+            else:
+                err = await ff_proc.stderr.read()
+            await ff_proc.wait()
+            timings.append(ff_timer.finish(ff_proc.returncode, "ok" if ff_proc.returncode == 0 else "failed"))
+            return err
+
+        yt_err, ff_err = await asyncio.wait_for(asyncio.gather(run_yt(), run_ff()), timeout=timeout)
+    except asyncio.TimeoutError:
+        await _kill(procs)
+        timings.extend(t.finish(None, "timeout") for t in (yt_timer, ff_timer) if not t.done)
+        _remove(tmp_output)
+        raise DownloadError(f"Audio download timed out after {timeout}s")
+    except BaseException:
+        # Cancellation or spawn failure: never leave orphaned yt-dlp/ffmpeg behind
+        await _kill(procs)
+        timings.extend(t.finish(None, "cancelled") for t in (yt_timer, ff_timer) if not t.done)
+        _remove(tmp_output)
+        raise
+    if yt_proc.returncode != 0 or ff_proc.returncode != 0 or not os.path.exists(tmp_output):
+        _remove(tmp_output)
+        msg = (yt_err or b"").decode("utf-8", "replace").strip() or (ff_err or b"").decode("utf-8", "replace").strip()
+        raise DownloadError(f"Piped audio download failed (yt-dlp rc={yt_proc.returncode}, ffmpeg rc={ff_proc.returncode}): {msg}")
+    os.replace(tmp_output, output_path)
+    record_written(output_path)
+    return output_path
+
+async def _acquire_captions(youtube_url: str, output_path: str, sub_lang: str, timeout: Optional[float], timings: List[Dict[str, Any]]) -> Optional[str]:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    timer = _ProcTimer("yt-dlp:captions")
+    proc = None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *build_captions_command(youtube_url, output_path, sub_lang),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        await asyncio.wait_for(proc.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        await _kill([proc])
+        timings.append(timer.finish(None, "timeout"))
+        return None
+    except OSError:
+        timings.append(timer.finish(None, "failed"))
+        return None
+    except BaseException:
+        if proc is not None:
+            await _kill([proc])
+        raise
+    timings.append(timer.finish(proc.returncode, "ok" if proc.returncode == 0 else "failed"))
+    if proc.returncode != 0:
+        # Same contract as download_captions: missing captions are not fatal
+        return None
+    found = find_caption_file(output_path, sub_lang)
+    if found:
+        record_written(found)
+    return found
+
+async def _acquire_audio_cached(media_cache, video_id: str, youtube_url: str, output_path: str, sample_rate: int, timeout: Optional[float], timings: List[Dict[str, Any]], cache_status: Dict[str, str], time_range=None, progress_fn=None) -> str:
+    async def produce(staging_dir):
+        await _acquire_audio(youtube_url, os.path.join(staging_dir, "audio.wav"), sample_rate, timeout, timings, time_range, progress_fn)
+        cache_status["audio"] = "miss"
+        return True
+    cache_status["audio"] = "hit"
+    files = await media_cache.afetch(audio_cache_key(video_id, sample_rate, time_range=time_range), produce)
+    link_or_copy(files["audio.wav"], output_path)
+    return output_path
+
+async def _acquire_captions_cached(media_cache, video_id: str, youtube_url: str, output_path: str, sub_lang: str, timeout: Optional[float], timings: List[Dict[str, Any]], cache_status: Dict[str, str]) -> Optional[str]:
+    async def produce(staging_dir):
+        cache_status["captions"] = "miss"
+        staged = await _acquire_captions(youtube_url, os.path.join(staging_dir, CACHED_CAPTIONS_NAME), sub_lang, timeout, timings)
+        return staged is not None
+    cache_status["captions"] = "hit"
+    files = await media_cache.afetch(captions_cache_key(video_id, sub_lang), produce)
+    return link_cached_captions(files, output_path) if files else None
+
+async def acquire_media(
+    youtube_url: str,
+    audio_path: str,
+    captions_path: str,
+    sample_rate: int = 16000,
+    sub_lang: str = "en",
+    audio_timeout: Optional[float] = None,
+    captions_timeout: Optional[float] = None,
+    media_cache=None,
+    time_range: Optional[Tuple[float, Optional[float]]] = None,
+    progress_fn: Optional[ProgressFn] = None,
+) -> Dict[str, Any]:
+    """
+    Download audio (mono WAV at sample_rate) and captions concurrently.
+    Returns {"audio_path", "captions_path" (None if unavailable), "timings": [per-process records], "seconds", "cache"}.
+    With time_range=(start, end), only that section of the audio is fetched (captions are always whole).
+    progress_fn(stage, info) receives parsed yt-dlp ("download") and ffmpeg ("convert") progress.
+    With a media_cache, each of audio/captions is linked from the cache on a hit ("cache" reports hit/miss).
+    Raises DownloadError if the audio fails or times out (the caption fetch is then cancelled).
+    """
+    started = time.perf_counter()
+    timings: List[Dict[str, Any]] = []
+    cache_status: Dict[str, str] = {}
+    video_id = parse_video_id(youtube_url) if media_cache is not None else None
+    if video_id:
+        audio_coro = _acquire_audio_cached(media_cache, video_id, youtube_url, audio_path, sample_rate, audio_timeout, timings, cache_status, time_range, progress_fn)
+        captions_coro = _acquire_captions_cached(media_cache, video_id, youtube_url, captions_path, sub_lang, captions_timeout, timings, cache_status)
+    else:
+        audio_coro = _acquire_audio(youtube_url, audio_path, sample_rate, audio_timeout, timings, time_range, progress_fn)
+        captions_coro = _acquire_captions(youtube_url, captions_path, sub_lang, captions_timeout, timings)
+    captions_task = asyncio.ensure_future(captions_coro)
+    try:
+        audio_file = await audio_coro
+    except BaseException:
+        captions_task.cancel()
+        await asyncio.gather(captions_task, return_exceptions=True)
+        raise
+    captions_file = await captions_task
+    result = {
+        "audio_path": audio_file,
+        "captions_path": captions_file,
+        "timings": timings,
+        "seconds": round(time.perf_counter() - started, 3),
+        "cache": cache_status or None,
+    }
+    tracing.event("Media acquired", level="info", **result)
+    return result
+
+def acquire_media_sync(*args, **kwargs) -> Dict[str, Any]:
+    """Blocking wrapper around acquire_media for threads without an event loop (pipeline workers, CLI)."""
+    return asyncio.run(acquire_media(*args, **kwargs))
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
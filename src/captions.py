@@ -0,0 +1,268 @@
+"""
+Single-pass WebVTT (and SRT) caption parser with rolling auto-caption dedup and an interval index.
+
+YouTube auto-captions are "rolling": every cue repeats the previous line above the new one,
+with inline word-timing tags (<00:00:01.500><c> word</c>), plus near-zero-length cues that
+only repeat text. Parsing keeps only the new line(s) of each cue, so the caption text the
+comparator windows over is not inflated two- or three-fold.
+
+Cues are stored as compact arrays: start/end times (float64) and offsets into one joined
+text string. A CaptionTrack can be persisted next to the caption file (.cues.npz) and is
+memoised per process, so every chunk of a run reuses one parse. Range queries go through a
+centered interval tree: O(log n + k) for k matching cues.
+"""
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CUES_SUFFIX = ".cues.npz"
+_FORMAT_VERSION = 2  # Bumped when parsing changes, so stale .cues.npz files are re-parsed
+_TAG_RE = re.compile(r"<[^>]*>")
+# Inline word timings (<00:00:01.500>) only appear in YouTube's rolling auto-captions
+_WORD_TIMING_RE = re.compile(r"<\d+:\d\d:\d\d\.\d+>")
+_MEMO_SIZE = 16
+
+class CaptionParseError(Exception):
+    pass
+
+def _parse_timestamp(value: str) -> float:
+    # "HH:MM:SS.mmm", "MM:SS.mmm" (VTT) or "HH:MM:SS,mmm" (SRT)
+    parts = value.replace(",", ".").split(":")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def _parse_timing(line: str) -> Optional[Tuple[float, float]]:
+    left, _, right = line.partition("-->")
+    right_fields = right.split()
+    if not right_fields:
+        return None
+    try:
+        return _parse_timestamp(left.strip()), _parse_timestamp(right_fields[0])
+    except ValueError:
+        return None
+
+def _overlap(previous: List[str], lines: List[str]) -> int:
+    """Number of leading lines of a cue that repeat the trailing lines of the previous cue."""
+    for k in range(min(len(previous), len(lines)), 0, -1):
+        if lines[:k] == previous[-k:]:
+            return k
+    return 0
+
+def _clean(raw: str) -> str:
+    text = _TAG_RE.sub("", raw) if "<" in raw else raw
+    if "&" in text:
+        text = html.unescape(text)
+    return " ".join(text.split())
+
+class IntervalIndex:
+    """
+    Centered interval tree over [start, end] intervals given as parallel arrays.
+    query(lo, hi) returns the sorted indices of intervals with start < hi and end > lo
+    (lo == hi is a stabbing query for intervals strictly containing that point).
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self._starts = starts
+        self._ends = ends
+        # Flat node storage: center, index arrays sorted by start / by end, sorted keys, children
+        self._nodes: List[tuple] = []
+        self._root = self._build(np.arange(len(starts)))
+
+    def _build(self, idx: np.ndarray) -> int:
+        if len(idx) == 0:
+            return -1
+        s, e = self._starts[idx], self._ends[idx]
+        center = float(np.median(np.concatenate([s, e])))
+        left_mask = e < center
+        right_mask = s > center
+        here = idx[~left_mask & ~right_mask]
+        by_start = here[np.argsort(self._starts[here], kind="stable")]
+        by_end = here[np.argsort(self._ends[here], kind="stable")]
+        node_id = len(self._nodes)
+        self._nodes.append(None)
+        left = self._build(idx[left_mask])
+        right = self._build(idx[right_mask])
+        self._nodes[node_id] = (center, by_start, self._starts[by_start], by_end, self._ends[by_end], left, right)
+        return node_id
+
+    def query(self, lo: float, hi: float) -> np.ndarray:
+        if hi < lo or self._root < 0:
+            return np.empty(0, dtype=np.int64)
+        found = []
+        stack = [self._root]
+        while stack:
+            node_id = stack.pop()
+            if node_id < 0:
+                continue
+            center, by_start, start_keys, by_end, end_keys, left, right = self._nodes[node_id]
+            if hi <= center:
+                # Every interval here reaches center >= hi, so it overlaps iff it starts before hi
+                found.append(by_start[:np.searchsorted(start_keys, hi, side="left")])
+                stack.append(left)
+            elif lo >= center:
+                # Every interval here starts at or before center <= lo, so it overlaps iff it ends after lo
+                found.append(by_end[np.searchsorted(end_keys, lo, side="right"):])
+                stack.append(right)
+            else:
+                found.append(by_start)
+                stack.append(left)
+                stack.append(right)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+class CaptionTrack:
+    """
+    Parsed cues as arrays: starts[i], ends[i] (seconds) and text[offsets[i]:offsets[i+1]].
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, offsets: np.ndarray, text: str):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+        self._index: Optional[IntervalIndex] = None
+        self._index_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def cue_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def texts(self, indices: Optional[Sequence[int]] = None) -> List[str]:
+        if indices is None:
+            indices = range(len(self))
+        return [self.cue_text(int(i)) for i in indices]
+
+    def full_text(self) -> str:
+        return " ".join(t for t in self.texts() if t)
+
+    def query(self, start: float, end: Optional[float] = None) -> np.ndarray:
+        """Indices (ascending) of cues overlapping [start, end); end=None means to the end."""
+        with self._index_lock:
+            if self._index is None:
+                self._index = IntervalIndex(self.starts, self.ends)
+        return self._index.query(start, float("inf") if end is None else end)
+
+    def save(self, path: str, source_signature: Tuple[int, int] = (0, 0)):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.array(_FORMAT_VERSION),
+            source=np.array(source_signature, dtype=np.int64),
+            starts=self.starts, ends=self.ends, offsets=self.offsets,
+            text=np.array(self.text),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source_signature: Optional[Tuple[int, int]] = None) -> Optional["CaptionTrack"]:
+        """Load a saved track; None if unreadable, from another format version, or stale for source_signature."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != _FORMAT_VERSION:
+                    return None
+                if source_signature is not None and tuple(int(x) for x in data["source"]) != tuple(source_signature):
+                    return None
+                return cls(data["starts"], data["ends"], data["offsets"], str(data["text"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+def parse_captions(content: str, dedup: bool = True) -> CaptionTrack:
+    """
+    Parse VTT/SRT text in one pass. Inline tags are stripped and entities unescaped.
+    With dedup, rolling auto-caption tracks (recognised by their inline word timings) keep
+    only the new lines of each cue: leading lines that repeat the previous cue's trailing
+    lines are dropped, and cues that only repeat text are skipped. Other tracks (manual VTT,
+    SRT) are kept as written, including genuinely repeated lines.
+    """
+    starts: List[float] = []
+    ends: List[float] = []
+    offsets: List[int] = [0]
+    pieces: List[str] = []
+    length = 0
+    rolling = dedup and _WORD_TIMING_RE.search(content) is not None
+    previous: List[str] = []
+    lines = content.splitlines()
+    i, n = 0, len(lines)
+    while i < n:
+        line = lines[i]
+        i += 1
+        if "-->" not in line:
+            continue
+        timing = _parse_timing(line)
+        if timing is None:
+            continue
+        cue_lines = []
+        # A cue ends at an empty line (YouTube puts whitespace-only lines inside cues) or the next timing line
+        while i < n and lines[i] != "" and "-->" not in lines[i]:
+            clean = _clean(lines[i])
+            i += 1
+            if clean:
+                cue_lines.append(clean)
+        new_lines = cue_lines
+        if rolling:
+            new_lines = cue_lines[_overlap(previous, cue_lines):]
+            previous = cue_lines
+        if not new_lines:
+            continue
+        cue = " ".join(new_lines)
+        starts.append(timing[0])
+        ends.append(timing[1])
+        pieces.append(cue)
+        length += len(cue)
+        offsets.append(length)
+    return CaptionTrack(
+        np.asarray(starts, dtype=np.float64),
+        np.asarray(ends, dtype=np.float64),
+        np.asarray(offsets, dtype=np.int64),
+        "".join(pieces),
+    )
+
+_memo: "OrderedDict[tuple, CaptionTrack]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+def load_captions(captions_file: str, persist: bool = True) -> CaptionTrack:
+    """
+    Return the CaptionTrack for captions_file, parsing it at most once: tracks are memoised
+    in-process and (with persist) saved as <captions_file>.cues.npz for later processes.
+    Both caches are keyed by the caption file's mtime and size. Raises CaptionParseError
+    if the file cannot be read.
+    """
+    try:
+        st = os.stat(captions_file)
+    except OSError as e:
+        raise CaptionParseError(f"Cannot read captions file {captions_file}: {e}")
+    signature = (st.st_mtime_ns, st.st_size)
+    key = (os.path.abspath(captions_file),) + signature
+    with _memo_lock:
+        track = _memo.get(key)
+        if track is not None:
+            _memo.move_to_end(key)
+            return track
+    index_path = captions_file + CUES_SUFFIX
+    track = CaptionTrack.load(index_path, signature) if persist and os.path.exists(index_path) else None
+    if track is None:
+        try:
+            with open(captions_file, "r", encoding="utf-8", errors="replace") as f:
+                track = parse_captions(f.read())
+        except OSError as e:
+            raise CaptionParseError(f"Cannot read captions file {captions_file}: {e}")
+        if persist:
+            try:
+                track.save(index_path, signature)
+            except OSError:
+                pass  # read-only location: the in-process memo still applies
+    with _memo_lock:
+        _memo[key] = track
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return track
@@ -1,8 +1,10 @@
 import os
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 import numpy as np
 import soundfile as sf
 
+from src.fileio import record_written
+
 class ChunkingException(Exception):
     pass
 
@@ -12,7 +14,9 @@ def create_speech_chunks(
     chunk_duration: float = 30.0,
     chunk_tol: float = 5.0,
     chunk_folder: str = "output/chunks",
-    orig_sr: int = 16000
+    orig_sr: int = 16000,
+    time_offset: float = 0.0,
+    progress_fn: Optional[Callable[[float], None]] = None
 ) -> List[Tuple[str, float]]:
     """
     Concatenate input speech-only segments and split into clean 30s (±tol) chunks.
@@ -20,6 +24,8 @@ def create_speech_chunks(
 
     chunk_duration: target duration for each chunk (seconds)
     chunk_tol: +/- tolerance, i.e. output chunks will be 25–35s
+    time_offset: added to every returned start time, for audio that begins part-way into the video (time-range runs)
+    progress_fn: called with the fraction of speech audio written to chunks so far (0.0-1.0)
     """
     if not speech_segments:
         raise ChunkingException("Speech segments list is empty.")
@@ -51,12 +57,17 @@ def create_speech_chunks(
         # Save chunk
         chunk_path = os.path.join(chunk_folder, f"chunk_{idx+1:03}.wav")
         sf.write(chunk_path, chunk, sr)
+        record_written(chunk_path)
         # The output chunk_start_time is (approximate, because chunks are speech-only, not in original timeline)
-        chunk_files.append((chunk_path, current/sr))
+        chunk_files.append((chunk_path, time_offset + current/sr))
         idx += 1
         current = chunk_end
+        if progress_fn:
+            progress_fn(current / total_len)
     if not chunk_files:
         raise ChunkingException("No valid chunk of desired length could be created.")
+    if progress_fn:
+        progress_fn(1.0)
     return chunk_files
 
 # === Stub/shim for testing, allows @patch in tests ===
@@ -1,12 +1,36 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 import difflib
 import os
+import threading
 
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import unicodedata
-import re, json, time
+import re
+
+from src import metrics, tracing
+from src.fileio import record_written
+from src.torch_threads import torch_threads
+
+EMBEDDING_MODEL_NAME = 'paraphrase-multilingual-mpnet-base-v2'
+
+_model_cache: Dict[tuple, Any] = {}
+_model_cache_lock = threading.Lock()
+
+def load_embedding_model(model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    Return the SentenceTransformer for model_name, loading it once per process.
+    """
+    # The class is part of the key so a patched/mocked SentenceTransformer never sees a stale instance
+    key = (SentenceTransformer, model_name)
+    with _model_cache_lock:
+        model = _model_cache.get(key)
+        if model is None:
+            with tracing.span("embedding_model_load", model_name=model_name), metrics.MODEL_LOAD_SECONDS.time(model="embedding"):
+                model = SentenceTransformer(model_name)
+            _model_cache[key] = model
+    return model
 
 def compare_transcripts(
     whisper_text: str,
@@ -15,12 +39,15 @@ def compare_transcripts(
     chunk_start: float = 0.0,
     chunk_end: float = None,
     captions_file: str = None,
+    num_threads: Optional[int] = None,
 ) -> None:
     """
     Compares Whisper transcript and YouTube captions text.
     - Uses semantic similarity over best matching caption segment
     - Outputs side-by-side diff, semantic, and surface similarity to file.
     - Highlights differences for transparency.
+    num_threads, if given, is this call's share of torch's intra-op threads used by the encoder
+    (see src/torch_threads.py for how that is scoped per torch build).
     """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     def normalize_inner(txt):
@@ -44,15 +71,13 @@ def compare_transcripts(
     def cosine(emb1, emb2):
         emb1, emb2 = np.array(emb1).reshape(1,-1), np.array(emb2).reshape(1,-1)
         return float(cosine_similarity(emb1, emb2)[0][0])
-    model = SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')
+    model = load_embedding_model()
     norm_whisper = normalize_inner(whisper_text)
     norm_captions = normalize_inner(captions_text)
-    #region agent log
-    with open('.cursor/debug.log','a') as dbg:
-        dbg.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "CMP1", "location": "comparator.py:16", "message": "Normalized comparison strings", "data": {"norm_whisper": norm_whisper[:200], "norm_captions": norm_captions[:200], "len_whisper": len(norm_whisper), "len_captions": len(norm_captions)}, "timestamp": time.time()}) + '\n')
-    #endregion
+    if tracing.enabled("debug"):
+        tracing.event("Normalized comparison strings", norm_whisper=norm_whisper[:200], norm_captions=norm_captions[:200], len_whisper=len(norm_whisper), len_captions=len(norm_captions))
     # ---- Main Comparison Output ----
-    with open(output_path, "w", encoding='utf-8') as f:
+    with torch_threads(num_threads), open(output_path, "w", encoding='utf-8') as f:
         f.write("=== Whisper Transcript (normalized) ===\n")
         f.write(norm_whisper + "\n\n")
         # 1. SLIDING SEMANTIC WINDOW MATCH
@@ -110,6 +135,7 @@ def compare_transcripts(
         sm_full = difflib.SequenceMatcher(None, norm_whisper, norm_captions)
         similarity_full = sm_full.ratio() * 100
         f.write(f"SequenceMatcher Similarity (surface, full file): {similarity_full:.2f}%\n")
+    record_written(output_path)
 
 # === Shim/Expose needed functions for testing ===
 def normalize(text):
@@ -121,7 +147,7 @@ def normalize(text):
     return text.strip()
 
 def calculate_semantic_similarity(hyp_text, ref_text, model=None):
-    model = model or SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')
+    model = model or load_embedding_model()
     hyp = normalize(hyp_text)
     ref = normalize(ref_text)
     hyp_emb = model.encode(hyp, show_progress_bar=False)
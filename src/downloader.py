@@ -1,20 +1,121 @@
 print(">>> RUNNING DOWNLOADER FROM:", __file__)
 import os
+import re
 import subprocess
-from typing import Tuple, Optional, List
+from typing import Any, Callable, Dict, Tuple, Optional, List
+
+from src import tracing
+from src.fileio import record_written
+from src.captions import load_captions
+from src.media_cache import parse_video_id, audio_cache_key, captions_cache_key, link_or_copy
 
 class DownloadError(Exception):
     pass
 
+YTDLP_BIN = "yt-dlp"
+FFMPEG_BIN = "ffmpeg"
+# bestaudio, falling back to format 18 (mp4 with audio+video) within one yt-dlp call
+PIPED_AUDIO_FORMAT = "bestaudio/18"
+# One machine-readable line per yt-dlp progress tick (fields are "NA" when unknown)
+YTDLP_PROGRESS_PREFIX = "[ytminer-progress]"
+YTDLP_PROGRESS_TEMPLATE = (
+    "download:" + YTDLP_PROGRESS_PREFIX +
+    " %(progress.downloaded_bytes)s %(progress.total_bytes,progress.total_bytes_estimate)s"
+    " %(progress.speed)s %(progress.eta)s"
+)
+
+# progress_fn(stage, info): stage is "download" (yt-dlp) or "convert" (ffmpeg); info is a small dict
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+def _progress_number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_ytdlp_progress(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one line printed with YTDLP_PROGRESS_TEMPLATE into
+    {"downloaded_bytes", "total_bytes", "speed_bps", "eta_seconds", "fraction"} (None where unknown).
+    Returns None for any other yt-dlp output.
+    """
+    line = line.strip()
+    if not line.startswith(YTDLP_PROGRESS_PREFIX):
+        return None
+    fields = line[len(YTDLP_PROGRESS_PREFIX):].split()
+    if len(fields) != 4:
+        return None
+    downloaded, total, speed, eta = (_progress_number(f) for f in fields)
+    return {
+        "downloaded_bytes": int(downloaded) if downloaded is not None else None,
+        "total_bytes": int(total) if total is not None else None,
+        "speed_bps": speed,
+        "eta_seconds": eta,
+        "fraction": round(min(downloaded / total, 1.0), 4) if downloaded is not None and total else None,
+    }
+
+def parse_ffmpeg_progress(line: str, block: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Feed one line of `ffmpeg -progress` output. Key=value pairs accumulate in block; when the
+    block's closing "progress=continue|end" line arrives, returns
+    {"media_seconds", "output_bytes", "speed", "done"} and resets block. Otherwise returns None.
+    """
+    key, sep, value = line.strip().partition("=")
+    if not sep:
+        return None
+    if key != "progress":
+        block[key] = value
+        return None
+    out_us = _progress_number(block.get("out_time_us") or block.get("out_time_ms"))
+    size = _progress_number(block.get("total_size"))
+    speed = _progress_number((block.get("speed") or "").rstrip("x"))
+    block.clear()
+    return {
+        "media_seconds": round(out_us / 1e6, 3) if out_us is not None and out_us >= 0 else None,
+        "output_bytes": int(size) if size is not None else None,
+        "speed": speed,
+        "done": value == "end",
+    }
+
+def progress_args(progress: bool) -> Tuple[List[str], List[str]]:
+    """Extra (yt-dlp, ffmpeg) arguments that make both tools print parseable progress lines."""
+    if not progress:
+        return [], []
+    return (
+        ["--newline", "--progress", "--progress-template", YTDLP_PROGRESS_TEMPLATE],
+        ["-progress", "pipe:1", "-nostats"],
+    )
+
 def download_audio(
     youtube_url: str,
     output_path: str = "output/audio.wav",
-    sample_rate: int = 16000
+    sample_rate: int = 16000,
+    streaming: bool = False,
+    media_cache=None,
+    time_range: Optional[Tuple[float, Optional[float]]] = None,
+    progress_fn: Optional[ProgressFn] = None
 ) -> str:
     """
     Download best available audio or fallback to mp4 (format 18) if necessary, then convert to WAV with ffmpeg.
     Returns path to output WAV; raises DownloadError on failure.
+    With streaming=True, uses download_audio_piped (single pass, no intermediate file).
+    With a media_cache (src.media_cache.MediaCache), the WAV is linked from the cache when this
+    video was already fetched at this sample rate; otherwise it is downloaded once into the cache.
+    With time_range=(start, end) seconds (end None = to the end), only that section is fetched
+    (yt-dlp --download-sections) and the WAV starts at `start` of the video timeline.
+    progress_fn is forwarded to the piped ingest (the classic path reports no progress).
     """
+    video_id = parse_video_id(youtube_url) if media_cache is not None else None
+    if video_id:
+        def produce(staging_dir):
+            staged = download_audio(youtube_url, os.path.join(staging_dir, "audio.wav"), sample_rate, streaming, time_range=time_range, progress_fn=progress_fn)
+            _keep_only(staging_dir, staged)
+            return True
+        files = media_cache.fetch(audio_cache_key(video_id, sample_rate, time_range=time_range), produce)
+        link_or_copy(files["audio.wav"], output_path)
+        return output_path
+    if streaming:
+        return download_audio_piped(youtube_url, output_path=output_path, sample_rate=sample_rate, time_range=time_range, progress_fn=progress_fn)
     import glob
     try:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -23,6 +124,7 @@ def download_audio(
         yt_cmd = [
             "yt-dlp",
             "-f", "bestaudio",
+            *download_sections_args(time_range),
             "-o", audio_base + ".%(ext)s",
             youtube_url
         ]
@@ -32,6 +134,7 @@ def download_audio(
             yt_cmd_fallback = [
                 "yt-dlp",
                 "-f", "18",
+                *download_sections_args(time_range),
                 "-o", audio_base + ".mp4",
                 youtube_url
             ]
@@ -48,34 +151,195 @@ def download_audio(
             input_audio = candidates[0]  # pick 1st available
         # Convert to WAV
         ffmpeg_cmd = [
-            "ffmpeg", "-y", "-i", input_audio, "-ar", str(sample_rate), output_path
+            FFMPEG_BIN, "-y", "-i", input_audio, "-ac", "1", "-ar", str(sample_rate), output_path
         ]
         subprocess.run(ffmpeg_cmd, check=True)
         if not os.path.exists(output_path):
             raise DownloadError(f"FFmpeg did not produce output file {output_path}")
+        record_written(output_path)
         return output_path
     except Exception as e:
         raise DownloadError(f"Audio download/convert failed: {e}")
 
+def parse_timestamp(value) -> Optional[float]:
+    """
+    Parse seconds ("90", "90.5", 90) or "[HH:]MM:SS[.fff]" into float seconds.
+    Returns None for None/"". Raises ValueError on malformed or negative input.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(":")
+        if len(parts) > 3:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Timestamp must not be negative: {value!r}")
+    return seconds
+
+def make_time_range(start=None, end=None) -> Optional[Tuple[float, Optional[float]]]:
+    """
+    Normalise optional start/end (seconds or timestamps) into (start, end) or None for the whole video.
+    Raises ValueError if end is not after start.
+    """
+    start_sec, end_sec = parse_timestamp(start), parse_timestamp(end)
+    if start_sec is None and end_sec is None:
+        return None
+    start_sec = start_sec or 0.0
+    if end_sec is not None and end_sec <= start_sec:
+        raise ValueError(f"End time ({end_sec}s) must be after start time ({start_sec}s)")
+    return (start_sec, end_sec)
+
+def download_sections_args(time_range: Optional[Tuple[float, Optional[float]]]) -> List[str]:
+    """
+    yt-dlp arguments that fetch only time_range. Cuts are forced onto keyframes so the
+    section starts exactly at `start` and VAD/chunk offsets line up with caption times.
+    """
+    if not time_range:
+        return []
+    start, end = time_range
+    end_spec = "inf" if end is None else f"{end:g}"
+    return ["--download-sections", f"*{start:g}-{end_spec}", "--force-keyframes-at-cuts"]
+
+def build_piped_audio_commands(youtube_url: str, output_path: str, sample_rate: int = 16000, time_range: Optional[Tuple[float, Optional[float]]] = None, progress: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Return (yt_dlp_cmd, ffmpeg_cmd) for the piped ingest: yt-dlp writes the media to stdout,
+    ffmpeg reads it from stdin and writes mono PCM16 WAV at sample_rate to output_path.
+    With progress=True, yt-dlp prints YTDLP_PROGRESS_TEMPLATE lines on stderr and ffmpeg
+    prints `-progress` blocks on stdout.
+    """
+    yt_progress, ff_progress = progress_args(progress)
+    yt_cmd = [
+        YTDLP_BIN,
+        "-f", PIPED_AUDIO_FORMAT,
+        *download_sections_args(time_range),
+        "--no-part",
+        "--quiet", "--no-warnings",
+        *yt_progress,
+        "-o", "-",
+        youtube_url
+    ]
+    ffmpeg_cmd = [
+        FFMPEG_BIN, "-y",
+        "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "pcm_s16le",
+        "-f", "wav",
+        *ff_progress,
+        output_path
+    ]
+    return yt_cmd, ffmpeg_cmd
+
+def download_audio_piped(
+    youtube_url: str,
+    output_path: str = "output/audio.wav",
+    sample_rate: int = 16000,
+    time_range: Optional[Tuple[float, Optional[float]]] = None,
+    progress_fn: Optional[ProgressFn] = None
+) -> str:
+    """
+    Single-pass ingest: pipe yt-dlp's stdout straight into ffmpeg's stdin and write
+    mono 16-bit WAV at sample_rate. No intermediate media file is written or globbed.
+    The WAV is written to a temporary name and renamed into place on success.
+    progress_fn, if given, receives parsed yt-dlp ("download") and ffmpeg ("convert") progress.
+    Returns path to output WAV; raises DownloadError on failure.
+    """
+    import threading
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_output = output_path + ".part"
+    yt_cmd, ffmpeg_cmd = build_piped_audio_commands(youtube_url, tmp_output, sample_rate, time_range, progress=progress_fn is not None)
+    yt_proc = ff_proc = None
+    yt_stderr: List[bytes] = []
+    readers = []
+    try:
+        yt_proc = subprocess.Popen(yt_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        ff_proc = subprocess.Popen(ffmpeg_cmd, stdin=yt_proc.stdout, stdout=subprocess.PIPE if progress_fn else subprocess.DEVNULL, stderr=subprocess.PIPE)
+        # Parent drops its copy so yt-dlp gets SIGPIPE if ffmpeg exits early
+        yt_proc.stdout.close()
+        # Drain yt-dlp stderr (and ffmpeg's progress stdout) concurrently so a chatty process can never block on a full pipe
+        readers.append(threading.Thread(target=_drain_ytdlp_stderr, args=(yt_proc.stderr, yt_stderr, progress_fn), daemon=True))
+        if progress_fn:
+            readers.append(threading.Thread(target=_drain_ffmpeg_progress, args=(ff_proc.stdout, progress_fn), daemon=True))
+        for reader in readers:
+            reader.start()
+        ff_err = ff_proc.stderr.read()
+        ff_proc.wait()
+        yt_rc = yt_proc.wait()
+        for reader in readers:
+            reader.join()
+    except OSError as e:
+        for proc in (yt_proc, ff_proc):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+        raise DownloadError(f"Audio download/convert failed: {e}")
+    if yt_rc != 0 or ff_proc.returncode != 0 or not os.path.exists(tmp_output):
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        yt_msg = b"".join(yt_stderr).decode("utf-8", "replace").strip()
+        ff_msg = (ff_err or b"").decode("utf-8", "replace").strip()
+        raise DownloadError(f"Piped audio download failed (yt-dlp rc={yt_rc}, ffmpeg rc={ff_proc.returncode}): {yt_msg or ff_msg}")
+    os.replace(tmp_output, output_path)
+    record_written(output_path)
+    return output_path
+
+def _drain_ytdlp_stderr(stream, sink: List[bytes], progress_fn: Optional[ProgressFn]):
+    # Progress lines are consumed here; everything else is kept for error messages
+    for raw in iter(stream.readline, b""):
+        info = parse_ytdlp_progress(raw.decode("utf-8", "replace")) if progress_fn else None
+        if info is not None:
+            progress_fn("download", info)
+        else:
+            sink.append(raw)
+
+def _drain_ffmpeg_progress(stream, progress_fn: ProgressFn):
+    block: Dict[str, str] = {}
+    for raw in iter(stream.readline, b""):
+        info = parse_ffmpeg_progress(raw.decode("utf-8", "replace"), block)
+        if info is not None:
+            progress_fn("convert", info)
+
 
-def download_captions(youtube_url: str, output_path: str = "output/captions.vtt", sub_lang: str = "en") -> Optional[str]:
+def build_captions_command(youtube_url: str, output_path: str, sub_lang: str = "en") -> List[str]:
+    """Return the yt-dlp command that writes auto/manual VTT captions next to output_path."""
+    return [
+        YTDLP_BIN,
+        "--skip-download",
+        "--write-auto-sub",
+        "--write-sub",
+        "--sub-lang", sub_lang,
+        "--sub-format", "vtt",
+        "-o", output_path,
+        youtube_url
+    ]
+
+def download_captions(youtube_url: str, output_path: str = "output/captions.vtt", sub_lang: str = "en", media_cache=None) -> Optional[str]:
     """
     Download auto-generated or manual captions in the requested language (default 'en') to output_path using yt-dlp.
     Returns the path to the downloaded VTT file, or None if download fails or not found.
+    With a media_cache, captions already fetched for this video/language are linked from the cache.
+    Missing captions are never cached, so a later run retries the download.
     """
+    video_id = parse_video_id(youtube_url) if media_cache is not None else None
+    if video_id:
+        def produce(staging_dir):
+            staged = download_captions(youtube_url, os.path.join(staging_dir, CACHED_CAPTIONS_NAME), sub_lang)
+            if not staged:
+                return False
+            _keep_only(staging_dir, staged)
+            return True
+        files = media_cache.fetch(captions_cache_key(video_id, sub_lang), produce)
+        return link_cached_captions(files, output_path) if files else None
     try:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         # Download captions for the given language
-        command = [
-            "yt-dlp",
-            "--skip-download",
-            "--write-auto-sub",
-            "--write-sub",
-            "--sub-lang", sub_lang,
-            "--sub-format", "vtt",
-            "-o", output_path,
-            youtube_url
-        ]
+        command = build_captions_command(youtube_url, output_path, sub_lang)
         subprocess.run(command, check=True)
 
         # After download, glob output directory for *.vtt files
@@ -86,44 +350,72 @@ def download_captions(youtube_url: str, output_path: str = "output/captions.vtt"
 
     except Exception:
         return None
-    # yt-dlp may append language code extensions
-    import json
-    alignment_log_path = '.cursor/debug.log'
+    found = find_caption_file(output_path, sub_lang)
+    if found:
+        record_written(found)
+    return found
+
+CACHED_CAPTIONS_NAME = "captions.vtt"
+
+def link_cached_captions(files, output_path: str) -> str:
+    """
+    Link cached caption files next to output_path, keeping the language suffix yt-dlp
+    gave them (captions.en.vtt -> <output base>.en.vtt). Returns the linked caption path.
+    """
+    cached_base = os.path.splitext(CACHED_CAPTIONS_NAME)[0]
+    out_base = os.path.splitext(output_path)[0]
+    linked = None
+    for name, path in sorted(files.items()):
+        dest = out_base + name[len(cached_base):]
+        link_or_copy(path, dest)
+        linked = linked or dest
+    return linked
+
+def _keep_only(directory: str, keep_path: str):
+    """Drop intermediates (e.g. the pre-conversion media of the classic download) so only keep_path is cached."""
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and os.path.abspath(path) != os.path.abspath(keep_path):
+            os.remove(path)
+
+def find_caption_file(output_path: str, sub_lang: str = "en") -> Optional[str]:
+    """
+    Return the caption file yt-dlp produced for output_path, or None.
+    yt-dlp may append language code extensions, so several candidate names are checked.
+    """
     vtt_candidates = [output_path]
     suffixes = [f".{sub_lang}.vtt", f".{sub_lang}-US.vtt", ".vtt", f".vtt.{sub_lang}.vtt"]
     base, _ = os.path.splitext(output_path)
     for suf in suffixes:
         test_path = base + suf
-        # Log each file candidate considered
-        with open(alignment_log_path, 'a') as f:
-            f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "FN1", "location": "downloader.py:93", "message": "Checking caption candidate file", "data": {"test_path": test_path, "exists": os.path.exists(test_path)}, "timestamp": __import__('time').time()}) + '\n')
-        if os.path.exists(test_path):
+        exists = os.path.exists(test_path)
+        tracing.event("Checking caption candidate file", test_path=test_path, exists=exists)
+        if exists:
             vtt_candidates.append(test_path)
     for candidate in vtt_candidates:
-        with open(alignment_log_path, 'a') as f:
-            f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "FN2", "location": "downloader.py:97", "message": "Returning caption file", "data": {"candidate": candidate, "exists": os.path.exists(candidate)}, "timestamp": __import__('time').time()}) + '\n')
         if os.path.exists(candidate):
+            tracing.event("Returning caption file", candidate=candidate)
             return candidate
     return None
 
-def extract_captions_text(captions_file: str, text_output: str = "output/youtube_captions.txt") -> Optional[str]:
+def extract_captions_text(captions_file: str, text_output: str = "output/youtube_captions.txt", time_range: Optional[Tuple[float, Optional[float]]] = None) -> Optional[str]:
     """
     Extracts *all* captions from the input captions_file and writes as plain text to text_output, returns the full text.
+    With time_range=(start, end), only cues overlapping that window are kept.
+    Rolling auto-caption repeats are collapsed (see src.captions).
     """
-    import webvtt
-    import re, os
-    lines = []
-    for caption in webvtt.read(captions_file):
-        clean = re.sub(r'<.*?>', '', caption.text.replace('\n', ' ')).strip()
-        if clean:
-            lines.append(clean)
+    track = load_captions(captions_file)
+    indices = track.query(*time_range) if time_range else None
+    lines = [text for text in track.texts(indices) if text]
     full_text = " ".join(lines).strip()
     os.makedirs(os.path.dirname(text_output), exist_ok=True)
     with open(text_output, "w", encoding="utf-8") as f:
         f.write(full_text + "\n")
+    record_written(text_output)
     return full_text
 
-
+_CAPTION_LABEL_MARKERS = ["transcriber", "reviewer", "kind: captions", "webvtt", "language:", "www", ".com"]
+_PARENTHESISED_RE = re.compile(r'\(.*\)')
 
 def extract_aligned_captions(
     captions_file: str,
@@ -135,49 +427,37 @@ def extract_aligned_captions(
     Saves result to text_output. Returns captured string.
     Raises Exception if no captions overlap.
     """
-    import webvtt
     start_sec, end_sec = chunk_range
     aligned_lines: List[str] = []
-    import re
-    #region agent log
-    import json
-    alignment_log_path = '.cursor/debug.log'
-    with open(alignment_log_path, 'a') as f:
-        f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "ALIGN1", "location": "downloader.py:118", "message": "Caption alignment window", "data": {"chunk_range": [start_sec, end_sec]}, "timestamp": __import__('time').time()}) + '\n')
-    #endregion
+    tracing.event("Caption alignment window", chunk_range=[start_sec, end_sec])
+    # Per-cue records are only built when debug tracing is on
+    trace_cues = tracing.enabled("debug")
     aligned_captions_debug = []
     saw_first_real = False
-    for caption in webvtt.read(captions_file):
-        cap_start, cap_end = caption.start_in_seconds, caption.end_in_seconds
-        #region agent log
-        with open(alignment_log_path, 'a') as f:
-            f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "ALIGN1", "location": "downloader.py:121", "message": "Caption candidate", "data": {"cap_start": cap_start, "cap_end": cap_end, "text": caption.text[:100]}, "timestamp": __import__('time').time()}) + '\n')
-        #endregion
+    track = load_captions(captions_file)
+    # Interval query narrows to overlapping cues; only those are checked against the stricter rule below
+    for i in track.query(start_sec, end_sec):
+        cap_start, cap_end = float(track.starts[i]), float(track.ends[i])
+        clean = track.cue_text(int(i))
         # Strictest include: caption must start AND end within chunk window, and end strictly before chunk_end
         if cap_start >= start_sec and cap_end < end_sec:
-            clean = re.sub(r'<.*?>', '', caption.text.replace('\n', ' ')).strip()
             # Skip if generic (credit/short lines) at start of chunk or trailing label lines
-            if (cap_start < start_sec + 10 and (not clean or len(clean) < 6 or any(x in clean.lower() for x in ["transcriber", "reviewer", "kind: captions", "webvtt", "language:", "www", ".com"]))) or clean == '' or re.search(r'\(.*\)', clean):
+            if (cap_start < start_sec + 10 and (not clean or len(clean) < 6 or any(x in clean.lower() for x in _CAPTION_LABEL_MARKERS))) or clean == '' or _PARENTHESISED_RE.search(clean):
                 continue
             if not saw_first_real:
-                with open(alignment_log_path, 'a') as f:
-                    f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "ALIGNSKIP", "location": "downloader.py:134", "message": "Using first real caption", "data": {"cap_start": cap_start, "clean_text": clean[:150]} , "timestamp": __import__('time').time()}) + '\n')
+                tracing.event("Using first real caption", cap_start=cap_start, clean_text=clean[:150])
                 saw_first_real = True
             aligned_lines.append(clean)
-            aligned_captions_debug.append({"cap_start": cap_start, "cap_end": cap_end, "clean_text": clean[:150]})
-        else:
-            #region agent log
-            with open(alignment_log_path, 'a') as f:
-                f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "ALIGNSKIP", "location": "downloader.py:140", "message": "Caption skipped (out of window)", "data": {"cap_start": cap_start, "cap_end": cap_end, "start_sec": start_sec, "end_sec": end_sec, "text": caption.text[:100]}, "timestamp": __import__('time').time()}) + '\n')
-            #endregion
-    #region agent log
-    with open(alignment_log_path, 'a') as f:
-        f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "ALIGN1", "location": "downloader.py:126", "message": "Aligned captions result", "data": {"aligned_captions": aligned_captions_debug, "n_aligned": len(aligned_lines)}, "timestamp": __import__('time').time()}) + '\n')
-    #endregion
+            if trace_cues:
+                aligned_captions_debug.append({"cap_start": cap_start, "cap_end": cap_end, "clean_text": clean[:150]})
+        elif trace_cues:
+            tracing.event("Caption skipped (out of window)", cap_start=cap_start, cap_end=cap_end, start_sec=start_sec, end_sec=end_sec, text=clean[:100])
+    tracing.event("Aligned captions result", aligned_captions=aligned_captions_debug, n_aligned=len(aligned_lines))
     if not aligned_lines:
         raise Exception(f"No captions overlap chunk range {chunk_range}.")
     full_text = " ".join(aligned_lines).strip()
     os.makedirs(os.path.dirname(text_output), exist_ok=True)
     with open(text_output, "w", encoding='utf-8') as f:
         f.write(full_text + "\n")
+    record_written(text_output)
     return full_text
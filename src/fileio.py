@@ -0,0 +1,93 @@
+"""
+Atomic file writes and per-path locks for run artifacts.
+
+Readers of a run directory (API handlers, ZIP exports, other chunk jobs) must never see a
+half-written file, so artifacts are written to a temp file next to the target and renamed
+over it. path_lock() serialises work on one path across threads and, where fcntl exists,
+across the executor's worker processes.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+from src import metrics
+from src.retention import artifact_kind
+
+try:
+    import fcntl
+except ImportError:  # Windows: thread lock only
+    fcntl = None
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+def temp_path(path: str) -> str:
+    """Unique temp name next to path (same filesystem, so os.replace is atomic)."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+
+def record_written(path: str, nbytes: Optional[int] = None):
+    """
+    Count a file just written to disk in ytminer_written_bytes_total (nbytes defaults to its
+    size). Writers call this once per write, so files that are only re-read are not counted.
+    """
+    if nbytes is None:
+        try:
+            nbytes = os.path.getsize(path)
+        except OSError:
+            return
+    # Kind as inside a run directory: chunks/<name> are chunks, other files go by name;
+    # a temp_path() file counts as the file it will be renamed to
+    parent, name = os.path.split(os.path.abspath(path))
+    if name.endswith(".part") and name.count(".") >= 3:
+        name = name.rsplit(".", 3)[0]
+    metrics.WRITTEN_BYTES.inc(nbytes, kind=artifact_kind(f"{os.path.basename(parent)}/{name}"))
+
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8"):
+    """Write text to path via a temp file + rename; readers see the old or the new file, never a mix."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = temp_path(path)
+    try:
+        with open(tmp, "w", encoding=encoding) as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    record_written(path)
+
+class path_lock:
+    """
+    Exclusive lock on `lock_path` (a lock file, created if missing):
+        with path_lock(os.path.join(run_dir, ".captions.lock")):
+            ...
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = os.path.abspath(lock_path)
+        with _locks_lock:
+            self._thread_lock = _locks.setdefault(self.lock_path, threading.Lock())
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return self
+        try:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
@@ -2,21 +2,26 @@ import argparse
 import sys
 import os
 
-from src.downloader import download_audio, download_captions, extract_aligned_captions
+from src.downloader import download_audio, download_captions, extract_aligned_captions, make_time_range
+from src.acquire import acquire_media_sync
+from src.media_cache import get_media_cache
 from src.vad import run_silero_vad, VADException
 from src.chunker import create_speech_chunks, ChunkingException
 from src.transcriber import transcribe_chunk, TranscriptionError
 from src.comparator import compare_transcripts
+from src.retention import get_retention_manager, DEFAULT_MAX_BYTES
+from src import tracing
 
 def prepare_new_output_dir(base="output"):
-    import shutil, time, os
-    # Remove the existing output directory (if any)
-    if os.path.exists(base):
-        shutil.rmtree(base)
-    # Create new unique run directory (with timestamp for clarity)
+    import time, os
+    # Earlier runs are kept; src/retention.py evicts them once the output budget is exceeded
     run_id = time.strftime("run_%Y%m%d_%H%M%S")
     outdir = os.path.join(base, run_id)
-    os.makedirs(outdir, exist_ok=True)
+    suffix = 1
+    while os.path.exists(outdir):
+        suffix += 1
+        outdir = os.path.join(base, f"{run_id}_{suffix}")
+    os.makedirs(outdir)
     return outdir
 
 def main():
@@ -30,27 +35,71 @@ def main():
     parser.add_argument("--model-size", type=str, default=None, help="Whisper model size: tiny, small, base, medium, large")
     parser.add_argument("--default-english-model", type=str, default="tiny", help="Default model size for English")
     parser.add_argument("--default-hindi-model", type=str, default="small", help="Default model size for Hindi")
+    parser.add_argument("--legacy-download", action="store_true", help="Download to a temp file then convert, and fetch captions afterwards, instead of piping yt-dlp into ffmpeg with captions fetched concurrently")
+    parser.add_argument("--start", type=str, default=None, help="Only process from this time (seconds or HH:MM:SS)")
+    parser.add_argument("--end", type=str, default=None, help="Only process up to this time (seconds or HH:MM:SS)")
+    parser.add_argument("--no-media-cache", action="store_true", help="Always re-download audio/captions instead of reusing cache/media")
+    parser.add_argument("--retention-max-gb", type=float, default=None, help="Evict least recently used runs under the output directory beyond this many GiB (default: 50)")
+    parser.add_argument("--trace-level", type=str, default=None, choices=["debug", "info", "warning", "error", "off"], help="Structured trace level (default: $YTMINER_TRACE_LEVEL or off)")
     args = parser.parse_args()
+    try:
+        args.time_range = make_time_range(args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.trace_level:
+        tracing.configure(level=args.trace_level)
 
-    output_dir = prepare_new_output_dir()
-    audio_path = os.path.join(output_dir, "audio.wav")
-    captions_path = os.path.join(output_dir, "captions.vtt")
+    output_dir = prepare_new_output_dir(args.output_dir)
+    with tracing.run_context(os.path.basename(output_dir)):
+        run_pipeline(args, output_dir)
+    tracing.flush()
+    enforce_output_retention(args.output_dir, os.path.basename(output_dir), args.retention_max_gb)
 
-    print("[1] Downloading audio...")
+def enforce_output_retention(base, run_id, max_gb=None):
+    max_bytes = int(max_gb * 1024 ** 3) if max_gb is not None else DEFAULT_MAX_BYTES
     try:
-        audio_file = download_audio(args.url, output_path=audio_path, sample_rate=args.sample_rate)
+        retention = get_retention_manager(base, max_bytes=max_bytes)
+        retention.max_bytes = max_bytes
+        retention.record_run(run_id)
+        report = retention.enforce(protected={run_id})
     except Exception as e:
-        print(f"Audio download failed: {e}")
-        sys.exit(1)
-    print(f"  Audio saved to {audio_file}")
-
-    print("[2] Downloading captions...")
-    captions_file = download_captions(args.url, output_path=captions_path, sub_lang=args.language)
-    #region agent log
-    import json
-    with open('.cursor/debug.log','a') as f:
-        f.write(json.dumps({"sessionId": "debug-session", "runId": "run1", "hypothesisId": "FN3", "location": "main.py:36", "message": "Caption file after download_captions", "data": {"captions_file": captions_file, "exists": os.path.exists(captions_file) if captions_file else False}, "timestamp": __import__('time').time()}) + '\n')
-    #endregion
+        print(f"[Retention] Skipped: {e}")
+        return
+    if report["expired"] or report["evicted"]:
+        print(f"[Retention] Freed {report['freed_bytes']} bytes from {base} ({report['bytes']} bytes kept)")
+
+def run_pipeline(args, output_dir):
+    media_cache = None if args.no_media_cache else get_media_cache()
+    audio_path = os.path.join(output_dir, "audio.wav")
+    captions_path = os.path.join(output_dir, "captions.vtt")
+
+    if args.legacy_download:
+        print("[1] Downloading audio...")
+        try:
+            with tracing.span("download_audio", url=args.url):
+                audio_file = download_audio(args.url, output_path=audio_path, sample_rate=args.sample_rate, streaming=False, media_cache=media_cache, time_range=args.time_range)
+        except Exception as e:
+            print(f"Audio download failed: {e}")
+            sys.exit(1)
+        print(f"  Audio saved to {audio_file}")
+
+        print("[2] Downloading captions...")
+        with tracing.span("download_captions", url=args.url, language=args.language):
+            # Captions cover the whole video; step [6] clips their text to the time range
+            captions_file = download_captions(args.url, output_path=captions_path, sub_lang=args.language, media_cache=media_cache)
+    else:
+        print("[1-2] Downloading audio and captions concurrently...")
+        try:
+            with tracing.span("acquire_media", url=args.url, language=args.language) as span:
+                acquired = acquire_media_sync(args.url, audio_path, captions_path, sample_rate=args.sample_rate, sub_lang=args.language, media_cache=media_cache, time_range=args.time_range)
+                span.set(seconds=acquired["seconds"])
+        except Exception as e:
+            print(f"Audio download failed: {e}")
+            sys.exit(1)
+        audio_file, captions_file = acquired["audio_path"], acquired["captions_path"]
+        print(f"  Audio saved to {audio_file} ({acquired['seconds']}s)")
+    if tracing.enabled("debug"):
+        tracing.event("Caption file after download_captions", captions_file=captions_file, exists=os.path.exists(captions_file) if captions_file else False)
     if not captions_file or not os.path.exists(captions_file):
         warning_msg = (
             f"No usable auto-generated captions found in this YouTube video for '{args.language}'.\n"
@@ -66,7 +115,9 @@ def main():
 
     print("[3] Running VAD...")
     try:
-        speech_segments = run_silero_vad(audio_file, sampling_rate=args.sample_rate)
+        with tracing.span("vad", wav_path=audio_file) as span:
+            speech_segments = run_silero_vad(audio_file, sampling_rate=args.sample_rate)
+            span.set(segments=len(speech_segments))
     except VADException as e:
         print(f"VAD failed: {e}")
         sys.exit(1)
@@ -75,14 +126,17 @@ def main():
     print("[4] Creating speech chunks...")
     chunk_dir = os.path.join(output_dir, "chunks")
     try:
-        chunks = create_speech_chunks(
-            audio_path=audio_file,
-            speech_segments=speech_segments,
-            chunk_duration=args.chunk_duration,
-            chunk_tol=5.0,
-            chunk_folder=chunk_dir,
-            orig_sr=args.sample_rate
-        )
+        with tracing.span("chunking", chunk_duration=args.chunk_duration) as span:
+            chunks = create_speech_chunks(
+                audio_path=audio_file,
+                speech_segments=speech_segments,
+                chunk_duration=args.chunk_duration,
+                chunk_tol=5.0,
+                chunk_folder=chunk_dir,
+                orig_sr=args.sample_rate,
+                time_offset=args.time_range[0] if args.time_range else 0.0
+            )
+            span.set(chunks=len(chunks))
     except ChunkingException as e:
         print(f"Chunking failed: {e}")
         sys.exit(1)
@@ -106,33 +160,11 @@ def main():
             model_size = args.default_hindi_model
         else:
             model_size = args.default_english_model
-        #region agent log
-        import json
-        with open('.cursor/debug.log','a') as f:
-            f.write(json.dumps({
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": "A,B,D",
-                "location": "main.py:84",
-                "message": "Calling transcribe_chunk",
-                "data": {"chunk_path": chunk_path, "output_path": transcript_path, "language": args.language, "model_size": model_size},
-                "timestamp": __import__('time').time()
-            }) + '\n')
-        #endregion
-        
-        whisper_text, asr_end_time = transcribe_chunk(chunk_path, output_path=transcript_path, language=args.language, model_size=model_size)
-        #region agent log
-        with open('.cursor/debug.log','a') as f:
-            f.write(json.dumps({
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": "C",
-                "location": "main.py:86",
-                "message": "Chunk info",
-                "data": {"chunk_path": chunk_path, "chunk_size_bytes": __import__('os').path.getsize(chunk_path)},
-                "timestamp": __import__('time').time()
-            }) + '\n')
-        #endregion
+        tracing.event("Calling transcribe_chunk", chunk_path=chunk_path, output_path=transcript_path, language=args.language, model_size=model_size)
+        with tracing.span("transcribe", chunk_path=chunk_path, model_size=model_size):
+            whisper_text, asr_end_time = transcribe_chunk(chunk_path, output_path=transcript_path, language=args.language, model_size=model_size)
+        if tracing.enabled("debug"):
+            tracing.event("Chunk info", chunk_path=chunk_path, chunk_size_bytes=os.path.getsize(chunk_path))
         # Ensure whisper_text is written in full
         with open(transcript_path, "w", encoding="utf-8") as x:
             x.write(whisper_text.strip() + "\n")
@@ -144,13 +176,14 @@ def main():
     # [6] Extracting full YouTube captions (no alignment)...
     caption_text_path = os.path.join(output_dir, "youtube_captions.txt")
     from src.downloader import extract_captions_text
-    captions_text = extract_captions_text(captions_file, text_output=caption_text_path)
+    captions_text = extract_captions_text(captions_file, text_output=caption_text_path, time_range=args.time_range)
     print(f"  Captions (full file) saved to {caption_text_path}")
 
     # [7] Comparing ASR and captions...
     compare_path = os.path.join(output_dir, "comparison.txt")
     from src.comparator import compare_transcripts
-    compare_transcripts(whisper_text, captions_text, output_path=compare_path)
+    with tracing.span("compare"):
+        compare_transcripts(whisper_text, captions_text, output_path=compare_path)
     print(f"  Comparison saved to {compare_path}")
 
 if __name__ == "__main__":
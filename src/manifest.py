@@ -0,0 +1,185 @@
+"""
+Run manifest: manifest.json in each run directory listing its artifacts (kind, size, sha256,
+mtime) and chunks (offset in the source video, duration, size, sha256, per-chunk result files).
+
+The pipeline writes it when a run finishes and updates only the changed entries when chunk
+processing adds files, so /result reads one JSON file (parsed once per revision and kept in
+memory) instead of listing directories on every request. Entries whose size and mtime are
+unchanged keep their hash, so rebuilding a manifest does not re-read unchanged audio.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from src.fileio import atomic_write_text, path_lock
+from src.retention import artifact_kind
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_FORMAT = 1
+CHUNKS_DIRNAME = "chunks"
+CHUNK_RESULTS_DIRNAME = "chunk_results"
+_HASH_BLOCK_BYTES = 1024 * 1024
+_CACHE_MAX = 256
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+class ManifestError(Exception):
+    pass
+
+def manifest_path(output_dir: str) -> str:
+    return os.path.join(output_dir, MANIFEST_FILENAME)
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _duration(path: str) -> Optional[float]:
+    try:
+        import soundfile as sf
+        return round(float(sf.info(path).duration), 3)
+    except Exception:
+        return None
+
+def _file_entry(output_dir: str, relpath: str, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """{"kind", "bytes", "mtime", "sha256"} for relpath, or None if it does not exist."""
+    try:
+        st = os.stat(os.path.join(output_dir, relpath))
+    except OSError:
+        return None
+    if previous and previous.get("bytes") == st.st_size and previous.get("mtime") == st.st_mtime:
+        return previous
+    return {"kind": artifact_kind(relpath), "bytes": st.st_size, "mtime": st.st_mtime,
+            "sha256": _sha256(os.path.join(output_dir, relpath))}
+
+def _listed(filename: str) -> bool:
+    return not filename.startswith(".") and not filename.endswith(".part") and filename != MANIFEST_FILENAME
+
+def _chunk_entry(output_dir: str, name: str, offset: Optional[float], previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    relpath = f"{CHUNKS_DIRNAME}/{name}"
+    entry = _file_entry(output_dir, relpath, previous)
+    if entry is None:
+        return None
+    if entry is previous:
+        return dict(previous, offset=offset if offset is not None else previous.get("offset"))
+    return {"name": name, "path": relpath, "offset": offset, "duration": _duration(os.path.join(output_dir, relpath)),
+            "bytes": entry["bytes"], "mtime": entry["mtime"], "sha256": entry["sha256"], "results": []}
+
+def _chunk_results(manifest: Dict[str, Any]):
+    # Attach chunk_results/<chunk>/ files to their chunk entries
+    by_stem = {os.path.splitext(chunk["name"])[0]: chunk for chunk in manifest["chunks"]}
+    for chunk in manifest["chunks"]:
+        chunk["results"] = []
+    for relpath in sorted(manifest["artifacts"]):
+        parts = relpath.split("/")
+        if len(parts) > 2 and parts[0] == CHUNK_RESULTS_DIRNAME and parts[1] in by_stem:
+            by_stem[parts[1]]["results"].append(relpath)
+
+def _save(output_dir: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    manifest["updated_at"] = time.time()
+    atomic_write_text(manifest_path(output_dir), json.dumps(manifest, sort_keys=True))
+    return manifest
+
+def write_manifest(run_id: str, output_dir: str, chunk_starts: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    (Re)build the manifest of a run directory from its files and return it. chunk_starts
+    maps chunk file names to their offset (seconds) in the source video.
+    """
+    if not os.path.isdir(output_dir):
+        raise ManifestError(f"Run directory {output_dir} does not exist.")
+    chunk_starts = chunk_starts or {}
+    with path_lock(os.path.join(output_dir, ".manifest.lock")):
+        previous = load_manifest(output_dir) or {}
+        old_artifacts = previous.get("artifacts", {})
+        old_chunks = {chunk["name"]: chunk for chunk in previous.get("chunks", [])}
+        artifacts = {}
+        chunk_names = []
+        for dirpath, dirnames, filenames in os.walk(output_dir):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for filename in sorted(filenames):
+                if not _listed(filename):
+                    continue
+                relpath = os.path.relpath(os.path.join(dirpath, filename), output_dir).replace(os.sep, "/")
+                if relpath.startswith(CHUNKS_DIRNAME + "/"):
+                    chunk_names.append(filename)
+                    continue
+                entry = _file_entry(output_dir, relpath, old_artifacts.get(relpath))
+                if entry is not None:
+                    artifacts[relpath] = entry
+        chunks = []
+        for name in sorted(chunk_names):
+            chunk = _chunk_entry(output_dir, name, chunk_starts.get(name), old_chunks.get(name))
+            if chunk is not None:
+                chunks.append(dict(chunk, index=len(chunks)))
+        manifest = {"format": MANIFEST_FORMAT, "run_id": run_id, "revision": previous.get("revision", 0) + 1,
+                    "artifacts": artifacts, "chunks": chunks}
+        _chunk_results(manifest)
+        return _save(output_dir, manifest)
+
+def update_manifest(output_dir: str, relpaths: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """
+    Re-record only relpaths (added, rewritten or deleted files) in an existing manifest.
+    Returns the updated manifest, or None if the run has none yet.
+    """
+    if not os.path.exists(manifest_path(output_dir)):
+        return None
+    with path_lock(os.path.join(output_dir, ".manifest.lock")):
+        manifest = load_manifest(output_dir)
+        if manifest is None:
+            return None
+        manifest = json.loads(json.dumps(manifest))  # never mutate the cached copy
+        for relpath in relpaths:
+            relpath = relpath.replace(os.sep, "/")
+            if relpath.startswith(CHUNKS_DIRNAME + "/"):
+                name = relpath.split("/", 1)[1]
+                old = next((c for c in manifest["chunks"] if c["name"] == name), None)
+                chunk = _chunk_entry(output_dir, name, old.get("offset") if old else None, old)
+                manifest["chunks"] = sorted([c for c in manifest["chunks"] if c["name"] != name] + ([chunk] if chunk else []),
+                                            key=lambda c: c["name"])
+                for index, c in enumerate(manifest["chunks"]):
+                    c["index"] = index
+                continue
+            entry = _file_entry(output_dir, relpath, manifest["artifacts"].get(relpath))
+            if entry is None:
+                manifest["artifacts"].pop(relpath, None)
+            else:
+                manifest["artifacts"][relpath] = entry
+        _chunk_results(manifest)
+        manifest["revision"] += 1
+        return _save(output_dir, manifest)
+
+def load_manifest(output_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    The run's manifest, or None if it is missing, unreadable or of another format. Parsed
+    manifests are cached by file size + mtime; callers must not modify the returned dict.
+    """
+    path = os.path.abspath(manifest_path(output_dir))
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    signature = (st.st_size, st.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == signature:
+            _cache.move_to_end(path)
+            return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    with _cache_lock:
+        _cache[path] = (signature, manifest)
+        _cache.move_to_end(path)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return manifest
@@ -0,0 +1,379 @@
+"""
+Content-addressed local store for downloaded media (audio WAV and caption files).
+
+Entries are keyed by the canonical YouTube video ID plus what was produced from it
+(e.g. "dQw4w9WgXcQ/audio-wav-16000", "dQw4w9WgXcQ/captions-en"), so a second run for
+the same video skips yt-dlp/ffmpeg entirely. Each entry is a directory holding the
+files and a meta.json with their sizes, mtimes and SHA-256 hashes; a hit whose size and
+mtime still match is used as is, otherwise it is re-hashed before use. The store is bounded in bytes and evicts least-recently-used
+entries. Files are handed to runs as hardlinks (or reflinks/copies across devices).
+
+Concurrent requests for the same key are serialised with a per-key thread lock plus
+an fcntl file lock, so only one download happens even across worker processes; the
+other requester waits and then takes the hit.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from src import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "media")
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+META_FILENAME = "meta.json"
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs)
+_FICLONE = 0x40049409
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+class MediaCacheError(Exception):
+    pass
+
+def parse_video_id(youtube_url: str) -> Optional[str]:
+    """
+    Return the canonical 11-character YouTube video ID for youtube_url, or None if
+    the URL is not a recognisable single-video link (such URLs are not cached).
+    """
+    try:
+        parsed = urlparse(youtube_url.strip())
+    except (AttributeError, ValueError):
+        return None
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www.") or host.startswith("m."):
+        host = host.split(".", 1)[1]
+    candidate = None
+    if host == "youtu.be":
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host in ("youtube.com", "music.youtube.com", "youtube-nocookie.com"):
+        if parsed.path == "/watch":
+            candidate = (parse_qs(parsed.query).get("v") or [None])[0]
+        else:
+            parts = parsed.path.strip("/").split("/")
+            if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+                candidate = parts[1]
+    if candidate and _VIDEO_ID_RE.match(candidate):
+        return candidate
+    return None
+
+def audio_cache_key(video_id: str, sample_rate: int, fmt: str = "wav", time_range=None) -> str:
+    key = f"{video_id}/audio-{fmt}-{int(sample_rate)}"
+    if time_range:
+        start, end = time_range
+        key += f"-{start:g}-{'end' if end is None else f'{end:g}'}"
+    return key
+
+def captions_cache_key(video_id: str, sub_lang: str) -> str:
+    return f"{video_id}/captions-{sub_lang}"
+
+def _sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def link_or_copy(src: str, dst: str) -> str:
+    """
+    Materialise src at dst: hardlink if possible, else reflink, else a plain copy.
+    An existing dst is replaced. Returns "hardlink", "reflink" or "copy".
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+    shutil.copyfile(src, dst)
+    return "copy"
+
+class _KeyLock:
+    """Thread lock + fcntl lock file for one cache key. Supports non-blocking acquire for asyncio callers."""
+
+    def __init__(self, thread_lock: threading.Lock, lock_path: str):
+        self._thread_lock = thread_lock
+        self._lock_path = lock_path
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self._lock_path), exist_ok=True)
+            fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            self._fd = fd
+            return True
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class MediaCache:
+    """
+    Bounded on-disk media store. Layout: <cache_dir>/<video_id>/<variant>/{files..., meta.json}.
+    All public methods are thread-safe; writers to the same key are serialised by key_lock().
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, verify: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, *key.split("/"))
+
+    def key_lock(self, key: str) -> _KeyLock:
+        with self._lock:
+            thread_lock = self._key_locks.setdefault(key, threading.Lock())
+        return _KeyLock(thread_lock, os.path.join(self.cache_dir, ".locks", key.replace("/", "__") + ".lock"))
+
+    def lookup(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Return {file name: cached path} for a complete, intact entry, else None.
+        An entry failing its size/hash check is removed so the caller re-downloads it.
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILENAME)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            metrics.cache_lookup("media", hit=False)
+            return None
+        paths = {}
+        rehashed = False
+        for name, info in meta.get("files", {}).items():
+            path = os.path.join(entry_dir, name)
+            try:
+                st = os.stat(path)
+                intact = st.st_size == info["size"]
+                # Full hash only when the file was touched since it was stored (or predates mtimes)
+                if intact and self.verify and st.st_mtime_ns != info.get("mtime_ns"):
+                    intact = _sha256(path) == info["sha256"]
+                    info["mtime_ns"] = st.st_mtime_ns
+                    rehashed = True
+            except OSError:
+                intact = False
+            if not intact:
+                print(f"[DEBUG] Media cache entry {key} failed integrity check; discarding")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                with self._lock:
+                    self.corrupt += 1
+                    self.misses += 1
+                metrics.cache_lookup("media", hit=False)
+                return None
+            paths[name] = path
+        if rehashed:
+            self._write_meta(entry_dir, meta)
+        try:
+            os.utime(meta_path)  # LRU clock
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        metrics.cache_lookup("media", hit=True)
+        return paths
+
+    def staging_dir(self) -> str:
+        """A fresh directory on the cache filesystem for a producer to write into."""
+        staging_root = os.path.join(self.cache_dir, ".staging")
+        os.makedirs(staging_root, exist_ok=True)
+        return tempfile.mkdtemp(dir=staging_root)
+
+    def store(self, key: str, staging_dir: str) -> Dict[str, str]:
+        """
+        Hash every file in staging_dir, write meta.json and move the directory into place
+        as the entry for key (replacing any previous one). Evicts LRU entries past max_bytes.
+        Returns {file name: cached path}.
+        """
+        files = {}
+        for name in sorted(os.listdir(staging_dir)):
+            path = os.path.join(staging_dir, name)
+            if os.path.isfile(path):
+                st = os.stat(path)
+                files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _sha256(path)}
+        if not files:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise MediaCacheError(f"Nothing to store for {key}")
+        self._write_meta(staging_dir, {"key": key, "created": time.time(), "files": files})
+        entry_dir = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging_dir, entry_dir)
+        self._evict(keep=key)
+        return {name: os.path.join(entry_dir, name) for name in files}
+
+    def _write_meta(self, entry_dir: str, meta: Dict):
+        tmp_path = os.path.join(entry_dir, f"{META_FILENAME}.{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(entry_dir, META_FILENAME))
+        except OSError as e:
+            print(f"[DEBUG] Could not write media cache metadata in {entry_dir}: {e}")
+
+    def fetch(self, key: str, produce: Callable[[str], bool]) -> Optional[Dict[str, str]]:
+        """
+        Return the cached files for key, calling produce(staging_dir) at most once across
+        concurrent callers on a miss. produce writes the files into staging_dir and returns
+        False if there is nothing to cache (e.g. no captions); fetch then returns None.
+        Exceptions from produce propagate and leave no entry behind.
+        """
+        with self.key_lock(key):
+            hit = self.lookup(key)
+            if hit is not None:
+                return hit
+            staging = self.staging_dir()
+            try:
+                produced = produce(staging)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            if not produced:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+            return self.store(key, staging)
+
+    async def afetch(self, key: str, produce: Callable[[str], Awaitable[bool]], poll_interval: float = 0.05) -> Optional[Dict[str, str]]:
+        """
+        asyncio variant of fetch(): produce is a coroutine function, and the key lock is
+        polled without blocking so other tasks on the loop keep running while we wait.
+        """
+        lock = self.key_lock(key)
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+        try:
+            hit = self.lookup(key)
+            if hit is not None:
+                return hit
+            staging = self.staging_dir()
+            try:
+                produced = await produce(staging)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            if not produced:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+            return self.store(key, staging)
+        finally:
+            lock.release()
+
+    def _entries(self) -> List[Dict]:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for video_id in os.listdir(self.cache_dir):
+            video_dir = os.path.join(self.cache_dir, video_id)
+            if video_id.startswith(".") or not os.path.isdir(video_dir):
+                continue
+            for variant in os.listdir(video_dir):
+                meta_path = os.path.join(video_dir, variant, META_FILENAME)
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    last_used = os.path.getmtime(meta_path)
+                except (OSError, ValueError):
+                    continue
+                size = sum(info.get("size", 0) for info in meta.get("files", {}).values())
+                entries.append({"key": f"{video_id}/{variant}", "size": size, "last_used": last_used})
+        return entries
+
+    def _evict(self, keep: Optional[str] = None):
+        entries = sorted(self._entries(), key=lambda e: e["last_used"])
+        total = sum(e["size"] for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            # Linked copies in run directories keep their own inode; removing the entry is safe
+            shutil.rmtree(self._entry_dir(entry["key"]), ignore_errors=True)
+            total -= entry["size"]
+            with self._lock:
+                self.evictions += 1
+            print(f"[DEBUG] Media cache evicted {entry['key']} ({entry['size']} bytes)")
+
+    def clear(self):
+        for entry in self._entries():
+            shutil.rmtree(self._entry_dir(entry["key"]), ignore_errors=True)
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "corrupt": self.corrupt,
+                "entries": len(entries),
+                "bytes": sum(e["size"] for e in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+_default_caches: Dict[str, MediaCache] = {}
+_default_caches_lock = threading.Lock()
+
+def get_media_cache(cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, verify: bool = True) -> MediaCache:
+    """
+    Return the shared MediaCache for cache_dir (one instance per directory per process,
+    so per-key thread locks are shared by every run in the process).
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    with _default_caches_lock:
+        cache = _default_caches.get(cache_dir)
+        if cache is None:
+            cache = MediaCache(cache_dir, max_bytes=max_bytes, verify=verify)
+            _default_caches[cache_dir] = cache
+        return cache
@@ -0,0 +1,361 @@
+"""
+In-process metrics in the Prometheus text exposition format (version 0.0.4), no client library needed.
+
+- Counter, Gauge and Histogram with fixed label names; each keeps its series in a dict
+  guarded by its own lock, so recording is a lock, a dict lookup and an add (plus a bisect
+  for histograms) and can stay on in the pipeline's hot paths.
+- Gauges can be computed at scrape time (`set_function`), so values that already live
+  elsewhere (queue depths, run states) cost nothing until /metrics is read.
+- Worker processes `drain()` what they recorded since the last drain and the API process
+  `merge()`s it, so one scrape of the API covers every process that did work.
+
+Recording is on unless YTMINER_METRICS is "0" or `configure(enabled=False)` is called;
+when off, every recording call returns after one attribute check.
+
+The pipeline's own metrics are defined at the bottom of this module.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-second cache hits up to long downloads and transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+class MetricsError(Exception):
+    pass
+
+class _State:
+    enabled = os.environ.get("YTMINER_METRICS", "1") != "0"
+
+def configure(enabled: bool = True):
+    _State.enabled = enabled
+
+def enabled() -> bool:
+    return _State.enabled
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise MetricsError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise MetricsError(f"{self.name} takes labels {self.labelnames}, missing {e}")
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._sample_lines())
+        return lines
+
+    def _sample_lines(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}" for key, value in series]
+
+class Counter(_Metric):
+    """Monotonically increasing total, e.g. bytes downloaded."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not _State.enabled:
+            return
+        if amount < 0:
+            raise MetricsError(f"Counter {self.name} cannot decrease")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0.0)
+
+    def drain(self) -> Dict[tuple, float]:
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: Dict[tuple, float]):
+        with self._lock:
+            for key, value in series.items():
+                self._series[key] = self._series.get(key, 0.0) + value
+
+class Gauge(_Metric):
+    """Value that goes up and down; either set directly or computed at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._function: Optional[Callable[[], Any]] = None
+
+    def set(self, value: float, **labels):
+        if not _State.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = float(value)
+
+    def set_function(self, fn: Optional[Callable[[], Any]]):
+        """
+        Compute the gauge on every scrape: fn returns a number (no labels) or a dict
+        mapping label value tuples to numbers.
+        """
+        self._function = fn
+
+    def _sample_lines(self) -> List[str]:
+        fn = self._function
+        if fn is None:
+            return super()._sample_lines()
+        try:
+            values = fn()
+        except Exception as e:
+            print(f"[Metrics] Gauge {self.name} failed: {e}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(float(value))}"
+                for key, value in sorted(values.items())]
+
+    def drain(self) -> Dict[tuple, float]:
+        # Gauges describe the process that holds them; nothing to forward
+        return {}
+
+    def merge(self, series: Dict[tuple, float]):
+        pass
+
+class Histogram(_Metric):
+    """Distribution of observations (e.g. stage durations) over fixed upper bounds."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def observe(self, value: float, **labels):
+        if not _State.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block, including when it raises."""
+        if not _State.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Optional[Dict[str, Any]]:
+        """{"buckets": cumulative counts per bound (last is +Inf), "sum", "count"} or None."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            counts, total, count = list(series[0]), series[1], series[2]
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def _sample_lines(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, (counts, total, count) in series:
+            running = 0
+            for bound, c in zip(bounds, counts):
+                running += c
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {running}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def drain(self) -> Dict[tuple, list]:
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: Dict[tuple, list]):
+        with self._lock:
+            for key, (counts, total, count) in series.items():
+                mine = self._series.get(key)
+                if mine is None:
+                    self._series[key] = [list(counts), total, count]
+                    continue
+                if len(counts) != len(mine[0]):
+                    raise MetricsError(f"Histogram {self.name} merged with different buckets")
+                for i, c in enumerate(counts):
+                    mine[0][i] += c
+                mine[1] += total
+                mine[2] += count
+
+class Registry:
+    """Named metrics, rendered together for one scrape."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add metric; registering the same name again returns the existing metric of that type."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise MetricsError(f"Metric {metric.name} is already registered as another {existing.type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def drain(self) -> Dict[str, Any]:
+        """Everything recorded since the last drain (counters and histograms only), then reset."""
+        delta = {}
+        for metric in self.metrics():
+            series = metric.drain()
+            if series:
+                delta[metric.name] = series
+        return delta
+
+    def merge(self, delta: Dict[str, Any]):
+        """Add a drain() result from another process; unknown metric names are ignored."""
+        for name, series in delta.items():
+            metric = self.get(name)
+            if metric is not None:
+                metric.merge(series)
+
+    def clear(self):
+        for metric in self.metrics():
+            metric.clear()
+
+REGISTRY = Registry()
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, tuple(labelnames)))
+
+def gauge(name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, tuple(labelnames)))
+
+def histogram(name: str, help: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, tuple(labelnames), buckets))
+
+def render() -> str:
+    return REGISTRY.render()
+
+def drain() -> Dict[str, Any]:
+    return REGISTRY.drain()
+
+def merge(delta: Dict[str, Any]):
+    REGISTRY.merge(delta)
+
+# --- Pipeline metrics ---
+
+STAGE_SECONDS = histogram(
+    "ytminer_stage_seconds", "Wall time of pipeline stages (download, captions, vad, chunking, transcribe, compare).",
+    ("stage",))
+MODEL_LOAD_SECONDS = histogram(
+    "ytminer_model_load_seconds", "Time to load a model into a process; _count is the number of loads.",
+    ("model",))
+AUDIO_SECONDS = counter(
+    "ytminer_audio_seconds_total", "Seconds of audio processed per stage; rate() gives audio seconds per second.",
+    ("stage",))
+DOWNLOAD_BYTES = counter(
+    "ytminer_download_bytes_total", "Bytes fetched by yt-dlp for run audio.")
+WRITTEN_BYTES = counter(
+    "ytminer_written_bytes_total", "Bytes written to disk by pipeline writers (audio, chunks, captions, transcripts, ...), by artifact kind.",
+    ("kind",))
+CACHE_REQUESTS = counter(
+    "ytminer_cache_requests_total", "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"))
+CACHE_HIT_RATIO = gauge(
+    "ytminer_cache_hit_ratio", "Hits / lookups per cache since start-up.",
+    ("cache",))
+
+def stage(name: str):
+    """`with metrics.stage("vad"):` records the block's duration in ytminer_stage_seconds."""
+    return STAGE_SECONDS.time(stage=name)
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def _cache_hit_ratios() -> Dict[Tuple[str], float]:
+    totals: Dict[str, List[float]] = {}
+    with CACHE_REQUESTS._lock:
+        series = list(CACHE_REQUESTS._series.items())
+    for (cache, result), value in series:
+        hits_lookups = totals.setdefault(cache, [0.0, 0.0])
+        hits_lookups[1] += value
+        if result == "hit":
+            hits_lookups[0] += value
+    return {(cache,): round(hits / lookups, 4) for cache, (hits, lookups) in totals.items() if lookups}
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
@@ -0,0 +1,150 @@
+"""
+Per-stage resource accounting and on-demand cProfile capture for pipeline runs.
+
+StageRecorder measures each stage of a run or chunk job:
+    stages = StageRecorder()
+    with stages.stage("vad") as stage:
+        ...
+        stage.set(audio_seconds=duration)
+    stages.records()  # [{"stage", "started_at", "wall_seconds", "cpu_seconds", ...}]
+and feeds the same measurements to ytminer_stage_seconds / ytminer_audio_seconds_total.
+
+- cpu_seconds is the process's CPU time (all threads, so native Whisper/torch threads
+  count); in thread executor mode it also includes other runs working at the same time.
+- peak_rss_delta_bytes is how far the stage raised the process's peak RSS (0 if an
+  earlier stage already reached that peak; None where the resource module is missing).
+
+profile_capture() runs a block under cProfile and writes <base>.pstats (for pstats,
+snakeviz, ...) plus <base>.txt (top functions by cumulative time).
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from src import metrics
+from src.fileio import atomic_write_text, record_written, temp_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_TOP_FUNCTIONS = 60
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class _Stage:
+    def __init__(self):
+        self.audio_seconds: Optional[float] = None
+        self.attrs: Dict[str, Any] = {}
+
+    def set(self, audio_seconds: Optional[float] = None, **attrs):
+        if audio_seconds is not None:
+            self.audio_seconds = audio_seconds
+        self.attrs.update(attrs)
+
+class StageRecorder:
+    """Collects one record per stage; records() is JSON-serialisable for the run record."""
+
+    def __init__(self):
+        self._records: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        handle = _Stage()
+        started_at = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        peak_start = peak_rss_bytes()
+        error = None
+        try:
+            yield handle
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_end = peak_rss_bytes()
+            record = {
+                "stage": name,
+                "started_at": round(started_at, 3),
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4),
+                "peak_rss_delta_bytes": peak_end - peak_start if peak_end is not None and peak_start is not None else None,
+                "audio_seconds": round(handle.audio_seconds, 3) if handle.audio_seconds is not None else None,
+                "audio_seconds_per_second": round(handle.audio_seconds / wall, 3) if handle.audio_seconds and wall > 0 else None,
+            }
+            record.update(handle.attrs)
+            if error:
+                record["error"] = error
+            self._records.append(record)
+            metrics.STAGE_SECONDS.observe(wall, stage=name)
+            if handle.audio_seconds:
+                metrics.AUDIO_SECONDS.inc(handle.audio_seconds, stage=name)
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [dict(record) for record in self._records]
+
+class ProfileCapture:
+    """Outcome of profile_capture(): written file paths, or why nothing was captured."""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self.files: List[str] = []
+        self.error: Optional[str] = None
+
+    def report(self) -> Dict[str, Any]:
+        return {"files": list(self.files), "error": self.error}
+
+@contextmanager
+def profile_capture(base_path: Optional[str], enabled: bool = True):
+    """
+    Profile the calling thread for the duration of the block and write base_path + ".pstats"
+    and ".txt" afterwards (also when the block raises). Only one profiler can be active at a
+    time on some Python versions; then the block runs unprofiled and `error` says why.
+    """
+    capture = ProfileCapture(base_path or "")
+    if not enabled or not base_path:
+        yield capture
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        capture.error = f"Profiler unavailable: {e}"
+        print(f"[Profiling] {capture.error}")
+        yield capture
+        return
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        try:
+            _write_profile(profiler, base_path, capture)
+        except Exception as e:
+            capture.error = f"Could not write profile: {e}"
+            print(f"[Profiling] {capture.error}")
+
+def _write_profile(profiler: cProfile.Profile, base_path: str, capture: ProfileCapture):
+    os.makedirs(os.path.dirname(os.path.abspath(base_path)), exist_ok=True)
+    pstats_path = base_path + ".pstats"
+    tmp = temp_path(pstats_path)
+    profiler.dump_stats(tmp)
+    os.replace(tmp, pstats_path)
+    record_written(pstats_path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    atomic_write_text(base_path + ".txt", summary.getvalue())
+    capture.files = [pstats_path, base_path + ".txt"]
@@ -0,0 +1,325 @@
+"""
+Disk retention for run outputs: a byte budget, per-artifact policies and LRU eviction.
+
+Every run directory under the output root is tracked in a small SQLite ledger with the size
+and kind of each artifact (audio, captions, chunks, transcripts, comparisons, other).
+Writers record files when they produce them and readers touch a run when they serve it, so
+usage and recency are known without walking the output tree. enforce() then
+1. drops artifacts older than their kind's max_age_days (e.g. chunk WAVs after a week), and
+2. while the total is over the byte budget, evicts the evictable artifacts of the
+   least-recently-accessed runs, one run at a time.
+Kinds whose policy has keep=True are never evicted. Every eviction leaves a tombstone row
+(path, kind, size, reason, time) so the API can say what was removed and why. Directories
+are only removed once empty; nothing is deleted that the ledger does not know about.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_LEDGER_PATH = os.path.join("cache", "retention.sqlite3")
+DEFAULT_MAX_BYTES = 50 * 1024 ** 3
+ARTIFACT_KINDS = ("audio", "captions", "chunks", "transcripts", "comparisons", "profiles", "other")
+# kind -> {"keep": never evicted, "max_age_days": dropped this long after it was written}
+DEFAULT_POLICIES: Dict[str, Dict[str, Any]] = {
+    "audio": {"max_age_days": 14},
+    "chunks": {"max_age_days": 7},
+    "captions": {"keep": True},
+    "transcripts": {"keep": True},
+    "comparisons": {"keep": True},
+    "profiles": {"max_age_days": 14},
+    "other": {},
+}
+# A run's last_access is rewritten at most this often (media Range requests touch it a lot)
+TOUCH_INTERVAL_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_access ON runs (last_access);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL,
+    relpath TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, relpath)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts (kind, created_at);
+CREATE TABLE IF NOT EXISTS tombstones (
+    run_id TEXT NOT NULL,
+    relpath TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    evicted_at REAL NOT NULL,
+    PRIMARY KEY (run_id, relpath)
+);
+"""
+
+class RetentionError(Exception):
+    pass
+
+def artifact_kind(relpath: str) -> str:
+    """Artifact kind of a path relative to its run directory (e.g. "chunks/chunk_001.wav")."""
+    relpath = relpath.replace(os.sep, "/")
+    name = relpath.rsplit("/", 1)[-1]
+    if relpath.startswith("chunks/"):
+        return "chunks"
+    if name.startswith("audio."):
+        return "audio"
+    if name.endswith((".vtt", ".srt")) or name == "youtube_captions.txt":
+        return "captions"
+    if "transcript" in name:
+        return "transcripts"
+    if name.startswith("comparison"):
+        return "comparisons"
+    if name.startswith("profile."):
+        return "profiles"
+    return "other"
+
+class RetentionManager:
+    """
+    Ledger + eviction for run directories under output_root. Thread-safe; every thread gets
+    its own ledger connection and enforce() calls are serialised.
+    """
+
+    def __init__(self, output_root: str, ledger_path: str = DEFAULT_LEDGER_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 policies: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.output_root = os.path.abspath(output_root)
+        self.ledger_path = ledger_path
+        self.max_bytes = max_bytes
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        unknown = set(self.policies) - set(ARTIFACT_KINDS)
+        if unknown:
+            raise RetentionError(f"Unknown artifact kinds in policies: {sorted(unknown)}")
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialised = False
+        self._enforce_lock = threading.Lock()
+        self.evictions = 0
+        self.freed_bytes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ledger_path)), exist_ok=True)
+            conn = sqlite3.connect(self.ledger_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialised:
+                    conn.executescript(_SCHEMA)
+                    self._initialised = True
+        return conn
+
+    def run_dir(self, run_id: str) -> str:
+        return os.path.join(self.output_root, run_id)
+
+    def record_files(self, run_id: str, relpaths: Iterable[str]) -> int:
+        """
+        Record (or re-record) files of run_id's directory after they were written. Files that
+        no longer exist are dropped from the ledger. Returns the bytes recorded.
+        """
+        now = time.time()
+        recorded = 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("INSERT OR IGNORE INTO runs (run_id, created_at, last_access) VALUES (?, ?, ?)", (run_id, now, now))
+            for relpath in relpaths:
+                relpath = relpath.replace(os.sep, "/")
+                try:
+                    st = os.stat(os.path.join(self.run_dir(run_id), relpath))
+                except OSError:
+                    conn.execute("DELETE FROM artifacts WHERE run_id = ? AND relpath = ?", (run_id, relpath))
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (run_id, relpath, kind, bytes, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, relpath, artifact_kind(relpath), st.st_size, st.st_mtime),
+                )
+                # Written again (e.g. a transcript regenerated): no longer evicted
+                conn.execute("DELETE FROM tombstones WHERE run_id = ? AND relpath = ?", (run_id, relpath))
+                recorded += st.st_size
+        return recorded
+
+    def record_run(self, run_id: str) -> int:
+        """Record every file of one run directory (walks that directory only)."""
+        base = self.run_dir(run_id)
+        relpaths = []
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            relpaths.extend(os.path.relpath(os.path.join(dirpath, f), base) for f in filenames
+                            if not f.startswith(".") and not f.endswith(".part"))
+        known = [row["relpath"] for row in self._conn().execute("SELECT relpath FROM artifacts WHERE run_id = ?", (run_id,))]
+        if not relpaths and not known:
+            return 0  # Nothing written (e.g. a run that failed before download); no ledger entry
+        return self.record_files(run_id, sorted(set(relpaths) | set(known)))
+
+    def record_untracked_runs(self) -> List[str]:
+        """
+        Record run directories under output_root the ledger has never seen (runs from before
+        the ledger existed, or whose recording failed). Returns their run IDs.
+        """
+        try:
+            names = sorted(os.listdir(self.output_root))
+        except FileNotFoundError:
+            return []
+        known = {row["run_id"] for row in self._conn().execute("SELECT run_id FROM runs")}
+        recorded = []
+        for name in names:
+            if name in known or name.startswith(".") or not os.path.isdir(self.run_dir(name)):
+                continue
+            if self.record_run(name):
+                recorded.append(name)
+        return recorded
+
+    def touch(self, run_id: str, now: Optional[float] = None):
+        """Mark run_id as just accessed (moves it to the back of the eviction order)."""
+        now = time.time() if now is None else now
+        self._conn().execute(
+            "UPDATE runs SET last_access = ? WHERE run_id = ? AND last_access < ?",
+            (now, run_id, now - TOUCH_INTERVAL_SECONDS),
+        )
+
+    def tombstones(self, run_id: str) -> List[Dict[str, Any]]:
+        """Artifacts of run_id that were evicted: [{path, kind, bytes, reason, evicted_at}]."""
+        rows = self._conn().execute(
+            "SELECT relpath, kind, bytes, reason, evicted_at FROM tombstones WHERE run_id = ? ORDER BY relpath", (run_id,)
+        ).fetchall()
+        return [{"path": row["relpath"], "kind": row["kind"], "bytes": row["bytes"], "reason": row["reason"],
+                 "evicted_at": row["evicted_at"]} for row in rows]
+
+    def tombstone(self, run_id: str, relpath: str) -> Optional[Dict[str, Any]]:
+        relpath = relpath.replace(os.sep, "/")
+        for stone in self.tombstones(run_id):
+            if stone["path"] == relpath:
+                return stone
+        return None
+
+    def total_bytes(self) -> int:
+        return self._conn().execute("SELECT COALESCE(SUM(bytes), 0) FROM artifacts").fetchone()[0]
+
+    def usage(self) -> Dict[str, Any]:
+        conn = self._conn()
+        by_kind = {row["kind"]: row["total"] for row in conn.execute("SELECT kind, SUM(bytes) AS total FROM artifacts GROUP BY kind")}
+        return {
+            "bytes": sum(by_kind.values()),
+            "max_bytes": self.max_bytes,
+            "by_kind": by_kind,
+            "runs": conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0],
+            "tombstones": conn.execute("SELECT COUNT(*) FROM tombstones").fetchone()[0],
+            "evictions": self.evictions,
+            "freed_bytes": self.freed_bytes,
+        }
+
+    def _evictable_kinds(self) -> List[str]:
+        return [kind for kind in ARTIFACT_KINDS if not self.policies.get(kind, {}).get("keep")]
+
+    def enforce(self, protected: Iterable[str] = (), now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Apply age policies, then evict least-recently-accessed runs until usage is within
+        max_bytes. Runs in `protected` (e.g. still running) are never touched.
+        Returns {"expired", "evicted", "freed_bytes", "bytes"}.
+        """
+        now = time.time() if now is None else now
+        protected = set(protected)
+        expired = evicted = freed = 0
+        with self._enforce_lock:
+            conn = self._conn()
+            for kind in self._evictable_kinds():
+                max_age_days = self.policies.get(kind, {}).get("max_age_days")
+                if max_age_days is None:
+                    continue
+                rows = conn.execute(
+                    "SELECT run_id, relpath, kind, bytes FROM artifacts WHERE kind = ? AND created_at < ?",
+                    (kind, now - max_age_days * 86400),
+                ).fetchall()
+                for row in rows:
+                    if row["run_id"] not in protected:
+                        freed += self._evict(row, f"expired: {kind} older than {max_age_days} days", now)
+                        expired += 1
+            total = self.total_bytes()
+            if total > self.max_bytes:
+                kinds = self._evictable_kinds()
+                placeholders = ",".join("?" * len(kinds))
+                runs = conn.execute(
+                    f"SELECT r.run_id FROM runs r WHERE EXISTS (SELECT 1 FROM artifacts a WHERE a.run_id = r.run_id "
+                    f"AND a.kind IN ({placeholders})) ORDER BY r.last_access, r.run_id", kinds,
+                ).fetchall()
+                for run in runs:
+                    if total <= self.max_bytes:
+                        break
+                    if run["run_id"] in protected:
+                        continue
+                    rows = conn.execute(
+                        f"SELECT run_id, relpath, kind, bytes FROM artifacts WHERE run_id = ? AND kind IN ({placeholders})",
+                        [run["run_id"]] + kinds,
+                    ).fetchall()
+                    for row in rows:
+                        size = self._evict(row, "budget: least recently accessed", now)
+                        total -= size
+                        freed += size
+                        evicted += 1
+                if total > self.max_bytes:
+                    print(f"[Retention] Still {total} bytes after eviction (budget {self.max_bytes}); the rest is kept by policy or in use")
+            self.evictions += expired + evicted
+            self.freed_bytes += freed
+        if expired or evicted:
+            print(f"[Retention] Expired {expired} and evicted {evicted} artifacts, freed {freed} bytes")
+        return {"expired": expired, "evicted": evicted, "freed_bytes": freed, "bytes": self.total_bytes()}
+
+    def _evict(self, row: sqlite3.Row, reason: str, now: float) -> int:
+        run_id, relpath = row["run_id"], row["relpath"]
+        path = os.path.join(self.run_dir(run_id), relpath)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[Retention] Could not remove {path}: {e}")
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM artifacts WHERE run_id = ? AND relpath = ?", (run_id, relpath))
+            conn.execute(
+                "INSERT OR REPLACE INTO tombstones (run_id, relpath, kind, bytes, reason, evicted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, relpath, row["kind"], row["bytes"], reason, now),
+            )
+        self._remove_empty_dirs(os.path.dirname(path), self.run_dir(run_id))
+        return row["bytes"]
+
+    def _remove_empty_dirs(self, directory: str, stop: str):
+        # Remove now-empty directories up to and including the run directory
+        while directory.startswith(stop):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            if directory == stop:
+                return
+            directory = os.path.dirname(directory)
+
+_managers: Dict[tuple, RetentionManager] = {}
+_managers_lock = threading.Lock()
+
+def get_retention_manager(output_root: str = "output", ledger_path: str = DEFAULT_LEDGER_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                          policies: Optional[Dict[str, Dict[str, Any]]] = None) -> RetentionManager:
+    """
+    Return the shared RetentionManager for output_root + ledger_path (one per process, so
+    enforce() calls are serialised across threads).
+    """
+    key = (os.path.abspath(output_root), os.path.abspath(ledger_path))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = RetentionManager(output_root, ledger_path, max_bytes, policies)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,54 @@
+"""
+torch intra-op thread counts for CPU-budgeted stages (VAD, the comparator's encoder).
+
+How far torch.set_num_threads() reaches depends on the build. With OpenMP (the default
+Linux wheels) it sets the calling thread's count (and the default for threads created
+later), so each stage sets its own allotment and restores the previous count when done.
+With torch's native thread pool, the count is shared by the whole process, so concurrent
+stages (thread mode) cannot each keep their own; torch is then set to the sum of the
+allotments of the stages currently running, which the CPU budget keeps within its total,
+and the original count is restored when the last stage leaves.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+_lock = threading.Lock()
+_active: List[int] = []
+_saved: Optional[int] = None
+_openmp: Optional[bool] = None
+
+def _per_thread() -> bool:
+    global _openmp
+    if _openmp is None:
+        import torch
+        _openmp = "OpenMP" in torch.__config__.parallel_info()
+    return _openmp
+
+@contextmanager
+def torch_threads(num_threads: Optional[int]) -> Iterator[None]:
+    """Run the block with num_threads torch intra-op threads for this stage (no-op for None/0)."""
+    if not num_threads:
+        yield
+        return
+    import torch
+    if _per_thread():
+        previous = torch.get_num_threads()
+        torch.set_num_threads(num_threads)
+        try:
+            yield
+        finally:
+            torch.set_num_threads(previous)
+        return
+    global _saved
+    with _lock:
+        if not _active:
+            _saved = torch.get_num_threads()
+        _active.append(num_threads)
+        torch.set_num_threads(sum(_active))
+    try:
+        yield
+    finally:
+        with _lock:
+            _active.remove(num_threads)
+            torch.set_num_threads(sum(_active) if _active else _saved)
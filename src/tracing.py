@@ -0,0 +1,230 @@
+"""
+Structured, buffered tracing for the pipeline (replaces ad-hoc debug.log appends).
+
+- Leveled: debug < info < warning < error; level "off" disables everything.
+- Sampled: debug-level records are kept with probability `sample_rate`.
+- Span-based: `with span("vad", wav=path) as s:` records start/end timestamps,
+  duration and attributes (plus error details if the block raises).
+- Non-blocking: records go through a bounded queue to a background writer thread
+  that appends JSON lines to the trace file; when the queue is full, records are
+  dropped and counted instead of stalling the pipeline.
+- The current run ID (see `run_context`) is attached to every record automatically.
+
+When disabled, `event()`/`span()` reduce to an integer comparison. Hot loops that
+build expensive attributes should additionally guard with `enabled("debug")`.
+
+Defaults come from the environment so the CLI and API behave the same:
+YTMINER_TRACE_LEVEL (default "off"), YTMINER_TRACE_FILE (default ".cursor/debug.log"),
+YTMINER_TRACE_SAMPLE (default 1.0), YTMINER_TRACE_QUEUE (default 10000).
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "off": 100}
+
+DEFAULT_TRACE_FILE = ".cursor/debug.log"
+
+_run_id: contextvars.ContextVar = contextvars.ContextVar("ytminer_run_id", default=None)
+
+def current_run_id() -> Optional[str]:
+    return _run_id.get()
+
+@contextmanager
+def run_context(run_id: Optional[str]):
+    """Attach run_id to every trace record emitted inside the block (this thread/task only)."""
+    token = _run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(token)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, level: int, attrs: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.level = level
+        self.attrs = attrs
+        self.run_id = _run_id.get()
+        self.start = 0.0
+        self._t0 = 0.0
+
+    def set(self, **attrs):
+        """Add or overwrite span attributes (e.g. result sizes known only at the end)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        record = {
+            "type": "span",
+            "name": self.name,
+            "start": self.start,
+            "end": self.start + duration,
+            "duration_ms": round(duration * 1000.0, 3),
+            "status": "error" if exc_type else "ok",
+            "attrs": self.attrs,
+        }
+        if exc_type:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        self._tracer._emit(self.level, record, self.run_id)
+        return False
+
+class Tracer:
+    """
+    Tracer writing JSON lines via a background thread. Thread-safe.
+    """
+
+    def __init__(self, level: str = "off", path: str = DEFAULT_TRACE_FILE, sample_rate: float = 1.0, queue_size: int = 10000):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.min_level = LEVELS[level.lower()]
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._dropped_lock = threading.Lock()
+
+    def enabled(self, level: str = "debug") -> bool:
+        return LEVELS[level] >= self.min_level
+
+    def event(self, message: str, level: str = "debug", **attrs):
+        lvl = LEVELS[level]
+        if lvl < self.min_level:
+            return
+        self._emit(lvl, {"type": "event", "name": message, "attrs": attrs}, _run_id.get())
+
+    def span(self, name: str, level: str = "info", **attrs):
+        lvl = LEVELS[level]
+        if lvl < self.min_level:
+            return _NOOP_SPAN
+        return Span(self, name, lvl, attrs)
+
+    def _emit(self, level: int, record: Dict[str, Any], run_id: Optional[str]):
+        if level < LEVELS["info"] and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        record["ts"] = time.time()
+        record["level"] = level
+        record["run_id"] = run_id
+        record["thread"] = threading.current_thread().name
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Producers race here under load; += alone loses counts
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                record = self._queue.get()
+                batch = [record]
+                # Drain whatever else is queued so one write/flush covers many records
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = False
+                for item in batch:
+                    if item is None:
+                        stop = True
+                        continue
+                    f.write(json.dumps(item, default=str) + "\n")
+                f.flush()
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    return
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+            self._writer = None
+
+def _tracer_from_env() -> Tracer:
+    level = os.environ.get("YTMINER_TRACE_LEVEL", "off").lower()
+    if level not in LEVELS:
+        level = "off"
+    return Tracer(
+        level=level,
+        path=os.environ.get("YTMINER_TRACE_FILE", DEFAULT_TRACE_FILE),
+        sample_rate=float(os.environ.get("YTMINER_TRACE_SAMPLE", "1.0")),
+        queue_size=int(os.environ.get("YTMINER_TRACE_QUEUE", "10000")),
+    )
+
+_tracer = _tracer_from_env()
+
+def configure(level: Optional[str] = None, path: Optional[str] = None, sample_rate: Optional[float] = None, queue_size: Optional[int] = None) -> Tracer:
+    """
+    Replace the process-wide tracer. Unspecified settings keep their current values.
+    """
+    global _tracer
+    old = _tracer
+    new = Tracer(
+        level=level if level is not None else next(k for k, v in LEVELS.items() if v == old.min_level),
+        path=path if path is not None else old.path,
+        sample_rate=sample_rate if sample_rate is not None else old.sample_rate,
+        queue_size=queue_size if queue_size is not None else old._queue.maxsize,
+    )
+    _tracer = new
+    old.close()
+    return new
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def enabled(level: str = "debug") -> bool:
+    return LEVELS[level] >= _tracer.min_level
+
+def event(message: str, level: str = "debug", **attrs):
+    _tracer.event(message, level, **attrs)
+
+def span(name: str, level: str = "info", **attrs):
+    return _tracer.span(name, level, **attrs)
+
+def flush():
+    _tracer.flush()
+
+atexit.register(lambda: _tracer.close())
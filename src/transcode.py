@@ -0,0 +1,181 @@
+"""
+Opus/WebM transcodes of run audio for in-browser playback, cached on disk.
+
+A 30 s PCM16 WAV chunk is about 1 MB and the full-length audio.wav can be hundreds of MB;
+the same audio as Opus in WebM is a small fraction of that, and browsers can start playing
+and seeking after the first few KB. Transcodes are keyed by the source file's path, size and
+mtime plus the bitrate, so a rewritten source never serves a stale transcode. Files are
+written under a temporary name and renamed into place, so a reader never sees a partial one.
+The cache is bounded: after each new transcode, least-recently-used files are removed past
+max_bytes. Hits refresh only the access time, so a transcode's mtime (and ETag) stays put.
+
+Servers should not make a request wait for a full-file ffmpeg run: cached_transcode() answers
+from the cache only, and start_transcode() runs the transcode on a small background pool
+(once per source), so the source can be served until the transcode is ready.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
+
+from src.downloader import FFMPEG_BIN
+
+OPUS_CONTENT_TYPE = "audio/webm"
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+# Striped locks: concurrent requests for one transcode run ffmpeg once
+_LOCKS = [threading.Lock() for _ in range(64)]
+# Background transcodes: at most this many ffmpeg processes at once
+BACKGROUND_WORKERS = 2
+_FAILED_KEPT = 1000
+_background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="transcode")
+_background_lock = threading.Lock()
+_pending: Set[str] = set()
+# key -> error of background transcodes that failed (the key changes when the source does)
+_failed: "OrderedDict[str, str]" = OrderedDict()
+
+class TranscodeError(Exception):
+    pass
+
+def build_opus_command(input_path: str, output_path: str, bitrate: str = "48k") -> List[str]:
+    return [
+        FFMPEG_BIN, "-nostdin", "-y", "-v", "error",
+        "-i", input_path,
+        "-vn", "-map_metadata", "-1",
+        "-c:a", "libopus", "-b:a", bitrate,
+        "-f", "webm",
+        output_path,
+    ]
+
+def transcode_key(input_path: str, bitrate: str) -> str:
+    st = os.stat(input_path)
+    ident = f"{os.path.abspath(input_path)}|{st.st_size}|{st.st_mtime_ns}|{bitrate}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+def _output_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.webm")
+
+def cached_transcode(input_path: str, cache_dir: str, bitrate: str = "48k") -> Optional[str]:
+    """Path of the cached transcode of input_path, or None if there is none yet. Never runs ffmpeg."""
+    try:
+        key = transcode_key(input_path, bitrate)
+    except OSError:
+        return None
+    output_path = _output_path(cache_dir, key)
+    return output_path if _touch(output_path) else None
+
+def start_transcode(input_path: str, cache_dir: str, bitrate: str = "48k", timeout: float = 600, max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> bool:
+    """
+    Queue opus_transcode() of input_path on the background pool. Returns False if it is
+    already queued or running, or has failed for this version of the source.
+    """
+    try:
+        key = transcode_key(input_path, bitrate)
+    except OSError:
+        return False
+    with _background_lock:
+        if key in _pending or key in _failed:
+            return False
+        _pending.add(key)
+    _background.submit(_transcode_in_background, key, input_path, cache_dir, bitrate, timeout, max_bytes)
+    return True
+
+def _transcode_in_background(key: str, input_path: str, cache_dir: str, bitrate: str, timeout: float, max_bytes: Optional[int]):
+    error = None
+    try:
+        opus_transcode(input_path, cache_dir, bitrate, timeout=timeout, max_bytes=max_bytes)
+    except Exception as e:
+        error = str(e)
+        print(f"[Transcode] Background transcode of {input_path} failed: {error}")
+    with _background_lock:
+        _pending.discard(key)
+        if error is not None:
+            _failed[key] = error
+            while len(_failed) > _FAILED_KEPT:
+                _failed.popitem(last=False)
+
+def opus_transcode(input_path: str, cache_dir: str, bitrate: str = "48k", timeout: float = 600, max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> str:
+    """
+    Return the path of the cached Opus/WebM transcode of input_path, running ffmpeg on
+    first use (and evicting LRU transcodes past max_bytes; None means unbounded).
+    Raises TranscodeError if ffmpeg fails.
+    """
+    try:
+        key = transcode_key(input_path, bitrate)
+    except OSError as e:
+        raise TranscodeError(f"Cannot read {input_path}: {e}")
+    output_path = _output_path(cache_dir, key)
+    if _touch(output_path):
+        return output_path
+    with _LOCKS[int(key[:8], 16) % len(_LOCKS)]:
+        if _touch(output_path):
+            return output_path
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.part"
+        print(f"[Transcode] {input_path} -> Opus {bitrate}")
+        try:
+            subprocess.run(build_opus_command(input_path, tmp_path, bitrate), check=True, capture_output=True, timeout=timeout)
+        except subprocess.CalledProcessError as e:
+            _remove(tmp_path)
+            raise TranscodeError(f"ffmpeg failed ({e.returncode}): {e.stderr.decode('utf-8', 'replace').strip()}")
+        except (OSError, subprocess.SubprocessError) as e:
+            _remove(tmp_path)
+            raise TranscodeError(f"ffmpeg failed: {e}")
+        os.replace(tmp_path, output_path)
+    if max_bytes is not None:
+        evict_transcodes(cache_dir, max_bytes, keep=output_path)
+    return output_path
+
+def evict_transcodes(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> int:
+    """Remove least-recently-used transcodes until cache_dir holds at most max_bytes. Returns the count removed."""
+    entries = []
+    try:
+        shards = os.listdir(cache_dir)
+    except OSError:
+        return 0
+    for shard in shards:
+        shard_dir = os.path.join(cache_dir, shard)
+        try:
+            names = os.listdir(shard_dir)
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith(".webm"):
+                continue  # In-progress .part files belong to a running ffmpeg
+            path = os.path.join(shard_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        # A response already streaming the file keeps its open handle
+        _remove(path)
+        total -= size
+        removed += 1
+        print(f"[Transcode] Evicted {path} ({size} bytes)")
+    return removed
+
+def _touch(path: str) -> bool:
+    # LRU clock on hits: bump the access time, keep the mtime the ETag is built from
+    try:
+        st = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        return False
+    return True
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
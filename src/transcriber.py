@@ -1,5 +1,34 @@
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import os
+import threading
+
+from src import metrics, tracing
+from src.fileio import atomic_write_text
+from src.transcript_cache import TranscriptCache, get_transcript_cache, hash_audio_file, make_cache_key
+
+WHISPER_COMPUTE_TYPE = "int8"
+
+# Approximate relative decode cost per model size (parameter count, tiny = 1).
+# Used to report how much compute the ASR cascade saves.
+MODEL_RELATIVE_COST = {
+    "tiny": 1.0,
+    "base": 1.9,
+    "small": 6.3,
+    "medium": 19.7,
+    "large": 39.7,
+    "large-v2": 39.7,
+    "large-v3": 39.7,
+}
+
+# A segment is low-confidence if it breaks any of these (same defaults Whisper uses for its own fallback)
+DEFAULT_CASCADE_THRESHOLDS = {
+    "min_avg_logprob": -1.0,
+    "max_no_speech_prob": 0.6,
+    "max_compression_ratio": 2.4,
+}
+
+_model_cache: Dict[tuple, Any] = {}
+_model_cache_lock = threading.Lock()
 
 class TranscriptionError(Exception):
     pass
@@ -9,85 +38,286 @@ def transcribe_chunk(
     output_path: str = "output/whisper_transcript.txt",
     model_size: str = "tiny",
     compute_type: str = "cpu",
-    language: str = "en"
+    language: str = "en",
+    beam_size: int = 1,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+    segment_fn: Optional[Callable[[Dict[str, Any]], None]] = None
 ) -> str:
     """
     Transcribe a chunk WAV file using faster-whisper (Whisper-Tiny model).
     Writes transcript to output_path.
     Returns transcript string.
     Raises TranscriptionError on failure or empty output.
+
+    When use_cache is set, the result is looked up in (and stored to) the transcript
+    cache keyed by the chunk audio hash and decode options; a hit skips model load
+    and decoding entirely.
+    cpu_threads/num_workers are passed to WhisperModel (0 = CTranslate2 default).
+    segment_fn, if given, receives each {"start", "end", "text"} segment as it is decoded.
+    """
+    tracing.event("transcribe_chunk entry", chunk_path=chunk_path, output_path=output_path, model_size=model_size, language=language, compute_type=compute_type)
+    transcript = ""
+    asr_end_time = 0.0
+    for segment in iter_transcribe_chunk(chunk_path, model_size=model_size, compute_type=compute_type, language=language, beam_size=beam_size, use_cache=use_cache, cache=cache, cpu_threads=cpu_threads, num_workers=num_workers):
+        transcript += segment["text"] + " "
+        asr_end_time = max(asr_end_time, segment["end"])
+        if segment_fn is not None:
+            segment_fn(segment)
+    transcript = transcript.strip()
+    tracing.event("Transcript result", transcript_start=transcript[:200], asr_end_time=asr_end_time)
+    if not transcript:
+        raise TranscriptionError("Whisper ASR returned empty transcript.")
+    _write_transcript(output_path, transcript)
+    return transcript, asr_end_time
+
+def iter_transcribe_chunk(
+    chunk_path: str,
+    model_size: str = "tiny",
+    compute_type: str = "cpu",
+    language: str = "en",
+    beam_size: int = 1,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
+    cpu_threads: int = 0,
+    num_workers: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily transcribe a chunk, yielding {"start", "end", "text"} for each segment as
+    faster-whisper decodes it (so callers can stream partial transcripts).
+    On a transcript cache hit, the cached segments are yielded immediately.
+    A fully consumed, non-empty decode is stored in the cache.
+    Raises TranscriptionError if the chunk is missing or faster-whisper is unavailable.
+    """
+    if not os.path.exists(chunk_path):
+        raise TranscriptionError(f"Chunk file {chunk_path} does not exist.")
+    cache_key = None
+    if use_cache:
+        cache = cache or get_transcript_cache()
+        try:
+            audio_hash = hash_audio_file(chunk_path)
+            cache_key = make_cache_key(audio_hash, model_size, compute_type, WHISPER_COMPUTE_TYPE, language, beam_size)
+        except OSError:
+            cache_key = None
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"[DEBUG] Transcript cache hit for {chunk_path}")
+            for segment in cached["segments"]:
+                yield dict(segment)
+            return
+    model = load_whisper_model(model_size, device=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+    tracing.event("Calling transcribe", chunk_path=chunk_path, language=language)
+    print(f"[DEBUG] Transcribing {chunk_path} with model_size={model_size}, device={compute_type}, language={language}")
+    segments, _info = model.transcribe(chunk_path, beam_size=beam_size, language=language)
+    segment_records = []
+    for segment in segments:
+        record = _segment_record(segment)
+        segment_records.append(record)
+        yield dict(record)
+    if cache_key and any(record["text"] for record in segment_records):
+        text = " ".join(record["text"] for record in segment_records if record["text"])
+        asr_end_time = max(record["end"] for record in segment_records)
+        cache.put(cache_key, {"text": text, "asr_end_time": asr_end_time, "segments": segment_records})
+
+def load_whisper_model(model_size: str, device: str = "cpu", cpu_threads: int = 0, num_workers: int = 1):
+    """
+    Return a WhisperModel for (model_size, device, cpu_threads, num_workers), loading it once per process.
+    Raises TranscriptionError if faster-whisper is not installed.
     """
-    #region agent log
-    import json
-    with open('.cursor/debug.log','a') as f:
-        f.write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "run1",
-            "hypothesisId": "A,B,D",
-            "location": "transcriber.py:20",
-            "message": "Function entry and input params",
-            "data": {"chunk_path": chunk_path, "output_path": output_path, "model_size": model_size, "language": language, "compute_type": compute_type},
-            "timestamp": __import__('time').time()
-        }) + '\n')
-    #endregion
     try:
         from faster_whisper import WhisperModel
     except ImportError:
         raise TranscriptionError("faster-whisper is not installed.")
+    # The class is part of the key so a patched/mocked WhisperModel never sees a stale instance
+    key = (WhisperModel, model_size, device, WHISPER_COMPUTE_TYPE, cpu_threads, num_workers)
+    # Thread settings are only passed when set, leaving CTranslate2 defaults otherwise
+    thread_kwargs = {}
+    if cpu_threads:
+        thread_kwargs["cpu_threads"] = cpu_threads
+    if num_workers != 1:
+        thread_kwargs["num_workers"] = num_workers
+    with _model_cache_lock:
+        model = _model_cache.get(key)
+        if model is None:
+            with tracing.span("whisper_model_load", model_size=model_size, device=device, cpu_threads=cpu_threads), metrics.MODEL_LOAD_SECONDS.time(model="whisper"):
+                model = WhisperModel(model_size, device=device, compute_type=WHISPER_COMPUTE_TYPE, **thread_kwargs)
+            _model_cache[key] = model
+    return model
+
+def is_low_confidence(segment: Dict[str, Any], thresholds: Optional[Dict[str, float]] = None) -> bool:
+    """
+    True if a decoded segment's avg_logprob, no_speech_prob or compression_ratio
+    falls outside thresholds (missing statistics count as confident).
+    """
+    t = thresholds or DEFAULT_CASCADE_THRESHOLDS
+    avg_logprob = segment.get("avg_logprob")
+    no_speech_prob = segment.get("no_speech_prob")
+    compression_ratio = segment.get("compression_ratio")
+    if avg_logprob is not None and avg_logprob < t["min_avg_logprob"]:
+        return True
+    if no_speech_prob is not None and no_speech_prob > t["max_no_speech_prob"]:
+        return True
+    if compression_ratio is not None and compression_ratio > t["max_compression_ratio"]:
+        return True
+    return False
+
+def transcribe_chunk_cascade(
+    chunk_path: str,
+    output_path: str = "output/whisper_transcript.txt",
+    fast_model_size: str = "tiny",
+    strong_model_size: str = "medium",
+    compute_type: str = "cpu",
+    language: str = "en",
+    beam_size: int = 1,
+    thresholds: Optional[Dict[str, float]] = None,
+    full_redecode_fraction: float = 0.5,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+    segment_fn: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Tuple[str, float, Dict[str, Any]]:
+    """
+    Confidence-driven model cascade.
+    Decodes the chunk with fast_model_size, then re-decodes only low-confidence segments
+    (see is_low_confidence) with strong_model_size. If more than full_redecode_fraction of
+    the audio is low-confidence, the whole chunk is re-decoded with the strong model instead.
+    Writes transcript to output_path.
+    Returns (transcript, asr_end_time, report) where report describes what was re-decoded
+    and the relative compute used versus always decoding with strong_model_size.
+    segment_fn, if given, receives each final {"start", "end", "text"} segment once the
+    cascade has settled them (re-decoding can replace fast-model segments).
+    Raises TranscriptionError on failure or empty output.
+    """
+    thresholds = dict(DEFAULT_CASCADE_THRESHOLDS, **(thresholds or {}))
     if not os.path.exists(chunk_path):
         raise TranscriptionError(f"Chunk file {chunk_path} does not exist.")
-    #region agent log
-    with open('.cursor/debug.log','a') as f:
-        f.write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "run1",
-            "hypothesisId": "A,B",
-            "location": "transcriber.py:26",
-            "message": "Creating WhisperModel",
-            "data": {"model_size": model_size, "device": compute_type},
-            "timestamp": __import__('time').time()
-        }) + '\n')
-    #endregion
-    model = WhisperModel(model_size, device=compute_type, compute_type="int8")
-    #region agent log
-    with open('.cursor/debug.log','a') as f:
-        f.write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "run1",
-            "hypothesisId": "B,E",
-            "location": "transcriber.py:27",
-            "message": "Calling transcribe",
-            "data": {"chunk_path": chunk_path, "language": language},
-            "timestamp": __import__('time').time()
-        }) + '\n')
-    #endregion
-    transcript = ""
-    asr_end_time = 0.0
-    print(f"[DEBUG] Transcribing {chunk_path} with model_size={model_size}, device={compute_type}, language={language}")
-    segments, _info = model.transcribe(chunk_path, beam_size=1, language=language)
-    for segment in segments:
-        transcript += segment.text.strip() + " "
-        if hasattr(segment, 'end'):
-            asr_end_time = max(asr_end_time, float(segment.end))
-    transcript = transcript.strip()
-    #region agent log
-    with open('.cursor/debug.log','a') as f:
-        f.write(json.dumps({
-            "sessionId": "debug-session",
-            "runId": "run1",
-            "hypothesisId": "E",
-            "location": "transcriber.py:31",
-            "message": "Transcript result",
-            "data": {"transcript_start": transcript[:200], "asr_end_time": asr_end_time},
-            "timestamp": __import__('time').time()
-        }) + '\n')
-    #endregion
+    cache_key = None
+    if use_cache:
+        cache = cache or get_transcript_cache()
+        try:
+            audio_hash = hash_audio_file(chunk_path)
+            cache_key = make_cache_key(
+                audio_hash, fast_model_size, compute_type, WHISPER_COMPUTE_TYPE, language, beam_size,
+                cascade_model=strong_model_size, cascade_thresholds=thresholds, full_redecode_fraction=full_redecode_fraction
+            )
+        except OSError:
+            cache_key = None
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"[DEBUG] Transcript cache hit (cascade) for {chunk_path}")
+            _write_transcript(output_path, cached["text"])
+            _emit_segments(segment_fn, cached["segments"])
+            return cached["text"], cached["asr_end_time"], cached["cascade"]
+
+    fast_model = load_whisper_model(fast_model_size, device=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+    with tracing.span("cascade_fast_decode", model_size=fast_model_size):
+        segments, info = fast_model.transcribe(chunk_path, beam_size=beam_size, language=language)
+        records = [_segment_record(segment, with_stats=True) for segment in segments]
+    duration = _audio_duration(chunk_path, info, records)
+    fast_segment_count = len(records)
+    low = [r for r in records if is_low_confidence(r, thresholds)]
+    low_seconds = sum(max(0.0, r["end"] - r["start"]) for r in low)
+    strong_seconds = 0.0
+    mode = "none"
+    if not records or (duration > 0 and low_seconds / duration > full_redecode_fraction):
+        mode = "full"
+        strong_model = load_whisper_model(strong_model_size, device=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+        with tracing.span("cascade_strong_decode", model_size=strong_model_size, mode=mode):
+            segments, _info = strong_model.transcribe(chunk_path, beam_size=beam_size, language=language)
+            records = [_segment_record(segment, with_stats=True) for segment in segments]
+        strong_seconds = duration
+    elif low:
+        mode = "segments"
+        strong_model = load_whisper_model(strong_model_size, device=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+        import numpy as np
+        import soundfile as sf
+        audio, sr = sf.read(chunk_path, dtype="float32")
+        if len(audio.shape) > 1:
+            audio = np.mean(audio, axis=1)
+        merged = []
+        for r in records:
+            flagged = is_low_confidence(r, thresholds)
+            if flagged and merged and merged[-1]["low"] and r["start"] - merged[-1]["end"] < 0.5:
+                merged[-1]["end"] = r["end"]
+                continue
+            merged.append({"start": r["start"], "end": r["end"], "low": flagged, "record": r})
+        new_records = []
+        with tracing.span("cascade_strong_decode", model_size=strong_model_size, mode=mode) as span:
+            for group in merged:
+                if not group["low"]:
+                    new_records.append(group["record"])
+                    continue
+                # Small padding so words at segment boundaries are not clipped
+                start = max(0.0, group["start"] - 0.2)
+                end = min(duration, group["end"] + 0.2) if duration > 0 else group["end"] + 0.2
+                clip = audio[int(start * sr):int(end * sr)]
+                strong_seconds += len(clip) / sr
+                sub_segments, _info = strong_model.transcribe(clip, beam_size=beam_size, language=language)
+                text = " ".join(seg.text.strip() for seg in sub_segments if seg.text.strip())
+                new_records.append({"start": group["start"], "end": group["end"], "text": text})
+            span.set(spans=sum(1 for g in merged if g["low"]))
+        records = new_records
+    transcript = " ".join(r["text"] for r in records if r["text"]).strip()
     if not transcript:
         raise TranscriptionError("Whisper ASR returned empty transcript.")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding='utf-8') as f:
-        f.write(transcript + "\n")
-    return transcript, asr_end_time
+    asr_end_time = max((r["end"] for r in records), default=0.0)
+    fast_cost = duration * MODEL_RELATIVE_COST.get(fast_model_size, 1.0)
+    strong_unit = MODEL_RELATIVE_COST.get(strong_model_size, 1.0)
+    cascade_cost = fast_cost + strong_seconds * strong_unit
+    baseline_cost = duration * strong_unit
+    report = {
+        "fast_model": fast_model_size,
+        "strong_model": strong_model_size,
+        "mode": mode,
+        "segments_total": fast_segment_count,
+        "segments_low_confidence": len(low),
+        "audio_seconds": round(duration, 3),
+        "low_confidence_seconds": round(low_seconds, 3),
+        "strong_audio_seconds": round(strong_seconds, 3),
+        "cascade_cost": round(cascade_cost, 3),
+        "baseline_cost": round(baseline_cost, 3),
+        "compute_saved_percent": round((1.0 - cascade_cost / baseline_cost) * 100.0, 2) if baseline_cost > 0 else 0.0,
+    }
+    tracing.event("Cascade report", level="info", **report)
+    _write_transcript(output_path, transcript)
+    segment_records = [{"start": r["start"], "end": r["end"], "text": r["text"]} for r in records]
+    if cache_key:
+        cache.put(cache_key, {"text": transcript, "asr_end_time": asr_end_time, "segments": segment_records, "cascade": report})
+    _emit_segments(segment_fn, segment_records)
+    return transcript, asr_end_time, report
+
+def _emit_segments(segment_fn: Optional[Callable[[Dict[str, Any]], None]], segments: List[Dict[str, Any]]):
+    if segment_fn is not None:
+        for segment in segments:
+            segment_fn(dict(segment))
+
+def _segment_record(segment, with_stats: bool = False) -> Dict[str, Any]:
+    record = {
+        "start": float(getattr(segment, "start", 0.0) or 0.0),
+        "end": float(getattr(segment, "end", 0.0) or 0.0),
+        "text": segment.text.strip(),
+    }
+    if with_stats:
+        for name in ("avg_logprob", "no_speech_prob", "compression_ratio"):
+            value = getattr(segment, name, None)
+            record[name] = float(value) if isinstance(value, (int, float)) else None
+    return record
+
+def _audio_duration(chunk_path: str, info, records: List[Dict[str, Any]]) -> float:
+    duration = getattr(info, "duration", None)
+    if isinstance(duration, (int, float)) and duration > 0:
+        return float(duration)
+    try:
+        import soundfile as sf
+        return float(sf.info(chunk_path).duration)
+    except Exception:
+        return max((r["end"] for r in records), default=0.0)
+
+def _write_transcript(output_path: str, transcript: str):
+    atomic_write_text(output_path, transcript + "\n")
 
 # ===== Exposure for patching in tests =====
 try:
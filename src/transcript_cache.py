@@ -0,0 +1,210 @@
+"""
+Persistent transcript cache for Whisper chunk transcriptions.
+
+Entries are keyed by the SHA-256 of the chunk audio content plus every decode
+option that can change the output (model size, device, compute type, language,
+beam size, ...). Each entry is one small JSON file on disk; a bounded in-memory
+LRU sits in front of it so repeated hits skip disk reads entirely. The on-disk
+store is bounded by entry count and evicts least-recently-used entries by file
+mtime (refreshed on every hit). The directory is the source of truth: several
+processes (executor workers) share it, so misses and eviction always go to disk.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src import metrics
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "transcripts")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MEMORY_ENTRIES = 256
+
+def hash_audio_file(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Return the hex SHA-256 of the file contents at path.
+    Raises OSError if the file cannot be read.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def make_cache_key(audio_hash: str, model_size: str, device: str, compute_type: str, language: str, beam_size: int, **decode_options) -> str:
+    """
+    Build a stable cache key from the audio hash and all decode parameters.
+    Extra decode options are included sorted by name so call order does not matter.
+    """
+    payload = {
+        "audio": audio_hash,
+        "model_size": model_size,
+        "device": device,
+        "compute_type": compute_type,
+        "language": language,
+        "beam_size": beam_size,
+        "options": {k: decode_options[k] for k in sorted(decode_options)},
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TranscriptCache:
+    """
+    Bounded two-level (memory + disk) cache of transcription results.
+
+    Stored entries are plain dicts: {"text", "asr_end_time", "segments": [{"start", "end", "text"}]}.
+    All public methods are thread-safe.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES, memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> last access (mtime); loaded lazily with one directory scan
+        self._index: Optional["OrderedDict[str, float]"] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _scan(self) -> "OrderedDict[str, float]":
+        # key -> mtime of every entry on disk, least recently used first
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for sub in os.listdir(self.cache_dir):
+                sub_dir = os.path.join(self.cache_dir, sub)
+                if not os.path.isdir(sub_dir):
+                    continue
+                for name in os.listdir(sub_dir):
+                    if not name.endswith(".json"):
+                        continue
+                    try:
+                        mtime = os.path.getmtime(os.path.join(sub_dir, name))
+                    except OSError:
+                        continue
+                    entries.append((mtime, name[:-len(".json")]))
+        # Ties (coarse filesystem timestamps) go by this process's own access order
+        rank = {key: i for i, key in enumerate(self._index or ())}
+        entries.sort(key=lambda e: (e[0], rank.get(e[1], -1), e[1]))
+        return OrderedDict((key, mtime) for mtime, key in entries)
+
+    def _load_index(self):
+        if self._index is None:
+            self._index = self._scan()
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key: str) -> bool:
+        self._index[key] = 0.0
+        self._index.move_to_end(key)
+        try:
+            os.utime(self._entry_path(key))
+        except OSError:
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._load_index()
+            entry = self._memory.get(key)
+            if entry is not None and not self._touch(key):
+                # Evicted by another process sharing the directory
+                self._memory.pop(key, None)
+                self._index.pop(key, None)
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                metrics.cache_lookup("transcript", hit=True)
+                return entry
+            # Read the file even for keys the index does not know: another process may have written it
+            try:
+                with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                # Missing, evicted elsewhere or corrupt entry: treat as a miss
+                self._index.pop(key, None)
+                self.misses += 1
+                metrics.cache_lookup("transcript", hit=False)
+                return None
+            self._remember(key, entry)
+            self._touch(key)
+            self.hits += 1
+            metrics.cache_lookup("transcript", hit=True)
+            return entry
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._load_index()
+            path = self._entry_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            self._remember(key, entry)
+            self._index[key] = 0.0
+            self._index.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        # One directory scan per new entry (negligible next to the decode that produced it),
+        # so entries written and touched by other processes count towards the bound
+        self._index = self._scan()
+        while len(self._index) > self.max_entries:
+            old_key, _ = self._index.popitem(last=False)
+            self._memory.pop(old_key, None)
+            try:
+                os.remove(self._entry_path(old_key))
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                try:
+                    os.remove(self._entry_path(key))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index) if self._index is not None else None,
+                "max_entries": self.max_entries,
+            }
+
+_default_caches: Dict[str, TranscriptCache] = {}
+_default_caches_lock = threading.Lock()
+
+def get_transcript_cache(cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES) -> TranscriptCache:
+    """
+    Return the shared TranscriptCache for cache_dir (one instance per directory per process).
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    with _default_caches_lock:
+        cache = _default_caches.get(cache_dir)
+        if cache is None:
+            cache = TranscriptCache(cache_dir, max_entries=max_entries)
+            _default_caches[cache_dir] = cache
+        return cache
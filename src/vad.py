@@ -1,24 +1,50 @@
+import threading
 import torch
 import numpy as np
 import soundfile as sf
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
+
+from src import metrics
+from src.torch_threads import torch_threads
 
 class VADException(Exception):
     pass
 
+# Per-thread (loader, (model, utils)); released with the thread, so finished threads keep no model
+_thread_model = threading.local()
+
+def load_vad_model() -> tuple:
+    """
+    Return the Silero VAD (model, utils) tuple from torch.hub, loading it once per thread.
+    The model keeps recurrent state between windows, so threads must not share one.
+    """
+    entry = getattr(_thread_model, "entry", None)
+    # The loader is checked so a patched torch.hub.load never sees a stale model
+    if entry is None or entry[0] is not torch.hub.load:
+        loader = torch.hub.load
+        with metrics.MODEL_LOAD_SECONDS.time(model="vad"):
+            entry = (loader, loader('snakers4/silero-vad', 'silero_vad', trust_repo=True))
+        _thread_model.entry = entry
+    return entry[1]
+
 def run_silero_vad(
     wav_path: str,
     sampling_rate: int = 16000,
     min_speech_sec: float = 0.4,
     min_silence_sec: float = 0.2,
     vad_window_sec: float = 0.05,
-    device: str = "cpu"
+    device: str = "cpu",
+    num_threads: Optional[int] = None,
+    progress_fn: Optional[Callable[[float], None]] = None
 ) -> List[Tuple[float, float]]:
     """
     Apply Silero VAD to audio file to return speech segments (in seconds).
     Discards silence and music.
     Returns list of (start_time, end_time).
     Raises VADException if audio is missing or no speech detected.
+    num_threads, if given, is this stage's share of torch's intra-op threads during inference
+    (see src/torch_threads.py for how that is scoped per torch build).
+    progress_fn, if given, is called with the fraction of audio processed (0.0-1.0).
     """
     # Read WAV
     try:
@@ -35,7 +61,7 @@ def run_silero_vad(
 
     print("[VAD-DEBUG] ENTRY", {"wav_path": wav_path})
     try:
-        vad_model_tuple = torch.hub.load('snakers4/silero-vad', 'silero_vad', trust_repo=True)
+        vad_model_tuple = load_vad_model()
         vad_model = vad_model_tuple[0]
         utils = vad_model_tuple[1]
         get_speech_timestamps = utils[0]
@@ -45,7 +71,17 @@ def run_silero_vad(
         audio_mono = torch.tensor(wav, dtype=torch.float32)
         print("[VAD-DEBUG] PRE_CALL_GST", {"shape": str(audio_mono.shape)})
         try:
-            speech_timestamps = get_speech_timestamps(audio_mono, vad_model, sampling_rate=sampling_rate)
+            kwargs = {}
+            if progress_fn is not None:
+                import inspect
+                # Older silero-vad releases have no progress hook; they still report 0.0 and 1.0 below
+                if "progress_tracking_callback" in inspect.signature(get_speech_timestamps).parameters:
+                    kwargs["progress_tracking_callback"] = lambda percent: progress_fn(min(percent / 100.0, 1.0))
+                progress_fn(0.0)
+            with torch_threads(num_threads):
+                speech_timestamps = get_speech_timestamps(audio_mono, vad_model, sampling_rate=sampling_rate, **kwargs)
+            if progress_fn is not None:
+                progress_fn(1.0)
             print("[VAD-DEBUG] POST_CALL_GST", {"result_type": str(type(speech_timestamps)), "len": len(speech_timestamps)})
         except Exception as call_exc:
             print("[VAD-DEBUG] GST_CALL_ERROR", {"type": str(type(call_exc)), "err": str(call_exc)})
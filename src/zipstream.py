@@ -0,0 +1,216 @@
+"""
+Streaming ZIP writer for run exports.
+
+The archive is never built on disk or in memory: ZipPlan lays out every byte from file sizes
+alone and iter_bytes(start, end) reads each member from disk in fixed-size blocks as the
+client consumes the stream. Members are STORED (audio does not compress) with data
+descriptors, so CRCs are computed while the data streams, and zip64 records are used for
+members or offsets past 4 GiB. Because the layout depends only on names, sizes and mtimes,
+the total size is known up front and any byte range can be regenerated, which is what lets
+HTTP Range requests resume an interrupted download.
+"""
+import binascii
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+ZIP64_LIMIT = 0xFFFFFFFF
+READ_BLOCK_BYTES = 1024 * 1024
+_FLAGS = 0x08 | 0x800  # data descriptor follows each member; UTF-8 names
+_CRC_CACHE_MAX = 4096
+_crc_cache: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+_crc_cache_lock = threading.Lock()
+
+class ZipStreamError(Exception):
+    pass
+
+class ZipEntry:
+    """One archive member: a file on disk (path) or generated bytes (data)."""
+
+    def __init__(self, name: str, path: Optional[str] = None, data: Optional[bytes] = None, mtime: Optional[float] = None):
+        if (path is None) == (data is None):
+            raise ZipStreamError("ZipEntry needs exactly one of path or data.")
+        self.name = name
+        self.path = path
+        self.data = data
+        if path is not None:
+            st = os.stat(path)
+            self.size, self.mtime_ns = st.st_size, st.st_mtime_ns
+        else:
+            # Fixed timestamp: regenerated bytes must match earlier ones for resumed downloads
+            self.size, self.mtime_ns = len(data), int((mtime or 0) * 1e9)
+        self.offset = 0
+        self.zip64 = False
+
+    def cache_key(self) -> Tuple[str, int, int]:
+        return (os.path.abspath(self.path), self.size, self.mtime_ns)
+
+def _dos_datetime(mtime_ns: int) -> Tuple[int, int]:
+    t = time.localtime(mtime_ns / 1e9)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+def _cached_crc(key: Tuple[str, int, int]) -> Optional[int]:
+    with _crc_cache_lock:
+        crc = _crc_cache.get(key)
+        if crc is not None:
+            _crc_cache.move_to_end(key)
+        return crc
+
+def _remember_crc(key: Tuple[str, int, int], crc: int):
+    with _crc_cache_lock:
+        _crc_cache[key] = crc
+        _crc_cache.move_to_end(key)
+        while len(_crc_cache) > _CRC_CACHE_MAX:
+            _crc_cache.popitem(last=False)
+
+class ZipPlan:
+    """
+    Byte layout of a ZIP archive of `entries`. `size` is the archive length and `etag` a
+    strong validator that changes whenever any member's name, size or mtime (or generated
+    content) changes. Members of zip64_threshold bytes or more, or starting past it, get
+    zip64 fields.
+    """
+
+    def __init__(self, entries: List[ZipEntry], zip64_threshold: int = ZIP64_LIMIT, block_bytes: int = READ_BLOCK_BYTES):
+        self.entries = entries
+        self.block_bytes = block_bytes
+        self._crcs: List[Optional[int]] = [None] * len(entries)
+        self._central: Optional[bytes] = None
+        # (kind, start, length, payload): "bytes" -> header bytes, "data"/"descriptor" -> entry index
+        self._segments: List[Tuple[str, int, int, object]] = []
+        offset = 0
+        for i, entry in enumerate(entries):
+            entry.offset = offset
+            entry.zip64 = entry.size >= zip64_threshold or offset >= zip64_threshold
+            header = self._local_header(entry)
+            for kind, length, payload in (("bytes", len(header), header), ("data", entry.size, i),
+                                          ("descriptor", 24 if entry.zip64 else 16, i)):
+                self._segments.append((kind, offset, length, payload))
+                offset += length
+        self._cd_start = offset
+        self._cd_size = sum(46 + len(e.name.encode("utf-8")) + (28 if e.zip64 else 0) for e in entries)
+        self._zip64_end = (any(e.zip64 for e in entries) or len(entries) >= 0xFFFF
+                           or self._cd_start >= zip64_threshold or self._cd_size >= zip64_threshold)
+        end_size = (56 + 20 if self._zip64_end else 0) + 22
+        self._segments.append(("central", offset, self._cd_size + end_size, None))
+        self.size = offset + self._cd_size + end_size
+        digest = hashlib.sha1()
+        for entry in entries:
+            digest.update(f"{entry.name}|{entry.size}|".encode("utf-8"))
+            digest.update(str(entry.mtime_ns).encode())
+            if entry.data is not None:
+                digest.update(hashlib.sha1(entry.data).digest())
+        self.etag = f'"zip-{digest.hexdigest()[:32]}"'
+
+    def _local_header(self, entry: ZipEntry) -> bytes:
+        name = entry.name.encode("utf-8")
+        dostime, dosdate = _dos_datetime(entry.mtime_ns)
+        if entry.zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            return struct.pack("<4sHHHHHLLLHH", b"PK\x03\x04", 45, _FLAGS, 0, dostime, dosdate, 0,
+                               ZIP64_LIMIT, ZIP64_LIMIT, len(name), len(extra)) + name + extra
+        return struct.pack("<4sHHHHHLLLHH", b"PK\x03\x04", 20, _FLAGS, 0, dostime, dosdate, 0, 0, 0, len(name), 0) + name
+
+    def _descriptor(self, i: int) -> bytes:
+        entry = self.entries[i]
+        if entry.zip64:
+            return struct.pack("<4sLQQ", b"PK\x07\x08", self._crc(i), entry.size, entry.size)
+        return struct.pack("<4sLLL", b"PK\x07\x08", self._crc(i), entry.size, entry.size)
+
+    def _central_bytes(self) -> bytes:
+        if self._central is None:
+            parts = []
+            for i, entry in enumerate(self.entries):
+                name = entry.name.encode("utf-8")
+                dostime, dosdate = _dos_datetime(entry.mtime_ns)
+                version = 45 if entry.zip64 else 20
+                if entry.zip64:
+                    extra = struct.pack("<HHQQQ", 0x0001, 24, entry.size, entry.size, entry.offset)
+                    size, offset = ZIP64_LIMIT, ZIP64_LIMIT
+                else:
+                    extra, size, offset = b"", entry.size, entry.offset
+                parts.append(struct.pack(
+                    "<4sBBHHHHHLLLHHHHHLL", b"PK\x01\x02", version, 3, version, _FLAGS, 0, dostime, dosdate,
+                    self._crc(i), size, size, len(name), len(extra), 0, 0, 0, 0o100644 << 16, offset,
+                ) + name + extra)
+            count = len(self.entries)
+            if self._zip64_end:
+                eocd64_offset = self._cd_start + self._cd_size
+                parts.append(struct.pack("<4sQHHLLQQQQ", b"PK\x06\x06", 44, 45, 45, 0, 0, count, count, self._cd_size, self._cd_start))
+                parts.append(struct.pack("<4sLQL", b"PK\x06\x07", 0, eocd64_offset, 1))
+            parts.append(struct.pack("<4sHHHHLLH", b"PK\x05\x06", 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                                     min(self._cd_size, ZIP64_LIMIT), min(self._cd_start, ZIP64_LIMIT), 0))
+            self._central = b"".join(parts)
+        return self._central
+
+    def _crc(self, i: int) -> int:
+        if self._crcs[i] is None:
+            entry = self.entries[i]
+            if entry.data is not None:
+                self._crcs[i] = binascii.crc32(entry.data)
+            else:
+                # Not streamed in this request (resumed past it): read it once, or reuse an earlier CRC
+                crc = _cached_crc(entry.cache_key())
+                if crc is None:
+                    crc = 0
+                    for block in self._read(entry, 0, entry.size):
+                        crc = binascii.crc32(block, crc)
+                    _remember_crc(entry.cache_key(), crc)
+                self._crcs[i] = crc
+        return self._crcs[i]
+
+    def _read(self, entry: ZipEntry, lo: int, hi: int) -> Iterator[bytes]:
+        try:
+            with open(entry.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != entry.size:
+                    raise ZipStreamError(f"{entry.name} changed while being exported.")
+                f.seek(lo)
+                remaining = hi - lo
+                while remaining > 0:
+                    block = f.read(min(self.block_bytes, remaining))
+                    if not block:
+                        raise ZipStreamError(f"{entry.name} was truncated while being exported.")
+                    remaining -= len(block)
+                    yield block
+        except OSError as e:
+            raise ZipStreamError(f"Cannot read {entry.name}: {e}")
+
+    def _member_bytes(self, i: int, lo: int, hi: int) -> Iterator[bytes]:
+        entry = self.entries[i]
+        if entry.data is not None:
+            yield entry.data[lo:hi]
+            return
+        whole = lo == 0 and hi == entry.size and self._crcs[i] is None
+        crc = 0
+        for block in self._read(entry, lo, hi):
+            if whole:
+                crc = binascii.crc32(block, crc)
+            yield block
+        if whole:
+            self._crcs[i] = crc
+            _remember_crc(entry.cache_key(), crc)
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes [start, end) (end defaults to size), reading members block by block."""
+        end = self.size if end is None else min(end, self.size)
+        for kind, seg_start, length, payload in self._segments:
+            seg_end = seg_start + length
+            if seg_end <= start or length == 0:
+                continue
+            if seg_start >= end:
+                break
+            lo, hi = max(start, seg_start) - seg_start, min(end, seg_end) - seg_start
+            if kind == "bytes":
+                yield payload[lo:hi]
+            elif kind == "data":
+                yield from self._member_bytes(payload, lo, hi)
+            elif kind == "descriptor":
+                yield self._descriptor(payload)[lo:hi]
+            else:
+                yield self._central_bytes()[lo:hi]